@@ -266,6 +266,26 @@ def create_app():
     app.register_blueprint(main_bp)
     app.register_blueprint(mobile_bp, url_prefix="/mobile")
 
+    # Keep the dashboard's daily rollups current on every write
+    from .services.analytics_rollup import register_rollup_hooks
+    register_rollup_hooks()
+
+    # Bump per-table data versions so cached dashboard contexts invalidate
+    from .services.context_cache import register_version_hooks
+    register_version_hooks()
+
+    # Keep the autocomplete search index in step with its source rows
+    from .services.search_index import register_search_hooks
+    register_search_hooks()
+
+    # Apply committed changes to the in-memory omnibox index
+    from .services.omnibox import register_omnibox_hooks
+    register_omnibox_hooks()
+
+    # Record which tables each Clarity answer reads (response cache invalidation)
+    from .services.clarity_cache import register_clarity_cache_hooks
+    register_clarity_cache_hooks()
+
     # ------------------------------------------------------------
     # Mobile auto-redirect
     # ------------------------------------------------------------
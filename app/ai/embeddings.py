@@ -19,6 +19,12 @@ try:
 except Exception:
     llm = None
 
+# Optional import: vectorized batch scoring in similarity()
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 
 # -------------------------------------------------------------------
 # Feature gates
@@ -104,6 +110,10 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     return dot / (norm_a * norm_b)
 
 
+def _norm(vec: List[float]) -> float:
+    return math.sqrt(sum(x * x for x in vec))
+
+
 def batch(iterable, size: int):
     """
     Yield successive lists of length `size` from iterable.
@@ -234,13 +244,30 @@ def similarity(query_vec: List[float], records: Iterable[EmbeddingRecord]):
     if not query_vec:
         return []
 
-    scored = []
-    for r in records:
-        emb = getattr(r, "embedding", None)
-        if not emb:
-            continue
-        score = cosine_similarity(query_vec, emb)
-        scored.append((r, score))
-
+    records = [r for r in records if getattr(r, "embedding", None)]
+    dim = len(query_vec)
+    query_norm = _norm(query_vec)
+    if query_norm == 0.0:
+        return [(r, 0.0) for r in records]
+
+    # Mismatched dimensions score 0.0 (same as cosine_similarity).
+    comparable = [r for r in records if len(r.embedding) == dim]
+    scores = {}
+
+    if np is not None and comparable:
+        # One matrix-vector product; every norm computed once.
+        matrix = np.asarray([r.embedding for r in comparable], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        dots = matrix @ np.asarray(query_vec, dtype=np.float32)
+        values = np.divide(dots, norms * query_norm, out=np.zeros_like(dots), where=norms > 0)
+        for r, value in zip(comparable, values.tolist()):
+            scores[id(r)] = value
+    else:
+        for r in comparable:
+            norm = _norm(r.embedding)
+            dot = sum(x * y for x, y in zip(query_vec, r.embedding))
+            scores[id(r)] = dot / (norm * query_norm) if norm else 0.0
+
+    scored = [(r, scores.get(id(r), 0.0)) for r in records]
     scored.sort(key=lambda x: x[1], reverse=True)
     return scored
@@ -30,12 +30,19 @@ from __future__ import annotations
 # - Always include units (hours, miles, dollars).
 #
 
+import contextvars
+import logging
 import os
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Dict, Any, List
 import json
 import re
 
+logger = logging.getLogger(__name__)
+
 
 # ----------------------------
 # JSON helpers
@@ -80,6 +87,35 @@ class LLMResponse:
         self.latency_ms = latency_ms
         self.provider = provider
         self.backend = provider
+        # Time to first token when the response was streamed (None otherwise).
+        self.ttft_ms: Optional[int] = None
+
+
+# ----------------------------
+# Token streaming
+# ----------------------------
+
+# Receives each text chunk of streamed completions made while it is set.
+_token_sink: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "llm_token_sink", default=None
+)
+
+
+@contextmanager
+def stream_tokens(sink: Callable[[str], None]):
+    """
+    Stream every plain-text completion made inside this block to `sink`.
+
+    Callers deeper in the stack (ai_service, chat_engine) keep calling
+    call_llm()/call_llm_with_meta() unchanged and still get the full text
+    back; the router switches to the backend's streaming API and hands each
+    chunk to `sink` as it arrives. JSON-mode calls are never streamed.
+    """
+    token = _token_sink.set(sink)
+    try:
+        yield
+    finally:
+        _token_sink.reset(token)
 
 
 # ----------------------------
@@ -105,6 +141,16 @@ class BaseLLM:
     ) -> LLMResponse:
         raise NotImplementedError
 
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Yield the completion in chunks (default: one chunk, the whole call)."""
+        yield self.call(messages, temperature=temperature, max_tokens=max_tokens).text
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         raise NotImplementedError
 
@@ -151,6 +197,17 @@ class MockLocalLLM(BaseLLM):
             provider="mock",
         )
 
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        text = self.call(messages).text
+        for word in re.findall(r"\S+\s*|\s+", text):
+            yield word
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         return [[0.0] * 8 for _ in texts]
 
@@ -159,6 +216,212 @@ class MockLocalLLM(BaseLLM):
 # Local (Ollama / llama.cpp)
 # ----------------------------
 
+# ----------------------------
+# Local backend HTTP pool
+# ----------------------------
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))], 1)
+
+
+class BackendBusy(RuntimeError):
+    """No concurrency slot freed up in time; the backend is busy, not down."""
+
+
+def _backend_errors() -> tuple:
+    """
+    Exceptions that mean the local backend can't serve a call (the router
+    fails over to the mock). An ImportError is raised by LocalHTTPPool when
+    `requests` isn't installed: the backend is unavailable, not a bug.
+    """
+    try:
+        import requests
+    except ImportError:
+        return (ImportError, BackendBusy)
+    return (requests.RequestException, ImportError, BackendBusy)
+
+
+class LocalHTTPPool:
+    """
+    Keep-alive HTTP for the local backend: one pooled requests.Session per
+    process plus a gate on how many generations run at once.
+
+      LOCAL_LLM_MAX_CONCURRENCY (default 4)        gated requests in flight; the rest queue
+                                                   first come, first served
+      LOCAL_LLM_MAX_CONNECTIONS (default           connections kept alive to the host
+        concurrency + 2, room for probes)
+      LOCAL_LLM_QUEUE_TIMEOUT_SECONDS (default 30) longest wait in the queue before the
+                                                   request raises BackendBusy (the router
+                                                   fails over without tripping the breaker)
+
+    Generations and embeddings are gated; health probes are not, so a busy
+    model never looks like a dead one. Per-operation latency, queue waits and
+    the number of TCP connections opened are kept for stats().
+
+    The session and gate are rebuilt after a fork (new pid).
+    """
+
+    def __init__(self, base_url: str, *, name: str = "local"):
+        self.base_url = base_url
+        self.name = name
+        self.max_concurrency = max(1, int(_env_float("LOCAL_LLM_MAX_CONCURRENCY", 4)))
+        self.max_connections = max(1, int(_env_float("LOCAL_LLM_MAX_CONNECTIONS", self.max_concurrency + 2)))
+        self.queue_timeout = max(0.0, _env_float("LOCAL_LLM_QUEUE_TIMEOUT_SECONDS", 30.0))
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+        self.in_flight = 0
+        self._waiters: deque = deque()  # FIFO of threading.Event, one per queued request
+        self.counts = {"requests": 0, "errors": 0, "queue_timeouts": 0}
+        self._wait_ms = deque(maxlen=200)
+        self._op_ms: Dict[str, Any] = {}
+
+    def _ensure(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+            self.in_flight = 0
+            self._waiters = deque()
+            self._pid = pid
+
+    def _acquire(self, wait: float) -> bool:
+        # First come, first served: a released slot is handed to the oldest
+        # waiter, so a busy caller can't re-take it ahead of the queue.
+        with self._lock:
+            if self.in_flight < self.max_concurrency and not self._waiters:
+                self.in_flight += 1
+                return True
+            if wait <= 0:
+                return False
+            ticket = threading.Event()
+            self._waiters.append(ticket)
+        if ticket.wait(wait):
+            return True
+        with self._lock:
+            if ticket.is_set():  # handed over while timing out
+                return True
+            self._waiters.remove(ticket)
+            return False
+
+    def _release(self, pid: int) -> None:
+        with self._lock:
+            if pid != self._pid:  # slot taken before a fork
+                return
+            if self._waiters:
+                self._waiters.popleft().set()  # in_flight unchanged: the slot moves
+            else:
+                self.in_flight -= 1
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """Hold one of the concurrency slots, queueing up to `timeout` (default: queue_timeout)."""
+        self._ensure()
+        pid = self._pid
+        wait = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        acquired = self._acquire(wait)
+        with self._lock:
+            self._wait_ms.append((time.monotonic() - started) * 1000.0)
+            if not acquired:
+                self.counts["queue_timeouts"] += 1
+        if not acquired:
+            raise BackendBusy(
+                f"{self.name} LLM busy: no free slot of {self.max_concurrency} after {wait:.1f}s"
+            )
+        try:
+            yield
+        finally:
+            self._release(pid)
+
+    @contextmanager
+    def timed(self, op: str):
+        """Record the latency (and failure) of one request under `op`."""
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000.0
+            with self._lock:
+                self.counts["requests"] += 1
+                if not ok:
+                    self.counts["errors"] += 1
+                if op not in self._op_ms:
+                    self._op_ms[op] = deque(maxlen=200)
+                self._op_ms[op].append(elapsed_ms)
+
+    def request(self, method: str, path: str, *, op: str, gated: bool = True, **kwargs):
+        """Send one request on the pooled session (through the gate unless gated=False)."""
+        self._ensure()
+        if not gated:
+            with self.timed(op):
+                return self._session.request(method, f"{self.base_url}{path}", **kwargs)
+        with self.slot(), self.timed(op):
+            return self._session.request(method, f"{self.base_url}{path}", **kwargs)
+
+    def session(self):
+        self._ensure()
+        return self._session
+
+    def connections_opened(self) -> int:
+        """TCP connections opened by this process's session so far."""
+        if self._session is None:
+            return 0
+        total = 0
+        for adapter in set(self._session.adapters.values()):
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    total += getattr(pool, "num_connections", 0)
+        return total
+
+    def stats(self) -> dict:
+        """Pool limits, queue depth, counters and per-operation latency percentiles (ms)."""
+        with self._lock:
+            wait_ms = list(self._wait_ms)
+            ops = {
+                op: {"n": len(v), "p50_ms": _percentile(list(v), 50), "p95_ms": _percentile(list(v), 95)}
+                for op, v in self._op_ms.items()
+            }
+            out = {
+                "max_connections": self.max_connections,
+                "max_concurrency": self.max_concurrency,
+                "queue_timeout_s": self.queue_timeout,
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                **self.counts,
+                "queue_wait_ms_p50": _percentile(wait_ms, 50),
+                "queue_wait_ms_p95": _percentile(wait_ms, 95),
+                "ops": ops,
+            }
+        out["connections_opened"] = self.connections_opened()
+        return out
+
+
 class LocalLLM(BaseLLM):
     name = "local"
 
@@ -166,11 +429,11 @@ class LocalLLM(BaseLLM):
         self.model = os.getenv("LOCAL_LLM_MODEL", "llama3.1")
         self.base_url = os.getenv("LOCAL_LLM_URL", "http://localhost:11434")
         self.timeout = int(os.getenv("LOCAL_LLM_TIMEOUT", "120"))
+        self.pool = LocalHTTPPool(self.base_url, name=self.name)
 
     def available(self) -> bool:
         try:
-            import requests
-            r = requests.get(f"{self.base_url}/api/tags", timeout=0.5)
+            r = self.pool.request("GET", "/api/tags", op="probe", gated=False, timeout=0.5)
             return r.ok
         except Exception:
             return False
@@ -181,17 +444,18 @@ class LocalLLM(BaseLLM):
         Safe to call multiple times.
         """
         try:
-            import requests
             payload = {
                 "model": self.model,
                 "prompt": "ping",
                 "stream": False,
             }
-            requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=2,
-            )
+            # Skip it rather than queue when generations are already running (the model is warm).
+            with self.pool.slot(timeout=0), self.pool.timed("warmup"):
+                self.pool.session().post(
+                    f"{self.base_url}/api/generate",
+                    json=payload,
+                    timeout=2,
+                )
         except Exception:
             pass
 
@@ -206,30 +470,17 @@ class LocalLLM(BaseLLM):
         max_tokens: Optional[int] = None,
         expect_json: bool = False,
     ) -> LLMResponse:
-        import requests
-
-        parts: list[str] = []
-        for m in messages:
-            content = m.get("content")
-            if not content:
-                continue
-            role = m.get("role")
-            if role and role != "user":
-                parts.append(f"[{role.upper()}]\n{content}")
-            else:
-                parts.append(content)
-
-        prompt = "\n\n".join(parts)
-
         start = time.time()
         payload = {
             "model": self.model,
-            "prompt": prompt,
+            "prompt": self._prompt(messages),
             "stream": False,
         }
 
-        r = requests.post(
-            f"{self.base_url}/api/generate",
+        r = self.pool.request(
+            "POST",
+            "/api/generate",
+            op="generate",
             json=payload,
             timeout=self.timeout,
         )
@@ -250,15 +501,62 @@ class LocalLLM(BaseLLM):
             provider="local",
         )
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        import requests
+    @staticmethod
+    def _prompt(messages: List[Dict[str, str]]) -> str:
+        parts: list[str] = []
+        for m in messages:
+            content = m.get("content")
+            if not content:
+                continue
+            role = m.get("role")
+            if role and role != "user":
+                parts.append(f"[{role.upper()}]\n{content}")
+            else:
+                parts.append(content)
+        return "\n\n".join(parts)
+
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Yield response chunks from Ollama's streaming /api/generate (NDJSON lines)."""
+        payload = {
+            "model": self.model,
+            "prompt": self._prompt(messages),
+            "stream": True,
+        }
+        # The slot is held until the stream is fully read (or the consumer stops).
+        with self.pool.slot(), self.pool.timed("stream"), self.pool.session().post(
+            f"{self.base_url}/api/generate",
+            json=payload,
+            timeout=self.timeout,
+            stream=True,
+        ) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Local LLM stream error: {data['error']}")
+                chunk = data.get("response") or ""
+                if chunk:
+                    yield chunk
+                if data.get("done"):
+                    break
 
+    def embed(self, texts: List[str]) -> List[List[float]]:
         payload = {
             "model": self.model,
             "input": texts,
         }
-        r = requests.post(
-            f"{self.base_url}/api/embeddings",
+        r = self.pool.request(
+            "POST",
+            "/api/embeddings",
+            op="embed",
             json=payload,
             timeout=self.timeout,
         )
@@ -267,6 +565,199 @@ class LocalLLM(BaseLLM):
         return [d["embedding"] for d in data.get("data", [])]
 
 
+# ----------------------------
+# Backend health (background probe + circuit breaker)
+# ----------------------------
+
+class BackendHealthMonitor:
+    """
+    Tracks whether a backend is usable without ever probing on the request path.
+
+    A daemon thread calls `probe()` (e.g. LocalLLM.available) every
+    LLM_HEALTH_INTERVAL_SECONDS (default 15) and feeds a circuit breaker:
+
+      closed    -> healthy; requests go to the backend
+      open      -> LLM_BREAKER_FAILURES (default 2) consecutive probe/call
+                   failures; requests fail over to the mock immediately
+      half_open -> LLM_BREAKER_COOLDOWN_SECONDS (default 30) after opening,
+                   the thread runs one trial probe: success closes the
+                   breaker, failure re-opens it. No probe runs while the
+                   breaker is open and the cooldown has not elapsed.
+                   Requests fail over to the mock until the trial answers.
+
+The breaker starts half-open: until the first probe answers, nothing is known
+about the backend, so requests go to the mock rather than each waiting out
+the HTTP timeout against a backend that may be missing or unreachable.
+
+    Real calls report their outcome too (record_success/record_failure), so a
+    backend that dies between probes opens the breaker on the next calls.
+    `on_recover` (e.g. LocalLLM.warmup) runs on the thread whenever the
+    breaker closes from another state, including the first healthy probe.
+
+    The thread starts on first use and restarts after a fork (new pid).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, probe, *, on_recover=None, name: str = "local"):
+        self.name = name
+        self._probe = probe
+        self._on_recover = on_recover
+        self.interval = max(1.0, _env_float("LLM_HEALTH_INTERVAL_SECONDS", 15.0))
+        self.cooldown = max(1.0, _env_float("LLM_BREAKER_COOLDOWN_SECONDS", 30.0))
+        self.failure_threshold = max(1, int(_env_float("LLM_BREAKER_FAILURES", 2)))
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+        # Unknown until the first probe answers (moments after first use).
+        self.state = self.HALF_OPEN
+        self.opened_at: Optional[float] = None
+        self._warmed = False
+        self.consecutive_failures = 0
+        self.last_probe_at: Optional[float] = None
+        self.last_ok_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.counts = {"probes": 0, "probe_failures": 0, "calls": 0, "call_failures": 0, "opened": 0, "failovers": 0}
+        self._probe_ms = deque(maxlen=50)
+        self._call_ms = deque(maxlen=200)
+
+    # -- thread ----------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name=f"llm-health-{self.name}", daemon=True)
+            self._thread.start()
+
+    def start(self) -> None:
+        """Start the monitor thread now (otherwise it starts on the first allow())."""
+        self._ensure_thread()
+
+    def _cooldown_left(self) -> float:
+        # Caller holds self._lock.
+        return max(0.0, self.cooldown - (time.monotonic() - (self.opened_at or 0.0)))
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                due = True
+                if self.state == self.OPEN:
+                    # Only the half-open trial may close an open breaker.
+                    due = self._cooldown_left() <= 0.0
+                    if due:
+                        self.state = self.HALF_OPEN
+            if due:
+                self.probe_now()
+            with self._lock:
+                wait = self._cooldown_left() if self.state == self.OPEN else self.interval
+            # record_failure sets _wake when the breaker opens, so the next
+            # wait is re-timed to the cooldown instead of the probe interval.
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def probe_now(self) -> bool:
+        """Run one probe on the calling thread and record it (used by the monitor thread)."""
+        started = time.monotonic()
+        try:
+            ok = bool(self._probe())
+            error = None if ok else "probe returned unavailable"
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        elapsed_ms = (time.monotonic() - started) * 1000.0
+        with self._lock:
+            self.counts["probes"] += 1
+            self.last_probe_at = time.time()
+            self._probe_ms.append(elapsed_ms)
+            if not ok:
+                self.counts["probe_failures"] += 1
+            # Calls failed while this probe was in flight: its success is stale.
+            stale = self.state == self.OPEN and (self.opened_at or 0.0) >= started
+        if ok:
+            if not stale:
+                self.record_success()
+        else:
+            self.record_failure(error)
+        return ok
+
+    # -- request path (never blocks on I/O) ----------------------------------
+
+    def allow(self) -> bool:
+        """True while the breaker is closed (requests may use the backend)."""
+        self._ensure_thread()
+        return self.state == self.CLOSED
+
+    def record_success(self, latency_ms: Optional[float] = None) -> None:
+        """Record a healthy probe (latency_ms=None) or a successful call."""
+        with self._lock:
+            if latency_ms is not None:
+                self.counts["calls"] += 1
+                self._call_ms.append(float(latency_ms))
+            recovered = latency_ms is None and (self.state != self.CLOSED or not self._warmed)
+            self.consecutive_failures = 0
+            self.last_ok_at = time.time()
+            self.last_error = None
+            self.state = self.CLOSED
+            self.opened_at = None
+            if recovered:
+                self._warmed = True
+        if recovered and self._on_recover is not None:
+            try:
+                self._on_recover()
+            except Exception:
+                pass
+
+    def record_failure(self, error: Optional[str], *, call: bool = False) -> None:
+        with self._lock:
+            if call:
+                self.counts["calls"] += 1
+                self.counts["call_failures"] += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            opened = self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            )
+            if opened:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.counts["opened"] += 1
+        if opened:
+            self._wake.set()
+
+    def record_failover(self) -> None:
+        with self._lock:
+            self.counts["failovers"] += 1
+
+    def stats(self) -> dict:
+        """Breaker state, counters and probe/call latency percentiles (ms)."""
+        with self._lock:
+            probe_ms, call_ms = list(self._probe_ms), list(self._call_ms)
+            return {
+                "backend": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "last_probe_at": self.last_probe_at,
+                "last_ok_at": self.last_ok_at,
+                "last_error": self.last_error,
+                **self.counts,
+                "probe_ms_p50": _percentile(probe_ms, 50),
+                "probe_ms_p95": _percentile(probe_ms, 95),
+                "call_ms_p50": _percentile(call_ms, 50),
+                "call_ms_p95": _percentile(call_ms, 95),
+                "interval_s": self.interval,
+                "cooldown_s": self.cooldown,
+            }
+
+
 # ----------------------------
 # Router + public API
 # ----------------------------
@@ -284,9 +775,9 @@ class LLMRouter:
         self.local = LocalLLM()
         self.mock = MockLocalLLM()
 
-        # Best-effort warmup to reduce first-call latency
-        if self.local.available():
-            self.local.warmup()
+        # Probes the local backend in the background (and warms it up when it
+        # becomes reachable), so selecting a backend never waits on the network.
+        self.health = BackendHealthMonitor(self.local.available, on_recover=self.local.warmup, name="local")
 
     def _numeric_guard(self, messages):
         """
@@ -321,16 +812,18 @@ class LLMRouter:
         Return availability and configuration of LLM backends.
         Safe to expose for diagnostics.
         """
-        active = "local" if self.local.available() else "mock"
+        active = "local" if self.health.allow() else "mock"
         return {
             "backend": active,
             "model": getattr(self.local, "model", None) if active == "local" else "mock-llm",
             "available": True,
             "external_inference": False,
+            "health": self.health.stats(),
+            "http": self.local.pool.stats(),
         }
 
     def _select_backend(self) -> BaseLLM:
-        if self.local.available():
+        if self.health.allow():
             return self.local
         return self.mock
 
@@ -342,13 +835,88 @@ class LLMRouter:
         max_tokens: Optional[int] = None,
         expect_json: bool = False,
     ) -> LLMResponse:
+        sink = _token_sink.get()
+        if sink is not None and not expect_json:
+            return self._stream_with_fallback(messages, sink, temperature=temperature, max_tokens=max_tokens)
+
         backend = self._select_backend()
-        return backend.call(
-            messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            expect_json=expect_json,
+        if backend is not self.local:
+            return backend.call(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                expect_json=expect_json,
+            )
+
+        started = time.monotonic()
+        try:
+            resp = backend.call(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                expect_json=expect_json,
+            )
+        except _backend_errors() as e:
+            # Backend unreachable / erroring / saturated: count it and answer from the mock now.
+            if not isinstance(e, BackendBusy):
+                self.health.record_failure(f"{type(e).__name__}: {e}", call=True)
+            self.health.record_failover()
+            return self.mock.call(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                expect_json=expect_json,
+            )
+        self.health.record_success((time.monotonic() - started) * 1000.0)
+        return resp
+
+    def _stream_with_fallback(
+        self,
+        messages: List[Dict[str, str]],
+        sink: Callable[[str], None],
+        *,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> LLMResponse:
+        """Stream the completion into `sink`; return it whole, with time-to-first-token."""
+        backend_errors = _backend_errors()
+        backend = self._select_backend()
+        started = time.monotonic()
+        chunks: List[str] = []
+        ttft_ms: Optional[int] = None
+        while True:
+            try:
+                for chunk in backend.stream(messages, temperature=temperature, max_tokens=max_tokens):
+                    if ttft_ms is None:
+                        ttft_ms = int((time.monotonic() - started) * 1000)
+                    chunks.append(chunk)
+                    sink(chunk)
+                break
+            except backend_errors as e:
+                if backend is not self.local:
+                    raise
+                if not isinstance(e, BackendBusy):
+                    self.health.record_failure(f"{type(e).__name__}: {e}", call=True)
+                if chunks:
+                    raise  # part of the answer is already on screen
+                self.health.record_failover()
+                backend = self.mock
+
+        latency_ms = int((time.monotonic() - started) * 1000)
+        if backend is self.local:
+            self.health.record_success(latency_ms)
+        logger.info(
+            "[llm] streamed %s completion: ttft=%sms total=%sms chunks=%d",
+            backend.name, ttft_ms, latency_ms, len(chunks),
         )
+        resp = LLMResponse(
+            text="".join(chunks).strip(),
+            model=self.local.model if backend is self.local else "mock-llm",
+            latency_ms=latency_ms,
+            provider=backend.name,
+        )
+        resp.ttft_ms = ttft_ms
+        return resp
 
     def call_text(
         self,
@@ -395,14 +963,45 @@ class LLMRouter:
             ) from e
 
     def embed(self, texts: List[str]) -> List[List[float]]:
-        if not self.local.available():
+        if not self.health.allow():
             raise RuntimeError("Local embedding backend unavailable")
         return self.local.embed(texts)
 
 
 
-# Shared singleton
-llm = LLMRouter()
+# Shared singleton, built on first use: importing this module does no I/O and
+# starts no threads, so CLI scripts and app start-up never touch the backend.
+_llm: Optional[LLMRouter] = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> LLMRouter:
+    """Return the shared router, constructing it on first call."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = LLMRouter()
+    return _llm
+
+
+def __getattr__(name: str):
+    # Keeps `from app.ai.llm import llm` working without an import-time router.
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def start_llm_warmup() -> None:
+    """
+    Start the local backend's health monitor now instead of on the first
+    request. Returns immediately: the probe (and the warmup generate once the
+    backend answers) run on the monitor thread.
+
+    Called by the server entry points after create_app(); scripts don't, so
+    they never probe the backend unless they actually call the LLM.
+    """
+    get_llm().health.start()
 
 
 # ----------------------------
@@ -413,7 +1012,8 @@ def get_active_llm_info() -> dict:
     Return metadata about the currently selected LLM backend.
     Safe for diagnostics, UI display, and provenance tracking.
     """
-    active = "local" if llm.local.available() else "mock"
+    llm = get_llm()
+    active = "local" if llm.health.allow() else "mock"
     return {
         "backend": active,
         "provider": active,
@@ -422,6 +1022,16 @@ def get_active_llm_info() -> dict:
     }
 
 
+def get_llm_health() -> dict:
+    """
+    Circuit-breaker state plus probe/call latency stats of the local backend,
+    with its HTTP pool stats under "http".
+    Never blocks (reads the background monitor's last results).
+    """
+    llm = get_llm()
+    return {**llm.health.stats(), "http": llm.local.pool.stats()}
+
+
 def call_llm(
     messages,
     *,
@@ -436,6 +1046,7 @@ def call_llm(
       - dict when expect_json=True
       - str when expect_json=False
     """
+    llm = get_llm()
     if expect_json:
         return llm.call_json(
             messages,
@@ -470,8 +1081,10 @@ def call_llm_with_meta(
         "model_source": "local" | "openai",
         "model": str,
         "latency_ms": int | None,
+        "ttft_ms": int | None,  # when streamed (see stream_tokens)
       }
     """
+    llm = get_llm()
     if expect_json:
         resp = llm._call_with_fallback(
             llm._numeric_guard(messages),
@@ -500,6 +1113,7 @@ def call_llm_with_meta(
         "model_source": resp.provider,
         "model": resp.model,
         "latency_ms": resp.latency_ms,
+        "ttft_ms": resp.ttft_ms,
     }
 
 
@@ -510,7 +1124,13 @@ __all__ = [
     "MockLocalLLM",
     "LocalLLM",
     "LLMRouter",
-    "llm",
+    "get_llm",
+    "start_llm_warmup",
+    "BackendHealthMonitor",
+    "BackendBusy",
+    "LocalHTTPPool",
+    "get_llm_health",
+    "stream_tokens",
     "call_llm",
     "call_llm_with_meta",
 ]
\ No newline at end of file
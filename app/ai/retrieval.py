@@ -16,15 +16,13 @@ reasoning, cross-claim analysis, and future agent behaviors.
 
 from dataclasses import dataclass
 from typing import List, Optional, Any
+import json
+import os
 import re
 
 from sqlalchemy import func
 from app import db
 
-# DEBUG: retrieval module loaded
-print("[retrieval] module loaded")
-
-
 from app.models import BillableItem, Claim, Contact, Carrier, Employer, Provider, Invoice
 
 # Reports may vary across branches; import best-effort.
@@ -34,26 +32,161 @@ except Exception:  # pragma: no cover
     Report = None
 
 # =========================
-# FULL DATABASE SNAPSHOT RETRIEVAL
+# Bounded, columnar system snapshot
 # =========================
+# The system snapshot rides along with every retrieve() result, so it must stay
+# small no matter how large the database grows:
+# - each domain is one GROUP BY summary (exact counts/totals) computed in SQL;
+# - rows are projected columns only (no ORM instances / __dict__ state),
+#   newest first, fetched with LIMIT and only when the question asks for them;
+# - all row lists together stay under SNAPSHOT_MAX_CHARS of JSON (~4 chars/token).
+SNAPSHOT_MAX_ROWS = 25
+SNAPSHOT_MAX_CHARS = 12000
+
+# Words that mean "show me the records", not just "how many / how much".
+_SNAPSHOT_ROW_TERMS = {
+    "list", "show", "which", "who", "whose", "recent", "latest", "newest",
+    "oldest", "each", "every", "details", "detail", "names", "name", "rows",
+}
+
+
+def _snapshot_domains() -> dict:
+    """Projected columns and newest-first ordering for each snapshot domain."""
+    domains = {
+        "claims": (
+            (Claim.id, Claim.claimant_name, Claim.claim_number, Claim.status, Claim.opened_at,
+             Claim.closed_at, Claim.next_report_due, Claim.carrier_id),
+            Claim.id.desc(),
+        ),
+        "invoices": (
+            (Invoice.id, Invoice.claim_id, Invoice.invoice_number, Invoice.status, Invoice.invoice_date,
+             Invoice.total_amount),
+            Invoice.id.desc(),
+        ),
+        "billables": (
+            (BillableItem.id, BillableItem.claim_id, BillableItem.invoice_id, BillableItem.date_of_service,
+             BillableItem.activity_code, BillableItem.quantity, BillableItem.is_complete),
+            BillableItem.id.desc(),
+        ),
+    }
+    if Report is not None:
+        domains["reports"] = (
+            (Report.id, Report.claim_id, Report.report_type, Report.dos_start, Report.dos_end,
+             Report.created_at),
+            Report.id.desc(),
+        )
+    return domains
+
+
+def _snapshot_summary(domain: str) -> dict:
+    """Exact whole-table aggregates for one domain (a single grouped query)."""
+    if domain == "claims":
+        rows = db.session.query(Claim.status, func.count(Claim.id)).group_by(Claim.status).all()
+        by_status: dict = {}
+        for st, n in rows:
+            key = str(st or "unknown")
+            by_status[key] = by_status.get(key, 0) + int(n)
+        return {"count": sum(by_status.values()), "by_status": by_status}
+
+    if domain == "invoices":
+        rows = (
+            db.session.query(Invoice.status, func.count(Invoice.id), func.coalesce(func.sum(Invoice.total_amount), 0.0))
+            .group_by(Invoice.status)
+            .all()
+        )
+        by_status: dict = {}
+        for st, n, t in rows:
+            v = by_status.setdefault(str(st or "Draft"), {"count": 0, "total_amount": 0.0})
+            v["count"] += int(n)
+            v["total_amount"] = round(v["total_amount"] + float(t or 0.0), 2)
+        outstanding = [v for k, v in by_status.items() if k not in ("Paid", "Void")]
+        return {
+            "count": sum(v["count"] for v in by_status.values()),
+            "by_status": by_status,
+            "outstanding_count": sum(v["count"] for v in outstanding),
+            "outstanding_amount": round(sum(v["total_amount"] for v in outstanding), 2),
+        }
+
+    if domain == "billables":
+        rows = (
+            db.session.query(
+                BillableItem.activity_code,
+                func.count(BillableItem.id),
+                func.coalesce(func.sum(BillableItem.quantity), 0.0),
+                func.count(BillableItem.id).filter(BillableItem.invoice_id.is_(None)),
+            )
+            .group_by(BillableItem.activity_code)
+            .all()
+        )
+        by_code: dict = {}
+        for code, n, q, _ in rows:
+            v = by_code.setdefault(str(code or "UNKNOWN"), {"count": 0, "quantity": 0.0})
+            v["count"] += int(n)
+            v["quantity"] = round(v["quantity"] + float(q or 0.0), 2)
+        return {
+            "count": sum(v["count"] for v in by_code.values()),
+            "uninvoiced_count": sum(int(u or 0) for *_, u in rows),
+            "by_activity_code": by_code,
+        }
+
+    if domain == "reports" and Report is not None:
+        rows = db.session.query(Report.report_type, func.count(Report.id)).group_by(Report.report_type).all()
+        by_type: dict = {}
+        for t, n in rows:
+            key = str(t or "unknown")
+            by_type[key] = by_type.get(key, 0) + int(n)
+        return {"count": sum(by_type.values()), "by_type": by_type}
+
+    return {}
+
+
+def _snapshot_rows(columns: tuple, order_by: Any, limit: int) -> list[dict]:
+    rows = db.session.query(*columns).order_by(order_by).limit(limit).all()
+    return [dict(r._mapping) for r in rows]
+
+
+def _build_system_snapshot(
+    domains: list[str],
+    *,
+    include_rows: bool,
+    max_rows: int = SNAPSHOT_MAX_ROWS,
+    max_chars: int = SNAPSHOT_MAX_CHARS,
+) -> dict:
+    """
+    Summaries for `domains`, plus newest-first projected rows when `include_rows`.
+    Row lists share the `max_chars` JSON budget evenly; anything cut is counted
+    in `rows_omitted` so the model knows the list is partial.
+    """
+    spec = _snapshot_domains()
+    domains = [d for d in domains if d in spec]
+    per_domain_chars = max_chars // max(1, len(domains))
+
+    snapshot: dict = {}
+    for domain in domains:
+        summary = _snapshot_summary(domain)
+        entry: dict = {"summary": summary}
+        if include_rows:
+            columns, order_by = spec[domain]
+            rows = _snapshot_rows(columns, order_by, max_rows)
+            kept, used = [], 0
+            for row in rows:
+                used += len(json.dumps(row, default=str))
+                if used > per_domain_chars:
+                    break
+                kept.append(row)
+            entry["rows"] = kept
+            entry["rows_omitted"] = max(0, int(summary.get("count", len(rows))) - len(kept))
+        snapshot[domain] = entry
+    return snapshot
+
+
 def _retrieve_full_database_snapshot() -> dict:
     """
     FULL SYSTEM SNAPSHOT.
-    Returns raw, structured data for *all* major tables.
+    Summaries and bounded recent rows for every major domain.
     Intended for system-level reasoning and analysis.
     """
-    return {
-        "claims": [c.__dict__ for c in Claim.query.all()],
-        "invoices": [i.__dict__ for i in Invoice.query.all()],
-        "billables": [b.__dict__ for b in BillableItem.query.all()],
-        "carriers": [c.__dict__ for c in Carrier.query.all()],
-        "employers": [e.__dict__ for e in Employer.query.all()],
-        "providers": [p.__dict__ for p in Provider.query.all()],
-        "reports": (
-            [r.__dict__ for r in Report.query.all()]
-            if Report is not None else []
-        ),
-    }
+    return _build_system_snapshot(list(_snapshot_domains()), include_rows=True)
 
 # =========================
 # Domain-shaped system snapshot (context shaping)
@@ -62,6 +195,7 @@ def _select_system_snapshot(query: str | None) -> dict:
     """
     Return a domain-shaped system snapshot based on the query.
     This intentionally suppresses unrelated domains to avoid LLM dominance.
+    Rows are only expanded when the question asks for records (list/show/which...).
     """
     if not query:
         return {}
@@ -73,28 +207,19 @@ def _select_system_snapshot(query: str | None) -> dict:
     claim_terms = {"claim", "claims", "claimant", "injury", "doi", "dos"}
 
     tokens = set(re.findall(r"[a-zA-Z0-9]+", q))
-
-    snapshot = {}
+    include_rows = bool(tokens & _SNAPSHOT_ROW_TERMS)
 
     if tokens & billing_terms:
-        snapshot["invoices"] = [i.__dict__ for i in Invoice.query.all()]
-        snapshot["billables"] = [b.__dict__ for b in BillableItem.query.all()]
-        return snapshot
-
-    if tokens & workload_terms:
-        snapshot["reports"] = [r.__dict__ for r in Report.query.all()] if Report is not None else []
-        snapshot["billables"] = [b.__dict__ for b in BillableItem.query.all()]
-        snapshot["claims"] = [c.__dict__ for c in Claim.query.all()]
-        return snapshot
-
-    if tokens & claim_terms:
-        snapshot["claims"] = [c.__dict__ for c in Claim.query.all()]
-        snapshot["reports"] = [r.__dict__ for r in Report.query.all()] if Report is not None else []
-        return snapshot
-
-    # Fallback: minimal system context
-    snapshot["claims"] = [c.__dict__ for c in Claim.query.all()]
-    return snapshot
+        domains = ["invoices", "billables"]
+    elif tokens & workload_terms:
+        domains = ["reports", "billables", "claims"]
+    elif tokens & claim_terms:
+        domains = ["claims", "reports"]
+    else:
+        # Fallback: minimal system context
+        domains = ["claims"]
+
+    return _build_system_snapshot(domains, include_rows=include_rows)
 
 # =========================
 # Helpers for identity and contacts
@@ -1280,6 +1405,14 @@ def _system_claims_list_chunk(limit: int = 200) -> RetrievedChunk:
 
     claims = q.limit(limit).all()
 
+    # Last activity / dormancy for every listed claim in one aggregated query.
+    try:
+        from app.services.claim_activity_service import get_claim_dormancy
+
+        dormancy = get_claim_dormancy([c.id for c in claims])
+    except Exception:
+        dormancy = {}
+
     def _safe(obj, *names):
         for n in names:
             if hasattr(obj, n):
@@ -1303,8 +1436,13 @@ def _system_claims_list_chunk(limit: int = 200) -> RetrievedChunk:
         if employer is not None:
             employer_name = _safe(employer, "name", "employer_name")
 
+        activity = dormancy.get(c.id) or {}
+        last_activity = activity.get("last_activity") or ""
+        activity_state = "Dormant" if activity.get("is_dormant") else "Active"
+
         lines.append(
             f"ClaimID: {c.id} | ClaimNumber: {claim_number} | Status: {status} | Carrier: {carrier_name} | Employer: {employer_name}"
+            f" | LastActivity: {last_activity} | Activity: {activity_state}"
         )
 
     if len(claims) >= limit:
@@ -1404,6 +1542,66 @@ def _claim_invoice_summary_chunk(claim_id: int) -> RetrievedChunk:
     )
 
 
+# =========================
+# Baseline system facts (memoized)
+# =========================
+# Tables the nine baseline fact chunks read; a write to any of them bumps its
+# data version (app.services.context_cache) and invalidates the shared copy.
+_SYSTEM_FACT_TABLES = ("claim", "invoice", "carrier", "employer", "provider")
+_SYSTEM_FACTS_TTL_DEFAULT = 60
+
+
+def _build_system_fact_chunks() -> List[RetrievedChunk]:
+    return [
+        _system_claim_count_chunk(),
+        _system_open_claim_count_chunk(),
+        _system_closed_claim_count_chunk(),
+        _system_invoice_count_chunk(),
+        _system_billing_summary_chunk(),
+        _system_outstanding_billing_chunk(),
+        _system_carrier_count_chunk(),
+        _system_employer_count_chunk(),
+        _system_provider_count_chunk(),
+    ]
+
+
+def _system_facts_ttl() -> int:
+    from flask import current_app
+
+    raw = current_app.config.get("AI_SYSTEM_FACTS_TTL_SECONDS", os.environ.get("AI_SYSTEM_FACTS_TTL_SECONDS"))
+    try:
+        return int(raw) if raw is not None else _SYSTEM_FACTS_TTL_DEFAULT
+    except (TypeError, ValueError):
+        return _SYSTEM_FACTS_TTL_DEFAULT
+
+
+def _system_fact_chunks() -> List[RetrievedChunk]:
+    """
+    Baseline system facts (claim/invoice/billing/carrier/employer/provider counts).
+
+    Built at most once per request (memoized on flask.g; a chat turn calls
+    retrieval several times) and shared across requests for
+    AI_SYSTEM_FACTS_TTL_SECONDS (default 60, 0 disables) until a write bumps
+    one of _SYSTEM_FACT_TABLES' data versions. Callers get their own copies,
+    since scores are adjusted downstream.
+    """
+    from dataclasses import replace
+    from flask import g
+    from app.services.context_cache import cached_context
+
+    memo = g.get("_system_fact_chunks")
+    if memo is None:
+        memo = cached_context(
+            "ai_system_facts",
+            {},
+            _build_system_fact_chunks,
+            tables=_SYSTEM_FACT_TABLES,
+            ttl=_system_facts_ttl(),
+        )
+        g._system_fact_chunks = memo
+    return [replace(c) for c in memo]
+
+
 # --- DISPATCHER + HELPERS: compatible retrieval_context ---
 def _first_attr(obj, *names):
     for n in names:
@@ -1439,17 +1637,7 @@ def _retrieve_context_chunks(
     )
 
     # --- ALWAYS include baseline system context ---
-    chunks.extend([
-        _system_claim_count_chunk(),
-        _system_open_claim_count_chunk(),
-        _system_closed_claim_count_chunk(),
-        _system_invoice_count_chunk(),
-        _system_billing_summary_chunk(),
-        _system_outstanding_billing_chunk(),
-        _system_carrier_count_chunk(),
-        _system_employer_count_chunk(),
-        _system_provider_count_chunk(),
-    ])
+    chunks.extend(_system_fact_chunks())
 
     # Determine whether the caller is explicitly requesting system-scope retrieval.
     # This enables Florence to answer system questions from any page (even when a claim_id is present).
@@ -1491,17 +1679,7 @@ def _retrieve_context_chunks(
             chunks.extend(dbg)
 
         # Always include the core system summary so the assistant can answer broad questions.
-        chunks.extend([
-            _system_claim_count_chunk(),
-            _system_open_claim_count_chunk(),
-            _system_closed_claim_count_chunk(),
-            _system_invoice_count_chunk(),
-            _system_billing_summary_chunk(),
-            _system_outstanding_billing_chunk(),
-            _system_carrier_count_chunk(),
-            _system_employer_count_chunk(),
-            _system_provider_count_chunk(),
-        ])
+        chunks.extend(_system_fact_chunks())
 
         # For list-y questions OR explicit system_list mode, include index-style lists.
         if intent.wants_list or mode == "system_list":
@@ -1935,6 +2113,21 @@ def _retrieve_context_chunks(
     return chunks[:max_chunks]
 
 
+def _structured_billable_row(b: Any) -> dict:
+    """Map a projected BillableItem row to the structured-retrieval shape."""
+    code = (b.activity_code or "").upper().strip()
+    return {
+        "id": b.id,
+        "service_date": str(b.date_of_service) if b.date_of_service else None,
+        "activity_code": code or None,
+        "quantity": float(b.quantity or 0.0),
+        "description": (b.description or None),
+        "notes": (b.notes or None),
+        "invoice_id": b.invoice_id,
+        "is_invoiced": b.invoice_id is not None,
+    }
+
+
 def _retrieve_context_structured(
     *,
     claim_id: Optional[int],
@@ -1957,40 +2150,73 @@ def _retrieve_context_structured(
     if isinstance(claim_id, int) and claim_id > 0:
         claim = Claim.query.get(claim_id)
 
-    # Invoices (structured, best-effort)
-    invoices_q = (
-        Invoice.query
+    # Invoices (structured, best-effort): projected columns, no ORM instances
+    invoice_rows = (
+        db.session.query(
+            Invoice.id,
+            Invoice.invoice_number,
+            Invoice.status,
+            Invoice.dos_start,
+            Invoice.dos_end,
+            Invoice.total_amount,
+            Invoice.created_at,
+        )
         .filter(Invoice.claim_id == claim_id)
         .order_by(Invoice.id.asc())
-        .all()
     )
-    out_invoices: List[dict] = []
-    for inv in invoices_q:
-        out_invoices.append({
+    out_invoices: List[dict] = [
+        {
             "id": inv.id,
-            "invoice_number": getattr(inv, "invoice_number", None),
-            "status": getattr(inv, "status", None),
-            "dos_start": str(getattr(inv, "dos_start", "") or "") or None,
-            "dos_end": str(getattr(inv, "dos_end", "") or "") or None,
-            "total_amount": getattr(inv, "total_amount", None),
-            "created_at": str(getattr(inv, "created_at", "") or "") or None,
-        })
-
-    billables_q = (
-        BillableItem.query
+            "invoice_number": inv.invoice_number,
+            "status": inv.status,
+            "dos_start": str(inv.dos_start or "") or None,
+            "dos_end": str(inv.dos_end or "") or None,
+            "total_amount": inv.total_amount,
+            "created_at": str(inv.created_at or "") or None,
+        }
+        for inv in invoice_rows
+    ]
+
+    # Newest `max_billables` (by service date, then id) selected in SQL; rows are
+    # returned oldest-first like the full list always was.
+    newest = (
+        db.session.query(BillableItem.id)
         .filter(BillableItem.claim_id == claim_id)
-        .order_by(
-            BillableItem.date_of_service.asc().nullslast(),
-            BillableItem.id.asc(),
+        .order_by(BillableItem.date_of_service.desc().nullsfirst(), BillableItem.id.desc())
+    )
+    if max_billables:
+        newest = newest.limit(max_billables)
+    newest_ids = newest.subquery()
+
+    billable_rows = (
+        db.session.query(
+            BillableItem.id,
+            BillableItem.date_of_service,
+            BillableItem.activity_code,
+            BillableItem.quantity,
+            BillableItem.description,
+            BillableItem.notes,
+            BillableItem.invoice_id,
+        )
+        .join(newest_ids, BillableItem.id == newest_ids.c.id)
+        .order_by(BillableItem.date_of_service.asc().nullslast(), BillableItem.id.asc())
+        .yield_per(500)
+    )
+    out_billables: List[dict] = [_structured_billable_row(b) for b in billable_rows]
+
+    # Summary over the same rows, grouped by activity code in SQL.
+    totals = (
+        db.session.query(
+            BillableItem.activity_code,
+            func.count(BillableItem.id),
+            func.coalesce(func.sum(BillableItem.quantity), 0.0),
+            func.count(BillableItem.invoice_id),
         )
+        .join(newest_ids, BillableItem.id == newest_ids.c.id)
+        .group_by(BillableItem.activity_code)
         .all()
     )
 
-    # Cap for UI/deterministic responses
-    billables_q = billables_q[-max_billables:] if max_billables and len(billables_q) > max_billables else billables_q
-
-    out_billables: List[dict] = []
-
     hours_total = 0.0
     miles_total = 0.0
     expense_total = 0.0
@@ -1998,10 +2224,9 @@ def _retrieve_context_structured(
     uninvoiced_count = 0
     no_bill_count = 0
 
-    for b in billables_q:
-        code = (b.activity_code or "").upper().strip()
-        qty = float(b.quantity or 0.0)
-        is_invoiced = b.invoice_id is not None
+    for raw_code, count, qty, invoiced in totals:
+        code = (raw_code or "").upper().strip()
+        qty = float(qty or 0.0)
 
         if code in EXPENSE_CODES:
             expense_total += qty
@@ -2010,25 +2235,11 @@ def _retrieve_context_structured(
         else:
             hours_total += qty
 
-        # --- PATCH: fix no_bill_count logic ---
         if code.replace("_", " ").replace("-", " ").strip() == "NO BILL":
-            no_bill_count += 1
+            no_bill_count += int(count)
 
-        if is_invoiced:
-            invoiced_count += 1
-        else:
-            uninvoiced_count += 1
-
-        out_billables.append({
-            "id": b.id,
-            "service_date": str(b.date_of_service) if getattr(b, "date_of_service", None) else None,
-            "activity_code": code or None,
-            "quantity": qty,
-            "description": (b.description or None),
-            "notes": (b.notes or None),
-            "invoice_id": b.invoice_id,
-            "is_invoiced": is_invoiced,
-        })
+        invoiced_count += int(invoiced)
+        uninvoiced_count += int(count) - int(invoiced)
 
     summary = {
         "hours_total": round(hours_total, 2),
@@ -2279,7 +2490,8 @@ def retrieve(*args, **kwargs):
 
     # IMPORTANT: Do NOT send full database context unless explicitly needed.
     # Context must be domain-shaped or the LLM will collapse to claims analysis.
-    full_snapshot = _select_system_snapshot(query)
+    # Callers that only use facts/chunks pass include_snapshot=False.
+    full_snapshot = _select_system_snapshot(query) if kwargs.get("include_snapshot", True) else {}
 
     # Retrieve chunked context as supplemental signal (ranking / anchors)
     chunks = retrieve_context(
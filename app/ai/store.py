@@ -10,15 +10,59 @@ Design goals:
 - No business logic
 - No permissions
 - No prompt knowledge
+
+Index (multi-table random-hyperplane LSH for cosine similarity):
+- Each embedding is hashed into one bucket in each of `lsh_tables` tables: the
+  sign pattern of the vector against `lsh_bits` random hyperplanes. Vectors with
+  a small angle between them share most sign bits, so near neighbours collide in
+  at least one table with high probability.
+- Buckets live in the `embedding_lsh` table of the same SQLite file, written at
+  upsert time and removed by a trigger when a row is deleted, so upsert /
+  delete_by_source / clear_namespace keep their semantics and nothing has to be
+  trained or rebuilt as the corpus grows.
+- A search probes the query's bucket plus the `lsh_probes - 1` neighbouring
+  buckets most likely to hold its neighbours (flipping the sign bits whose
+  projections are closest to zero) in every table, and scores only those rows.
+- Small namespaces (<= exact_max_rows), exact=True, and searches whose probes
+  return fewer than top_k rows fall back to the exact full scan. With NumPy the
+  threshold defaults to the matrix budget below, since a cached matrix product
+  is cheaper than probing.
+
+Storage and scoring:
+- Embeddings are stored L2-normalized as float32 BLOBs (4 bytes per component
+  instead of ~20 bytes of JSON text), so cosine similarity is a plain dot
+  product and nothing is parsed at query time.
+- With NumPy installed, a namespace whose float32 matrix fits in
+  matrix_max_bytes is cached in process (rebuilt when the namespace's write
+  counter changes) and scanned with a single matrix-vector product. Larger
+  namespaces are never loaded whole: index candidates, and exact scans, decode
+  their BLOBs in batches. Without NumPy the same BLOBs are scored with a
+  pure-Python dot product.
+- Stores written with JSON text embeddings are converted in place on open.
+
+See app/scripts/bench_vector_store.py for recall vs latency at 10k-1M chunks.
 """
 
 from __future__ import annotations
 
-from typing import List, Dict, Any, Tuple
+from array import array
+from collections import OrderedDict
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
 import json
 import math
 import os
+import random
+import re
 import sqlite3
+import threading
+
+# Optional import: vectorized scoring (pure-Python fallback below)
+try:
+    import numpy as np
+except Exception:
+    np = None
 
 # ---- Configuration ----
 
@@ -27,16 +71,155 @@ DEFAULT_DB_PATH = os.path.join(
     "vector_store.sqlite3",
 )
 
+# ~97% recall@10 while scoring ~5% of a large namespace (see bench_vector_store).
+DEFAULT_LSH_TABLES = 6
+DEFAULT_LSH_BITS = 12
+DEFAULT_LSH_PROBES = 20  # buckets visited per table
+
+# Namespaces up to this size are scanned exactly (cheaper than probing).
+DEFAULT_EXACT_MAX_ROWS = 5000
+
+# With NumPy, a namespace whose float32 matrix (rows x dim x 4 bytes) fits in
+# this budget is cached and scanned exactly: ~20k rows at 768 dimensions, scored
+# in well under a millisecond. Bigger namespaces use the index instead.
+DEFAULT_MATRIX_MAX_BYTES = 64 * 1024 * 1024
+
+# Bump to change how hyperplanes are generated (forces every bucket to be recomputed).
+LSH_SEED = 20240501
+
+# Memory for cached vector matrices across namespaces (NumPy scoring), per process.
+MATRIX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Rows decoded per batch when scoring BLOBs outside the matrix cache.
+SCORE_BATCH_ROWS = 4096
+
+_FILTER_KEY_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 # ---- Utilities ----
 
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-    """Compute cosine similarity between two vectors."""
-    dot = sum(x * y for x, y in zip(a, b))
-    mag_a = math.sqrt(sum(x * x for x in a))
-    mag_b = math.sqrt(sum(y * y for y in b))
-    if mag_a == 0 or mag_b == 0:
-        return 0.0
-    return dot / (mag_a * mag_b)
+def _normalize(vec: Sequence[float]) -> List[float]:
+    """Scale to unit length (a zero vector stays zero and scores 0 against everything)."""
+    norm = math.sqrt(sum(x * x for x in vec))
+    if norm == 0.0:
+        return [0.0 for _ in vec]
+    return [x / norm for x in vec]
+
+
+def _pack(vec: Sequence[float]) -> bytes:
+    """Normalized float32 BLOB for storage."""
+    return array("f", _normalize(vec)).tobytes()
+
+
+def _unpack(blob: bytes) -> array:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec
+
+
+def _top(scores: Any, ids: Sequence[int], top_k: int) -> List[Tuple[float, int]]:
+    """Best (score, row id) pairs, highest first, from a NumPy score vector."""
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return [(float(scores[i]), int(ids[i])) for i in best]
+
+
+# (db path, namespace, dim) -> (write version, row ids, float32 matrix)
+_matrix_cache: "OrderedDict[Tuple[str, str, int], Tuple[int, Any, Any]]" = OrderedDict()
+_matrix_lock = threading.Lock()
+
+_planes_cache: Dict[Tuple[int, int, int], List[List[List[float]]]] = {}
+
+
+def _hyperplanes(dim: int, tables: int, bits: int) -> List[List[List[float]]]:
+    """Deterministic Gaussian hyperplanes: [table][bit] -> vector of length dim."""
+    key = (dim, tables, bits)
+    planes = _planes_cache.get(key)
+    if planes is None:
+        rng = random.Random(f"{LSH_SEED}:{dim}")
+        planes = [
+            [[rng.gauss(0.0, 1.0) for _ in range(dim)] for _ in range(bits)]
+            for _ in range(tables)
+        ]
+        _planes_cache[key] = planes
+    return planes
+
+
+def _projections(embedding: List[float], tables: int, bits: int) -> List[List[float]]:
+    """Dot product of the embedding with every hyperplane, per table."""
+    return [
+        [sum(p * x for p, x in zip(plane, embedding)) for plane in table]
+        for table in _hyperplanes(len(embedding), tables, bits)
+    ]
+
+
+def _bucket(projection: List[float]) -> int:
+    """Sign bits of one table's projections packed into an int."""
+    key = 0
+    for i, value in enumerate(projection):
+        if value >= 0.0:
+            key |= 1 << i
+    return key
+
+
+def _lsh_buckets(embedding: List[float], tables: int, bits: int) -> List[int]:
+    return [_bucket(proj) for proj in _projections(embedding, tables, bits)]
+
+
+def _probe_buckets(projection: List[float], probes: int) -> List[int]:
+    """
+    The query's bucket plus the neighbours most likely to hold its neighbours.
+
+    Flipping a bit whose projection is near zero is cheap (the query is almost on
+    that hyperplane), so flip sets are ranked by the sum of |projection|.
+    """
+    key = _bucket(projection)
+    if probes <= 1:
+        return [key]
+    weakest = sorted(range(len(projection)), key=lambda b: abs(projection[b]))[:8]
+    flip_sets = []
+    for r in (1, 2, 3):
+        for flips in combinations(weakest, r):
+            flip_sets.append((sum(abs(projection[b]) for b in flips), flips))
+    flip_sets.sort(key=lambda f: f[0])
+
+    keys = [key]
+    for _, flips in flip_sets[: probes - 1]:
+        k = key
+        for b in flips:
+            k ^= 1 << b
+        keys.append(k)
+    return keys
+
+
+def _filter_sql(filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """
+    Build `AND json_extract(metadata, '$.key') = ?` clauses for metadata filters.
+    A list/tuple/set value matches any of its items.
+    """
+    if not filters:
+        return "", []
+    clauses: List[str] = []
+    params: List[Any] = []
+    for key, value in filters.items():
+        if not _FILTER_KEY_RE.match(str(key)):
+            raise ValueError(f"Invalid metadata filter key: {key!r}")
+        expr = f"json_extract(metadata, '$.{key}')"
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            if not values:
+                clauses.append("0")
+                continue
+            clauses.append(f"{expr} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        elif value is None:
+            clauses.append(f"{expr} IS NULL")
+        else:
+            clauses.append(f"{expr} = ?")
+            params.append(value)
+    return "".join(f" AND {c}" for c in clauses), params
 
 
 # ---- Store ----
@@ -49,10 +232,26 @@ class VectorStore:
       - a chunk of text
       - its embedding
       - metadata describing where it came from
+    plus one LSH bucket per index table (see module docstring).
     """
 
-    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        *,
+        lsh_tables: int = DEFAULT_LSH_TABLES,
+        lsh_bits: int = DEFAULT_LSH_BITS,
+        lsh_probes: int = DEFAULT_LSH_PROBES,
+        exact_max_rows: Optional[int] = None,
+        matrix_max_bytes: int = DEFAULT_MATRIX_MAX_BYTES,
+    ):
         self.db_path = db_path
+        self.lsh_tables = int(lsh_tables)
+        self.lsh_bits = int(lsh_bits)
+        self.lsh_probes = int(lsh_probes)
+        # None: DEFAULT_EXACT_MAX_ROWS, or every namespace the matrix budget holds.
+        self.exact_max_rows = None if exact_max_rows is None else int(exact_max_rows)
+        self.matrix_max_bytes = int(matrix_max_bytes)
         self._ensure_schema()
 
     # ---- Schema ----
@@ -66,7 +265,7 @@ class VectorStore:
                     namespace TEXT NOT NULL,
                     source_id TEXT NOT NULL,
                     text TEXT NOT NULL,
-                    embedding TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
                     metadata TEXT,
                     UNIQUE(namespace, source_id, text)
                 )
@@ -75,7 +274,74 @@ class VectorStore:
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_namespace ON embeddings(namespace)"
             )
+
+            # ANN index: one bucket per (row, table)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_lsh (
+                    row_id INTEGER NOT NULL,
+                    tbl INTEGER NOT NULL,
+                    namespace TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    PRIMARY KEY (row_id, tbl)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON embedding_lsh(namespace, tbl, bucket)"
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS embeddings_lsh_delete
+                AFTER DELETE ON embeddings
+                BEGIN
+                    DELETE FROM embedding_lsh WHERE row_id = OLD.id;
+                END
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS index_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+                """
+            )
+
+            # Buckets computed with other settings are meaningless here: drop them
+            # and let each namespace re-index on its next search (_ensure_indexed).
+            signature = f"{LSH_SEED}:{self.lsh_tables}x{self.lsh_bits}"
+            row = conn.execute("SELECT value FROM index_meta WHERE key = 'lsh'").fetchone()
+            if row is None or row[0] != signature:
+                conn.execute("DELETE FROM embedding_lsh")
+                conn.execute("DELETE FROM index_meta WHERE key LIKE 'lsh_ready:%'")
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('lsh', ?)",
+                    (signature,),
+                )
+            conn.commit()
+
+            if self._migrate_json_embeddings(conn):
+                conn.execute("VACUUM")
+
+    def _migrate_json_embeddings(self, conn: sqlite3.Connection) -> int:
+        """Convert legacy JSON text embeddings to normalized float32 BLOBs; returns rows converted."""
+        converted = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, embedding FROM embeddings WHERE typeof(embedding) = 'text' LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                "UPDATE embeddings SET embedding = ? WHERE id = ?",
+                [(_pack(json.loads(emb_json)), row_id) for row_id, emb_json in rows],
+            )
+            converted += len(rows)
+        if converted:
+            conn.execute("UPDATE index_meta SET value = value + 1 WHERE key LIKE 'version:%'")
             conn.commit()
+        return converted
 
     # ---- Writes ----
 
@@ -92,22 +358,50 @@ class VectorStore:
         Insert or replace an embedding entry.
         Caller is responsible for deciding when to overwrite.
         """
+        self.upsert_many(
+            namespace=namespace,
+            items=[
+                {
+                    "source_id": source_id,
+                    "text": text,
+                    "embedding": embedding,
+                    "metadata": metadata,
+                }
+            ],
+        )
+
+    def upsert_many(self, *, namespace: str, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or replace many entries in one transaction.
+        Each item has source_id, text, embedding and optional metadata.
+        """
+        items = list(items)
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO embeddings
-                (namespace, source_id, text, embedding, metadata)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    namespace,
-                    source_id,
-                    text,
-                    json.dumps(embedding),
-                    json.dumps(metadata or {}),
-                ),
-            )
+            for item in items:
+                source_id = str(item["source_id"])
+                # Plain DELETE (not INSERT OR REPLACE) so the trigger drops old buckets.
+                conn.execute(
+                    "DELETE FROM embeddings WHERE namespace = ? AND source_id = ? AND text = ?",
+                    (namespace, source_id, item["text"]),
+                )
+                cursor = conn.execute(
+                    """
+                    INSERT INTO embeddings
+                    (namespace, source_id, text, embedding, metadata)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (
+                        namespace,
+                        source_id,
+                        item["text"],
+                        _pack(item["embedding"]),
+                        json.dumps(item.get("metadata") or {}),
+                    ),
+                )
+                self._index_row(conn, cursor.lastrowid, namespace, item["embedding"])
+            self._bump_version(conn, namespace)
             conn.commit()
+        return len(items)
 
     def delete_by_source(self, namespace: str, source_id: str) -> None:
         """Delete all embeddings for a given source."""
@@ -116,17 +410,68 @@ class VectorStore:
                 "DELETE FROM embeddings WHERE namespace = ? AND source_id = ?",
                 (namespace, source_id),
             )
+            self._bump_version(conn, namespace)
             conn.commit()
 
     def clear_namespace(self, namespace: str) -> None:
         """Delete all embeddings in a namespace."""
         with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "DELETE FROM embedding_lsh WHERE namespace = ?",
+                (namespace,),
+            )
             conn.execute(
                 "DELETE FROM embeddings WHERE namespace = ?",
                 (namespace,),
             )
+            self._bump_version(conn, namespace)
             conn.commit()
 
+    # ---- Index maintenance ----
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection, namespace: str) -> None:
+        """Advance the namespace's write counter (invalidates cached matrices in every process)."""
+        conn.execute(
+            """
+            INSERT INTO index_meta (key, value) VALUES (?, 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+            """,
+            (f"version:{namespace}",),
+        )
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection, namespace: str) -> int:
+        row = conn.execute("SELECT value FROM index_meta WHERE key = ?", (f"version:{namespace}",)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _index_row(self, conn: sqlite3.Connection, row_id: int, namespace: str, embedding: List[float]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embedding_lsh (row_id, tbl, namespace, bucket) VALUES (?, ?, ?, ?)",
+            [
+                (row_id, tbl, namespace, bucket)
+                for tbl, bucket in enumerate(_lsh_buckets(embedding, self.lsh_tables, self.lsh_bits))
+            ],
+        )
+
+    def _ensure_indexed(self, conn: sqlite3.Connection, namespace: str) -> None:
+        """Index rows written before the index existed (or under other settings), once."""
+        ready_key = f"lsh_ready:{namespace}"
+        if conn.execute("SELECT 1 FROM index_meta WHERE key = ?", (ready_key,)).fetchone():
+            return
+        missing = conn.execute(
+            """
+            SELECT id, embedding FROM embeddings e
+            WHERE namespace = ?
+              AND NOT EXISTS (SELECT 1 FROM embedding_lsh b WHERE b.row_id = e.id)
+            """,
+            (namespace,),
+        ).fetchall()
+        for row_id, blob in missing:
+            self._index_row(conn, row_id, namespace, _unpack(blob))
+        conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, '1')", (ready_key,))
+        conn.commit()
+
     # ---- Reads ----
 
     def similarity_search(
@@ -135,36 +480,212 @@ class VectorStore:
         namespace: str,
         query_embedding: List[float],
         top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        exact: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Return the top_k most similar entries within a namespace.
+
+        filters: metadata equality filters, e.g. {"claim_id": 12, "source_type": "report"}
+                 (a list value matches any of its items).
+        exact:   skip the index and score every matching row.
         """
-        results: List[Tuple[float, Dict[str, Any]]] = []
+        filter_sql, filter_params = _filter_sql(filters)
+        query = _normalize(query_embedding)
+        dim = len(query)
+        matrix_rows = self.matrix_max_bytes // (dim * 4) if np is not None and dim else 0
+        exact_rows = self.exact_max_rows
+        if exact_rows is None:
+            exact_rows = max(DEFAULT_EXACT_MAX_ROWS, matrix_rows)
 
         with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                """
-                SELECT source_id, text, embedding, metadata
-                FROM embeddings
-                WHERE namespace = ?
-                """,
-                (namespace,),
-            )
+            rows = self._count(conn, namespace, max(exact_rows, matrix_rows))
+            if not exact and rows > exact_rows:
+                self._ensure_indexed(conn, namespace)
 
-            for source_id, text, emb_json, meta_json in cursor.fetchall():
-                emb = json.loads(emb_json)
-                score = _cosine_similarity(query_embedding, emb)
-                results.append(
-                    (
-                        score,
-                        {
-                            "source_id": source_id,
-                            "text": text,
-                            "metadata": json.loads(meta_json or "{}"),
-                            "score": score,
-                        },
+                # One indexed lookup per table; OR-ing them makes SQLite scan the
+                # namespace's whole bucket index.
+                probes, params = [], []
+                for tbl, proj in enumerate(_projections(query, self.lsh_tables, self.lsh_bits)):
+                    buckets = _probe_buckets(proj, self.lsh_probes)
+                    probes.append(
+                        "SELECT row_id FROM embedding_lsh WHERE namespace = ? AND tbl = ?"
+                        f" AND bucket IN ({', '.join('?' for _ in buckets)})"
                     )
+                    params.extend([namespace, tbl, *buckets])
+                scored = self._score_blobs(
+                    conn,
+                    query,
+                    top_k,
+                    f"""
+                    SELECT id, embedding FROM embeddings
+                    WHERE namespace = ? AND id IN ({" UNION ".join(probes)}){filter_sql}
+                    """,
+                    [namespace, *params, *filter_params],
                 )
+                # Sparse buckets (or tight filters) can leave too few candidates.
+                if len(scored) >= top_k:
+                    return self._hydrate(conn, scored)
+
+            if rows <= matrix_rows:
+                scored = self._score_matrix(conn, namespace, query, top_k, filter_sql, filter_params)
+            else:
+                scored = self._score_blobs(
+                    conn,
+                    query,
+                    top_k,
+                    f"SELECT id, embedding FROM embeddings WHERE namespace = ?{filter_sql}",
+                    [namespace, *filter_params],
+                )
+            return self._hydrate(conn, scored)
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, namespace: str, limit: int) -> int:
+        """Rows in the namespace, counted no further than limit + 1."""
+        (n,) = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM embeddings WHERE namespace = ? LIMIT ?)",
+            (namespace, limit + 1),
+        ).fetchone()
+        return n
+
+    @staticmethod
+    def _score_blobs(
+        conn: sqlite3.Connection,
+        query: List[float],
+        top_k: int,
+        sql: str,
+        params: List[Any],
+    ) -> List[Tuple[float, int]]:
+        """
+        Top (score, row id) pairs among the (id, embedding) rows selected by `sql`,
+        decoded straight from their BLOBs. `query` must already be normalized.
+        """
+        dim = len(query)
+        row_bytes = dim * 4
+        cursor = conn.execute(sql, params)
+
+        if np is None:
+            # Pure-Python fallback: decode the BLOBs and take dot products.
+            scored = (
+                (sum(q * x for q, x in zip(query, _unpack(blob))), row_id)
+                for row_id, blob in cursor
+                if len(blob) == row_bytes
+            )
+            return heapq.nlargest(top_k, scored, key=lambda r: r[0])
+
+        # Batched so memory stays at SCORE_BATCH_ROWS vectors however many rows match.
+        vector = np.asarray(query, dtype=np.float32)
+        best: List[Tuple[float, int]] = []
+        while True:
+            fetched = cursor.fetchmany(SCORE_BATCH_ROWS)
+            if not fetched:
+                break
+            batch = [(row_id, blob) for row_id, blob in fetched if len(blob) == row_bytes]
+            if not batch:
+                continue
+            matrix = np.frombuffer(b"".join(blob for _, blob in batch), dtype=np.float32).reshape(len(batch), dim)
+            best = heapq.nlargest(
+                top_k,
+                best + _top(matrix @ vector, [row_id for row_id, _ in batch], top_k),
+                key=lambda r: r[0],
+            )
+        return best
+
+    def _score_matrix(
+        self,
+        conn: sqlite3.Connection,
+        namespace: str,
+        query: List[float],
+        top_k: int,
+        where_sql: str,
+        params: List[Any],
+    ) -> List[Tuple[float, int]]:
+        """
+        Top (score, row id) pairs among the namespace rows matching `where_sql`
+        ("" = every row), scored against the cached matrix. Only for namespaces
+        within matrix_max_bytes; `query` must already be normalized.
+        """
+        ids, matrix = self._matrix(conn, namespace, len(query))
+        if not len(ids):
+            return []
+        if where_sql:
+            wanted = np.fromiter(
+                (
+                    row_id
+                    for (row_id,) in conn.execute(
+                        f"SELECT id FROM embeddings WHERE namespace = ?{where_sql}",
+                        [namespace, *params],
+                    )
+                ),
+                dtype=np.int64,
+            )
+            # ids is sorted: map wanted ids to matrix rows, dropping other-dim rows
+            positions = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+            positions = positions[ids[positions] == wanted]
+            if not len(positions):
+                return []
+            ids, matrix = ids[positions], matrix[positions]
+        return _top(matrix @ np.asarray(query, dtype=np.float32), ids, top_k)
+
+    def _matrix(self, conn: sqlite3.Connection, namespace: str, dim: int):
+        """(sorted row ids, float32 matrix) of the namespace's `dim`-sized vectors, cached per write version."""
+        cache_key = (os.path.abspath(self.db_path), namespace, dim)
+        version = self._version(conn, namespace)
+        with _matrix_lock:
+            cached = _matrix_cache.get(cache_key)
+            if cached is not None and cached[0] == version:
+                _matrix_cache.move_to_end(cache_key)
+                return cached[1], cached[2]
+
+        row_bytes = dim * 4
+        ids: List[int] = []
+        blobs: List[bytes] = []
+        for row_id, blob in conn.execute(
+            "SELECT id, embedding FROM embeddings WHERE namespace = ? ORDER BY id",
+            (namespace,),
+        ):
+            if len(blob) == row_bytes:
+                ids.append(row_id)
+                blobs.append(blob)
+        id_array = np.asarray(ids, dtype=np.int64)
+        matrix = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(ids), dim)
+
+        with _matrix_lock:
+            _matrix_cache[cache_key] = (version, id_array, matrix)
+            _matrix_cache.move_to_end(cache_key)
+            # Evict least recently used matrices past the budget (never the one just built).
+            while len(_matrix_cache) > 1 and sum(
+                entry[1].nbytes + entry[2].nbytes for entry in _matrix_cache.values()
+            ) > MATRIX_CACHE_BYTES:
+                _matrix_cache.popitem(last=False)
+        return id_array, matrix
 
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [r[1] for r in results[:top_k]]
\ No newline at end of file
+    @staticmethod
+    def _hydrate(conn: sqlite3.Connection, scored: List[Tuple[float, int]]) -> List[Dict[str, Any]]:
+        """Attach source_id/text/metadata to (score, row id) pairs, keeping their order."""
+        if not scored:
+            return []
+        rows = {
+            row_id: (source_id, text, meta_json)
+            for row_id, source_id, text, meta_json in conn.execute(
+                f"""
+                SELECT id, source_id, text, metadata FROM embeddings
+                WHERE id IN ({", ".join("?" for _ in scored)})
+                """,
+                [row_id for _, row_id in scored],
+            )
+        }
+        results = []
+        for score, row_id in scored:
+            if row_id not in rows:
+                continue
+            source_id, text, meta_json = rows[row_id]
+            results.append(
+                {
+                    "source_id": source_id,
+                    "text": text,
+                    "metadata": json.loads(meta_json or "{}"),
+                    "score": score,
+                }
+            )
+        return results
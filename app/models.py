@@ -261,6 +261,10 @@ class Contact(db.Model):
 
 class Claim(db.Model):
     __tablename__ = "claim"
+    __table_args__ = (
+        # Claims list order (claims_list_service): pages are index range scans.
+        sa.Index("ix_claim_list_order", "claimant_last_name", "claimant_first_name", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -487,7 +491,7 @@ class ClaimDocument(db.Model):
     __tablename__ = "claim_document"
 
     id = db.Column(db.Integer, primary_key=True)
-    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False, index=True)
     claim = db.relationship("Claim", back_populates="documents")
 
     original_filename = db.Column(db.String(255), nullable=False)
@@ -569,6 +573,8 @@ class DocumentArtifact(db.Model):
     # Metadata
     file_size_bytes = db.Column(db.Integer)
     sha256 = db.Column(db.String(64))
+    # Hash of the print HTML + assets + render options (app.services.pdf_cache)
+    render_fingerprint = db.Column(db.String(64))
 
     created_at = db.Column(db.DateTime, default=now, nullable=False)
 
@@ -638,7 +644,7 @@ class Report(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False, index=True)
     claim = db.relationship("Claim", back_populates="reports")
 
     report_type = db.Column(db.String(50), nullable=False)  # initial/progress/closure
@@ -760,13 +766,13 @@ class BillableItem(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False, index=True)
     claim = db.relationship("Claim", back_populates="billables")
 
     report_id = db.Column(db.Integer, db.ForeignKey("report.id"))
     report = db.relationship("Report", back_populates="billables")
 
-    invoice_id = db.Column(db.Integer, db.ForeignKey("invoice.id"))
+    invoice_id = db.Column(db.Integer, db.ForeignKey("invoice.id"), index=True)
 
     # When the activity occurred
     date_of_service = db.Column(db.Date)
@@ -795,7 +801,7 @@ class Invoice(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey("claim.id"), nullable=False, index=True)
     claim = db.relationship("Claim", back_populates="invoices")
 
     # For reference on the invoice itself
@@ -1060,4 +1066,174 @@ class ContactRole(db.Model):
         return f"<ContactRole {self.label}>"
 
     def __str__(self):
-        return self.label
\ No newline at end of file
+        return self.label
+
+# ============================================================
+#  BACKGROUND JOBS (PDF renders, outbound email)
+# ============================================================
+
+class BackgroundJob(db.Model):
+    """Durable work item processed by app.services.job_queue workers.
+
+    Timestamps are naive UTC (not system-local like the rest of the schema) so
+    run_after/locked_at comparisons are unambiguous across processes.
+    """
+
+    __tablename__ = "background_job"
+    __table_args__ = (
+        sa.Index("ix_background_job_status_run_after", "status", "run_after"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    job_type = db.Column(db.String(50), nullable=False)  # e.g., "invoice_email", "report_pdf"
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued/running/succeeded/failed
+
+    payload = db.Column(db.Text)  # JSON
+    result = db.Column(db.Text)  # JSON (set on success)
+    progress = db.Column(db.Text)  # JSON {"done", "total", "message"} while running (batch jobs)
+    last_error = db.Column(db.Text)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+
+    run_after = db.Column(db.DateTime, nullable=False)
+    locked_by = db.Column(db.String(120))
+    locked_at = db.Column(db.DateTime)
+
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<BackgroundJob {self.job_type} id={self.id} status={self.status}>"
+
+
+# ============================================================
+#  ANALYTICS ROLLUPS (dashboard)
+# ============================================================
+
+class DailyFactRollup(db.Model):
+    """Per-day aggregate of billables, invoices or claims for the dashboard.
+
+    Maintained by app.services.analytics_rollup in the same transaction as the
+    rows it summarizes; never edit by hand (rebuild with
+    `python -m app.scripts.rebuild_rollups`).
+    """
+
+    __tablename__ = "daily_fact_rollup"
+    __table_args__ = (
+        sa.Index("ix_daily_fact_rollup_fact_day", "fact", "day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    fact = db.Column(db.String(20), nullable=False)  # billable / invoice / invoice_undated / claim_opened / claim_closed
+    day = db.Column(db.Date)  # NULL = undated source rows
+    key = db.Column(db.String(50))  # activity code (billable) or upper-cased status (invoice)
+    flag = db.Column(db.Boolean, nullable=False, default=False)  # billable: pending (un-invoiced + complete); claim: not CLOSED
+
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyFactRollup {self.fact} {self.day} {self.key!r}>"
+
+
+class DataVersion(db.Model):
+    """Per-table change counter used to invalidate cached page contexts.
+
+    Bumped by app.services.context_cache right after every commit that wrote
+    to a tracked table, in a short transaction of its own (so concurrent
+    writers never queue on the counter row).
+    """
+
+    __tablename__ = "data_version"
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DataVersion {self.table_name}={self.version}>"
+
+
+# ============================================================
+#  SEARCH INDEX (autocomplete)
+# ============================================================
+
+class SearchDocument(db.Model):
+    """One searchable row per claim, claimant, carrier, employer, provider or contact.
+
+    `search_text` is the lower-cased searchable fields joined by newlines.
+    Maintained by app.services.search_index in the same transaction as the
+    source rows and indexed for substring search (pg_trgm GIN on Postgres, an
+    FTS5 trigram table on SQLite, SearchGram for two-character terms); rebuild with
+    `python -m app.scripts.rebuild_search_index`.
+    """
+
+    __tablename__ = "search_document"
+    __table_args__ = (
+        sa.UniqueConstraint("kind", "entity_id", name="uq_search_document_kind_entity"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    kind = db.Column(db.String(20), nullable=False)  # claim / claimant / carrier / employer / provider / contact
+    entity_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255), nullable=False, default="")  # tie-break sort key
+    search_text = db.Column(db.Text, nullable=False, default="")
+
+    def __repr__(self):
+        return f"<SearchDocument {self.kind}:{self.entity_id}>"
+
+
+class SearchGram(db.Model):
+    """Two-character substrings of a search document, for terms too short for the trigram indexes.
+
+    One row per distinct gram (no whitespace) of `search_text`, with the best
+    rank tier it appears at: 0 = start of a field, 1 = start of a word, 2 =
+    anywhere else. `title_key` and `entity_id` repeat the document's sort key
+    so a (gram, kind, tier) range of the lookup index is already in result
+    order. Written and removed together with the document.
+    """
+
+    __tablename__ = "search_gram"
+    __table_args__ = (
+        sa.Index(
+            "ix_search_gram_lookup", "gram", "kind", "tier", "title_key", sa.text("entity_id DESC"), "document_id"
+        ),
+    )
+
+    document_id = db.Column(
+        db.Integer, db.ForeignKey("search_document.id", ondelete="CASCADE"), primary_key=True
+    )
+    gram = db.Column(db.String(2), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # copies of the document's columns
+    entity_id = db.Column(db.Integer, nullable=False)
+    title_key = db.Column(db.String(255), nullable=False, default="")  # lower(title)
+    tier = db.Column(db.SmallInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<SearchGram {self.gram!r} doc={self.document_id}>"
+
+
+# ============================================================
+#  INVOICE NUMBERING
+# ============================================================
+
+class InvoiceNumberCounter(db.Model):
+    """Last invoice sequence number issued per prefix (e.g. "INV-25-").
+
+    Incremented with an atomic UPDATE ... RETURNING by
+    app.services.invoice_numbers in the invoice's own transaction, so
+    concurrent invoice creations never receive the same number.
+    """
+
+    __tablename__ = "invoice_number_counter"
+
+    prefix = db.Column(db.String(40), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<InvoiceNumberCounter {self.prefix}{self.last_value}>"
@@ -31,3 +31,5 @@ from . import billing  # noqa: F401,E402
 from . import documents  # noqa: F401,E402
 from . import forms  # noqa: F401,E402
 from . import core_data  # noqa: F401,E402
+from . import jobs  # noqa: F401,E402
+from . import exports  # noqa: F401,E402
@@ -26,6 +26,7 @@ from sqlalchemy import text, func
 from .. import db
 from ..models import BillableItem, Carrier, Claim, Invoice, Payment, Settings
 
+from ..services.claim_activity_service import get_claim_last_activity
 from ..services.dashboard_service import build_dashboard_context
 
 
@@ -206,28 +207,6 @@ def _claim_age_days(claim: Claim, today: Optional[date] = None) -> Optional[int]
     return max(0, (today - start).days)
 
 
-def _claim_last_activity_date(claim: Claim) -> Optional[date]:
-    # Prefer last_activity_at, then updated_at, then newest billable date.
-    d = _as_date(_safe_get(claim, "last_activity_at", "updated_at"))
-    if d:
-        return d
-
-    # Try derive from billables (safe, but slightly heavier)
-    try:
-        q = BillableItem.query.filter(BillableItem.claim_id == claim.id)
-        # newest by service_date/created_at
-        if hasattr(BillableItem, "service_date"):
-            q = q.order_by(BillableItem.service_date.desc().nullslast())
-        elif hasattr(BillableItem, "created_at"):
-            q = q.order_by(BillableItem.created_at.desc())
-        last = q.first()
-        if last:
-            return _billable_service_date(last)
-    except Exception:
-        pass
-    return None
-
-
 def _hours_last_n_days(n_days: int, today_dt: Optional[datetime] = None) -> float:
     # Use local now if not provided
     if today_dt is None:
@@ -412,6 +391,27 @@ def analysis_index():
     if period not in allowed_periods:
         period = "week"
 
+    # local import to avoid circulars
+    from ..services.context_cache import cached_context
+
+    # Served from cache until a claim/invoice/billable/payment/report/settings
+    # write bumps a data version (or the TTL / the day runs out).
+    context = cached_context(
+        "analysis",
+        {"period": period},
+        lambda: _analysis_context(settings, period),
+    )
+
+    return render_template(
+        "analysis.html",
+        active_page="analysis",
+        settings=settings,
+        **context,
+    )
+
+
+def _analysis_context(settings: Any, period: str) -> Dict[str, Any]:
+    """Everything analysis.html needs besides settings/active_page (plain, picklable data)."""
     dashboard_context = build_dashboard_context(
         revenue_overview_period=period,
         billable_breakdown_period=period,
@@ -493,9 +493,18 @@ def analysis_index():
     dormant_days = int(getattr(settings, "dormant_claim_days", 60) or 60)
     stale_cutoff = _today_local() - timedelta(days=dormant_days)
 
+    # One aggregated last-activity query instead of per-claim lookups.
+    last_activity_map, err = _try(
+        "get_claim_last_activity",
+        lambda: get_claim_last_activity([c.id for c in open_claims]),
+        {},
+    )
+    if err:
+        analysis_errors.append(err)
+
     stale_claims_count = 0
     for c in open_claims:
-        last_activity = _claim_last_activity_date(c)
+        last_activity = last_activity_map.get(c.id)
         if last_activity is None:
             # If we truly don't know, treat as stale only if claim itself is old.
             age = _claim_age_days(c, _today_local())
@@ -678,10 +687,7 @@ def analysis_index():
     except Exception as e:
         current_app.logger.exception("Error logging upcoming_appointments: %s", e)
 
-    return render_template(
-        "analysis.html",
-        active_page="analysis",
-        settings=settings,
+    return dict(
         # claims
         active_claims_count=active_claims_count,
         total_claims=total_claims,
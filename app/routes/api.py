@@ -225,15 +225,14 @@ def _rewrite_query_with_context(query: str, context: Dict[str, Any]) -> str:
             return f"How many billable items are on invoice {invoice_id}?"
 
     return query
-@bp.route("/api/clarity/query", methods=["POST"])
-def clarity_query():
-    """Universal Clarity entrypoint."""
-    data: Dict[str, Any] = request.get_json(force=True) or {}
 
+
+def _prepare_clarity_request(data: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
+    """Resolve the question and context for one Clarity turn ("" when no query was sent)."""
     # Accept either "query" or "question" (UI variations)
     query: str = _get_str(data, "query", "question")
     if not query:
-        return jsonify({"ok": False, "error": "No query provided"}), 400
+        return "", {}
 
     # Normalize context
     context: Dict[str, Any] = _normalize_context(data)
@@ -265,9 +264,11 @@ def clarity_query():
         session.pop("clarity_pending_intent", None)
         session.modified = True
 
-    # Ask Clarity via the service layer
-    result: Dict[str, Any] = ai_service.ask_clarity(question=query, context=context)
+    return query, context
 
+
+def _finalize_clarity_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize an ask_clarity() result into the shape the chat UI renders."""
     # Round-trip thread state for the chat UI (client-owned).
     # Backend may return `thread_state_update` (preferred) or `thread_state`.
     tsu = result.get("thread_state_update")
@@ -320,4 +321,103 @@ def clarity_query():
         else:
             result["pending_intent"] = None
 
-    return jsonify({"ok": True, **result})
\ No newline at end of file
+    return {"ok": True, **result}
+
+
+@bp.route("/api/clarity/query", methods=["POST"])
+def clarity_query():
+    """Universal Clarity entrypoint."""
+    data: Dict[str, Any] = request.get_json(force=True) or {}
+
+    query, context = _prepare_clarity_request(data)
+    if not query:
+        return jsonify({"ok": False, "error": "No query provided"}), 400
+
+    # Ask Clarity via the service layer ("no_cache": true answers fresh)
+    result: Dict[str, Any] = ai_service.ask_clarity(
+        question=query, context=context, use_cache=not data.get("no_cache")
+    )
+    return jsonify(_finalize_clarity_result(result))
+
+
+@bp.route("/api/clarity/stream", methods=["POST"])
+def clarity_stream():
+    """Clarity entrypoint that streams the answer as Server-Sent Events.
+
+    Same request body as /api/clarity/query. Emits `token` events while the
+    model writes, then `done` with the same payload /api/clarity/query returns
+    (plus `ttft_ms`); the UI keeps follow-up state from that payload, since
+    the session cookie has already been sent.
+    """
+    from .helpers import sse_token_stream  # local import to avoid circulars
+
+    data: Dict[str, Any] = request.get_json(force=True) or {}
+
+    query, context = _prepare_clarity_request(data)
+    if not query:
+        return jsonify({"ok": False, "error": "No query provided"}), 400
+
+    use_cache = not data.get("no_cache")
+    return sse_token_stream(
+        lambda: _finalize_clarity_result(
+            ai_service.ask_clarity(question=query, context=context, use_cache=use_cache)
+        ),
+        label="clarity",
+    )
+
+
+@bp.route("/api/clarity/health", methods=["GET"])
+def clarity_health():
+    """LLM backend health (breaker, pool, latency; never probes inline) and answer-cache stats."""
+    from app.ai.llm import get_active_llm_info, get_llm_health  # local import to avoid circulars
+    from app.services.clarity_cache import get_clarity_cache_stats  # local import to avoid circulars
+
+    return jsonify({
+        "ok": True,
+        "active": get_active_llm_info(),
+        "health": get_llm_health(),
+        "cache": get_clarity_cache_stats(),
+    })
+
+
+# -----------------------------------------------------------------------------
+# Omnibox (global search)
+# -----------------------------------------------------------------------------
+
+_OMNIBOX_ENDPOINTS = {
+    "claim": ("main.claim_detail", "claim_id"),
+    "invoice": ("main.invoice_detail_invoices", "invoice_id"),
+    "provider": ("main.provider_detail", "provider_id"),
+    "carrier": ("main.carrier_detail", "carrier_id"),
+    "employer": ("main.employer_detail", "employer_id"),
+}
+
+
+@bp.route("/api/search", methods=["GET"])
+def omnibox_search():
+    """Global search across claims, invoices, providers, carriers, employers and contacts.
+
+    Query args: q (2+ chars), types (comma-separated kinds; default all), limit (default 20).
+    Contacts link to the carrier/employer/provider they belong to.
+    """
+    from flask import url_for
+    from app.services.omnibox import search  # local import to avoid circulars
+
+    q = (request.args.get("q") or "").strip()
+    types = [t.strip() for t in (request.args.get("types") or "").split(",") if t.strip()] or None
+    try:
+        limit = int(request.args.get("limit") or 20)
+    except ValueError:
+        limit = 20
+
+    results = []
+    for hit in search(q, types, limit):
+        endpoint = _OMNIBOX_ENDPOINTS.get(hit["target_kind"])
+        results.append({
+            "type": hit["kind"],
+            "id": hit["id"],
+            "label": hit["label"],
+            "detail": hit["detail"],
+            "url": url_for(endpoint[0], **{endpoint[1]: hit["target_id"]}) if endpoint else None,
+        })
+    return jsonify({"query": q, "results": results})
@@ -50,6 +50,8 @@ except Exception:  # pragma: no cover
 
 # AI claim query helper
 from ..services import ai_service
+from ..services import claim_activity_service
+from ..services import claims_list_service
 
 
 
@@ -552,6 +554,7 @@ def claims_list():
         (request.args.get("activity") or request.args.get("status") or "").strip().lower()
     )
     billing_filter = (request.args.get("billing") or "").strip().lower()
+    search_query = (request.args.get("q") or "").strip()
     # Closed-claim filter (default: hide closed).
     # The UI may send different param names depending on the control.
     _show_closed_raw = (
@@ -563,211 +566,54 @@ def claims_list():
     )
     show_closed = str(_show_closed_raw).strip().lower() in ("1", "true", "yes", "on")
 
-    # Base query
-    q = Claim.query
-
-
-    claims = (
-        q.order_by(
-            Claim.claimant_last_name.asc().nullslast(),
-            Claim.claimant_first_name.asc().nullslast(),
-            Claim.id.desc(),
-        ).all()
-    )
-
-    if activity_filter not in ("active", "dormant"):
+    if activity_filter not in claims_list_service.ACTIVITY_FILTERS:
         activity_filter = "all"
-    if billing_filter not in ("none", "open", "closed"):
+    if billing_filter not in claims_list_service.BILLING_FILTERS:
         billing_filter = "all"
 
-    # Dormant status calculation
-    dormant_info = {}
-    dormant_threshold_days = _ensure_settings().dormant_claim_days or 0
-    for c in claims:
-        last_date = None
-
-        r = (
-            Report.query.filter_by(claim_id=c.id)
-            .order_by(Report.created_at.desc())
-            .first()
-        )
-        if r and r.created_at:
-            last_date = r.created_at.date()
-
-        b = (
-            BillableItem.query.filter_by(claim_id=c.id)
-            .order_by(BillableItem.created_at.desc())
-            .first()
-        )
-        if b and b.created_at:
-            d = b.created_at.date()
-            if not last_date or d > last_date:
-                last_date = d
-
-        inv = (
-            Invoice.query.filter_by(claim_id=c.id)
-            .order_by(Invoice.id.desc())
-            .first()
-        )
-        if inv and inv.invoice_date:
-            d = inv.invoice_date
-            if not last_date or d > last_date:
-                last_date = d
-
-        doc = (
-            ClaimDocument.query.filter_by(claim_id=c.id)
-            .order_by(ClaimDocument.uploaded_at.desc())
-            .first()
-        )
-        if doc and doc.uploaded_at:
-            d = doc.uploaded_at.date()
-            if not last_date or d > last_date:
-                last_date = d
-
-        if last_date:
-            delta = (today() - last_date).days
-            is_dormant = dormant_threshold_days > 0 and delta >= dormant_threshold_days
-        else:
-            is_dormant = False
-
-        dormant_info[c.id] = {
-            "is_dormant": is_dormant,
-            "last_activity": last_date,
-        }
-
-    # Billing summary per-claim
-    billing_summary = {}
-    if claims:
-        claim_ids = [c.id for c in claims]
-        invoices = Invoice.query.filter(Invoice.claim_id.in_(claim_ids)).all()
-
-        for cid in claim_ids:
-            billing_summary[cid] = {
-                "total": 0,
-                "open": 0,
-                "closed": 0,
-                "open_total": 0.0,
-                "uninvoiced_total": 0.0,
-            }
-
-        # Preload billables for uninvoiced calculations
-        billables = BillableItem.query.filter(
-            BillableItem.claim_id.in_(claim_ids)
-        ).all()
-
-        # Build quick lookup per claim for billables
-        billables_by_claim = {}
-        for b in billables:
-            billables_by_claim.setdefault(b.claim_id, []).append(b)
-
-        # Compute invoice totals (open only)
-        for inv in invoices:
-            cid = inv.claim_id
-            status = (inv.status or "Draft")
-            entry = billing_summary.get(cid)
-            if not entry:
-                continue
-
-            # Count logic (existing behavior)
-            entry["total"] += 1
-            if status in ("Paid", "Void"):
-                entry["closed"] += 1
-            else:
-                entry["open"] += 1
-
-                # Use canonical invoice financial calculation if available
-                fin = None
-                try:
-                    if callable(_helpers_compute_invoice_financials):
-                        settings_obj = _ensure_settings()
-                        claim_obj = next((c for c in claims if c.id == cid), None)
-
-                        # Try preferred signatures (match claim_detail logic)
-                        try:
-                            fin = _helpers_compute_invoice_financials(
-                                invoice=inv,
-                                settings=settings_obj,
-                                claim=claim_obj,
-                            )
-                        except TypeError:
-                            try:
-                                fin = _helpers_compute_invoice_financials(
-                                    inv,
-                                    settings_obj,
-                                    claim_obj,
-                                )
-                            except TypeError:
-                                fin = _helpers_compute_invoice_financials(inv)
-                except Exception:
-                    fin = None
-
-                if isinstance(fin, dict):
-                    total_val = fin.get("invoice_total") or fin.get("total") or 0.0
-                    try:
-                        entry["open_total"] += float(total_val or 0.0)
-                    except Exception:
-                        pass
-
-        # Compute uninvoiced totals (exclude NO BILL)
-        for cid in claim_ids:
-            entry = billing_summary.get(cid)
-            if not entry:
-                continue
-
-            claim_billables = billables_by_claim.get(cid, [])
-            for b in claim_billables:
-                if getattr(b, "invoice_id", None):
-                    continue
-
-                activity = (
-                    getattr(b, "activity_code", None)
-                    or getattr(b, "activity", None)
-                    or ""
-                ).upper()
-
-                if activity == "NO BILL":
-                    continue
-
-                qty = getattr(b, "quantity", None) or getattr(b, "qty", None)
-                if not qty:
-                    continue
-
-                try:
-                    qty_val = float(qty)
-                except Exception:
-                    continue
-
-                # Determine correct rate (telephonic-aware)
-                claim_obj = next((c for c in claims if c.id == cid), None)
-                if not claim_obj:
-                    continue
+    page_size = claims_list_service.normalize_page_size(
+        request.args.get("per_page") or claims_list_service.DEFAULT_PAGE_SIZE
+    )
+    settings = _ensure_settings()
+    dormant_threshold_days = settings.dormant_claim_days or 0
 
-                rate = (
-                    _ensure_settings().telephonic_rate
-                    if getattr(claim_obj, "is_telephonic", False)
-                    else _ensure_settings().hourly_rate
-                )
+    # Filters + keyset pagination run in SQL; only one page of claims is loaded.
+    page = claims_list_service.get_claims_page(
+        activity_filter=activity_filter,
+        billing_filter=billing_filter,
+        show_closed=show_closed,
+        dormant_threshold_days=dormant_threshold_days,
+        search=search_query,
+        page_size=page_size,
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+    claims = page.claims
 
-                try:
-                    entry["uninvoiced_total"] += qty_val * float(rate or 0.0)
-                except Exception:
-                    pass
+    # Dormant status calculation (one aggregated last-activity query for the page)
+    dormant_info = claim_activity_service.get_claim_dormancy(
+        [c.id for c in claims],
+        threshold_days=dormant_threshold_days,
+    )
 
-        # NOTE: old invoice counting loop removed because it is now handled above
+    # Billing summary per-claim (grouped rollup; constant query count per page)
+    billing_summary = claims_list_service.get_billing_summary(claims, settings)
 
     # Add claim_status_map (Open/Closed) for each claim
     claim_status_map: dict[int, str] = {c.id: "Open" for c in claims}
     if claims and _claim_has_is_closed_column():
         claim_ids = [c.id for c in claims]
         try:
+            # Expanding IN (not `= ANY(:ids)`) so this also runs on SQLite; a failure
+            # here rolls back the session and expires every claim on the page.
             rows = db.session.execute(
                 text(
                     """
                     SELECT id, COALESCE(is_closed, FALSE) AS is_closed
                     FROM claim
-                    WHERE id = ANY(:ids)
+                    WHERE id IN :ids
                     """
-                ),
+                ).bindparams(bindparam("ids", expanding=True)),
                 {"ids": claim_ids},
             ).fetchall()
             for rid, is_closed in rows:
@@ -788,45 +634,41 @@ def claims_list():
 
     today_value = today()
 
-    # Apply filters
-    filtered_claims = []
-    for c in claims:
-        info = dormant_info.get(c.id, {})
-        is_dormant = bool(info.get("is_dormant", False))
-
-        if activity_filter == "active" and is_dormant:
-            continue
-        if activity_filter == "dormant" and not is_dormant:
-            continue
-
-        summary = billing_summary.get(c.id, {"total": 0, "open": 0, "closed": 0})
-        total_inv = summary["total"]
-        open_inv = summary["open"]
-        closed_inv = summary["closed"]
-
-        if billing_filter == "none" and total_inv != 0:
-            continue
-        if billing_filter == "open" and open_inv <= 0:
-            continue
-        if billing_filter == "closed" and closed_inv <= 0:
-            continue
-
-        filtered_claims.append(c)
+    # Pager links keep the active filters; cursors replace each other.
+    pager_args = {
+        k: v
+        for k, v in request.args.items()
+        if k not in ("after", "before") and v not in (None, "")
+    }
+    next_url = (
+        url_for("main.claims_list", **{**pager_args, "after": page.next_cursor})
+        if page.next_cursor
+        else None
+    )
+    prev_url = (
+        url_for("main.claims_list", **{**pager_args, "before": page.prev_cursor})
+        if page.prev_cursor
+        else None
+    )
 
     return render_template(
         "claims_list.html",
         active_page="claims",
         page_title="Claims",
-        claims=filtered_claims,
+        claims=claims,
         billing_summary=billing_summary,
         dormant_info=dormant_info,
         activity_filter=activity_filter,
         status_filter=activity_filter,  # For backward compatibility in template
         billing_filter=billing_filter,
         show_closed=show_closed,
+        search_query=search_query,
         claim_status_map=claim_status_map,
         next_report_due_map=next_report_due_map,
         today=today_value,
+        page_size=page.page_size,
+        next_url=next_url,
+        prev_url=prev_url,
     )
 
 
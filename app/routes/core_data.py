@@ -24,7 +24,6 @@ from app.models import system_today, system_now
 
 from flask import flash, jsonify, redirect, render_template, request, url_for
 from jinja2 import TemplateNotFound
-from sqlalchemy import or_
 
 from app import db
 from app.models import Carrier, Claim, Contact, ContactRole, Employer, Invoice, Provider
@@ -557,22 +556,13 @@ def analysis_view():
     return analysis_index()
 
 
-@bp.route("/reporting", endpoint="reporting_dashboard")
-def reporting_dashboard():
-    """Reporting dashboard for AR / aging / open invoices.
+def _reporting_snapshot() -> dict:
+    """Unfiltered open-A/R figures for /reporting as plain (cacheable) data.
 
-    Template: reporting_dashboard.html
-    Supports optional drill-down filters:
-      - ?carrier=<carrier name>
-      - ?bucket=0-30|31-60|61-90|90+
+    Rows carry just the invoice/claim fields reporting_dashboard.html shows.
     """
-
-    settings = _ensure_settings()
     today = system_today()
 
-    carrier_filter = (request.args.get("carrier") or "").strip() or None
-    bucket_filter = (request.args.get("bucket") or "").strip() or None
-
     total_claims = Claim.query.count()
     total_invoices = Invoice.query.count()
     invoices = Invoice.query.all()
@@ -631,8 +621,8 @@ def reporting_dashboard():
 
         open_invoice_rows.append(
             {
-                "invoice": inv,
-                "claim": getattr(inv, "claim", None),
+                "invoice": {"id": inv.id, "invoice_number": inv.invoice_number, "status": inv.status},
+                "claim": {"claimant_name": inv.claim.claimant_name} if getattr(inv, "claim", None) else None,
                 "carrier_name": carrier_name,
                 "age_days": age_days,
                 "bucket": bucket_label,
@@ -640,6 +630,43 @@ def reporting_dashboard():
             }
         )
 
+    return {
+        "today": today,
+        "total_claims": total_claims,
+        "total_invoices": total_invoices,
+        "aging_buckets": aging_buckets,
+        "ar_by_carrier": ar_by_carrier,
+        "open_invoice_rows": open_invoice_rows,
+    }
+
+
+@bp.route("/reporting", endpoint="reporting_dashboard")
+def reporting_dashboard():
+    """Reporting dashboard for AR / aging / open invoices.
+
+    Template: reporting_dashboard.html
+    Supports optional drill-down filters:
+      - ?carrier=<carrier name>
+      - ?bucket=0-30|31-60|61-90|90+
+    """
+
+    settings = _ensure_settings()
+
+    carrier_filter = (request.args.get("carrier") or "").strip() or None
+    bucket_filter = (request.args.get("bucket") or "").strip() or None
+
+    # local import to avoid circulars
+    from ..services.context_cache import cached_context
+
+    # One cached snapshot serves every drill-down; filters are applied below.
+    snapshot = cached_context("reporting", {}, _reporting_snapshot)
+    today = snapshot["today"]
+    total_claims = snapshot["total_claims"]
+    total_invoices = snapshot["total_invoices"]
+    aging_buckets = snapshot["aging_buckets"]
+    ar_by_carrier = snapshot["ar_by_carrier"]
+    open_invoice_rows = snapshot["open_invoice_rows"]
+
     # Apply drill-down filters
     if carrier_filter or bucket_filter:
         filtered_rows = []
@@ -1716,23 +1743,13 @@ def api_contact_search():
     if not q:
         return jsonify([])
 
-    like = f"%{q}%"
-    query = Contact.query
+    # local import to avoid circulars
+    from ..services.search_index import search_entities
+
+    # Ranked hits from the search index (name / email / phone)
+    results = [c for _, c in search_entities(q, ["contact"], limit=25)]
     if parent_type and _contact_supports_polymorphic():
-        query = query.filter(Contact.parent_type == parent_type)
-
-    results = (
-        query.filter(
-            or_(
-                Contact.name.ilike(like),
-                Contact.email.ilike(like),
-                Contact.phone.ilike(like),
-            )
-        )
-        .order_by(Contact.name.asc())
-        .limit(25)
-        .all()
-    )
+        results = [c for c in results if c.parent_type == parent_type]
 
     payload = []
     for c in results:
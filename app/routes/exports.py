@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from flask import abort, current_app, flash, redirect, send_file, url_for
+from sqlalchemy import func, or_
+
+from . import bp  # use the already-registered main blueprint
+from .helpers import documents_root, safe_filename
+from app.models import Carrier, Claim, Invoice, Report
+from app.services import job_queue
+from app.services.job_queue import job_handler
+from app.services.pdf_export import PdfExportItem, build_export_zip
+
+
+# Invoices still owed by the carrier (everything except these statuses).
+CLOSED_INVOICE_STATUSES = ("paid", "void")
+
+# Finished export ZIPs older than this are removed when a new export starts.
+DEFAULT_EXPORT_RETENTION_HOURS = 48
+
+_EXPORT_NAME_RE = re.compile(r"^[A-Za-z0-9._\-]+\.zip$")
+
+
+# -----------------------------------------------------------------------------
+# Batch PDF export (claim documents, carrier open invoices)
+# -----------------------------------------------------------------------------
+
+
+def _exports_dir() -> Path:
+    folder = documents_root() / "exports"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def _prune_old_exports(folder: Path) -> None:
+    hours = current_app.config.get("PDF_EXPORT_RETENTION_HOURS", DEFAULT_EXPORT_RETENTION_HOURS)
+    cutoff = time.time() - float(hours) * 3600.0
+    for path in folder.glob("*.zip*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def _claim_export_items(claim: Claim) -> List[PdfExportItem]:
+    """Every report and invoice PDF for a claim (reports/, invoices/ in the ZIP)."""
+    from .invoices import _invoice_pdf_export_item  # local import to avoid circulars
+    from .reports import _report_pdf_export_item  # local import to avoid circulars
+
+    reports = Report.query.filter_by(claim_id=claim.id).order_by(Report.id.asc()).all()
+    invoices = Invoice.query.filter_by(claim_id=claim.id).order_by(Invoice.id.asc()).all()
+    items = [_report_pdf_export_item(claim, r) for r in reports]
+    items += [_invoice_pdf_export_item(inv) for inv in invoices]
+    return items
+
+
+def _carrier_open_invoices(carrier: Carrier) -> List[Invoice]:
+    """Unpaid, non-void invoices billed to the carrier (directly or via the claim's carrier)."""
+    return (
+        Invoice.query.join(Claim, Invoice.claim_id == Claim.id)
+        .filter(
+            or_(
+                Invoice.carrier_id == carrier.id,
+                (Invoice.carrier_id.is_(None)) & (Claim.carrier_id == carrier.id),
+            ),
+            func.lower(func.coalesce(Invoice.status, "draft")).notin_(CLOSED_INVOICE_STATUSES),
+        )
+        .order_by(Invoice.invoice_date.asc(), Invoice.id.asc())
+        .all()
+    )
+
+
+def _carrier_export_items(carrier: Carrier) -> List[PdfExportItem]:
+    from .invoices import _invoice_pdf_export_item  # local import to avoid circulars
+
+    return [_invoice_pdf_export_item(inv, folder="") for inv in _carrier_open_invoices(carrier)]
+
+
+def _export_target(scope: str, target_id: int) -> Tuple[str, List[PdfExportItem]]:
+    """Return (zip base name, export items) for a scope ("claim" or "carrier")."""
+    if scope == "claim":
+        claim = Claim.query.get(target_id)
+        if claim is None:
+            raise LookupError(f"Claim {target_id} not found")
+        label = claim.claim_number or f"claim_{claim.id}"
+        return f"Claim-{label}-PDFs", _claim_export_items(claim)
+    if scope == "carrier":
+        carrier = Carrier.query.get(target_id)
+        if carrier is None:
+            raise LookupError(f"Carrier {target_id} not found")
+        return f"{carrier.name or f'carrier_{carrier.id}'}-Open-Invoices", _carrier_export_items(carrier)
+    raise ValueError(f"Unknown export scope {scope!r}")
+
+
+def run_pdf_export(
+    scope: str,
+    target_id: int,
+    *,
+    out_path: Optional[str] = None,
+    progress: Optional[Callable[[int, int, Optional[str]], None]] = None,
+) -> dict:
+    """Build the export ZIP for a claim/carrier; shared by the job handler and the CLI.
+
+    Requires an app context. Without `out_path` the ZIP goes to
+    DOCUMENTS_ROOT/exports (older exports there are pruned first).
+    """
+    base_name, items = _export_target(scope, target_id)
+    if out_path is None:
+        folder = _exports_dir()
+        _prune_old_exports(folder)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out_path = str(folder / f"{safe_filename(base_name, fallback='export')}-{stamp}.zip")
+
+    if progress is not None:
+        progress(0, len(items), "Preparing documents")
+    return build_export_zip(items, out_path, progress=progress)
+
+
+@job_handler("pdf_export")
+def _job_pdf_export(payload: dict) -> dict:
+    """Render (or reuse) every PDF in scope and bundle them into one ZIP."""
+    summary = run_pdf_export(
+        payload["scope"],
+        int(payload["target_id"]),
+        progress=job_queue.report_progress,
+    )
+    filename = os.path.basename(summary["path"])
+    message = f"Exported {summary['added']} of {summary['total']} PDF(s)."
+    warnings = [f"{f['name']} failed ({f['error']})." for f in summary["failed"]]
+    return {
+        "message": message,
+        "warnings": warnings,
+        "filename": filename,
+        "download_url": url_for("main.pdf_export_download", filename=filename),
+        "auto_download": True,
+        "total": summary["total"],
+        "cached": summary["cached"],
+        "rendered": summary["rendered"],
+        "size_bytes": summary["size_bytes"],
+    }
+
+
+def _enqueue_export(scope: str, target_id: int):
+    return job_queue.enqueue(
+        "pdf_export",
+        {"scope": scope, "target_id": target_id},
+        # a batch that failed twice needs a human (Chromium, disk), not more retries
+        max_attempts=2,
+    )
+
+
+@bp.route("/claims/<int:claim_id>/export/pdfs", methods=["POST"])
+def claim_pdf_export(claim_id: int):
+    """Queue a ZIP of every report and invoice PDF for the claim."""
+    claim = Claim.query.get_or_404(claim_id)
+    if not (claim.reports or claim.invoices):
+        flash("This claim has no reports or invoices to export.", "info")
+        return redirect(url_for("main.claim_detail", claim_id=claim.id))
+
+    job = _enqueue_export("claim", claim.id)
+    flash("Export started. The ZIP will download when it is ready.", "info")
+    return redirect(url_for("main.claim_detail", claim_id=claim.id, job=job.id))
+
+
+@bp.route("/carriers/<int:carrier_id>/export/open-invoices", methods=["POST"])
+def carrier_open_invoices_export(carrier_id: int):
+    """Queue a ZIP of every open (not Paid/Void) invoice PDF for the carrier."""
+    carrier = Carrier.query.get_or_404(carrier_id)
+    if not _carrier_open_invoices(carrier):
+        flash("This carrier has no open invoices to export.", "info")
+        return redirect(url_for("main.carrier_detail", carrier_id=carrier.id))
+
+    job = _enqueue_export("carrier", carrier.id)
+    flash("Export started. The ZIP will download when it is ready.", "info")
+    return redirect(url_for("main.carrier_detail", carrier_id=carrier.id, job=job.id))
+
+
+@bp.route("/exports/<path:filename>")
+def pdf_export_download(filename: str):
+    """Stream a finished export ZIP from DOCUMENTS_ROOT/exports."""
+    if not _EXPORT_NAME_RE.match(filename):
+        abort(404)
+    path = _exports_dir() / filename
+    if not path.is_file():
+        abort(404)
+    return send_file(path, mimetype="application/zip", as_attachment=True, download_name=filename)
@@ -22,14 +22,13 @@ from flask import (
     current_app,
     session,
 )
-from playwright.sync_api import sync_playwright
-
-from sqlalchemy import or_
 
 from . import bp
 from app import db
 from app.models import Settings
-from app.models import Carrier, Employer, Provider, Claim, Contact, ContactRole
+from app.services.pdf_service import render_pdf_from_html
+from app.services.search_index import search_entities
+from app.models import Carrier, Employer, Provider, Claim, ContactRole
 
 
 
@@ -179,19 +178,6 @@ def _fmt_address(obj) -> str:
     return ", ".join([p for p in parts if p])
 
 
-def _safe_or_ilike(model, term: str, fields: list[str]):
-    """Build an OR( col ILIKE %term% ) across existing columns only."""
-    clauses = []
-    for f in fields:
-        col = getattr(model, f, None)
-        if col is not None:
-            try:
-                clauses.append(col.ilike(f"%{term}%"))
-            except Exception:
-                pass
-    return or_(*clauses) if clauses else None
-
-
 # Helper: get first non-empty value from form/args for any alias key
 def _get_form_or_args(*keys: str) -> str:
     """Return first non-empty value from request.form/request.args for any of the given keys."""
@@ -268,41 +254,58 @@ def _fax_cover_payload_from_request(settings: Settings) -> dict:
     }
 
 
-def _playwright_pdf_from_url(url: str, *, page_size: str = "Letter") -> bytes:
-    """Render the given URL to PDF via headless Chromium and return PDF bytes."""
+def _render_fax_cover_print_html(settings: Settings, claim: Claim | None, payload: dict) -> str:
+    """Render forms/fax_cover_print.html (shared by the print views and PDF routes)."""
 
-    # Keep timeouts conservative to avoid hanging a request.
-    nav_timeout_ms = int(current_app.config.get("PDF_NAV_TIMEOUT_MS", 20_000))
-    pdf_timeout_ms = int(current_app.config.get("PDF_RENDER_TIMEOUT_MS", 20_000))
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-            ],
-        )
-        context = browser.new_context()
-        page = context.new_page()
-        page.set_default_navigation_timeout(nav_timeout_ms)
-        page.set_default_timeout(nav_timeout_ms)
-
-        # Ensure we only return once the page is fully rendered.
-        page.goto(url, wait_until="networkidle")
-        # Bump timeout for the render step (some Playwright versions don't accept timeout= on page.pdf)
-        page.set_default_timeout(pdf_timeout_ms)
-        pdf_bytes = page.pdf(
-            format=page_size,
-            print_background=True,
-            margin={"top": "0.5in", "right": "0.5in", "bottom": "0.5in", "left": "0.5in"},
-        )
+    return render_template(
+        "forms/fax_cover_print.html",
+        active_page="forms",
+        claim=claim,
+        settings=settings,
+        logo_url=_settings_logo_url(settings),
+        now=_now_local(settings).strftime("%m/%d/%Y %I:%M %p"),
+        to_name=payload["to_name"],
+        to_fax=payload["to_fax"],
+        to_phone=payload["to_phone"],
+        to_email=payload["to_email"],
+        from_name=payload["from_name"],
+        from_case_manager=payload["from_case_manager"],
+        from_phone=payload["from_phone"],
+        from_fax=payload["from_fax"],
+        from_email=payload["from_email"],
+        pages=payload["pages"],
+        subject=payload["subject"],
+        contents=payload["contents"],
+        message=payload["message"],
+        to=payload["to_name"],
+    )
 
-        context.close()
-        browser.close()
 
-    return pdf_bytes
+def _render_face_sheet_print_html(settings: Settings, claim: Claim) -> str:
+    """Render forms/face_sheet_print.html (shared by the print view and PDF route)."""
+
+    return render_template(
+        "forms/face_sheet_print.html",
+        active_page="forms",
+        settings=settings,
+        claim=claim,
+        logo_url=_settings_logo_url(settings),
+        now=_now_local(settings).strftime("%m/%d/%Y %I:%M %p"),
+    )
+
+
+def _playwright_pdf_from_html(html: str, *, label: str, page_size: str = "Letter") -> bytes:
+    """Render in-process print HTML to PDF via the shared headless Chromium and return PDF bytes."""
+
+    # Keep timeouts conservative to avoid hanging a request.
+    return render_pdf_from_html(
+        html,
+        label=label,
+        page_format=page_size,
+        margin={"top": "0.5in", "right": "0.5in", "bottom": "0.5in", "left": "0.5in"},
+        nav_timeout_ms=int(current_app.config.get("PDF_NAV_TIMEOUT_MS", 20_000)),
+        pdf_timeout_ms=int(current_app.config.get("PDF_RENDER_TIMEOUT_MS", 20_000)),
+    )
 
 
 @bp.route("/forms/fax-cover/<int:claim_id>/pdf", methods=["GET", "POST"])
@@ -315,29 +318,12 @@ def fax_cover_pdf(claim_id: int):
     # Use helper to normalize payload
     payload = _fax_cover_payload_from_request(settings)
     _fax_save_to_session(claim.id, payload)
-    # IMPORTANT: generate PDF from the real print URL (same HTML as preview),
-    # so static assets (logo/CSS) load correctly and PDF matches preview.
-    print_url = url_for(
-        "main.fax_cover_print",
-        claim_id=claim.id,
-        _external=True,
-        to_name=payload["to_name"],
-        to_fax=payload["to_fax"],
-        to_phone=payload["to_phone"],
-        to_email=payload["to_email"],
-        from_name=payload["from_name"],
-        from_case_manager=payload["from_case_manager"],
-        from_phone=payload["from_phone"],
-        from_fax=payload["from_fax"],
-        from_email=payload["from_email"],
-        pages=payload["pages"],
-        subject=payload["subject"],
-        message=payload["message"],
-        contents=payload["contents"],
-    )
+    # IMPORTANT: generate PDF from the same HTML as the print preview; pdf_service
+    # inlines static assets (logo/CSS) so the PDF matches preview.
+    html = _render_fax_cover_print_html(settings, claim, payload)
 
     try:
-        pdf_bytes = _playwright_pdf_from_url(print_url)
+        pdf_bytes = _playwright_pdf_from_html(html, label=f"fax cover (claim {claim.id})")
     except Exception as e:
         flash(f"Could not generate PDF: {e}", "error")
         return redirect(url_for("main.fax_cover_edit", claim_id=claim.id))
@@ -402,19 +388,8 @@ def api_face_sheet_search():
         return jsonify({"results": []})
 
     try:
-        clause = or_(
-            Claim.claim_number.ilike(f"%{q}%"),
-            Claim.claimant_first_name.ilike(f"%{q}%"),
-            Claim.claimant_last_name.ilike(f"%{q}%"),
-        )
-
-        matches = (
-            Claim.query
-            .filter(clause)
-            .order_by(Claim.id.desc())
-            .limit(25)
-            .all()
-        )
+        # Ranked hits from the search index (claim number / claimant first / last name)
+        matches = [c for _, c in search_entities(q, ["claim"], limit=25)]
 
         results = []
         for c in matches:
@@ -446,17 +421,7 @@ def forms_face_sheet():
     claims = []
     if len(q) >= 2:
         try:
-            search_clause = or_(
-                Claim.claim_number.ilike(f"%{q}%"),
-                Claim.claimant_first_name.ilike(f"%{q}%"),
-                Claim.claimant_last_name.ilike(f"%{q}%"),
-            )
-            claims = (
-                Claim.query.filter(search_clause)
-                .order_by(Claim.id.desc())
-                .limit(25)
-                .all()
-            )
+            claims = [c for _, c in search_entities(q, ["claim"], limit=25)]
         except Exception:
             claims = []
 
@@ -478,14 +443,7 @@ def face_sheet_print(claim_id: int):
     settings = _ensure_settings()
     claim = Claim.query.get_or_404(claim_id)
 
-    return render_template(
-        "forms/face_sheet_print.html",
-        active_page="forms",
-        settings=settings,
-        claim=claim,
-        logo_url=_settings_logo_url(settings),
-        now=_now_local(settings).strftime("%m/%d/%Y %I:%M %p"),
-    )
+    return _render_face_sheet_print_html(settings, claim)
 
 
 @bp.route("/forms/face-sheet/<int:claim_id>/pdf")
@@ -497,14 +455,11 @@ def face_sheet_pdf(claim_id: int):
     settings = _ensure_settings()
     claim = Claim.query.get_or_404(claim_id)
 
-    print_url = url_for(
-        "main.face_sheet_print",
-        claim_id=claim.id,
-        _external=True,
-    )
-
     try:
-        pdf_bytes = _playwright_pdf_from_url(print_url)
+        pdf_bytes = _playwright_pdf_from_html(
+            _render_face_sheet_print_html(settings, claim),
+            label=f"face sheet (claim {claim.id})",
+        )
     except Exception as e:
         flash(f"Could not generate PDF: {e}", "error")
         return redirect(url_for("main.forms_face_sheet"))
@@ -555,11 +510,17 @@ def api_fax_cover_search():
             }
         )
 
-    # Providers
+    # One ranked query over the search index; hits are loaded by primary key.
     try:
-        clause = _safe_or_ilike(Provider, term, ["name", "city", "email", "phone"])  # type: ignore[name-defined]
-        if clause is not None:
-            for p in Provider.query.filter(clause).order_by(Provider.name.asc()).limit(20).all():
+        hits = search_entities(term, ["provider", "employer", "carrier", "claimant", "contact"], limit=60)
+    except Exception:
+        hits = []
+
+    role_map = None
+    for kind, obj in hits:
+        try:
+            if kind == "provider":
+                p = obj
                 p_name = (getattr(p, "name", "") or "").strip()
                 p_spec = (getattr(p, "specialty", "") or "").strip()
                 if p_spec:
@@ -574,60 +535,20 @@ def api_fax_cover_search():
                     fax=(getattr(p, "fax", "") or "").strip(),
                     email=(getattr(p, "email", "") or "").strip(),
                 )
-    except Exception:
-        pass
 
-    # Employers
-    try:
-        clause = _safe_or_ilike(Employer, term, ["name", "city", "email", "phone"])  # type: ignore[name-defined]
-        if clause is not None:
-            for e in Employer.query.filter(clause).order_by(Employer.name.asc()).limit(20).all():
+            elif kind in ("employer", "carrier"):
                 add_result(
-                    kind="employer",
-                    display=f"{(getattr(e, 'name', '') or '').strip()} (Employer)",
-                    name=(getattr(e, "name", "") or "").strip(),
-                    phone=_fmt_phone(getattr(e, "phone", None), getattr(e, "phone_ext", None)),
-                    fax=(getattr(e, "fax", "") or "").strip(),
-                    email=(getattr(e, "email", "") or "").strip(),
+                    kind=kind,
+                    display=f"{(getattr(obj, 'name', '') or '').strip()} ({kind.title()})",
+                    name=(getattr(obj, "name", "") or "").strip(),
+                    phone=_fmt_phone(getattr(obj, "phone", None), getattr(obj, "phone_ext", None)),
+                    fax=(getattr(obj, "fax", "") or "").strip(),
+                    email=(getattr(obj, "email", "") or "").strip(),
                 )
-    except Exception:
-        pass
 
-    # Carriers
-    try:
-        clause = _safe_or_ilike(Carrier, term, ["name", "city", "email", "phone"])  # type: ignore[name-defined]
-        if clause is not None:
-            for c in Carrier.query.filter(clause).order_by(Carrier.name.asc()).limit(20).all():
-                add_result(
-                    kind="carrier",
-                    display=f"{(getattr(c, 'name', '') or '').strip()} (Carrier)",
-                    name=(getattr(c, "name", "") or "").strip(),
-                    phone=_fmt_phone(getattr(c, "phone", None), getattr(c, "phone_ext", None)),
-                    fax=(getattr(c, "fax", "") or "").strip(),
-                    email=(getattr(c, "email", "") or "").strip(),
-                )
-    except Exception:
-        pass
-
-    # Claimants (Claims)
-    try:
-        # Support a couple possible claimant name fields.
-        claimant_clause = None
-        if hasattr(Claim, "claimant"):
-            claimant_clause = Claim.claimant.ilike(f"%{term}%")
-            claimant_name_field = "claimant"
-        elif hasattr(Claim, "claimant_name"):
-            claimant_clause = Claim.claimant_name.ilike(f"%{term}%")
-            claimant_name_field = "claimant_name"
-        elif hasattr(Claim, "claimant_full_name"):
-            claimant_clause = Claim.claimant_full_name.ilike(f"%{term}%")
-            claimant_name_field = "claimant_full_name"
-        else:
-            claimant_name_field = ""
-
-        if claimant_clause is not None:
-            for cl in Claim.query.filter(claimant_clause).order_by(Claim.id.desc()).limit(20).all():
-                nm = (getattr(cl, claimant_name_field, "") or "").strip() if claimant_name_field else ""
+            elif kind == "claimant":
+                cl = obj
+                nm = (getattr(cl, "claimant_name", "") or "").strip()
                 add_result(
                     kind="claimant",
                     display=f"{nm} (Claimant)",
@@ -636,16 +557,11 @@ def api_fax_cover_search():
                     fax="",
                     email=(getattr(cl, "claimant_email", "") or "").strip(),
                 )
-    except Exception:
-        pass
-
-    # Contacts (role + parent entity)
-    try:
-        role_map = {r.id: (r.label or "").strip() for r in ContactRole.query.all()}
 
-        contact_clause = _safe_or_ilike(Contact, term, ["name", "first_name", "last_name", "email", "phone"])  # type: ignore[name-defined]
-        if contact_clause is not None:
-            for ct in Contact.query.filter(contact_clause).order_by(Contact.id.desc()).limit(30).all():
+            elif kind == "contact":
+                ct = obj
+                if role_map is None:
+                    role_map = {r.id: (r.label or "").strip() for r in ContactRole.query.all()}
                 base_name = (getattr(ct, "name", "") or "").strip()
                 if not base_name:
                     fn = (getattr(ct, "first_name", "") or "").strip()
@@ -688,8 +604,8 @@ def api_fax_cover_search():
                     fax=(getattr(ct, "fax", "") or "").strip(),
                     email=(getattr(ct, "email", "") or "").strip(),
                 )
-    except Exception:
-        pass
+        except Exception:
+            continue
 
     # De-dupe by label (or display) + kind
     seen = set()
@@ -775,28 +691,7 @@ def fax_cover_print_standalone():
     payload = _fax_cover_payload_from_request(settings)
     _fax_save_to_session(None, payload)
 
-    return render_template(
-        "forms/fax_cover_print.html",
-        active_page="forms",
-        claim=None,
-        settings=settings,
-        logo_url=_settings_logo_url(settings),
-        now=_now_local(settings).strftime("%m/%d/%Y %I:%M %p"),
-        to_name=payload["to_name"],
-        to_fax=payload["to_fax"],
-        to_phone=payload["to_phone"],
-        to_email=payload["to_email"],
-        from_name=payload["from_name"],
-        from_case_manager=payload["from_case_manager"],
-        from_phone=payload["from_phone"],
-        from_fax=payload["from_fax"],
-        from_email=payload["from_email"],
-        pages=payload["pages"],
-        subject=payload["subject"],
-        contents=payload["contents"],
-        message=payload["message"],
-        to=payload["to_name"],
-    )
+    return _render_fax_cover_print_html(settings, None, payload)
 
 
 # Standalone (no-claim) Fax Cover Sheet PDF route
@@ -808,27 +703,11 @@ def fax_cover_pdf_standalone():
     payload = _fax_cover_payload_from_request(settings)
     _fax_save_to_session(None, payload)
 
-    # IMPORTANT: generate PDF from the real print URL (same HTML as preview)
-    print_url = url_for(
-        "main.fax_cover_print_standalone",
-        _external=True,
-        to_name=payload["to_name"],
-        to_fax=payload["to_fax"],
-        to_phone=payload["to_phone"],
-        to_email=payload["to_email"],
-        from_name=payload["from_name"],
-        from_case_manager=payload["from_case_manager"],
-        from_phone=payload["from_phone"],
-        from_fax=payload["from_fax"],
-        from_email=payload["from_email"],
-        pages=payload["pages"],
-        subject=payload["subject"],
-        message=payload["message"],
-        contents=payload["contents"],
-    )
+    # IMPORTANT: generate PDF from the same HTML as the print preview
+    html = _render_fax_cover_print_html(settings, None, payload)
 
     try:
-        pdf_bytes = _playwright_pdf_from_url(print_url)
+        pdf_bytes = _playwright_pdf_from_html(html, label="fax cover")
     except Exception as e:
         flash(f"Could not generate PDF: {e}", "error")
         return redirect(url_for("main.forms_fax_cover"))
@@ -904,25 +783,4 @@ def fax_cover_print(claim_id: int):
     payload = _fax_cover_payload_from_request(settings)
     _fax_save_to_session(claim.id, payload)
 
-    return render_template(
-        "forms/fax_cover_print.html",
-        active_page="forms",
-        claim=claim,
-        settings=settings,
-        logo_url=_settings_logo_url(settings),
-        now=_now_local(settings).strftime("%m/%d/%Y %I:%M %p"),
-        to_name=payload["to_name"],
-        to_fax=payload["to_fax"],
-        to_phone=payload["to_phone"],
-        to_email=payload["to_email"],
-        from_name=payload["from_name"],
-        from_case_manager=payload["from_case_manager"],
-        from_phone=payload["from_phone"],
-        from_fax=payload["from_fax"],
-        from_email=payload["from_email"],
-        pages=payload["pages"],
-        subject=payload["subject"],
-        contents=payload["contents"],
-        message=payload["message"],
-        to=payload["to_name"],
-    )
\ No newline at end of file
+    return _render_fax_cover_print_html(settings, claim, payload)
\ No newline at end of file
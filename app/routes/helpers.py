@@ -10,10 +10,13 @@ Intentionally **no Blueprint routes** should live here.
 
 from __future__ import annotations
 
+import json
 import os
+import queue
 import re
 import subprocess
 import random
+import threading
 from datetime import date, datetime, timezone
 
 # -----------------------------------------------------------------------------
@@ -36,10 +39,10 @@ def _today_local(settings=None):
     """Return the current date in the server's local timezone."""
     return _now_local(settings).date()
 from pathlib import Path
-from typing import Any, Iterable, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 
 
-from flask import current_app
+from flask import Response, copy_current_request_context, current_app, stream_with_context
 from markupsafe import Markup, escape
 
 # Public exports used by route modules and templates
@@ -77,6 +80,7 @@ __all__ = [
     "open_folder_in_file_manager",
     "shutil_which",
     "build_basic_ics",
+    "sse_token_stream",
     "_coerce_float",
 ]
 
@@ -426,36 +430,14 @@ def _generate_invoice_number(prefix: str = "INV") -> str:
         YY  = 2-digit year
         ### = zero-padded global sequence for that year (001, 002, ...)
 
-    This is system-wide (not per-claim).
+    This is system-wide (not per-claim). The number is reserved through a
+    per-year counter row in the caller's transaction (see
+    app.services.invoice_numbers), so concurrent creations never collide.
     """
 
-    from app.extensions import db
-    from app.models import Invoice
-
-    today = _today_local()
-    year_short = today.strftime("%y")
-    year_prefix = f"{prefix}-{year_short}-"
-
-    # Find all invoices for this year by prefix match
-    existing = (
-        db.session.query(Invoice)
-        .filter(Invoice.invoice_number.like(f"{year_prefix}%"))
-        .all()
-    )
+    from app.services.invoice_numbers import allocate_invoice_number
 
-    max_seq = 0
-    for inv in existing:
-        try:
-            parts = inv.invoice_number.split("-")
-            if len(parts) >= 3 and parts[1] == year_short:
-                seq = int(parts[2])
-                if seq > max_seq:
-                    max_seq = seq
-        except Exception:
-            continue
-
-    next_seq = max_seq + 1
-    return f"{year_prefix}{next_seq:03d}"
+    return allocate_invoice_number(prefix, on=_today_local())
 
 
 def _iter_invoice_items(invoice) -> Iterable[Any]:
@@ -955,4 +937,70 @@ def build_basic_ics(
         lines.append(f"DESCRIPTION:{_esc(description)}")
 
     lines.extend(["END:VEVENT", "END:VCALENDAR", ""])
-    return "\r\n".join(lines)
\ No newline at end of file
+    return "\r\n".join(lines)
+
+
+# -----------------------------------------------------------------------------
+# Server-Sent Events for streamed LLM output
+# -----------------------------------------------------------------------------
+
+SSE_KEEPALIVE_SECONDS = 10.0
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_token_stream(produce: Callable[[], Dict[str, Any]], *, label: str = "stream") -> Response:
+    """Run `produce()` in a worker thread and stream its LLM tokens as SSE.
+
+    Events, in order:
+      token  {"text": "<chunk>"}            one per model chunk (may be none)
+      done   produce()'s dict + "ttft_ms"   the final, authoritative result
+      error  {"ok": false, "error": ...}    instead of done, if produce() raised
+
+    The UI renders tokens as they arrive and replaces them with the `done`
+    payload (a caller may call the model more than once, e.g. to retry).
+    Session changes made by `produce()` are not saved: the response headers
+    are already sent by then.
+    """
+    from app.ai.llm import stream_tokens  # local import to avoid circulars
+
+    events: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+    started = time.monotonic()
+
+    @copy_current_request_context
+    def _worker():
+        try:
+            with stream_tokens(lambda chunk: events.put(("token", {"text": chunk}))):
+                result = produce()
+            events.put(("done", result))
+        except Exception as e:
+            current_app.logger.exception("%s failed", label)
+            events.put(("error", {"ok": False, "error": str(e), "type": e.__class__.__name__}))
+
+    threading.Thread(target=_worker, name=f"sse-{label}", daemon=True).start()
+
+    def _generate():
+        ttft_ms = None
+        while True:
+            try:
+                event, data = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if event == "token" and ttft_ms is None:
+                ttft_ms = int((time.monotonic() - started) * 1000)
+            if event != "token":
+                total_ms = int((time.monotonic() - started) * 1000)
+                current_app.logger.info("[%s] ttft=%sms total=%sms", label, ttft_ms, total_ms)
+                data = {**data, "ttft_ms": ttft_ms}
+            yield _sse_event(event, data)
+            if event != "token":
+                return
+
+    return Response(
+        stream_with_context(_generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -20,7 +20,7 @@ from datetime import date, datetime
 from .forms import _now_local as system_now, _today_local as system_today
 from typing import Optional
 
-from flask import current_app, flash, redirect, render_template, request, send_file, url_for
+from flask import current_app, flash, jsonify, redirect, render_template, request, send_file, url_for
 from sqlalchemy import func
 
 from .. import db
@@ -37,11 +37,14 @@ try:
 except Exception:  # pragma: no cover
     DocumentArtifact = None  # type: ignore
 
-# Optional Playwright import for server-side Chromium PDF generation.
-try:
-    from playwright.sync_api import sync_playwright
-except Exception:  # pragma: no cover
-    sync_playwright = None
+# Server-side Chromium PDF generation (shared warm browser; Playwright optional).
+from app.services.invoice_numbers import note_issued_number
+from app.services.pdf_cache import find_cached_pdf, pdf_fingerprint, record_pdf_artifact
+from app.services.pdf_export import PdfExportItem
+from app.services.pdf_service import ZERO_MARGIN, prepare_html_for_pdf, render_pdf_from_html
+
+from app.services import job_queue
+from app.services.job_queue import job_handler
 
 # Payments are defined in some versions of this project; keep optional.
 try:
@@ -678,68 +681,180 @@ def _get_invoice_pdf_path(invoice: Invoice, filename: str) -> str:
 
 
 
-# New: Playwright PDF rendering from print URL
-def _render_pdf_from_url_playwright(url: str) -> bytes:
-    """Render the given URL to PDF using headless Chromium (Playwright).
+# Playwright PDF rendering from the in-process print HTML
+INVOICE_PDF_OPTIONS = {
+    "page_format": "Letter",
+    "margin": ZERO_MARGIN,
+    "prefer_css_page_size": True,
+    "emulate_print": True,
+}
+
+
+def _render_invoice_pdf(invoice, *, html: Optional[str] = None) -> bytes:
+    """Render an invoice to PDF bytes using the shared headless Chromium (Playwright).
 
     Notes:
-    - Synchronous; acceptable for this single-user app.
-    - Copies request cookies so authenticated print pages render.
+    - Renders invoice_print.html in-process and hands it to Chromium directly, so
+      no second request (and no cookie copying) is needed.
+    - Pass `html` when it was already rendered (e.g. for fingerprinting).
     """
-    if sync_playwright is None:
-        raise RuntimeError("Playwright is not available")
+    return render_pdf_from_html(
+        html if html is not None else _render_invoice_print_html(invoice),
+        label=f"invoice {invoice.id}",
+        **INVOICE_PDF_OPTIONS,
+    )
 
-    cookies = []
-    try:
-        for name, value in (request.cookies or {}).items():
-            cookies.append({"name": name, "value": value, "url": request.host_url})
-    except Exception:
-        cookies = []
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
+def _invoice_pdf_fingerprint(invoice, html: Optional[str] = None) -> str:
+    """Fingerprint of everything printed on the invoice PDF (see pdf_cache)."""
+    if html is None:
+        html = _render_invoice_print_html(invoice)
+    return pdf_fingerprint(html, **INVOICE_PDF_OPTIONS)
 
-        if cookies:
-            try:
-                context.add_cookies(cookies)
-            except Exception:
-                pass
+def _store_invoice_pdf(invoice, filename: str, pdf_bytes: bytes, *, fingerprint: Optional[str] = None) -> str:
+    """Write an invoice PDF to the invoices folder and record DocumentArtifact metadata.
 
-        page = context.new_page()
-        page.goto(url, wait_until="networkidle")
+    Also refreshes the human-readable claim projection. Raises if the file cannot
+    be written; projection/artifact bookkeeping failures are swallowed.
+    """
+    pdf_path = _get_invoice_pdf_path(invoice, filename)
+    with open(pdf_path, "wb") as f:
+        f.write(pdf_bytes)
 
+    # Refresh human-readable SMB projection for this claim
+    if update_claim_projection:
         try:
-            page.emulate_media(media="print")
+            update_claim_projection(invoice.claim)
         except Exception:
             pass
 
-        pdf_bytes = page.pdf(
-            format="Letter",
-            print_background=True,
-            prefer_css_page_size=True,
-            margin={
-                "top": "0in",
-                "right": "0in",
-                "bottom": "0in",
-                "left": "0in",
-            },
-        )
+    # The render-input fingerprint lets identical invoices be served from disk
+    record_pdf_artifact(
+        claim_id=invoice.claim_id,
+        invoice_id=invoice.id,
+        artifact_type="invoice_pdf",
+        filename=filename,
+        path=pdf_path,
+        fingerprint=fingerprint,
+    )
 
+    return pdf_path
+
+
+def _invoice_pdf_export_item(invoice, *, folder: str = "invoices") -> PdfExportItem:
+    """Batch export entry for an invoice: the cached PDF if current, else HTML to render."""
+    filename = _invoice_pdf_filename(invoice)
+    pdf_path = _get_invoice_pdf_path(invoice, filename)
+    arcname = f"{folder}/{filename}" if folder else filename
+
+    html = _render_invoice_print_html(invoice)
+    fingerprint = _invoice_pdf_fingerprint(invoice, html)
+    if find_cached_pdf("invoice_pdf", fingerprint, expected_path=pdf_path, invoice_id=invoice.id):
+        return PdfExportItem(arcname=arcname, label=f"invoice {invoice.id}", path=pdf_path)
+    return PdfExportItem(
+        arcname=arcname,
+        label=f"invoice {invoice.id}",
+        html=prepare_html_for_pdf(html),
+        render_options=INVOICE_PDF_OPTIONS,
+        store=lambda pdf_bytes: _store_invoice_pdf(invoice, filename, pdf_bytes, fingerprint=fingerprint),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Background jobs (invoice PDF render, invoice email)
+# -----------------------------------------------------------------------------
+
+def _job_load_invoice(payload: dict):
+    invoice = Invoice.query.get(payload.get("invoice_id"))
+    if invoice is None:
+        raise LookupError(f"Invoice {payload.get('invoice_id')} not found")
+    return invoice
+
+
+@job_handler("invoice_pdf")
+def _job_invoice_pdf(payload: dict) -> dict:
+    """Render and store an invoice PDF."""
+    invoice = _job_load_invoice(payload)
+    filename = _invoice_pdf_filename(invoice)
+    html = _render_invoice_print_html(invoice)
+    fingerprint = _invoice_pdf_fingerprint(invoice, html)
+    pdf_path = _get_invoice_pdf_path(invoice, filename)
+    if not find_cached_pdf("invoice_pdf", fingerprint, expected_path=pdf_path, invoice_id=invoice.id):
+        _store_invoice_pdf(invoice, filename, _render_invoice_pdf(invoice, html=html), fingerprint=fingerprint)
+    return {
+        "message": "Invoice PDF is ready.",
+        "filename": filename,
+        "download_url": url_for("main.invoice_pdf_invoices", invoice_id=invoice.id),
+    }
+
+
+def _reverted_note(status) -> str:
+    """Flash/job text for an invoice whose status was put back to `status`."""
+    return f"Invoice reverted to {status}." if status else "Invoice status cleared."
+
+
+def _invoice_email_failed(payload: dict, error: str) -> dict:
+    """Retries exhausted: put the invoice back the way it was before 'Send'."""
+    original_status = payload.get("original_status")
+    invoice = Invoice.query.get(payload.get("invoice_id"))
+    if invoice is not None:
+        invoice.status = original_status
+        raw_date = payload.get("original_date")
+        invoice.invoice_date = date.fromisoformat(raw_date) if raw_date else None
+        db.session.commit()
+    return {"message": f"Invoice email failed to send. {_reverted_note(original_status)}"}
+
+
+@job_handler("invoice_email", on_failure=_invoice_email_failed)
+def _job_invoice_email(payload: dict) -> dict:
+    """Render the invoice (+ linked report) PDF, email them, then persist the sent invoice PDF."""
+    from ..services.email_service import send_email_with_attachments
+    from .helpers import _ensure_settings
+
+    invoice = _job_load_invoice(payload)
+    claim = invoice.claim
+    warnings = []
+
+    html = _render_invoice_print_html(invoice)
+    fingerprint = _invoice_pdf_fingerprint(invoice, html)
+    invoice_bytes = _render_invoice_pdf(invoice, html=html)
+    attachments = [(payload["invoice_filename"], invoice_bytes, "application/pdf")]
+
+    if payload.get("report_id"):
         try:
-            page.close()
-        except Exception:
-            pass
-        try:
-            context.close()
-        except Exception:
-            pass
-        try:
-            browser.close()
+            from .reports import _render_report_pdf  # local import to avoid circulars
+
+            report = Report.query.get(payload["report_id"])
+            attachments.append((payload["report_filename"], _render_report_pdf(claim, report), "application/pdf"))
         except Exception:
-            pass
+            current_app.logger.exception("Failed to generate report PDF for email")
+            warnings.append("Report PDF could not be attached to email.")
+
+    send_email_with_attachments(
+        settings=_ensure_settings(),
+        to_email=payload["to_email"],
+        subject=payload.get("subject") or "",
+        body=payload.get("body") or "",
+        attachments=attachments,
+    )
+
+    # Sent: never raise past this point, or a retry would email the carrier twice.
+    try:
+        _store_invoice_pdf(invoice, payload["invoice_filename"], invoice_bytes, fingerprint=fingerprint)
+    except Exception:
+        current_app.logger.exception("Failed finalizing sent invoice artifact")
+        warnings.append("Invoice was emailed but PDF persistence encountered an issue.")
+
+    return {"message": f"Invoice emailed to {payload['to_email']}.", "warnings": warnings}
+
+
+@bp.route("/billing/<int:invoice_id>/pdf/queue", methods=["POST"], endpoint="invoice_pdf_queue_invoices")
+def invoice_pdf_queue(invoice_id: int):
+    """Queue invoice PDF generation; poll the returned status_url for completion."""
+    invoice = Invoice.query.get_or_404(invoice_id)
+    job = job_queue.enqueue("invoice_pdf", {"invoice_id": invoice.id})
+    return jsonify({"job_id": job.id, "status_url": url_for("main.api_job_status", job_id=job.id)}), 202
 
-    return pdf_bytes
 
 # -----------------------------------------------------------------------------
 # Routes
@@ -837,7 +952,6 @@ def invoice_email_preview(invoice_id: int):
     from ..services.email_service import (
         build_email_context,
         render_template_string_safe,
-        send_email_with_attachments,
     )
 
     invoice = Invoice.query.get_or_404(invoice_id)
@@ -1027,7 +1141,7 @@ def invoice_email_preview(invoice_id: int):
             body = request.form.get("body") or ""
 
             # ------------------------------------------------------------------
-            # FIRST: Persist "Sent" state to DB so Playwright print view sees it
+            # FIRST: Persist "Sent" state to DB so the rendered invoice PDF shows it
             # ------------------------------------------------------------------
             original_status = getattr(invoice, "status", None)
             original_date = getattr(invoice, "invoice_date", None)
@@ -1048,100 +1162,36 @@ def invoice_email_preview(invoice_id: int):
                 flash("Failed to update invoice status/date before sending.", "danger")
                 return redirect(url_for("main.invoice_detail_invoices", invoice_id=invoice.id))
 
-            attachments = []
-
-            # ------------------------------------------------------------------
-            # Generate fresh Invoice PDF (now DB reflects SENT)
-            # ------------------------------------------------------------------
-            try:
-                invoice_print_url = url_for(
-                    "main.invoice_print_invoices",
-                    invoice_id=invoice.id,
-                    _external=True,
-                )
-                invoice_bytes = _render_pdf_from_url_playwright(invoice_print_url)
-
-                attachments.append(
-                    (invoice_filename, invoice_bytes, "application/pdf")
-                )
-
-            except Exception:
-                # Revert invoice back to Draft if PDF generation fails
-                db.session.rollback()
-                invoice.status = original_status
-                invoice.invoice_date = original_date
-                db.session.commit()
-
-                current_app.logger.exception("Failed to generate invoice PDF for email")
-                flash("Invoice PDF could not be generated. Invoice reverted to Draft.", "danger")
-                return redirect(url_for("main.invoice_detail_invoices", invoice_id=invoice.id))
-
-            # ------------------------------------------------------------------
-            # Attach report PDF if exists
-            # ------------------------------------------------------------------
-            if report:
-                try:
-                    report_print_url = url_for(
-                        "main.report_print",
-                        claim_id=claim.id,
-                        report_id=report.id,
-                        _external=True,
-                    )
-                    report_bytes = _render_pdf_from_url_playwright(report_print_url)
-
-                    attachments.append(
-                        (
-                            report_filename,
-                            report_bytes,
-                            "application/pdf",
-                        )
-                    )
-                except Exception:
-                    current_app.logger.exception("Failed to generate report PDF for email")
-                    flash("Warning: Report PDF could not be attached to email.", "warning")
-
             # ------------------------------------------------------------------
-            # Attempt to send email
+            # Queue PDF renders + SMTP send (see _job_invoice_email). The job
+            # reverts the invoice to its original status if it finally fails.
             # ------------------------------------------------------------------
             try:
-                send_email_with_attachments(
-                    settings=settings,
-                    to_email=to_email,
-                    subject=subject,
-                    body=body,
-                    attachments=attachments,
+                job = job_queue.enqueue(
+                    "invoice_email",
+                    {
+                        "invoice_id": invoice.id,
+                        "report_id": report.id if report else None,
+                        "to_email": to_email,
+                        "subject": subject,
+                        "body": body,
+                        "invoice_filename": invoice_filename,
+                        "report_filename": report_filename,
+                        "original_status": original_status,
+                        "original_date": original_date.isoformat() if original_date else None,
+                    },
                 )
             except Exception:
-                # Email failed → revert invoice back to Draft
                 invoice.status = original_status
                 invoice.invoice_date = original_date
                 db.session.commit()
 
-                current_app.logger.exception("Email send failed")
-                flash("Email failed to send. Invoice reverted to Draft.", "danger")
+                current_app.logger.exception("Failed to queue invoice email")
+                flash(f"Email could not be queued. {_reverted_note(original_status)}", "danger")
                 return redirect(url_for("main.invoice_detail_invoices", invoice_id=invoice.id))
 
-            # ------------------------------------------------------------------
-            # SUCCESS: Persist SENT PDF artifact to filesystem
-            # ------------------------------------------------------------------
-            try:
-                pdf_path = _get_invoice_pdf_path(invoice, invoice_filename)
-                with open(pdf_path, "wb") as f:
-                    f.write(invoice_bytes)
-
-                if update_claim_projection:
-                    try:
-                        update_claim_projection(invoice.claim)
-                    except Exception:
-                        pass
-
-            except Exception:
-                current_app.logger.exception("Failed finalizing sent invoice artifact")
-                flash("Invoice was emailed but PDF persistence encountered an issue.", "warning")
-                return redirect(url_for("main.invoice_detail_invoices", invoice_id=invoice.id))
-
-            flash("Invoice email sent successfully.", "success")
-            return redirect(url_for("main.invoice_detail_invoices", invoice_id=invoice.id))
+            flash(f"Invoice email to {to_email} queued for sending.", "info")
+            return redirect(url_for("main.invoice_detail_invoices", invoice_id=invoice.id, job=job.id))
 
     # Default GET
     subject = render_template_string_safe(subject_template, context)
@@ -1379,11 +1429,9 @@ def invoice_detail(invoice_id: int):
     )
 
 
-@bp.route("/billing/<int:invoice_id>/print", endpoint="invoice_print_invoices")
-def invoice_print(invoice_id: int):
-    """Print-friendly invoice view."""
+def _render_invoice_print_html(invoice) -> str:
+    """Render invoice_print.html for `invoice` (shared by the /print view and PDF generation)."""
 
-    invoice = Invoice.query.get_or_404(invoice_id)
     settings = None
     try:
         from .helpers import _ensure_settings
@@ -1431,19 +1479,20 @@ def invoice_print(invoice_id: int):
     )
 
 
+@bp.route("/billing/<int:invoice_id>/print", endpoint="invoice_print_invoices")
+def invoice_print(invoice_id: int):
+    """Print-friendly invoice view."""
+
+    invoice = Invoice.query.get_or_404(invoice_id)
+    return _render_invoice_print_html(invoice)
+
+
 @bp.route("/billing/<int:invoice_id>/pdf", endpoint="invoice_pdf_invoices")
 def invoice_pdf(invoice_id: int):
     """Generate + download an invoice PDF (and store it as a DB artifact if available)."""
 
     invoice = Invoice.query.get_or_404(invoice_id)
 
-    settings = None
-    try:
-        from .helpers import _ensure_settings
-        settings = _ensure_settings()
-    except Exception:
-        settings = None
-
     filename = _invoice_pdf_filename(invoice)
 
     # By default, reuse the latest stored PDF artifact so we don't generate a new one on every click.
@@ -1453,52 +1502,14 @@ def invoice_pdf(invoice_id: int):
     view_raw = (request.args.get("view") or "").strip().lower()
     view = view_raw in {"1", "true", "yes"}
 
-    # Determine when the invoice last changed (prefer updated_at; fall back to created_at).
-    invoice_updated = getattr(invoice, "updated_at", None) or getattr(invoice, "created_at", None)
-
-    # Consider upstream data that affects the printed invoice but may not bump invoice.updated_at.
-    # We treat the PDF artifact as stale if any of these are newer than the artifact.
-    effective_updated = invoice_updated
-
-    # Claim / carrier / employer changes can affect the header.
-    claim = getattr(invoice, "claim", None)
-    claim_updated = getattr(claim, "updated_at", None) or getattr(claim, "created_at", None) if claim else None
-
-    carrier = getattr(claim, "carrier", None) if claim else None
-    carrier_updated = getattr(carrier, "updated_at", None) or getattr(carrier, "created_at", None) if carrier else None
-
-    employer = getattr(claim, "employer", None) if claim else None
-    employer_updated = getattr(employer, "updated_at", None) or getattr(employer, "created_at", None) if employer else None
-
-    settings_updated = getattr(settings, "updated_at", None) or getattr(settings, "created_at", None) if settings else None
-
-    # Invoice line items (billables) influence totals and line display.
-    items_updated = None
-    try:
-        items = BillableItem.query.filter_by(invoice_id=invoice.id).all()
-        times = []
-        for it in items or []:
-            t = getattr(it, "updated_at", None) or getattr(it, "created_at", None)
-            if t is not None:
-                times.append(t)
-        if times:
-            items_updated = max(times)
-    except Exception:
-        items_updated = None
-
-    for t in (claim_updated, carrier_updated, employer_updated, settings_updated, items_updated):
-        if t is None:
-            continue
-        try:
-            if effective_updated is None or t > effective_updated:
-                effective_updated = t
-        except Exception:
-            pass
-
-    # Filesystem reuse logic
+    # Filesystem reuse: serve the stored PDF only if it was rendered from identical
+    # print HTML (invoice, line items, claim/carrier/employer header, Settings
+    # branding and template all flow into it). Any change produces a new fingerprint.
     pdf_path = _get_invoice_pdf_path(invoice, filename)
+    html = _render_invoice_print_html(invoice)
+    fingerprint = _invoice_pdf_fingerprint(invoice, html)
 
-    if (not regen) and os.path.exists(pdf_path):
+    if (not regen) and find_cached_pdf("invoice_pdf", fingerprint, expected_path=pdf_path, invoice_id=invoice.id):
         try:
             return send_file(
                 pdf_path,
@@ -1510,10 +1521,8 @@ def invoice_pdf(invoice_id: int):
         except Exception:
             pass
 
-    print_url = url_for("main.invoice_print_invoices", invoice_id=invoice.id, _external=True)
-
     try:
-        pdf_bytes = _render_pdf_from_url_playwright(print_url)
+        pdf_bytes = _render_invoice_pdf(invoice, html=html)
     except Exception as e:
         current_app.logger.exception("Invoice PDF generation failed")
         flash(f"Invoice PDF generation failed: {e}", "danger")
@@ -1522,16 +1531,7 @@ def invoice_pdf(invoice_id: int):
     # Save to filesystem (RAID-backed) ONLY when not in preview (view mode).
     # Preview (view=1) should render in-memory and NOT persist a draft PDF.
     if not view:
-        pdf_path = _get_invoice_pdf_path(invoice, filename)
-        with open(pdf_path, "wb") as f:
-            f.write(pdf_bytes)
-
-        # Refresh human-readable SMB projection for this claim
-        if update_claim_projection:
-            try:
-                update_claim_projection(invoice.claim)
-            except Exception:
-                pass
+        _store_invoice_pdf(invoice, filename, pdf_bytes, fingerprint=fingerprint)
 
     resp = send_file(
         BytesIO(pdf_bytes),
@@ -1625,6 +1625,8 @@ def invoice_update(invoice_id: int):
         if invoice_number is not None and hasattr(invoice, "invoice_number"):
             if (invoice.invoice_number or "") != invoice_number:
                 invoice.invoice_number = invoice_number
+                # A typed INV-YY-### must not be allocated again later.
+                note_issued_number(invoice_number)
                 changed = True
 
     # Invoice date (always editable)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from flask import jsonify
+
+from . import bp  # use the already-registered main blueprint
+from app.services import job_queue
+
+
+# -----------------------------------------------------------------------------
+# Background job status (polled by the UI after a queued send/render)
+# -----------------------------------------------------------------------------
+
+
+@bp.route("/api/jobs/<int:job_id>", methods=["GET"])
+def api_job_status(job_id: int):
+    """Return the status of a background job as JSON."""
+    # Polling also (re)starts in-process workers after a restart, so jobs queued
+    # before the restart are picked up without waiting for a new enqueue.
+    job_queue.ensure_workers_started()
+
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "not_found", "id": job_id}), 404
+    return jsonify(job_queue.job_status(job))
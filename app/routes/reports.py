@@ -56,12 +56,11 @@ from werkzeug.utils import secure_filename
 from sqlalchemy import inspect as sa_inspect, text
 
 
-# Optional Playwright import for server-side Chromium PDF generation.
-# If not installed/available, PDF routes should fail gracefully.
-try:
-    from playwright.sync_api import sync_playwright
-except Exception:
-    sync_playwright = None
+# Server-side Chromium PDF generation (shared warm browser).
+# If Playwright is not installed/available, PDF routes should fail gracefully.
+from ..services.pdf_cache import find_cached_pdf, pdf_fingerprint, record_pdf_artifact
+from ..services.pdf_export import PdfExportItem
+from ..services.pdf_service import ZERO_MARGIN, prepare_html_for_pdf, render_pdf_from_html
 
 from ..extensions import db
 from ..models import (
@@ -76,7 +75,8 @@ from ..models import (
     DocumentArtifact,
 )
 
-from ..services import ai_service
+from ..services import ai_service, job_queue
+from ..services.job_queue import job_handler
 
 from . import bp
 
@@ -359,70 +359,38 @@ def _build_report_pdf_filename(claim: Claim, report: Report, display_report_numb
     return filename
 
 # --- Playwright PDF rendering helper ---
-def _render_pdf_from_url_playwright(url: str) -> bytes:
-    """Render the given URL to PDF using headless Chromium (Playwright).
+REPORT_PDF_OPTIONS = {
+    "page_format": "Letter",
+    "margin": ZERO_MARGIN,
+    "prefer_css_page_size": True,
+    "emulate_print": True,
+}
+
+def _render_report_pdf(claim, report, *, html: str | None = None) -> bytes:
+    """Render a report to PDF bytes using the shared headless Chromium (Playwright).
 
     Notes:
-    - This is synchronous and intended for single-user, low-concurrency use.
-    - We copy request cookies into the browser context so authenticated print pages render.
+    - The print template is rendered in-process and handed to Chromium directly
+      (no loopback HTTP request back into this app).
+    - Local /static assets (logo, signature) are inlined by pdf_service.
+    - Pass `html` when it was already rendered (e.g. for fingerprinting).
     """
-    if sync_playwright is None:
-        raise RuntimeError("Playwright is not available")
-
-    # Copy current request cookies so /print routes that require auth still render.
-    cookies = []
-    try:
-        for name, value in (request.cookies or {}).items():
-            cookies.append({"name": name, "value": value, "url": request.host_url})
-    except Exception:
-        cookies = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-
-        if cookies:
-            try:
-                context.add_cookies(cookies)
-            except Exception:
-                pass
+    return render_pdf_from_html(
+        html if html is not None else _render_report_print_html(claim, report),
+        label=f"report {report.id}",
+        **REPORT_PDF_OPTIONS,
+    )
 
-        page = context.new_page()
-        # Prefer networkidle so CSS/assets finish loading.
-        page.goto(url, wait_until="networkidle")
 
-        # Ensure we use print media rules.
-        try:
-            page.emulate_media(media="print")
-        except Exception:
-            pass
+def _report_pdf_fingerprint(claim, report, html: str | None = None) -> str:
+    """Fingerprint of everything printed on the report PDF (see pdf_cache).
 
-        pdf_bytes = page.pdf(
-            format="Letter",
-            print_background=True,
-            prefer_css_page_size=True,
-            margin={
-                "top": "0in",
-                "right": "0in",
-                "bottom": "0in",
-                "left": "0in",
-            },
-        )
-
-        try:
-            page.close()
-        except Exception:
-            pass
-        try:
-            context.close()
-        except Exception:
-            pass
-        try:
-            browser.close()
-        except Exception:
-            pass
-
-    return pdf_bytes
+    The "Generated" footer timestamp is marked volatile in the template, so
+    the HTML that gets printed can be fingerprinted as-is.
+    """
+    if html is None:
+        html = _render_report_print_html(claim, report)
+    return pdf_fingerprint(html, **REPORT_PDF_OPTIONS)
 
 # New route: artifact download
 @bp.route("/artifacts/<int:artifact_id>/download")
@@ -1189,10 +1157,13 @@ def report_ai_draft_field(claim_id, report_id, field_name):
 
     # Optional freeform guidance from the user (e.g. "Write in Gina's tone, mention latest ortho visit")
     user_prompt = ""
+    # Stream the draft as Server-Sent Events (token/done/error) when asked to.
+    wants_stream = request.accept_mimetypes.best == "text/event-stream"
     if request.method == "POST":
         if request.is_json:
             payload = request.get_json(silent=True) or {}
             user_prompt = (payload.get("user_prompt") or "").strip()
+            wants_stream = wants_stream or bool(payload.get("stream"))
         else:
             user_prompt = (request.form.get("user_prompt") or "").strip()
 
@@ -1251,7 +1222,7 @@ def report_ai_draft_field(claim_id, report_id, field_name):
             filtered2 = {k: v for k, v in kwargs.items() if k in allowed2}
             return fn2(**filtered2)
 
-        text = _call_generator(
+        generator_kwargs = dict(
             claim_id=claim.id,
             report_id=report.id,
             field_name=field_name,
@@ -1259,6 +1230,15 @@ def report_ai_draft_field(claim_id, report_id, field_name):
             settings=settings,
             current_value=current_value,
         )
+        if wants_stream:
+            from .helpers import sse_token_stream  # local import to avoid circulars
+
+            return sse_token_stream(
+                lambda: {"ok": True, "text": _call_generator(**generator_kwargs)},
+                label="report-draft",
+            )
+
+        text = _call_generator(**generator_kwargs)
         return jsonify({"ok": True, "text": text}), 200
 
     except NotImplementedError as e:
@@ -1733,29 +1713,33 @@ def report_next_appointment_ics(claim_id, report_id):
     return response
 
 
-@bp.route("/claims/<int:claim_id>/reports/<int:report_id>/print")
-def report_print(claim_id, report_id):
-    """Render a print-friendly version of a report (HTML)."""
-    # Defensive: clear any aborted transaction from earlier failures in this request
-    try:
-        db.session.rollback()
-    except Exception:
-        pass
-    claim = Claim.query.get_or_404(claim_id)
-    report = Report.query.filter_by(id=report_id, claim_id=claim.id).first_or_404()
+class _DisplayView:
+    """Read-only stand-in for a model instance with some attributes replaced for display.
+
+    Lets the print template see local-time datetimes without assigning them to
+    the persistent instance (which would dirty it, or clobber the caller's
+    pending changes if it were expired afterwards).
+    """
+
+    def __init__(self, obj, overrides: dict):
+        self._obj = obj
+        self._overrides = overrides
+
+    def __getattr__(self, name):
+        overrides = self.__dict__.get("_overrides", {})
+        if name in overrides:
+            return overrides[name]
+        return getattr(self._obj, name)
+
+
+def _render_report_print_html(claim, report) -> str:
+    """Render report_print.html for `report` (shared by the /print view and PDF generation)."""
     settings = _ensure_settings()
 
     barriers = _get_selected_barriers(report)
 
     display_report_number = _compute_claim_report_number(claim.id, report.id)
 
-    # Convenience for templates that prefer attribute access
-    try:
-        setattr(report, "display_report_number", display_report_number)
-    except Exception:
-        pass
-
-
     generated_at = system_now()
 
     page_title = _build_report_page_title(claim, report, display_report_number)
@@ -1795,20 +1779,18 @@ def report_print(claim_id, report_id):
 
     cm_items = cm_activities  # back-compat
 
-    # Standardize time display for key fields
-    if hasattr(report, "initial_next_appt_datetime"):
-        report.initial_next_appt_datetime = to_system_timezone(report.initial_next_appt_datetime)
-    if hasattr(report, "dos_start"):
-        report.dos_start = to_system_timezone(report.dos_start)
-    if hasattr(report, "dos_end"):
-        report.dos_end = to_system_timezone(report.dos_end)
+    # Standardize time display for key fields (on a view, never on the instance)
+    display = {"display_report_number": display_report_number}
+    for field in ("initial_next_appt_datetime", "dos_start", "dos_end"):
+        if hasattr(report, field):
+            display[field] = to_system_timezone(getattr(report, field))
 
-    return render_template(
+    html = render_template(
         "report_print.html",
         active_page="claims",
         settings=settings,
         claim=claim,
-        report=report,
+        report=_DisplayView(report, display),
         claim_providers=claim_providers,
         cm_activities=cm_activities,
         cm_items=cm_items,
@@ -1819,12 +1801,88 @@ def report_print(claim_id, report_id):
         claim_surgeries=claim_surgeries,
         generated_at=generated_at,
     )
+    return html
 
 
+@bp.route("/claims/<int:claim_id>/reports/<int:report_id>/print")
+def report_print(claim_id, report_id):
+    """Render a print-friendly version of a report (HTML)."""
+    # Defensive: clear any aborted transaction from earlier failures in this request
+    try:
+        db.session.rollback()
+    except Exception:
+        pass
+    claim = Claim.query.get_or_404(claim_id)
+    report = Report.query.filter_by(id=report_id, claim_id=claim.id).first_or_404()
+
+    return _render_report_print_html(claim, report)
+
+
+
+def _store_report_pdf(claim, report, filename: str, pdf_bytes: bytes, *, fingerprint: str | None = None) -> Path:
+    """Atomically write a report PDF to the report folder and record DocumentArtifact metadata.
+
+    Raises if the file cannot be written; artifact bookkeeping failures are swallowed.
+    """
+    report_folder = _get_report_folder(report)
+    pdf_path = report_folder / filename
+
+    report_folder.mkdir(parents=True, exist_ok=True)
+    tmp_path = report_folder / (filename + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(tmp_path, pdf_path)
+
+    # Store metadata only (no blob) in DB, with the render-input fingerprint
+    record_pdf_artifact(
+        claim_id=claim.id,
+        report_id=report.id,
+        artifact_type="report_pdf",
+        filename=filename,
+        path=str(pdf_path),
+        fingerprint=fingerprint,
+    )
+
+    return pdf_path
+
+
+def _ensure_report_pdf(claim, report, *, force: bool = False) -> Path:
+    """Return the path of an up-to-date report PDF on disk, rendering it only on a cache miss."""
+    display_report_number = _compute_claim_report_number(claim.id, report.id)
+    filename = _build_report_pdf_filename(claim, report, display_report_number)
+    pdf_path = _get_report_folder(report) / filename
+
+    html = _render_report_print_html(claim, report)
+    fingerprint = _report_pdf_fingerprint(claim, report, html)
+    if not force and find_cached_pdf("report_pdf", fingerprint, expected_path=str(pdf_path), report_id=report.id):
+        return pdf_path
+    pdf_bytes = _render_report_pdf(claim, report, html=html)
+    return _store_report_pdf(claim, report, filename, pdf_bytes, fingerprint=fingerprint)
+
+
+def _report_pdf_export_item(claim, report, *, folder: str = "reports") -> PdfExportItem:
+    """Batch export entry for a report: the cached PDF if current, else HTML to render."""
+    display_report_number = _compute_claim_report_number(claim.id, report.id)
+    filename = _build_report_pdf_filename(claim, report, display_report_number)
+    pdf_path = _get_report_folder(report) / filename
+    arcname = f"{folder}/{filename}" if folder else filename
+
+    html = _render_report_print_html(claim, report)
+    fingerprint = _report_pdf_fingerprint(claim, report, html)
+    if find_cached_pdf("report_pdf", fingerprint, expected_path=str(pdf_path), report_id=report.id):
+        return PdfExportItem(arcname=arcname, label=f"report {report.id}", path=str(pdf_path))
+    return PdfExportItem(
+        arcname=arcname,
+        label=f"report {report.id}",
+        html=prepare_html_for_pdf(html),
+        render_options=REPORT_PDF_OPTIONS,
+        store=lambda pdf_bytes: _store_report_pdf(claim, report, filename, pdf_bytes, fingerprint=fingerprint),
+    )
+
 
 @bp.route("/claims/<int:claim_id>/reports/<int:report_id>/pdf")
 def report_pdf(claim_id, report_id):
-    """Generate a PDF of the report by snapshotting the /print route via headless Chromium."""
+    """Generate a PDF of the report from its print HTML via headless Chromium (cached by input fingerprint)."""
     # Defensive: clear any aborted transaction from earlier failures in this request
     try:
         db.session.rollback()
@@ -1849,35 +1907,6 @@ def report_pdf(claim_id, report_id):
     view_raw = (request.args.get("view") or "").strip().lower()
     view = view_raw in {"1", "true", "yes"}
 
-    # Determine last-modified time of source data
-    report_updated = getattr(report, "updated_at", None) or getattr(report, "created_at", None)
-    # Ensure any datetime is system-local for consistency (for mtime comparison)
-    report_updated = to_system_timezone(report_updated)
-
-    provider_updated = None
-    try:
-        provider_ids = _claim_load_provider_ids(claim.id)
-        if provider_ids:
-            prov_rows = Provider.query.filter(Provider.id.in_(provider_ids)).all()
-            prov_times = []
-            for p in prov_rows:
-                t = getattr(p, "updated_at", None) or getattr(p, "created_at", None)
-                t = to_system_timezone(t)
-                if t is not None:
-                    prov_times.append(t)
-            if prov_times:
-                provider_updated = max(prov_times)
-    except Exception:
-        provider_updated = None
-
-    effective_updated = report_updated
-    if provider_updated is not None:
-        try:
-            if effective_updated is None or provider_updated > effective_updated:
-                effective_updated = provider_updated
-        except Exception:
-            pass
-
     # Filesystem target path
     report_folder = _get_report_folder(report)
     pdf_path = report_folder / filename
@@ -1893,40 +1922,23 @@ def report_pdf(claim_id, report_id):
             resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
         return resp
 
-    # Reuse existing file if fresh
-    if (not regen) and pdf_path.exists():
-        is_fresh = True
-        if effective_updated is not None:
-            try:
-                mtime = to_system_timezone(__import__('datetime').datetime.fromtimestamp(pdf_path.stat().st_mtime))
-                is_fresh = mtime >= effective_updated
-            except Exception:
-                is_fresh = True
-        if is_fresh:
-            return _send_pdf_from_disk(pdf_path)
-
-    # Generate new PDF via Playwright
-    print_url = url_for(
-        "main.report_print",
-        claim_id=claim.id,
-        report_id=report.id,
-        _external=True,
-    )
+    # Reuse the stored file when it was rendered from identical inputs
+    html = _render_report_print_html(claim, report)
+    fingerprint = _report_pdf_fingerprint(claim, report, html)
+    if (not regen) and find_cached_pdf("report_pdf", fingerprint, expected_path=str(pdf_path), report_id=report.id):
+        return _send_pdf_from_disk(pdf_path)
 
+    # Generate new PDF via Playwright from the same HTML as the /print view
     try:
-        pdf_bytes = _render_pdf_from_url_playwright(print_url)
+        pdf_bytes = _render_report_pdf(claim, report, html=html)
     except Exception as e:
         current_app.logger.exception("Report PDF generation failed")
         flash(f"PDF generation failed: {e}", "danger")
         return redirect(url_for("main.report_print", claim_id=claim.id, report_id=report.id))
 
-    # Persist to disk atomically
+    # Persist to disk atomically (+ DocumentArtifact metadata)
     try:
-        report_folder.mkdir(parents=True, exist_ok=True)
-        tmp_path = report_folder / (filename + ".tmp")
-        with open(tmp_path, "wb") as f:
-            f.write(pdf_bytes)
-        os.replace(tmp_path, pdf_path)
+        pdf_path = _store_report_pdf(claim, report, filename, pdf_bytes, fingerprint=fingerprint)
     except Exception as e:
         current_app.logger.exception("Report PDF save-to-disk failed")
         flash(f"PDF save failed: {e}", "danger")
@@ -1941,33 +1953,6 @@ def report_pdf(claim_id, report_id):
             resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
         return resp
 
-    # Store metadata only (no blob) in DB
-    try:
-        art = DocumentArtifact(
-            claim_id=claim.id,
-            report_id=report.id,
-            artifact_type="report_pdf",
-            content_type="application/pdf",
-            download_filename=filename,
-            file_size_bytes=int(pdf_path.stat().st_size),
-            storage_backend="fs",
-            created_at=system_now(),
-        )
-        if hasattr(art, "stored_path"):
-            art.stored_path = str(pdf_path)
-        if hasattr(art, "content"):
-            art.content = None
-        if hasattr(art, "data"):
-            art.data = None
-
-        db.session.add(art)
-        db.session.commit()
-    except Exception:
-        try:
-            db.session.rollback()
-        except Exception:
-            pass
-
     return _send_pdf_from_disk(pdf_path)
 
 
@@ -2012,6 +1997,63 @@ def report_pdf_regenerate(claim_id, report_id):
     )
 
 
+# ------------------------
+# Background jobs (report PDF render, report email)
+# ------------------------
+
+def _job_load_report(payload: dict):
+    report = Report.query.filter_by(id=payload.get("report_id"), claim_id=payload.get("claim_id")).first()
+    if report is None:
+        raise LookupError(f"Report {payload.get('report_id')} not found")
+    return report.claim, report
+
+
+@job_handler("report_pdf")
+def _job_report_pdf(payload: dict) -> dict:
+    """Render (if stale) and store a report PDF on disk."""
+    claim, report = _job_load_report(payload)
+    pdf_path = _ensure_report_pdf(claim, report, force=bool(payload.get("force")))
+    return {
+        "message": "Report PDF is ready.",
+        "filename": pdf_path.name,
+        "download_url": url_for("main.report_pdf", claim_id=claim.id, report_id=report.id),
+    }
+
+
+@job_handler("report_email")
+def _job_report_email(payload: dict) -> dict:
+    """Ensure the report PDF exists on disk, then email it as an attachment."""
+    from ..services.email_service import send_smtp_email
+
+    claim, report = _job_load_report(payload)
+    pdf_path = _ensure_report_pdf(claim, report)
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+
+    send_smtp_email(
+        to_email=payload["to_email"],
+        subject=payload.get("subject") or "",
+        body=payload.get("body") or "",
+        settings=_ensure_settings(),
+        attachments=[(pdf_path.name, pdf_bytes, "application/pdf")],
+    )
+    return {"message": f"Report emailed to {payload['to_email']}."}
+
+
+@bp.route("/claims/<int:claim_id>/reports/<int:report_id>/pdf/queue", methods=["POST"])
+def report_pdf_queue(claim_id, report_id):
+    """Queue report PDF generation; poll the returned status_url for completion."""
+    claim = Claim.query.get_or_404(claim_id)
+    report = Report.query.filter_by(id=report_id, claim_id=claim.id).first_or_404()
+
+    regen_raw = (request.values.get("regen") or "").strip().lower()
+    job = job_queue.enqueue(
+        "report_pdf",
+        {"claim_id": claim.id, "report_id": report.id, "force": regen_raw in {"1", "true", "yes"}},
+    )
+    return jsonify({"job_id": job.id, "status_url": url_for("main.api_job_status", job_id=job.id)}), 202
+
+
 # ------------------------
 # Report Email Preview / Send
 # ------------------------
@@ -2022,7 +2064,6 @@ def report_email(claim_id, report_id):
     from ..services.email_service import (
         build_email_context,
         render_email_template,
-        send_smtp_email,
     )
 
     claim = Claim.query.get_or_404(claim_id)
@@ -2130,46 +2171,31 @@ def report_email(claim_id, report_id):
                 flash("Recipient email is required.", "danger")
             else:
                 try:
-                    # Ensure PDF exists on disk (regenerate if necessary)
-                    pdf_response = report_pdf(claim.id, report.id)
-                    # We do not use the response object; calling ensures file is generated if missing.
-
-                    # Resolve filesystem path to PDF
-                    report_folder = _get_report_folder(report)
-                    pdf_path = report_folder / pdf_filename
-
-                    if not pdf_path.exists():
-                        raise RuntimeError("Report PDF file not found on disk.")
-
-                    # Read PDF bytes for attachment
-                    with open(pdf_path, "rb") as f:
-                        pdf_bytes = f.read()
-
-                    send_smtp_email(
-                        to_email=to_email,
-                        subject=subject,
-                        body=body,
-                        settings=settings,
-                        attachments=[
-                            (
-                                pdf_filename,
-                                pdf_bytes,
-                                "application/pdf",
-                            )
-                        ],
+                    # PDF render + SMTP send run on the background job queue
+                    # (see _job_report_email) so a slow mail server can't block the UI.
+                    job = job_queue.enqueue(
+                        "report_email",
+                        {
+                            "claim_id": claim.id,
+                            "report_id": report.id,
+                            "to_email": to_email,
+                            "subject": subject,
+                            "body": body,
+                        },
                     )
 
-                    flash("Email sent successfully.", "success")
+                    flash(f"Email to {to_email} queued for sending.", "info")
                     return redirect(
                         url_for(
                             "main.report_edit",
                             claim_id=claim.id,
                             report_id=report.id,
+                            job=job.id,
                         )
                     )
 
                 except Exception as e:
-                    current_app.logger.exception("Email send failed")
+                    current_app.logger.exception("Email queueing failed")
                     flash(f"Email failed: {e}", "danger")
 
     # Standardize time display for key fields
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Claims List Benchmark
+
+Seeds a throwaway SQLite database with N synthetic claims (plus reports,
+billables, invoices and documents), then renders the claims list through the
+Flask test client and prints the SQL query count and wall-clock latency of the
+first page and of a page from the middle of the list (an `after` cursor).
+Both should stay flat as the claim count grows.
+
+Usage:
+  python -m app.scripts.bench_claims_list
+  python -m app.scripts.bench_claims_list --sizes 1000 10000 --repeat 3
+
+Never point this at a real database: it always creates its own temp DB.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROUTE = "/claims"
+
+
+def _seed(db, models, n_claims: int) -> None:
+    """Bulk-insert synthetic claims with a little activity on each."""
+    Claim = models.Claim
+    Report = models.Report
+    BillableItem = models.BillableItem
+    Invoice = models.Invoice
+    ClaimDocument = models.ClaimDocument
+
+    rnd = random.Random(42)
+    today = date.today()
+    now = datetime.now()
+    last_names = ["Smith", "Jones", "Adams", "Brown", "Garcia", "Lee", "Nguyen", "Miller"]
+    first_names = ["Ann", "Bob", "Cy", "Dee", "Eli", "Fay"]
+
+    claims = [
+        {
+            "id": i,
+            "claimant_name": f"Claimant {i}",
+            "claimant_first_name": rnd.choice(first_names),
+            "claimant_last_name": rnd.choice(last_names),
+            "claim_number": f"WC-{i:06d}",
+            "is_telephonic": rnd.random() < 0.3,
+            "is_closed": rnd.random() < 0.2,
+            "status": "open",
+            "opened_at": today - timedelta(days=rnd.randint(0, 700)),
+        }
+        for i in range(1, n_claims + 1)
+    ]
+    db.session.execute(db.insert(Claim), claims)
+
+    reports, billables, invoices, docs = [], [], [], []
+    for cid in range(1, n_claims + 1):
+        for _ in range(rnd.randint(0, 2)):
+            reports.append({
+                "claim_id": cid,
+                "report_type": "progress",
+                "created_at": now - timedelta(days=rnd.randint(0, 180)),
+            })
+        for k in range(rnd.randint(0, 2)):
+            invoices.append({
+                "claim_id": cid,
+                "invoice_number": f"INV-{cid}-{k}",
+                "status": rnd.choice(["Draft", "Sent", "Paid"]),
+                "invoice_date": today - timedelta(days=rnd.randint(0, 200)),
+                "total_amount": round(rnd.random() * 900, 2),
+                "created_at": now,
+            })
+        for _ in range(rnd.randint(0, 6)):
+            billables.append({
+                "claim_id": cid,
+                "description": "Bench activity",
+                "activity_code": rnd.choice(["EMAIL", "CALL", "MIL", "EXP", "NO BILL"]),
+                "quantity": rnd.choice([0.25, 0.5, 1.0, 2.0]),
+                "date_of_service": today - timedelta(days=rnd.randint(0, 400)),
+                "created_at": now - timedelta(days=rnd.randint(0, 150)),
+            })
+        if rnd.random() < 0.3:
+            docs.append({
+                "claim_id": cid,
+                "original_filename": "bench.pdf",
+                "filename_stored": "bench.pdf",
+                "uploaded_at": now - timedelta(days=rnd.randint(0, 90)),
+            })
+
+    for model, rows in ((Report, reports), (Invoice, invoices), (BillableItem, billables), (ClaimDocument, docs)):
+        if rows:
+            db.session.execute(db.insert(model), rows)
+    db.session.commit()
+
+
+def _reset(db) -> None:
+    """Recreate the schema and the singleton Settings row."""
+    from app.models import Settings
+
+    db.drop_all()
+    db.create_all()
+    db.session.add(Settings(business_name="Bench", hourly_rate=95.0, telephonic_rate=70.0, dormant_claim_days=30))
+    db.session.commit()
+
+
+def _middle_cursor(db, models) -> str:
+    """`after` cursor for the open claim halfway down the list."""
+    from app.services import claims_list_service
+
+    Claim = models.Claim
+    stmt = claims_list_service.build_claims_query().order_by(
+        *claims_list_service._order_by()
+    )
+    ids = [c.id for c in db.session.execute(stmt).scalars()]
+    return claims_list_service.encode_cursor(db.session.get(Claim, ids[len(ids) // 2]))
+
+
+def run(app, size: int, repeat: int) -> dict:
+    """Seed `size` claims into the bench DB and time the first and a middle page."""
+    from sqlalchemy import event
+
+    from app import db
+    from app import models
+
+    with app.app_context():
+        _reset(db)
+        _seed(db, models, size)
+        urls = {"first": ROUTE, "middle": f"{ROUTE}?after={_middle_cursor(db, models)}"}
+        db.session.remove()
+
+        counter = {"n": 0}
+
+        def _count(*_args, **_kwargs):
+            counter["n"] += 1
+
+        out = {"claims": size}
+        event.listen(db.engine, "before_cursor_execute", _count)
+        try:
+            client = app.test_client()
+            client.get(ROUTE)  # warm templates and caches
+            for name, url in urls.items():
+                timings = []
+                for _ in range(repeat):
+                    counter["n"] = 0
+                    started = time.perf_counter()
+                    resp = client.get(url)
+                    timings.append(time.perf_counter() - started)
+                    out[f"{name}_queries"] = counter["n"]
+                    if resp.status_code != 200:
+                        raise RuntimeError(f"{url} returned {resp.status_code}")
+                out[f"{name}_best_ms"] = min(timings) * 1000.0
+                out[f"{name}_avg_ms"] = sum(timings) / len(timings) * 1000.0
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _count)
+        db.session.remove()
+
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_claims_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from app import create_app
+
+    app = create_app()
+
+    print(f"{'claims':>8}  {'page':>6}  {'queries':>8}  {'best ms':>10}  {'avg ms':>10}")
+    for size in args.sizes:
+        r = run(app, size, args.repeat)
+        for page in ("first", "middle"):
+            print(
+                f"{r['claims']:>8}  {page:>6}  {r[f'{page}_queries']:>8}"
+                f"  {r[f'{page}_best_ms']:>10.1f}  {r[f'{page}_avg_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Dashboard Context Cache Benchmark
+
+Loads /analysis (every period) and /reporting through the Flask test client
+against the configured database (DATABASE_URL), first with the context cache
+disabled and then twice with it enabled (cold, warm), and prints SQL
+statements and wall time per page plus the cache hit/miss counters.
+
+Read-only; safe to run against a copy of production data. The sqlite
+backend is measured against a throwaway file in a temp directory, so nothing
+is left under instance/.
+
+Usage:
+  python -m app.scripts.bench_dashboard_cache
+  python -m app.scripts.bench_dashboard_cache --backend sqlite --repeat 5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.services.context_cache import get_backend, get_cache_stats
+
+PAGES = [
+    "/analysis?period=week",
+    "/analysis?period=month",
+    "/analysis?period=six_months",
+    "/analysis?period=twelve_months",
+    "/reporting",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory", help="cache backend to measure")
+    parser.add_argument("--repeat", type=int, default=3, help="loads per page and mode (best time is reported)")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["DASHBOARD_CACHE_BACKEND"] = args.backend
+    scratch = tempfile.TemporaryDirectory(prefix="bench_dashboard_cache_")
+    app.config["DASHBOARD_CACHE_PATH"] = os.path.join(scratch.name, "context_cache.sqlite3")
+    client = app.test_client()
+    statements = []
+
+    with app.app_context():
+        get_backend().clear()
+        event.listen(db.engine, "before_cursor_execute", lambda *a: statements.append(1))
+
+    def _load(url):
+        statements.clear()
+        started = time.perf_counter()
+        resp = client.get(url)
+        if resp.status_code != 200:
+            raise SystemExit(f"{url}: HTTP {resp.status_code}")
+        return len(statements), (time.perf_counter() - started) * 1000.0
+
+    print(f"{'page':<32} {'uncached':>18} {'cold':>18} {'warm':>18}")
+    for url in PAGES:
+        app.config["DASHBOARD_CACHE_TTL_SECONDS"] = 0
+        uncached = min((_load(url) for _ in range(args.repeat)), key=lambda r: r[1])
+        app.config["DASHBOARD_CACHE_TTL_SECONDS"] = 300
+        cold = _load(url)
+        warm = min((_load(url) for _ in range(args.repeat)), key=lambda r: r[1])
+        cells = "".join(f" {q:5d} q {ms:8.1f} ms" for q, ms in (uncached, cold, warm))
+        print(f"{url:<32}{cells}")
+
+    print()
+    for name, s in get_cache_stats().items():
+        print(f"{name}: {s}")
+    scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
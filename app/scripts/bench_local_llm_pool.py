@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Local LLM Connection Pool Benchmark
+
+Starts a stub Ollama-style server in a child process (HTTP/1.1 keep-alive;
+/api/generate takes --model-ms and runs at most --server-parallel at once,
+like OLLAMA_NUM_PARALLEL, queueing the rest) and sends the same generate
+calls through:
+
+  legacy: module-level requests.post per call (a new TCP connection each time)
+  pooled: app.ai.llm.LocalLLM.call (keep-alive session + concurrency gate)
+
+once sequentially and once from --threads threads at a time. Prints per-call
+p50/p95 latency, wall time, the TCP connections the server accepted and the
+most generate requests open on the server at once (the pool keeps that at or
+below LOCAL_LLM_MAX_CONCURRENCY; the rest queue client-side, where they can
+time out and fail over instead of piling onto the model).
+
+Needs no database and no real model.
+
+Usage:
+  python -m app.scripts.bench_local_llm_pool
+  python -m app.scripts.bench_local_llm_pool --calls 500 --threads 16 --model-ms 5 --server-parallel 1
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+class _StubState:
+    def __init__(self, model_ms, parallel):
+        self.model_ms = model_ms
+        self.capacity = threading.Semaphore(parallel)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def take(self):
+        """Counters since the last take() (the in-flight level carries over)."""
+        with self.lock:
+            out = {"connections": self.connections, "peak": self.max_in_flight}
+            self.connections = 0
+            self.max_in_flight = self.in_flight
+            return out
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, obj):
+            body = json.dumps(obj).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/_stats":
+                self._reply(state.take())
+            else:
+                self._reply({"models": []})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with state.lock:
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                with state.capacity:
+                    time.sleep(state.model_ms / 1000.0)
+                self._reply({"response": "ok", "done": True})
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    return Handler
+
+
+def _serve(port, model_ms, parallel):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(_StubState(model_ms, parallel)))
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def _run(send, calls, threads):
+    latencies = []
+
+    def one(_):
+        t0 = time.perf_counter()
+        send()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    started = time.perf_counter()
+    if threads <= 1:
+        for i in range(calls):
+            one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as ex:
+            list(ex.map(one, range(calls)))
+    return latencies, (time.perf_counter() - started) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300, help="generate calls per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent callers in the concurrent scenario")
+    parser.add_argument("--model-ms", type=float, default=5.0, help="stub server time per generation")
+    parser.add_argument("--server-parallel", type=int, default=2, help="generations the stub runs at once")
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = multiprocessing.Process(target=_serve, args=(port, args.model_ms, args.server_parallel), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/_stats", timeout=0.5)
+            break
+        except requests.ConnectionError:
+            time.sleep(0.05)
+
+    os.environ["LOCAL_LLM_URL"] = base_url
+    from app.ai.llm import LocalLLM  # reads LOCAL_LLM_* when constructed
+
+    local = LocalLLM()
+    messages = [{"role": "user", "content": "ping"}]
+    payload = {"model": local.model, "prompt": "ping", "stream": False}
+
+    def legacy():
+        r = requests.post(f"{base_url}/api/generate", json=payload, timeout=local.timeout)
+        r.raise_for_status()
+        r.json()
+
+    def pooled():
+        local.call(messages)
+
+    print(
+        f"stub model {args.model_ms:.0f} ms/call x{args.server_parallel}, "
+        f"pool: {local.pool.max_connections} connections, "
+        f"{local.pool.max_concurrency} in flight"
+    )
+    print(f"{'scenario':<22} {'p50':>8} {'p95':>8} {'wall':>9} {'conns':>6} {'peak':>5}")
+    for label, threads in (("sequential", 1), (f"{args.threads} threads", args.threads)):
+        for name, send in (("legacy", legacy), ("pooled", pooled)):
+            requests.get(f"{base_url}/_stats", timeout=5)
+            latencies, wall = _run(send, args.calls, threads)
+            seen = requests.get(f"{base_url}/_stats", timeout=5).json()
+            print(
+                f"{name + ' ' + label:<22} {statistics.median(latencies):6.2f}ms {_pct(latencies, 95):6.2f}ms "
+                f"{wall:7.0f}ms {seen['connections'] - 1:6d} {seen['peak']:5d}"  # less the /_stats request's own
+            )
+
+    stats = local.pool.stats()
+    print(
+        f"pool: {stats['requests']} requests, {stats['errors']} errors, {stats['queue_timeouts']} queue timeouts, "
+        f"queue wait p50/p95 {stats['queue_wait_ms_p50']}/{stats['queue_wait_ms_p95']} ms"
+    )
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
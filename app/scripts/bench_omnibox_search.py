@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Omnibox Search Benchmark
+
+Adds synthetic claims, invoices, providers, carriers, employers and contacts
+(--rows entities in total) to the configured database (DATABASE_URL) inside a
+transaction that is rolled back at the end, builds the in-memory omnibox
+index over them and replays keystrokes (every prefix of a few sample terms).
+Prints p50/p95 latency for:
+
+  sql:    one ILIKE 'q%' OR ILIKE '% q%' query per table (what a global search
+          over the existing tables would cost per keystroke)
+  index:  app.services.omnibox.search (cold: answer cache cleared first)
+  cached: the same keystroke again (answer cache hit)
+
+plus the index build time and the cost of applying one committed change.
+
+Nothing is committed; safe to run against a copy of production data.
+
+Usage:
+  python -m app.scripts.bench_omnibox_search
+  python -m app.scripts.bench_omnibox_search --rows 200000 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import or_
+
+from app import create_app
+from app.extensions import db
+from app.models import Carrier, Claim, Contact, Employer, Invoice, Provider
+from app.services import omnibox
+
+FIRST = ["james", "maria", "john", "linda", "robert", "susan", "michael", "karen", "david", "nancy", "jose", "emily"]
+LAST = ["smith", "johnson", "garcia", "miller", "davis", "martinez", "wilson", "anderson", "thomas", "moore", "jackson"]
+WORDS = ["mountain", "valley", "summit", "river", "pacific", "liberty", "granite", "cedar", "harbor", "pioneer"]
+TERMS = ["smith", "maria gar", "wc-0012", "inv-2024-01", "summit", "c12@gm"]
+
+SQL_FIELDS = {
+    Claim: ("claim_number", "claimant_name"),
+    Invoice: ("invoice_number",),
+    Provider: ("name",),
+    Carrier: ("name",),
+    Employer: ("name",),
+    Contact: ("name", "email"),
+}
+
+
+def _populate(n):
+    rng = random.Random(19)
+    n_claims = int(n * 0.35)
+    n_invoices = int(n * 0.35)
+    n_contacts = int(n * 0.15)
+    n_small = max(1, int(n * 0.05))
+
+    def org(i, suffix):
+        return {"name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {suffix} {i}"}
+
+    db.session.bulk_insert_mappings(Carrier, [org(i, "Insurance") for i in range(n_small)])
+    db.session.bulk_insert_mappings(Employer, [org(i, "LLC") for i in range(n_small)])
+    db.session.bulk_insert_mappings(Provider, [org(i, "Clinic") for i in range(n_small)])
+    db.session.bulk_insert_mappings(Contact, [
+        {
+            "name": f"{rng.choice(FIRST).title()} {rng.choice(LAST).title()}",
+            "email": f"c{i}@{rng.choice(['gmail.com', 'outlook.com', 'corp.example'])}",
+        }
+        for i in range(n_contacts)
+    ])
+    claims = []
+    for i in range(n_claims):
+        first, last = rng.choice(FIRST).title(), rng.choice(LAST).title()
+        claims.append({
+            "claimant_name": f"{first} {last}",
+            "claimant_first_name": first,
+            "claimant_last_name": last,
+            "claim_number": f"WC-{i:06d}",
+            "opened_at": date(2024, 1, 1),
+        })
+    db.session.bulk_insert_mappings(Claim, claims)
+    db.session.flush()
+    claim_ids = [r[0] for r in db.session.query(Claim.id).all()]
+    db.session.bulk_insert_mappings(Invoice, [
+        {"claim_id": rng.choice(claim_ids), "invoice_number": f"INV-{2020 + i % 6}-{i:05d}", "status": "Draft"}
+        for i in range(n_invoices)
+    ])
+    db.session.flush()
+
+
+def _sql_search(term):
+    """Per-table prefix-of-field / prefix-of-word ILIKE queries."""
+    for model, fields in SQL_FIELDS.items():
+        clauses = []
+        for f in fields:
+            col = getattr(model, f)
+            clauses += [col.ilike(f"{term}%"), col.ilike(f"% {term}%")]
+        model.query.filter(or_(*clauses)).limit(20).all()
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def _row(name, values):
+    print(f"{name:<8} p50 {statistics.median(values):7.2f} ms   p95 {_pct(values, 95):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="synthetic entities to add")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the keystroke list")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            _populate(args.rows)
+
+            started = time.perf_counter()
+            index = omnibox.rebuild_index(db.session.connection())
+            print(f"index build: {len(index.docs)} entities in {(time.perf_counter() - started) * 1000.0:.0f} ms")
+
+            keystrokes = [t[:i] for t in TERMS for i in range(omnibox.MIN_QUERY_CHARS, len(t) + 1)]
+            sql, cold, warm = [], [], []
+            for _ in range(args.repeat):
+                for term in keystrokes:
+                    t0 = time.perf_counter()
+                    _sql_search(term)
+                    sql.append((time.perf_counter() - t0) * 1000.0)
+                    db.session.expunge_all()
+
+                    index._results.clear()
+                    t0 = time.perf_counter()
+                    omnibox.search(term)
+                    cold.append((time.perf_counter() - t0) * 1000.0)
+
+                    t0 = time.perf_counter()
+                    omnibox.search(term)
+                    warm.append((time.perf_counter() - t0) * 1000.0)
+
+            print(f"{len(keystrokes)} keystrokes x {args.repeat}:")
+            _row("sql", sql)
+            _row("index", cold)
+            _row("cached", warm)
+
+            doc = next(iter(index.docs.values()))
+            started = time.perf_counter()
+            for _ in range(100):
+                index.upsert(doc)
+            print(f"apply one committed change: {(time.perf_counter() - started) * 10.0:.3f} ms")
+        finally:
+            db.session.rollback()
+            omnibox._indexes.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+PDF Render Benchmark
+
+Times report/invoice PDF generation two ways against the configured database
+(DATABASE_URL), using the shared warm Chromium from pdf_service:
+
+  url   Chromium fetches the /print route back over HTTP (the old loopback path;
+        the app is served on 127.0.0.1 from a background thread for this)
+  html  print HTML rendered in-process, assets inlined, loaded via set_content
+
+Read-only: PDFs are rendered in memory and discarded. Requires Playwright with
+Chromium installed (`python -m playwright install chromium`).
+
+Usage:
+  python -m app.scripts.bench_pdf_render --report-id 12
+  python -m app.scripts.bench_pdf_render --invoice-id 34 --repeat 5
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from flask import url_for
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.models import Invoice, Report
+from app.services import pdf_service
+
+
+def _time(fn, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--report-id", type=int, help="report to render")
+    parser.add_argument("--invoice-id", type=int, help="invoice to render")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not args.report_id and not args.invoice_id:
+        parser.error("pass --report-id and/or --invoice-id")
+
+    app = create_app()
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/"
+
+    from app.routes.invoices import _render_invoice_pdf
+    from app.routes.reports import _render_report_pdf
+
+    jobs = []
+    with app.test_request_context("/", base_url=base_url):
+        if args.report_id:
+            report = Report.query.get(args.report_id)
+            if report is None:
+                parser.error(f"report {args.report_id} not found")
+            print_url = url_for("main.report_print", claim_id=report.claim_id, report_id=report.id, _external=True)
+            jobs.append((f"report {report.id}", print_url, lambda r=report: _render_report_pdf(r.claim, r)))
+        if args.invoice_id:
+            invoice = Invoice.query.get(args.invoice_id)
+            if invoice is None:
+                parser.error(f"invoice {args.invoice_id} not found")
+            print_url = url_for("main.invoice_print_invoices", invoice_id=invoice.id, _external=True)
+            jobs.append((f"invoice {invoice.id}", print_url, lambda i=invoice: _render_invoice_pdf(i)))
+
+        # Warm the browser so neither mode pays the Chromium launch.
+        pdf_service.render_pdf_from_html("<p>warm-up</p>", inline_assets=False)
+
+        print(f"{'document':<14}  {'mode':<5}  {'median ms':>10}  {'best ms':>10}")
+        try:
+            for label, print_url, render_html in jobs:
+                modes = {
+                    "url": lambda u=print_url: pdf_service.render_pdf_from_url(
+                        u,
+                        margin=pdf_service.ZERO_MARGIN,
+                        prefer_css_page_size=True,
+                        emulate_print=True,
+                    ),
+                    "html": render_html,
+                }
+                for mode, fn in modes.items():
+                    t = _time(fn, args.repeat)
+                    print(f"{label:<14}  {mode:<5}  {statistics.median(t):>10.1f}  {min(t):>10.1f}")
+        finally:
+            pdf_service.shutdown()
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Autocomplete Search Benchmark
+
+Adds a synthetic data set (--rows search documents' worth of claims, contacts,
+providers, employers and carriers) to the configured database (DATABASE_URL)
+inside a transaction that is rolled back at the end, then replays keystrokes
+(every prefix of a few sample terms) against the three autocomplete endpoints
+and prints p50/p95 latency per endpoint for:
+
+  legacy: the previous per-table ILIKE '%q%' queries
+  index:  the endpoint as shipped (search_index.search() + loads by id)
+
+It also checks that, for every keystroke, the index matches exactly the
+entities the legacy ILIKE filters matched (ignoring result limits).
+
+Nothing is committed apart from the one-time index backfill of the real data;
+safe to run against a copy of production data.
+
+Usage:
+  python -m app.scripts.bench_search_index
+  python -m app.scripts.bench_search_index --rows 100000 --repeat 3
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import or_
+
+from app import create_app
+from app.extensions import db
+from app.models import Carrier, Claim, Contact, Employer, Provider
+from app.routes.core_data import api_contact_search
+from app.routes.forms import api_face_sheet_search, api_fax_cover_search
+from app.services.search_index import _KIND_FIELDS, _KIND_MODELS, ensure_search_index, rebuild_search_index, search
+
+FIRST = ["james", "maria", "john", "linda", "robert", "susan", "michael", "karen", "david", "nancy", "jose", "emily"]
+LAST = ["smith", "johnson", "garcia", "miller", "davis", "martinez", "wilson", "anderson", "thomas", "moore", "jackson"]
+WORDS = ["mountain", "valley", "summit", "river", "pacific", "liberty", "granite", "cedar", "harbor", "pioneer"]
+CITIES = ["boise", "nampa", "meridian", "idaho falls", "pocatello", "twin falls", "coeur d'alene", "eagle"]
+TERMS = ["smith", "garcia", "summit", "clm-04", "208-55", "gmail", "river ins"]
+
+
+def _phone(rng):
+    return f"208-{rng.randrange(200, 999)}-{rng.randrange(1000, 9999)}"
+
+
+def _populate(n_docs):
+    """Synthetic entities worth ~n_docs search documents (a claim yields two)."""
+    rng = random.Random(42)
+    n_claims = int(n_docs * 0.4)
+    n_contacts = int(n_docs * 0.1)
+    n_small = max(1, int(n_docs * 0.033))
+
+    def org(suffix):
+        return f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {suffix}"
+
+    def org_row(i, suffix):
+        name = org(suffix)
+        return {
+            "name": f"{name} {i}",
+            "city": rng.choice(CITIES).title(),
+            "email": f"info{i}@{name.split()[0].lower()}.com",
+            "phone": _phone(rng),
+        }
+
+    db.session.bulk_insert_mappings(Carrier, [org_row(i, "Insurance") for i in range(n_small)])
+    db.session.bulk_insert_mappings(Employer, [org_row(i, "LLC") for i in range(n_small)])
+    db.session.bulk_insert_mappings(Provider, [org_row(i, "Clinic") for i in range(n_small)])
+    db.session.bulk_insert_mappings(Contact, [
+        {
+            "name": f"{rng.choice(FIRST).title()} {rng.choice(LAST).title()}",
+            "email": f"c{i}@{rng.choice(['gmail.com', 'outlook.com', 'corp.example'])}",
+            "phone": _phone(rng),
+        }
+        for i in range(n_contacts)
+    ])
+    rows = []
+    for i in range(n_claims):
+        first, last = rng.choice(FIRST).title(), rng.choice(LAST).title()
+        rows.append({
+            "claimant_name": f"{first} {last}",
+            "claimant_first_name": first,
+            "claimant_last_name": last,
+            "claim_number": f"CLM-{i:06d}",
+            "opened_at": date(2024, 1, 1),
+        })
+    db.session.bulk_insert_mappings(Claim, rows)
+    db.session.flush()
+    rebuild_search_index(db.session.connection())
+
+
+def _legacy_ids(term, kind):
+    """Entity ids the previous ILIKE filters matched for `kind` (no limit)."""
+    model = _KIND_MODELS[kind]
+    cols = [getattr(model, f) for f in _KIND_FIELDS[kind]]
+    like = f"%{term}%"
+    return {r[0] for r in db.session.query(model.id).filter(or_(*[c.ilike(like) for c in cols])).all()}
+
+
+def _legacy_fax_cover(term):
+    like = f"%{term}%"
+    for model in (Provider, Employer, Carrier):
+        model.query.filter(or_(model.name.ilike(like), model.city.ilike(like), model.email.ilike(like), model.phone.ilike(like))).order_by(model.name.asc()).limit(20).all()
+    Claim.query.filter(Claim.claimant_name.ilike(like)).order_by(Claim.id.desc()).limit(20).all()
+    Contact.query.filter(or_(Contact.name.ilike(like), Contact.email.ilike(like), Contact.phone.ilike(like))).order_by(Contact.id.desc()).limit(30).all()
+
+
+LEGACY = {
+    "face-sheet": lambda t: Claim.query.filter(or_(
+        Claim.claim_number.ilike(f"%{t}%"), Claim.claimant_first_name.ilike(f"%{t}%"), Claim.claimant_last_name.ilike(f"%{t}%")
+    )).order_by(Claim.id.desc()).limit(25).all(),
+    "fax-cover": _legacy_fax_cover,
+    "contact": lambda t: Contact.query.filter(or_(
+        Contact.name.ilike(f"%{t}%"), Contact.email.ilike(f"%{t}%"), Contact.phone.ilike(f"%{t}%")
+    )).order_by(Contact.name.asc()).limit(25).all(),
+}
+ENDPOINTS = {
+    "face-sheet": ("/api/face-sheet-search", api_face_sheet_search),
+    "fax-cover": ("/api/fax-cover-search", api_fax_cover_search),
+    "contact": ("/api/contact-search", api_contact_search),
+}
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="approximate synthetic search documents to add")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the keystroke list")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        ensure_search_index()
+        try:
+            started = time.perf_counter()
+            _populate(args.rows)
+            print(f"synthetic data + index: {(time.perf_counter() - started):.1f} s")
+
+            keystrokes = [t[:i] for t in TERMS for i in range(2, len(t) + 1)]
+
+            mismatches = 0
+            for term in keystrokes:
+                for kind in _KIND_MODELS:
+                    expected = _legacy_ids(term, kind)
+                    got = {eid for _, eid in search(term, [kind], limit=10 ** 7)}
+                    if got != expected:
+                        mismatches += 1
+                        print(f"  mismatch {kind} {term!r}: {len(expected)} legacy vs {len(got)} index")
+
+            print(f"{'endpoint':<12} {'legacy p50':>11} {'p95':>8}   {'index p50':>10} {'p95':>8}")
+            for name, (url, view) in ENDPOINTS.items():
+                legacy, indexed = [], []
+                for _ in range(args.repeat):
+                    for term in keystrokes:
+                        t0 = time.perf_counter()
+                        LEGACY[name](term)
+                        legacy.append((time.perf_counter() - t0) * 1000.0)
+                        with app.test_request_context(url, query_string={"q": term}):
+                            t0 = time.perf_counter()
+                            view()
+                            indexed.append((time.perf_counter() - t0) * 1000.0)
+                        db.session.expunge_all()
+                print(
+                    f"{name:<12} {statistics.median(legacy):9.1f}ms {_pct(legacy, 95):6.1f}ms   "
+                    f"{statistics.median(indexed):8.1f}ms {_pct(indexed, 95):6.1f}ms"
+                )
+            print(f"{len(keystrokes)} keystrokes x {len(_KIND_MODELS)} kinds checked: {mismatches} mismatches.")
+            raise SystemExit(1 if mismatches else 0)
+        finally:
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Structured Retrieval Benchmark
+
+Times app.ai.retrieval._retrieve_context_structured (the AI fast-path context)
+against the previous implementation, which loaded every billable of the claim
+and sliced the newest `max_billables` in Python. The comparison runs on a
+synthetic claim with --billables items (plus a few invoices) created inside a
+transaction that is rolled back at the end, and fails if the billables,
+summary or invoices differ.
+
+Nothing is committed; safe to run against a copy of production data.
+
+Usage:
+  python -m app.scripts.bench_structured_retrieval
+  python -m app.scripts.bench_structured_retrieval --billables 20000 --max-billables 500
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app import create_app
+from app.ai.retrieval import EXPENSE_CODES, MILEAGE_CODES, _retrieve_context_structured
+from app.extensions import db
+from app.models import BillableItem, Claim, Invoice
+
+CODES = ["VISIT", "CALL", "EMAIL", "RR", "MIL", "EXP", "NO BILL", None]
+
+
+def legacy_billables(claim_id, max_billables):
+    """Billables + summary exactly as they were computed before (ORM load + slice)."""
+    items = (
+        BillableItem.query.filter(BillableItem.claim_id == claim_id)
+        .order_by(BillableItem.date_of_service.asc().nullslast(), BillableItem.id.asc())
+        .all()
+    )
+    items = items[-max_billables:] if max_billables and len(items) > max_billables else items
+
+    out, hours, miles, expense, invoiced, uninvoiced, no_bill = [], 0.0, 0.0, 0.0, 0, 0, 0
+    for b in items:
+        code = (b.activity_code or "").upper().strip()
+        qty = float(b.quantity or 0.0)
+        if code in EXPENSE_CODES:
+            expense += qty
+        elif code in MILEAGE_CODES:
+            miles += qty
+        else:
+            hours += qty
+        if code.replace("_", " ").replace("-", " ").strip() == "NO BILL":
+            no_bill += 1
+        if b.invoice_id is not None:
+            invoiced += 1
+        else:
+            uninvoiced += 1
+        out.append({
+            "id": b.id,
+            "service_date": str(b.date_of_service) if b.date_of_service else None,
+            "activity_code": code or None,
+            "quantity": qty,
+            "description": b.description or None,
+            "notes": b.notes or None,
+            "invoice_id": b.invoice_id,
+            "is_invoiced": b.invoice_id is not None,
+        })
+    summary = {
+        "hours_total": round(hours, 2),
+        "miles_total": round(miles, 2),
+        "expense_total": round(expense, 2),
+        "billable_count": len(out),
+        "invoiced_count": invoiced,
+        "uninvoiced_count": uninvoiced,
+        "no_bill_count": no_bill,
+    }
+    return out, summary
+
+
+def _synthetic_claim(n_billables):
+    rng = random.Random(17)
+    claim = Claim(claimant_name="Synthetic Benchmark", opened_at=date.today() - timedelta(days=3650))
+    db.session.add(claim)
+    db.session.flush()
+    invoices = [Invoice(claim_id=claim.id, invoice_number=f"BENCH-{i}", status="Draft") for i in range(12)]
+    db.session.add_all(invoices)
+    db.session.flush()
+    db.session.bulk_insert_mappings(BillableItem, [
+        {
+            "claim_id": claim.id,
+            "invoice_id": rng.choice(invoices).id if rng.random() < 0.6 else None,
+            # ~1% undated items and many same-day items exercise the tie/NULL ordering
+            "date_of_service": None if rng.random() < 0.01 else claim.opened_at + timedelta(days=rng.randrange(3650)),
+            "activity_code": rng.choice(CODES),
+            "quantity": None if rng.random() < 0.02 else rng.choice([0.25, 0.5, 1.0, 1.5, 12.0, 37.5]),
+            "description": f"Synthetic item {i}",
+        }
+        for i in range(n_billables)
+    ])
+    db.session.flush()
+    return claim.id
+
+
+def _best_ms(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--billables", type=int, default=10000, help="billable items on the synthetic claim")
+    parser.add_argument("--max-billables", type=int, default=80, help="cap passed to structured retrieval")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            claim_id = _synthetic_claim(args.billables)
+
+            legacy_ms, (old_rows, old_summary) = _best_ms(lambda: legacy_billables(claim_id, args.max_billables), args.repeat)
+            new_ms, ctx = _best_ms(
+                lambda: _retrieve_context_structured(claim_id=claim_id, max_billables=args.max_billables, max_reports=0),
+                args.repeat,
+            )
+
+            same = ctx["billables"] == old_rows and ctx["billable_summary"] == old_summary
+            print(f"claim with {args.billables} billables, max_billables={args.max_billables}")
+            print(f"  legacy billables+summary:        {legacy_ms:8.1f} ms")
+            print(f"  structured retrieval (all parts): {new_ms:8.1f} ms")
+            print(f"  results identical: {same}")
+            if not same:
+                print(f"  legacy summary: {old_summary}")
+                print(f"  new summary:    {ctx['billable_summary']}")
+            raise SystemExit(0 if same else 1)
+        finally:
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+AI System Snapshot Benchmark
+
+Builds the system snapshot that app.ai.retrieval.retrieve() attaches to every
+chat question, for a set of sample questions, against the configured database
+(DATABASE_URL). Each question is measured two ways:
+
+  legacy:  full-table ORM loads serialized via __dict__ (the previous behavior)
+  bounded: _select_system_snapshot (grouped summaries + projected, LIMITed rows)
+
+and prints best-of-N latency, peak Python allocation (tracemalloc) and the
+JSON size the prompt would carry (~4 chars per token).
+
+Read-only; safe to run against a copy of production data.
+
+Usage:
+  python -m app.scripts.bench_system_snapshot
+  python -m app.scripts.bench_system_snapshot --repeat 10 --question "list unpaid invoices"
+"""
+
+import argparse
+import json
+import re
+import time
+import tracemalloc
+
+from app import create_app
+from app.ai.retrieval import Report, _select_system_snapshot
+from app.extensions import db
+from app.models import BillableItem, Claim, Invoice
+
+SAMPLE_QUESTIONS = [
+    "how much is outstanding?",
+    "list unpaid invoices",
+    "what is my workload this week?",
+    "show recent claims",
+    "hello",
+]
+
+
+def legacy_snapshot(query):
+    """The snapshot as it used to be built: every row of every selected table."""
+    q = query.lower()
+    tokens = set(re.findall(r"[a-zA-Z0-9]+", q))
+    billing_terms = {"billing", "invoice", "invoices", "outstanding", "owed", "owe", "due", "ar", "receivable", "paid", "unpaid"}
+    workload_terms = {"workload", "busy", "capacity", "work", "reports", "billables"}
+    claim_terms = {"claim", "claims", "claimant", "injury", "doi", "dos"}
+    reports = lambda: [r.__dict__ for r in Report.query.all()] if Report is not None else []  # noqa: E731
+    if tokens & billing_terms:
+        return {"invoices": [i.__dict__ for i in Invoice.query.all()], "billables": [b.__dict__ for b in BillableItem.query.all()]}
+    if tokens & workload_terms:
+        return {"reports": reports(), "billables": [b.__dict__ for b in BillableItem.query.all()], "claims": [c.__dict__ for c in Claim.query.all()]}
+    if tokens & claim_terms:
+        return {"claims": [c.__dict__ for c in Claim.query.all()], "reports": reports()}
+    return {"claims": [c.__dict__ for c in Claim.query.all()]}
+
+
+def _measure(fn, question, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()  # cold identity map, as on a fresh request
+        started = time.perf_counter()
+        fn(question)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    snapshot = fn(question)
+    size = len(json.dumps(snapshot, default=str))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024.0, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per question (best is reported)")
+    parser.add_argument("--question", action="append", help="question to measure (repeatable; default: samples)")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print(f"{'question':<34} {'legacy ms':>10} {'KiB':>9} {'JSON':>9}   {'bounded ms':>10} {'KiB':>7} {'JSON':>7}")
+        for question in args.question or SAMPLE_QUESTIONS:
+            old = _measure(legacy_snapshot, question, args.repeat)
+            new = _measure(_select_system_snapshot, question, args.repeat)
+            print(
+                f"{question[:34]:<34} {old[0]:10.1f} {old[1]:9.0f} {old[2]:9d}   "
+                f"{new[0]:10.1f} {new[1]:7.0f} {new[2]:7d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
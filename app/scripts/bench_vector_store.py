@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Vector Store Benchmark
+
+Measures recall@k and latency of VectorStore.similarity_search with the LSH
+index (per probe count) against the exact full-namespace scan (a cached matrix
+within --matrix-mb, batched BLOB decoding beyond it), on synthetic
+clustered embeddings written to a throwaway SQLite file (the real
+vector_store.sqlite3 is never touched).
+
+Recall@k is the fraction of the exact top_k that the indexed search returns.
+
+Usage:
+  python -m app.scripts.bench_vector_store                          # 10k and 100k
+  python -m app.scripts.bench_vector_store --sizes 10000 100000 1000000
+  python -m app.scripts.bench_vector_store --sizes 100000 --tables 8 --probes 10 20 40
+  python -m app.scripts.bench_vector_store --sizes 100000 --matrix-mb 0      # no matrix cache
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.ai import store as store_module
+from app.ai.store import DEFAULT_LSH_BITS, DEFAULT_LSH_TABLES, DEFAULT_MATRIX_MAX_BYTES, VectorStore
+
+NAMESPACE = "bench"
+
+
+def _unit(v):
+    n = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / n for x in v]
+
+
+def _vectors(rng, centers, count, noise):
+    for _ in range(count):
+        c = rng.choice(centers)
+        yield _unit([x + rng.gauss(0.0, noise) for x in c])
+
+
+def _build(path, size, *, dim, clusters, noise, tables, bits, seed):
+    rng = random.Random(seed)
+    centers = [_unit([rng.gauss(0.0, 1.0) for _ in range(dim)]) for _ in range(clusters)]
+    store = VectorStore(path, lsh_tables=tables, lsh_bits=bits)
+    started = time.perf_counter()
+    batch = []
+    for i, emb in enumerate(_vectors(rng, centers, size, noise)):
+        batch.append(
+            {
+                "source_id": str(i),
+                "text": f"chunk {i}",
+                "embedding": emb,
+                "metadata": {"claim_id": rng.randint(1, 500), "source_type": rng.choice(["report", "billable", "note"])},
+            }
+        )
+        if len(batch) == 5000:
+            store.upsert_many(namespace=NAMESPACE, items=batch)
+            batch = []
+    if batch:
+        store.upsert_many(namespace=NAMESPACE, items=batch)
+    return centers, time.perf_counter() - started
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - started) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--clusters", type=int, default=200, help="synthetic topic clusters")
+    parser.add_argument("--noise", type=float, default=0.08, help="per-component noise around a cluster center")
+    parser.add_argument("--tables", type=int, default=DEFAULT_LSH_TABLES)
+    parser.add_argument("--bits", type=int, default=DEFAULT_LSH_BITS)
+    parser.add_argument("--probes", type=int, nargs="+", default=[5, 10, 20, 40], help="buckets probed per table")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--matrix-mb", type=float, default=DEFAULT_MATRIX_MAX_BYTES / 2**20, help="NumPy matrix cache budget per namespace"
+    )
+    args = parser.parse_args()
+    matrix_max_bytes = int(args.matrix_mb * 2**20)
+
+    print(f"scoring: {'numpy' if store_module.np is not None else 'pure Python'}")
+    print(f"{'rows':>9}  {'mode':<10}  {'recall@k':>8}  {'median ms':>10}  {'p95 ms':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.sqlite3")
+            centers, build_s = _build(
+                path, size, dim=args.dim, clusters=args.clusters, noise=args.noise, tables=args.tables, bits=args.bits, seed=args.seed
+            )
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{size:>9}  built in {build_s:.1f}s, {size_mb:.1f} MB")
+
+            rng = random.Random(args.seed + 1)
+            queries = list(_vectors(rng, centers, args.queries, args.noise))
+            exact_store = VectorStore(path, lsh_tables=args.tables, lsh_bits=args.bits, matrix_max_bytes=matrix_max_bytes)
+
+            truth, exact_ms = [], []
+            for q in queries:
+                res, ms = _timed(lambda: exact_store.similarity_search(
+                    namespace=NAMESPACE, query_embedding=q, top_k=args.top_k, exact=True
+                ))
+                truth.append({r["source_id"] for r in res})
+                exact_ms.append(ms)
+            _report(size, "exact", 1.0, exact_ms)
+
+            for probes in args.probes:
+                store = VectorStore(
+                    path,
+                    lsh_tables=args.tables,
+                    lsh_bits=args.bits,
+                    lsh_probes=probes,
+                    exact_max_rows=0,
+                    matrix_max_bytes=matrix_max_bytes,
+                )
+                hits, times = 0, []
+                for q, expected in zip(queries, truth):
+                    res, ms = _timed(lambda: store.similarity_search(
+                        namespace=NAMESPACE, query_embedding=q, top_k=args.top_k
+                    ))
+                    hits += len(expected & {r["source_id"] for r in res})
+                    times.append(ms)
+                _report(size, f"lsh p={probes}", hits / (len(queries) * args.top_k), times)
+
+            store = VectorStore(path, lsh_tables=args.tables, lsh_bits=args.bits, matrix_max_bytes=matrix_max_bytes)
+            _, ms = _timed(lambda: store.similarity_search(
+                namespace=NAMESPACE,
+                query_embedding=queries[0],
+                top_k=args.top_k,
+                filters={"claim_id": 42, "source_type": ["report", "note"]},
+            ))
+            print(f"{size:>9}  filtered (claim_id + source_type) search: {ms:.1f} ms")
+
+
+def _report(size, mode, recall, times):
+    times = sorted(times)
+    p95 = times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+    print(f"{size:>9}  {mode:<10}  {recall:>8.3f}  {statistics.median(times):>10.1f}  {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
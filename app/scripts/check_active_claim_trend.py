@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Active Claim Trend Equivalence Check
+
+Computes the dashboard's active-claim trend three ways for every period of the
+configured database (DATABASE_URL) and reports any mismatch:
+
+  1. reference: one COUNT(Claim.id) per bucket straight from the claim table
+     (opened_at <= day AND (closed_at IS NULL OR closed_at > day))
+  2. get_active_claim_trend: one calendar-join query over the claim rollups
+  3. DashboardAggregates.active_claim_trend: sweep-line over the rollup rows
+     the dashboard already loaded
+
+Read-only apart from the one-time rollup backfill; safe to run against a copy
+of production data.
+
+Usage:
+  python -m app.scripts.check_active_claim_trend
+  python -m app.scripts.check_active_claim_trend --periods WEEK YEAR
+"""
+
+import argparse
+
+from sqlalchemy import func, or_
+
+from app import create_app
+from app.extensions import db
+from app.models import Claim
+from app.services.dashboard_service import (
+    DASHBOARD_PERIODS,
+    DashboardAggregates,
+    _active_claim_buckets,
+    get_active_claim_trend,
+    get_period_bounds,
+)
+
+
+def reference_trend(period):
+    """The active claim trend exactly as it was computed bucket-by-bucket."""
+    start, end = get_period_bounds(period)
+    out = []
+    for label, as_of in _active_claim_buckets(period, start, end):
+        count = (
+            db.session.query(func.count(Claim.id))
+            .filter(Claim.opened_at <= as_of)
+            .filter(or_(Claim.closed_at.is_(None), Claim.closed_at > as_of))
+            .scalar()
+            or 0
+        )
+        out.append({"label": label, "count": int(count)})
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--periods", nargs="+", default=["MTD", *DASHBOARD_PERIODS], help="periods to compare")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        agg = DashboardAggregates(args.periods)
+        mismatches = 0
+        for period in args.periods:
+            expected = reference_trend(period)
+            results = {
+                "single query": get_active_claim_trend(period),
+                "sweep": agg.active_claim_trend(period),
+            }
+            for name, got in results.items():
+                if got != expected:
+                    mismatches += 1
+                    print(f"{period} ({name}): expected {expected!r}, got {got!r}")
+            print(f"{period:>6}: {len(expected)} buckets checked")
+
+        print(f"{mismatches} mismatches.")
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
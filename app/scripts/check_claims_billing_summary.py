@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Claims List Billing Summary Equivalence Check
+
+Recomputes the claims-list billing summary two ways for every claim in the
+configured database (DATABASE_URL) and reports any mismatch:
+
+  1. reference: the original item-by-item loop (compute_invoice_financials per
+     open invoice, Python loop over un-invoiced billables)
+  2. claims_list_service.get_billing_summary (grouped SQL rollup)
+
+Read-only; safe to run against a copy of production data.
+
+Usage:
+  python -m app.scripts.check_claims_billing_summary
+  python -m app.scripts.check_claims_billing_summary --batch 200 --tolerance 1e-6
+"""
+
+import argparse
+
+from app import create_app
+from app.models import BillableItem, Claim, Invoice
+from app.routes.helpers import _ensure_settings, compute_invoice_financials
+from app.services.claims_list_service import get_billing_summary
+
+
+def reference_summary(claims, settings):
+    """The claims_list billing summary exactly as it was computed item-by-item."""
+    claim_ids = [c.id for c in claims]
+    claims_by_id = {c.id: c for c in claims}
+    summary = {
+        cid: {"total": 0, "open": 0, "closed": 0, "open_total": 0.0, "uninvoiced_total": 0.0}
+        for cid in claim_ids
+    }
+
+    for inv in Invoice.query.filter(Invoice.claim_id.in_(claim_ids)).all():
+        entry = summary[inv.claim_id]
+        entry["total"] += 1
+        if (inv.status or "Draft") in ("Paid", "Void"):
+            entry["closed"] += 1
+            continue
+        entry["open"] += 1
+        fin = compute_invoice_financials(invoice=inv, settings=settings, claim=claims_by_id[inv.claim_id])
+        entry["open_total"] += float(fin.get("invoice_total") or fin.get("total") or 0.0)
+
+    for b in BillableItem.query.filter(BillableItem.claim_id.in_(claim_ids)).all():
+        if b.invoice_id:
+            continue
+        if (b.activity_code or "").upper() == "NO BILL":
+            continue
+        if not b.quantity:
+            continue
+        claim_obj = claims_by_id[b.claim_id]
+        rate = settings.telephonic_rate if claim_obj.is_telephonic else settings.hourly_rate
+        summary[b.claim_id]["uninvoiced_total"] += float(b.quantity) * float(rate or 0.0)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=100, help="claims per comparison batch (mirrors page size)")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="allowed float difference for money totals")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        settings = _ensure_settings()
+        ids = [cid for (cid,) in Claim.query.with_entities(Claim.id).order_by(Claim.id).all()]
+
+        mismatches = 0
+        for start in range(0, len(ids), args.batch):
+            claims = Claim.query.filter(Claim.id.in_(ids[start:start + args.batch])).all()
+            expected = reference_summary(claims, settings)
+            actual = get_billing_summary(claims, settings)
+
+            for cid, exp in expected.items():
+                got = actual.get(cid, {})
+                for key, exp_val in exp.items():
+                    got_val = got.get(key)
+                    if isinstance(exp_val, float):
+                        ok = got_val is not None and abs(float(got_val) - exp_val) <= args.tolerance
+                    else:
+                        ok = got_val == exp_val
+                    if not ok:
+                        mismatches += 1
+                        print(f"Claim {cid}: {key} expected {exp_val!r}, got {got_val!r}")
+
+        print(f"Checked {len(ids)} claims: {mismatches} mismatches.")
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
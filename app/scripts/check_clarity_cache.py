@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Clarity Answer Cache Check
+
+Asks a set of common Clarity questions (system-wide and for the newest
+claims) against the configured database (DATABASE_URL) and the configured
+LLM backend, and reports:
+
+  cold:  the first ask (cache miss: routing, retrieval, LLM)
+  warm:  the same question again, re-phrased only in case/spacing/punctuation
+         (exact-tier hit)
+
+Every warm answer is compared with a fresh uncached answer
+(ask_clarity(..., use_cache=False)).
+
+It then checks invalidation. It caches "how many open claims", closes one
+open claim (committed) and asks again; the answer must be rebuilt with the
+new count. Then it re-opens the claim (committed) and asks again, with the
+same check. The claim is always restored. Run against a copy of production
+data.
+
+Exits 1 if any cached answer differs from a fresh one.
+
+Usage:
+  python -m app.scripts.check_clarity_cache
+  python -m app.scripts.check_clarity_cache --claims 5 --repeat 3
+"""
+
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.extensions import db
+from app.models import Claim
+from app.services import ai_service
+from app.services.clarity_cache import clear_clarity_cache, get_clarity_cache_stats
+
+SYSTEM_QUESTIONS = [
+    "How many open claims?",
+    "How many closed claims?",
+    "outstanding billing",
+    "How many unpaid invoices?",
+    "What can you do?",
+]
+CLAIM_QUESTIONS = [
+    "Summarize this claim",
+    "What is the latest report status?",
+    "How many billable items are on this claim?",
+    "What invoices are open on this claim?",
+]
+
+
+def _rephrase(question):
+    return "  " + question.upper().rstrip("?") + " ? "
+
+
+def _ask(question, context, use_cache=True):
+    started = time.perf_counter()
+    result = ai_service.ask_clarity(question=question, context=dict(context), use_cache=use_cache)
+    return (time.perf_counter() - started) * 1000.0, result
+
+
+def _answer(result):
+    return (result or {}).get("answer") or (result or {}).get("text")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=3, help="newest claims to ask claim questions about")
+    parser.add_argument("--repeat", type=int, default=2, help="warm asks per question")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        clear_clarity_cache()
+        claim_ids = [cid for (cid,) in db.session.query(Claim.id).order_by(Claim.id.desc()).limit(args.claims)]
+        cases = [(q, {"context_scope": "system"}) for q in SYSTEM_QUESTIONS]
+        cases += [(q, {"claim_id": cid, "context_scope": "claim"}) for cid in claim_ids for q in CLAIM_QUESTIONS]
+
+        cold, warm, mismatches = [], [], 0
+        for question, context in cases:
+            ms, _ = _ask(question, context)
+            cold.append(ms)
+            for _ in range(args.repeat):
+                ms, cached = _ask(_rephrase(question), context)
+                warm.append(ms)
+                _, fresh = _ask(question, context, use_cache=False)
+                if _answer(cached) != _answer(fresh):
+                    mismatches += 1
+                    print(f"  MISMATCH {question!r} {context}: {_answer(cached)!r} vs {_answer(fresh)!r}")
+        stats = get_clarity_cache_stats()
+        print(f"{len(cases)} questions, {len(warm)} repeats")
+        print(f"cold p50 {statistics.median(cold):8.1f} ms   max {max(cold):8.1f} ms")
+        print(f"warm p50 {statistics.median(warm):8.2f} ms   max {max(warm):8.2f} ms")
+        print(
+            f"hits {stats['exact_hits']}  misses {stats['misses']}  uncacheable {stats['uncacheable']}  "
+            f"(uncacheable answers are rebuilt every time)"
+        )
+
+        # Invalidation: a committed write must never leave a stale number cached.
+        claim = db.session.query(Claim).filter(Claim.is_closed.isnot(True)).order_by(Claim.id.desc()).first()
+        if claim is not None:
+            question, context = "How many open claims?", {"context_scope": "system"}
+            original = (claim.status, claim.is_closed)
+            try:
+                for step, (status, is_closed) in (("closed one", ("closed", True)), ("re-opened it", original)):
+                    _ask(question, context)  # make sure it is cached
+                    claim.status, claim.is_closed = status, is_closed
+                    db.session.commit()
+                    _, cached = _ask(question, context)
+                    _, fresh = _ask(question, context, use_cache=False)
+                    ok = _answer(cached) == _answer(fresh) and not cached.get("cache")
+                    mismatches += 0 if ok else 1
+                    print(f"{step:<13} -> {_answer(cached)!r} ({'rebuilt' if ok else 'STALE'})")
+            finally:
+                claim.status, claim.is_closed = original
+                db.session.commit()
+
+        print(f"{mismatches} stale or mismatched answers.")
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
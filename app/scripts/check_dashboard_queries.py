@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Dashboard Query-Count Check
+
+Builds the /analysis dashboard context (build_dashboard_context) for the
+configured database (DATABASE_URL) once per period and counts the SQL
+statements each build issues. Exits non-zero when any build exceeds the
+budget, so a module that slips back into per-period or per-bucket queries is
+caught before it ships.
+
+The count does not depend on the amount of data: every period window and
+trend bucket is evaluated from one read of the daily rollups plus two
+window-limited per-claim queries, Settings, reports due, appointments and the
+system health probe.
+
+Read-only apart from the one-time rollup backfill on a database that has never
+been built (done before counting); safe to run against a copy of production data.
+
+Usage:
+  python -m app.scripts.check_dashboard_queries
+  python -m app.scripts.check_dashboard_queries --budget 10 --verbose
+  python -m app.scripts.check_dashboard_queries --periods WEEK YEAR
+"""
+
+import argparse
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.services.analytics_rollup import ensure_rollups
+from app.services.dashboard_service import DASHBOARD_PERIODS, build_dashboard_context
+
+DEFAULT_BUDGET = 12
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="max SQL statements per dashboard build")
+    parser.add_argument(
+        "--periods",
+        nargs="+",
+        default=["MTD", *DASHBOARD_PERIODS],
+        help="period selected in every module dropdown, one build each",
+    )
+    parser.add_argument("--verbose", action="store_true", help="print every statement issued")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        ensure_rollups()
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _count)
+        over = 0
+        try:
+            for period in args.periods:
+                statements.clear()
+                started = time.perf_counter()
+                build_dashboard_context(*([period] * 7))
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                db.session.rollback()
+
+                status = "ok" if len(statements) <= args.budget else "OVER BUDGET"
+                if len(statements) > args.budget:
+                    over += 1
+                print(f"{period:>6}: {len(statements):3d} queries, {elapsed_ms:7.1f} ms  {status}")
+                if args.verbose:
+                    for sql in statements:
+                        print("        " + " ".join(sql.split())[:160])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _count)
+
+        print(f"Budget {args.budget} queries per build: {over} of {len(args.periods)} builds over.")
+        raise SystemExit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Invoice Number Allocation Stress Check
+
+Creates invoices from --workers threads at once (each thread has its own
+session and connection, like concurrent requests), --per-worker invoices
+each, all committed against the configured database (DATABASE_URL), and
+reports duplicate invoice numbers for:
+
+  legacy:    the previous allocator (load the year's invoices, max + 1 in Python)
+  allocator: app.routes.helpers._generate_invoice_number (counter row)
+
+It then checks hand-typed numbers: a draft invoice is renumbered through the
+invoice update form to a number ahead of the counter, and the next
+allocations must continue after it instead of handing it out again.
+
+The invoices use their own prefix (--prefix, default STRESS) on a synthetic
+claim; the invoices, the claim and the prefix's counters are deleted at the
+end. Run against a copy of production data.
+
+Usage:
+  python -m app.scripts.check_invoice_numbers
+  python -m app.scripts.check_invoice_numbers --workers 16 --per-worker 50 --think-ms 5
+"""
+
+import argparse
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+from app import create_app
+from app.extensions import db
+from app.models import Claim, Invoice, InvoiceNumberCounter
+from app.routes.helpers import _generate_invoice_number, _today_local
+from app.services.invoice_numbers import format_number, year_prefix
+
+
+def legacy_invoice_number(prefix):
+    """The previous allocator: scan the year's invoices and take max + 1."""
+    year_short = _today_local().strftime("%y")
+    year_prefix = f"{prefix}-{year_short}-"
+    max_seq = 0
+    for inv in db.session.query(Invoice).filter(Invoice.invoice_number.like(f"{year_prefix}%")).all():
+        parts = inv.invoice_number.split("-")
+        if len(parts) >= 3 and parts[1] == year_short and parts[2].isdigit():
+            max_seq = max(max_seq, int(parts[2]))
+    return f"{year_prefix}{max_seq + 1:03d}"
+
+
+def _run(app, allocate, claim_id, workers, per_worker, think_ms):
+    errors = []
+    start = threading.Barrier(workers)
+
+    def worker():
+        with app.app_context():
+            start.wait()
+            for _ in range(per_worker):
+                try:
+                    number = allocate()
+                    if think_ms:
+                        time.sleep(think_ms / 1000.0)  # rest of the request before commit
+                    db.session.add(Invoice(claim_id=claim_id, invoice_number=number, status="Draft"))
+                    db.session.commit()
+                except Exception as exc:  # keep going; report at the end
+                    db.session.rollback()
+                    errors.append(repr(exc))
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return (time.perf_counter() - started) * 1000.0, errors
+
+
+def _check_manual_number(app, prefix, claim_id):
+    """Allocate 2, type #4 into a draft, allocate 4 more: expect 005-008, no duplicates."""
+    yp = year_prefix(prefix, _today_local())
+    for _ in range(2):
+        db.session.add(Invoice(claim_id=claim_id, invoice_number=_generate_invoice_number(prefix=prefix), status="Draft"))
+        db.session.commit()
+    draft = Invoice(claim_id=claim_id, invoice_number=f"{prefix}-DRAFT", status="Draft")
+    db.session.add(draft)
+    db.session.commit()
+
+    typed = format_number(yp, 4)
+    resp = app.test_client().post(f"/billing/{draft.id}/update", data={"invoice_number": typed})
+    if resp.status_code >= 400:
+        return [f"invoice update returned HTTP {resp.status_code}"]
+    db.session.expire_all()
+
+    allocated = []
+    for _ in range(4):
+        number = _generate_invoice_number(prefix=prefix)
+        db.session.add(Invoice(claim_id=claim_id, invoice_number=number, status="Draft"))
+        db.session.commit()
+        allocated.append(number)
+
+    problems = []
+    expected = [format_number(yp, n) for n in range(5, 9)]
+    if allocated != expected:
+        problems.append(f"after typing {typed}: allocated {allocated}, expected {expected}")
+    numbers = [n for (n,) in db.session.query(Invoice.invoice_number).filter(Invoice.invoice_number.like(f"{yp}%"))]
+    problems += [f"duplicate {n}" for n, c in Counter(numbers).items() if c > 1]
+    return problems
+
+
+def _cleanup(prefix, claim_id=None):
+    Invoice.query.filter(Invoice.invoice_number.like(f"{prefix}-%")).delete(synchronize_session=False)
+    InvoiceNumberCounter.query.filter(InvoiceNumberCounter.prefix.like(f"{prefix}-%")).delete(synchronize_session=False)
+    if claim_id is not None:
+        db.session.delete(db.session.get(Claim, claim_id))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent threads")
+    parser.add_argument("--per-worker", type=int, default=25, help="invoices created per thread")
+    parser.add_argument("--think-ms", type=float, default=2.0, help="pause between allocation and commit")
+    parser.add_argument("--prefix", default="STRESS", help="invoice number prefix used for the test rows")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        claim = Claim(claimant_name="Invoice Number Stress", opened_at=date.today())
+        db.session.add(claim)
+        db.session.commit()
+        claim_id = claim.id
+
+        failed = False
+        try:
+            for name, allocate in (
+                ("legacy", lambda: legacy_invoice_number(args.prefix)),
+                ("allocator", lambda: _generate_invoice_number(prefix=args.prefix)),
+            ):
+                _cleanup(args.prefix)
+                elapsed, errors = _run(app, allocate, claim_id, args.workers, args.per_worker, args.think_ms)
+                numbers = [
+                    n for (n,) in db.session.query(Invoice.invoice_number)
+                    .filter(Invoice.invoice_number.like(f"{args.prefix}-%"))
+                ]
+                dupes = sum(c - 1 for c in Counter(numbers).values() if c > 1)
+                print(
+                    f"{name:<10} {len(numbers):5d} invoices in {elapsed:7.0f} ms   "
+                    f"{dupes:4d} duplicate numbers   {len(errors)} errors"
+                )
+                for err in sorted(set(errors))[:3]:
+                    print(f"  {err}")
+                if name == "allocator":
+                    expected = args.workers * args.per_worker
+                    failed = bool(dupes or errors or len(numbers) != expected)
+
+            _cleanup(args.prefix)
+            problems = _check_manual_number(app, args.prefix, claim_id)
+            print(f"{'typed':<10} {'ok' if not problems else 'FAILED'}")
+            for problem in problems:
+                print(f"  {problem}")
+            failed = failed or bool(problems)
+        finally:
+            _cleanup(args.prefix, claim_id)
+
+        raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
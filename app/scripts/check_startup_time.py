@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+App Start-up Time Check
+
+Starts fresh interpreters that import the app and call create_app() (what
+every gunicorn worker and every CLI script does before its first line of
+work) against the configured database (DATABASE_URL), and reports:
+
+  wall:    median import + create_app() time over --runs interpreters
+  imports: the slowest app modules from `python -X importtime` (cumulative,
+           including what they import)
+
+It also checks that start-up does no LLM work: the shared LLM router is not
+built, no background threads are started, no networking/rendering stacks
+(--forbid, default requests and playwright) are imported, and nothing is
+printed to stdout.
+
+Exits 1 if the median is over --budget-ms or any check fails.
+
+Usage:
+  python -m app.scripts.check_startup_time
+  python -m app.scripts.check_startup_time --runs 9 --budget-ms 1500 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import time
+started = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = (time.perf_counter() - started) * 1000.0
+import json, sys, threading
+import app.ai.llm as llm_module
+print("@@" + json.dumps({
+    "ms": elapsed,
+    "router_built": any(vars(llm_module).get(name) is not None for name in ("_llm", "llm")),
+    "threads": [t.name for t in threading.enumerate() if t is not threading.main_thread()],
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def _child(importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=dict(os.environ))
+    if proc.returncode != 0:
+        raise SystemExit(f"create_app() failed:\n{proc.stderr[-2000:]}")
+    lines = proc.stdout.splitlines()
+    result = json.loads(next(line[2:] for line in lines if line.startswith("@@")))
+    result["stdout"] = [line for line in lines if not line.startswith("@@")]
+    result["stderr"] = proc.stderr
+    return result
+
+
+def _import_times(stderr):
+    """{module: cumulative microseconds} from -X importtime output."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            out[name.strip()] = int(cumulative)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="largest allowed median start-up time")
+    parser.add_argument("--top", type=int, default=10, help="slowest app modules to list")
+    parser.add_argument(
+        "--forbid", default="requests,playwright", help="comma-separated top-level packages start-up must not import"
+    )
+    args = parser.parse_args()
+
+    if not os.environ.get("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is required (create_app() needs it).")
+
+    walls = [_child()["ms"] for _ in range(args.runs)]
+    detail = _child(importtime=True)
+    times = _import_times(detail["stderr"])
+
+    print(f"start-up (import + create_app) over {args.runs} runs:")
+    print(f"  median {statistics.median(walls):7.0f} ms   min {min(walls):7.0f} ms   max {max(walls):7.0f} ms")
+    print("slowest app modules (cumulative, -X importtime):")
+    app_modules = sorted(
+        ((name, us) for name, us in times.items() if name == "app" or name.startswith("app.")),
+        key=lambda item: -item[1],
+    )
+    for name, us in app_modules[: args.top]:
+        print(f"  {us / 1000.0:7.1f} ms  {name}")
+
+    failures = []
+    if statistics.median(walls) > args.budget_ms:
+        failures.append(f"median start-up {statistics.median(walls):.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if detail["router_built"]:
+        failures.append("the shared LLM router was built during start-up")
+    if detail["threads"]:
+        failures.append(f"background threads started during start-up: {', '.join(detail['threads'])}")
+    forbidden = [p.strip() for p in args.forbid.split(",") if p.strip()]
+    for package in forbidden:
+        if package in detail["modules"]:
+            importers = [name for name in times if name == package or name.startswith(package + ".")]
+            ms = max((times[name] for name in importers), default=0) / 1000.0
+            failures.append(f"{package} imported during start-up ({ms:.1f} ms)")
+    if detail["stdout"]:
+        failures.append(f"start-up printed to stdout: {detail['stdout'][:3]}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("OK: within budget; no LLM router, threads, forbidden imports or stdout at start-up.")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
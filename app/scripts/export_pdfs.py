@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Batch PDF Export
+
+Writes every report and invoice PDF for a claim, or every open (not Paid/Void)
+invoice for a carrier, into one ZIP using the configured database
+(DATABASE_URL). PDFs that are already current on disk are reused; the rest are
+rendered in parallel on the shared warm Chromium (PDF_POOL_SIZE) and stored
+back so the next export or download is a cache hit.
+
+Requires Playwright with Chromium installed for anything not already cached
+(`python -m playwright install chromium`).
+
+Usage:
+  python -m app.scripts.export_pdfs --claim 12
+  python -m app.scripts.export_pdfs --carrier 3 --out open-invoices.zip
+"""
+
+import argparse
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--claim", type=int, help="claim id: all reports and invoices")
+    target.add_argument("--carrier", type=int, help="carrier id: all open invoices")
+    parser.add_argument("--out", help="ZIP path (default: DOCUMENTS_ROOT/exports/...)")
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.routes.exports import run_pdf_export
+    from app.services import pdf_service
+
+    scope, target_id = ("claim", args.claim) if args.claim else ("carrier", args.carrier)
+
+    def progress(done, total, message):
+        print(f"[{done}/{total}] {message or ''}", flush=True)
+
+    app = create_app()
+    with app.test_request_context("/"):
+        try:
+            summary = run_pdf_export(scope, target_id, out_path=args.out, progress=progress)
+        except LookupError as e:
+            parser.error(str(e))
+        except pdf_service.PdfRenderError as e:
+            print(f"Export failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            pdf_service.shutdown()
+
+    print(
+        f"Wrote {summary['path']}: {summary['added']}/{summary['total']} PDF(s) "
+        f"({summary['cached']} cached, {summary['rendered']} rendered) "
+        f"in {summary['elapsed_ms'] / 1000.0:.1f}s"
+    )
+    for failure in summary["failed"]:
+        print(f"  FAILED {failure['name']}: {failure['error']}", file=sys.stderr)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
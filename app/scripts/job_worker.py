@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Background Job Worker
+
+Processes the `background_job` queue (PDF renders, outbound email) for the
+configured database (DATABASE_URL). Run one or more of these alongside the web
+server and set JOB_WORKER_IN_PROCESS=0 on the web processes so they only enqueue.
+
+Usage:
+  python -m app.scripts.job_worker                 # run forever, 2 threads
+  python -m app.scripts.job_worker --threads 4
+  python -m app.scripts.job_worker --once          # drain due jobs, then exit
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=2, help="concurrent jobs in this process")
+    parser.add_argument("--once", action="store_true", help="run every job that is due now, then exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    # This process *is* the worker; never spawn the lazy in-process pool on top.
+    os.environ["JOB_WORKER_IN_PROCESS"] = "0"
+
+    from app import create_app
+    from app.services import job_queue
+
+    app = create_app()
+
+    if args.once:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:once"
+        with app.app_context():
+            job_queue.requeue_stale_jobs()
+        n = job_queue.process_available_jobs(app, worker_id=worker_id)
+        print(f"Processed {n} job(s).")
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    job_queue.start_workers(app, threads=args.threads)
+    print(f"Job worker running with {args.threads} thread(s); Ctrl+C to stop.")
+    stop.wait()
+    job_queue.stop_workers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Rebuild Daily Fact Rollups
+
+Recomputes daily_fact_rollup (the dashboard's per-day billable, invoice and
+claim aggregates) from the source tables of the configured database
+(DATABASE_URL). The app keeps the rollups current on every ORM write; run this
+after importing or editing billables/invoices/claims with raw SQL.
+
+--check rebuilds inside a transaction, compares the result with what is
+stored, reports any drift and rolls back (read-only).
+
+Usage:
+  python -m app.scripts.rebuild_rollups
+  python -m app.scripts.rebuild_rollups --check
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from app import create_app
+from app.extensions import db
+from app.models import DailyFactRollup
+from app.services.analytics_rollup import BUILT_MARKER, rebuild_rollups
+
+
+def _snapshot(conn):
+    t = DailyFactRollup.__table__
+    rows = conn.execute(
+        t.select().with_only_columns(t.c.fact, t.c.day, t.c.key, t.c.flag, t.c.quantity, t.c.amount, t.c.row_count)
+        .where(t.c.fact != BUILT_MARKER)
+    )
+    return Counter(
+        (r.fact, str(r.day), r.key, bool(r.flag), round(float(r.quantity), 6), round(float(r.amount), 6), int(r.row_count))
+        for r in rows
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="compare stored rollups with a fresh rebuild, change nothing")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        if not args.check:
+            rebuild_rollups()
+            count = db.session.query(DailyFactRollup).filter(DailyFactRollup.fact != BUILT_MARKER).count()
+            print(f"Rebuilt {count} rollup rows in {(time.perf_counter() - started) * 1000.0:.0f} ms.")
+            return
+
+        with db.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                stored = _snapshot(conn)
+                rebuild_rollups(conn)
+                fresh = _snapshot(conn)
+            finally:
+                trans.rollback()
+
+        if not stored:
+            print("Rollups have not been built yet (the app builds them on first use).")
+            raise SystemExit(1)
+
+        missing = fresh - stored
+        extra = stored - fresh
+        for row in sorted(missing.elements(), key=str):
+            print(f"missing: {row}")
+        for row in sorted(extra.elements(), key=str):
+            print(f"stale:   {row}")
+        drift = sum(missing.values()) + sum(extra.values())
+        print(f"Checked {sum(fresh.values())} rollup rows: {drift} differences.")
+        raise SystemExit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Rebuild Autocomplete Search Index
+
+Recomputes search_document and search_gram (the face sheet / fax cover /
+contact autocomplete index) from the claim, carrier, employer, provider and contact tables of the
+configured database (DATABASE_URL). The app keeps the index current on every
+ORM write; run this after importing or editing those tables with raw SQL.
+
+--check rebuilds inside a transaction, compares the result with what is
+stored, reports any drift and rolls back (read-only).
+
+Usage:
+  python -m app.scripts.rebuild_search_index
+  python -m app.scripts.rebuild_search_index --check
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from app import create_app
+from app.extensions import db
+from app.models import SearchDocument, SearchGram
+from app.services.search_index import BUILT_MARKER, rebuild_search_index
+
+
+def _snapshot(conn):
+    t = SearchDocument.__table__
+    rows = conn.execute(
+        t.select().with_only_columns(t.c.kind, t.c.entity_id, t.c.title, t.c.search_text)
+        .where(t.c.kind != BUILT_MARKER)
+    )
+    return Counter((r.kind, int(r.entity_id), r.title, r.search_text) for r in rows)
+
+
+def _gram_snapshot(conn):
+    g = SearchGram.__table__
+    rows = conn.execute(g.select().with_only_columns(g.c.kind, g.c.entity_id, g.c.gram, g.c.tier, g.c.title_key))
+    return Counter((r.kind, int(r.entity_id), r.gram, int(r.tier), r.title_key) for r in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="compare stored documents with a fresh rebuild, change nothing")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        if not args.check:
+            rebuild_search_index()
+            count = db.session.query(SearchDocument).filter(SearchDocument.kind != BUILT_MARKER).count()
+            print(f"Rebuilt {count} search documents in {(time.perf_counter() - started) * 1000.0:.0f} ms.")
+            return
+
+        with db.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                stored, stored_grams = _snapshot(conn), _gram_snapshot(conn)
+                rebuild_search_index(conn)
+                fresh, fresh_grams = _snapshot(conn), _gram_snapshot(conn)
+            finally:
+                trans.rollback()
+
+        if not stored:
+            print("The search index has not been built yet (the app builds it on first search).")
+            raise SystemExit(1)
+
+        missing = fresh - stored
+        extra = stored - fresh
+        for row in sorted(missing.elements(), key=str):
+            print(f"missing: {row}")
+        for row in sorted(extra.elements(), key=str):
+            print(f"stale:   {row}")
+        drift = sum(missing.values()) + sum(extra.values())
+        print(f"Checked {sum(fresh.values())} search documents: {drift} differences.")
+
+        gram_drift = list((fresh_grams - stored_grams).elements()) + list((stored_grams - fresh_grams).elements())
+        for row in sorted(gram_drift, key=str)[:20]:
+            print(f"gram:    {row}")
+        print(f"Checked {sum(fresh_grams.values())} search grams: {len(gram_drift)} differences.")
+        drift += len(gram_drift)
+        raise SystemExit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
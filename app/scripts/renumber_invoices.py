@@ -1,39 +1,59 @@
-from datetime import datetime
-from app import create_app
-from app.models import Invoice, _now_local
-from app import db
-
-
-def main():
-    app = create_app()
-    app.app_context().push()
+#!/usr/bin/env python
+"""
+Renumber Invoices
 
-    year_suffix = _now_local().strftime("%y")
-    prefix = f"INV-{year_suffix}-"
+Reissues every invoice number, oldest invoice first (created_at, then id), as
+INV-YY-001, INV-YY-002, ... for the current year, through the same counter
+the app allocates new invoice numbers from (app.services.invoice_numbers).
 
-    invoices = (
-        Invoice.query
-        .order_by(Invoice.created_at.asc(), Invoice.id.asc())
-        .all()
-    )
+The counter for the year is reset and then advanced once per invoice inside a
+single transaction, so invoices created concurrently wait for the renumbering
+to commit and then continue after its last number.
 
-    print(f"Found {len(invoices)} invoices. Renumbering...")
+Usage:
+  python -m app.scripts.renumber_invoices
+  python -m app.scripts.renumber_invoices --dry-run
+"""
 
-    counter = 1
+import argparse
 
-    for invoice in invoices:
-        new_number = f"{prefix}{counter:03d}"
-
-        old_number = invoice.invoice_number
-        invoice.invoice_number = new_number
+from app import create_app
+from app.extensions import db
+from app.models import Invoice
+from app.services.invoice_numbers import allocate_sequence, format_number, reset_counter, year_prefix
 
-        print(f"{old_number}  →  {new_number}")
 
-        counter += 1
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="print the new numbers, change nothing")
+    args = parser.parse_args()
 
-    db.session.commit()
-    print("Done.")
+    app = create_app()
+    with app.app_context():
+        prefix = year_prefix()
+        conn = db.session.connection()
+        try:
+            # Taking the counter first locks out concurrent allocations until we commit.
+            reset_counter(prefix, 0, conn)
+
+            invoices = Invoice.query.order_by(Invoice.created_at.asc(), Invoice.id.asc()).all()
+            print(f"Found {len(invoices)} invoices. Renumbering...")
+
+            for invoice in invoices:
+                new_number = format_number(prefix, allocate_sequence(prefix, conn))
+                print(f"{invoice.invoice_number}  →  {new_number}")
+                invoice.invoice_number = new_number
+
+            if args.dry_run:
+                db.session.rollback()
+                print("Dry run: nothing changed.")
+                return
+            db.session.commit()
+            print("Done.")
+        except Exception:
+            db.session.rollback()
+            raise
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -600,7 +600,18 @@ def generate(prompt: str) -> Dict[str, Any]:
         "answer_mode": normalized.get("answer_mode"),
     }
 
-def ask_clarity(question: str, context: dict) -> Dict[str, Any]:
+def ask_clarity(question: str, context: dict, *, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Answer a Clarity question, reusing a cached answer while its data is
+    unchanged (see app.services.clarity_cache). use_cache=False always
+    answers fresh.
+    """
+    from app.services.clarity_cache import cached_answer  # local import to avoid circulars
+
+    return cached_answer(question, context, _ask_clarity, bypass=not use_cache)
+
+
+def _ask_clarity(question: str, context: dict) -> Dict[str, Any]:
     trace = {
         "question_raw": question,
         "question_norm": _qnorm(question),
@@ -1772,6 +1783,7 @@ def retrieve(context: dict = None, question: str = None, **kwargs) -> Dict[str,
         query=question or "",
         scope=context.get("scope"),
         mode=context.get("mode"),
+        include_snapshot=False,  # dropped below; don't build it
     )
     # Only keep the Clarity contract keys
     return {
@@ -0,0 +1,432 @@
+"""Daily fact rollups for the analytics dashboard.
+
+The dashboard used to aggregate raw BillableItem/Invoice/Claim rows on every
+page view, so it slowed down as history accumulated. daily_fact_rollup keeps
+one row per (fact, day, key, flag) instead:
+
+  billable         day = date_of_service, key = activity_code,
+                   flag = pending (un-invoiced and complete), quantity = SUM(quantity)
+  invoice          day = invoice_date, key = UPPER(status), amount = SUM(total_amount)
+  invoice_undated  day = DATE(created_at) for invoices without an invoice_date
+  claim_opened     day = opened_at, flag = status is not CLOSED, row_count
+  claim_closed     day = the day the claim stops counting as active
+                   (closed_at, or opened_at if it was closed before it opened)
+
+Active claims on day D = SUM(claim_opened <= D) - SUM(claim_closed <= D).
+
+Keeping it current:
+- Flush hooks read the days every inserted, updated or deleted
+  BillableItem/Invoice/Claim occupied before the flush and occupies after it,
+  then recompute just those days, inside the same transaction as the change,
+  so readers never see a stale rollup.
+- Bulk Query.update()/delete() on those models (e.g. claim deletion) are
+  intercepted in do_orm_execute and refresh the days they touch.
+- Payments do not feed a rollup directly; recording one changes the invoice's
+  status, which the invoice hook picks up.
+- Raw SQL writes bypass both hooks: run `python -m app.scripts.rebuild_rollups`.
+
+Concurrency (Postgres): a day refresh is DELETE + INSERT ... SELECT, so two
+transactions refreshing the same day must not interleave. Each refresh takes a
+transaction-scoped advisory lock per (source, day) it rewrites, in sorted
+order, plus a shared lock on a table-wide key; a full rebuild takes that key
+exclusively. Writers touching different days never wait on each other.
+
+Existing databases are backfilled on first read (ensure_rollups()).
+
+NOTE: This service does not compute dashboard metrics. dashboard_service reads the rollups.
+"""
+
+from __future__ import annotations
+
+import logging
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, func, insert, literal, or_, select, type_coerce, union_all
+from sqlalchemy import Date, Float, Integer, String
+from sqlalchemy.engine import Connection
+
+from app.extensions import db
+from app.models import BillableItem, Claim, DailyFactRollup, Invoice
+
+logger = logging.getLogger(__name__)
+
+# Facts derived from each source table.
+SOURCE_FACTS: Dict[str, Tuple[str, ...]] = {
+    "billable": ("billable",),
+    "invoice": ("invoice", "invoice_undated"),
+    "claim": ("claim_opened", "claim_closed"),
+}
+
+# Columns whose change moves a source row between rollup rows.
+_TRACKED_ATTRS: Dict[type, Tuple[str, Tuple[str, ...]]] = {
+    BillableItem: ("billable", ("date_of_service", "activity_code", "quantity", "invoice_id", "invoice", "is_complete")),
+    Invoice: ("invoice", ("invoice_date", "created_at", "status", "total_amount")),
+    Claim: ("claim", ("opened_at", "closed_at", "status")),
+}
+
+# Sentinel row written once the table has been backfilled.
+BUILT_MARKER = "_built"
+
+_ROLLUP_COLUMNS = ("fact", "day", "key", "flag", "quantity", "amount", "row_count")
+
+# Engines (by URL) known to have a backfilled rollup table.
+_built_engines: Set[str] = set()
+
+# Advisory lock namespace: the bigint key guards full rebuilds (shared by day
+# refreshes), (key, day hash) pairs guard single days.
+_PG_LOCK_KEY = 0x0D41_1707
+
+
+# -----------------------------------------------------------------------------
+#  Rollup SELECTs
+# -----------------------------------------------------------------------------
+
+def _created_day():
+    return type_coerce(func.date(Invoice.created_at), Date)
+
+
+def _claim_closed_day():
+    return case((Claim.closed_at < Claim.opened_at, Claim.opened_at), else_=Claim.closed_at)
+
+
+def _day_filter(day_expr, days: Optional[Set[Optional[date]]]):
+    """WHERE clause restricting `day_expr` to `days` (None = no restriction)."""
+    if days is None:
+        return None
+    dated = sorted(d for d in days if d is not None)
+    clauses = []
+    if dated:
+        clauses.append(day_expr.in_(dated))
+    if None in days:
+        clauses.append(day_expr.is_(None))
+    return or_(*clauses) if clauses else literal(False)
+
+
+def _fact_selects(source: str, days: Optional[Set[Optional[date]]] = None) -> List[Any]:
+    """INSERT ... SELECT bodies producing the rollup rows for `source` (limited to `days`)."""
+
+    def _where(q, *clauses):
+        clauses = [c for c in clauses if c is not None]
+        return q.where(and_(*clauses)) if clauses else q
+
+    if source == "billable":
+        pending = and_(BillableItem.invoice_id.is_(None), BillableItem.is_complete.is_(True))
+        flag = case((pending, True), else_=False)
+        q = select(
+            literal("billable", String),
+            BillableItem.date_of_service,
+            BillableItem.activity_code,
+            flag,
+            func.coalesce(func.sum(func.coalesce(BillableItem.quantity, 0)), 0),
+            literal(0.0, Float),
+            func.count(BillableItem.id),
+        ).group_by(BillableItem.date_of_service, BillableItem.activity_code, flag)
+        return [_where(q, _day_filter(BillableItem.date_of_service, days))]
+
+    if source == "invoice":
+        status_u = func.upper(Invoice.status)
+        dated = select(
+            literal("invoice", String),
+            Invoice.invoice_date,
+            status_u,
+            literal(False),
+            literal(0.0, Float),
+            func.coalesce(func.sum(Invoice.total_amount), 0),
+            func.count(Invoice.id),
+        ).group_by(Invoice.invoice_date, status_u)
+        created_day = _created_day()
+        undated = select(
+            literal("invoice_undated", String),
+            created_day,
+            status_u,
+            literal(False),
+            literal(0.0, Float),
+            func.coalesce(func.sum(Invoice.total_amount), 0),
+            func.count(Invoice.id),
+        ).group_by(created_day, status_u)
+        return [
+            _where(dated, Invoice.invoice_date.isnot(None), _day_filter(Invoice.invoice_date, days)),
+            _where(undated, Invoice.invoice_date.is_(None), _day_filter(created_day, days)),
+        ]
+
+    if source == "claim":
+        active = case((func.upper(Claim.status) != "CLOSED", True), else_=False)
+        opened = select(
+            literal("claim_opened", String),
+            Claim.opened_at,
+            literal(None, String),
+            active,
+            literal(0.0, Float),
+            literal(0.0, Float),
+            func.count(Claim.id),
+        ).group_by(Claim.opened_at, active)
+        closed_day = _claim_closed_day()
+        closed = select(
+            literal("claim_closed", String),
+            closed_day,
+            literal(None, String),
+            literal(False),
+            literal(0.0, Float),
+            literal(0.0, Float),
+            func.count(Claim.id),
+        ).group_by(closed_day)
+        return [
+            _where(opened, _day_filter(Claim.opened_at, days)),
+            _where(closed, Claim.closed_at.isnot(None), _day_filter(closed_day, days)),
+        ]
+
+    raise ValueError(f"Unknown rollup source {source!r}")
+
+
+# -----------------------------------------------------------------------------
+#  Refresh
+# -----------------------------------------------------------------------------
+
+def _day_lock_id(source: str, day: Optional[date]) -> int:
+    """Stable signed int4 for the (source, day) advisory lock."""
+    h = zlib.crc32(f"{source}:{day.isoformat() if day else '-'}".encode("ascii"))
+    return h - (1 << 32) if h >= (1 << 31) else h
+
+
+def _lock(conn: Connection, source: str, days: Optional[Set[Optional[date]]]) -> None:
+    """Serialize refreshes of the same days (Postgres only; SQLite has one writer)."""
+    if conn.dialect.name != "postgresql":
+        return
+    if days is None:
+        conn.execute(select(func.pg_advisory_xact_lock(_PG_LOCK_KEY)))
+        return
+    conn.execute(select(func.pg_advisory_xact_lock_shared(_PG_LOCK_KEY)))
+    # Sorted so two transactions locking overlapping days can't deadlock here.
+    for lock_id in sorted({_day_lock_id(source, d) for d in days}):
+        conn.execute(select(func.pg_advisory_xact_lock(_PG_LOCK_KEY, lock_id)))
+
+
+def refresh_days(conn: Connection, source: str, days: Optional[Iterable[Optional[date]]] = None) -> None:
+    """Recompute the rollup rows of `source` for `days` (None = every day) on `conn`.
+
+    Runs in the caller's transaction; the source rows must already be flushed.
+    """
+    day_set = None if days is None else set(days)
+    if day_set is not None and not day_set:
+        return
+    _lock(conn, source, day_set)
+    table = DailyFactRollup.__table__
+    facts = SOURCE_FACTS[source]
+
+    delete = table.delete().where(table.c.fact.in_(facts))
+    day_clause = _day_filter(table.c.day, day_set)
+    if day_clause is not None:
+        delete = delete.where(day_clause)
+    conn.execute(delete)
+
+    for body in _fact_selects(source, day_set):
+        conn.execute(insert(table).from_select(list(_ROLLUP_COLUMNS), body))
+
+
+def rebuild_rollups(conn: Optional[Connection] = None) -> None:
+    """Rebuild every rollup row from the source tables and mark the table as built."""
+    if conn is None:
+        with db.engine.begin() as own:
+            rebuild_rollups(own)
+        return
+
+    table = DailyFactRollup.__table__
+    for source in SOURCE_FACTS:
+        refresh_days(conn, source)
+    conn.execute(table.delete().where(table.c.fact == BUILT_MARKER))
+    conn.execute(
+        insert(table).values(fact=BUILT_MARKER, day=None, key=None, flag=False, quantity=0.0, amount=0.0, row_count=0)
+    )
+    _built_engines.add(str(conn.engine.url))
+
+
+def ensure_rollups() -> None:
+    """Backfill the rollup table on first use (databases created before it existed)."""
+    url = str(db.engine.url)
+    if url in _built_engines:
+        return
+    built = db.session.execute(
+        select(DailyFactRollup.id).where(DailyFactRollup.fact == BUILT_MARKER).limit(1)
+    ).first()
+    if built is None:
+        logger.info("[rollup] backfilling daily_fact_rollup")
+        rebuild_rollups(db.session.connection())
+        db.session.commit()
+    _built_engines.add(url)
+
+
+# -----------------------------------------------------------------------------
+#  Readers
+# -----------------------------------------------------------------------------
+
+def rollup_rows(facts: Iterable[str], *, collapse_before: Optional[date] = None) -> List[Any]:
+    """Rollup rows for `facts`, summed per (fact, day, key, flag).
+
+    Rows dated before `collapse_before` are folded into one row per
+    (fact, key, flag) with `before` set and `day` NULL, so the result size
+    depends on the window, not on how much history exists. Undated rows keep
+    day NULL with `before` unset.
+    """
+    ensure_rollups()
+    t = DailyFactRollup
+    if collapse_before is not None:
+        before = case((t.day < collapse_before, 1), else_=0)
+        day = case((t.day < collapse_before, None), else_=t.day)
+    else:
+        before = literal(0, Integer)
+        day = t.day
+    q = (
+        db.session.query(
+            t.fact.label("fact"),
+            type_coerce(day, Date).label("day"),
+            before.label("before"),
+            t.key.label("key"),
+            t.flag.label("flag"),
+            func.sum(t.quantity).label("quantity"),
+            func.sum(t.amount).label("amount"),
+            func.sum(t.row_count).label("row_count"),
+        )
+        .filter(t.fact.in_(list(facts)))
+        .group_by(t.fact, day, before, t.key, t.flag)
+    )
+    return q.all()
+
+
+def active_claim_counts(as_of_dates: Iterable[date]) -> Dict[date, int]:
+    """Active claims on each date, in one query (calendar join over claim events).
+
+    The dates become an inline calendar (UNION ALL of literals, portable to
+    SQLite and Postgres) joined to every claim_opened/claim_closed row on or
+    before each date; opened rows count +1, closed rows -1.
+    """
+    dates = sorted(set(as_of_dates))
+    if not dates:
+        return {}
+    ensure_rollups()
+    t = DailyFactRollup
+    calendar = union_all(*[select(literal(d, Date).label("as_of")) for d in dates]).subquery("calendar")
+    delta = case((t.fact == "claim_opened", t.row_count), else_=-t.row_count)
+    q = (
+        db.session.query(calendar.c.as_of, func.coalesce(func.sum(delta), 0))
+        .select_from(calendar)
+        .outerjoin(t, and_(t.fact.in_(SOURCE_FACTS["claim"]), t.day <= calendar.c.as_of))
+        .group_by(calendar.c.as_of)
+    )
+    return {_as_day(as_of): int(count or 0) for as_of, count in q.all()}
+
+
+# -----------------------------------------------------------------------------
+#  Session hooks
+# -----------------------------------------------------------------------------
+
+def _day_columns(source: str) -> List[Any]:
+    """Every rollup day a source row contributes to (matches _fact_selects)."""
+    if source == "billable":
+        return [BillableItem.date_of_service]
+    if source == "invoice":
+        return [Invoice.invoice_date, _created_day()]
+    return [Claim.opened_at, _claim_closed_day()]
+
+
+def _id_column(source: str):
+    return {"billable": BillableItem.id, "invoice": Invoice.id, "claim": Claim.id}[source]
+
+
+def _as_day(value: Any) -> Optional[date]:
+    """DATE()/date/datetime result as a date (SQLite returns DATE() as text)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _stored_days(conn: Connection, source: str, where: Any) -> Set[Optional[date]]:
+    """Rollup days of the rows matching `where`, as currently stored."""
+    q = select(*_day_columns(source))
+    if where is not None:
+        q = q.where(where)
+    days: Set[Optional[date]] = set()
+    for row in conn.execute(q.distinct()):
+        days.update(_as_day(v) for v in row)
+    return days
+
+
+def _changed_ids(session: Any, collections: Iterable[Iterable[Any]]) -> Dict[str, Set[int]]:
+    """Primary keys of tracked objects whose rollup-relevant columns changed, by source."""
+    from sqlalchemy import inspect as sa_inspect
+
+    ids: Dict[str, Set[int]] = {}
+    for collection in collections:
+        for obj in collection:
+            tracked = _TRACKED_ATTRS.get(type(obj))
+            if tracked is None:
+                continue
+            source, attrs = tracked
+            state = sa_inspect(obj)
+            if state.identity is None and obj.id is None:
+                continue
+            if obj in session.dirty and not state.deleted and not any(
+                state.attrs[a].history.has_changes() for a in attrs
+            ):
+                continue
+            ids.setdefault(source, set()).add(state.identity[0] if state.identity else obj.id)
+    return ids
+
+
+def _before_flush(session: Any, flush_context: Any, instances: Any) -> None:
+    # Days the changed/deleted rows occupy *before* this flush.
+    old_ids = _changed_ids(session, (session.dirty, session.deleted))
+    if not old_ids:
+        return
+    conn = session.connection()
+    pending = session.info.setdefault("rollup_days", {})
+    for source, ids in old_ids.items():
+        pending.setdefault(source, set()).update(_stored_days(conn, source, _id_column(source).in_(ids)))
+
+
+def _after_flush(session: Any, flush_context: Any) -> None:
+    pending: Dict[str, Set[Optional[date]]] = session.info.pop("rollup_days", {})
+    # ...plus the days the new/changed rows occupy now.
+    new_ids = _changed_ids(session, (session.new, session.dirty))
+    conn = session.connection() if (pending or new_ids) else None
+    for source, ids in new_ids.items():
+        pending.setdefault(source, set()).update(_stored_days(conn, source, _id_column(source).in_(ids)))
+    for source, days in pending.items():
+        refresh_days(conn, source, days)
+
+
+def _do_orm_execute(orm_execute_state: Any) -> Any:
+    """Refresh the days touched by bulk Query.update()/delete() on tracked models."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    tracked = _TRACKED_ATTRS.get(mapper.class_) if mapper is not None else None
+    if tracked is None:
+        return None
+
+    source = tracked[0]
+    where = orm_execute_state.statement.whereclause
+    conn = orm_execute_state.session.connection()
+
+    days = _stored_days(conn, source, where)
+    result = orm_execute_state.invoke_statement()
+    if orm_execute_state.is_update:
+        days |= _stored_days(conn, source, where)
+    refresh_days(conn, source, days)
+    return result
+
+
+def register_rollup_hooks() -> None:
+    """Attach the rollup maintenance hooks to the app's session (idempotent)."""
+    for name, fn in (
+        ("before_flush", _before_flush),
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+    ):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
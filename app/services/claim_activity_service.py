@@ -0,0 +1,159 @@
+"""Claim activity / dormancy utilities.
+
+A claim's "last activity" is the newest of:
+- Report.created_at
+- BillableItem.created_at
+- Invoice.invoice_date
+- ClaimDocument.uploaded_at
+
+Historically each caller derived this with four `ORDER BY ... LIMIT 1` queries per
+claim. This module computes it set-based instead: one per-table MAX grouped by
+claim_id, combined with UNION ALL and reduced with an outer MAX (the portable
+equivalent of GREATEST over the per-table maxima, which also works on SQLite).
+
+NOTE: This service does not render HTML. Routes/templates decide presentation.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, and_, false, func, select, union_all
+
+from app.extensions import db
+from app.models import BillableItem, ClaimDocument, Invoice, Report, Settings, today as _system_today
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Coerce DB results (date, datetime or ISO string on SQLite) to a date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except Exception:
+        return None
+
+
+def last_activity_subquery(claim_ids: Optional[List[int]] = None):
+    """Return a subquery of (claim_id, last_activity) for every claim with activity.
+
+    Claims without any report/billable/invoice/document are absent; outer-join
+    against it when you need every claim. `last_activity` is typed as a Date so it
+    can be compared against date parameters on both Postgres and SQLite.
+
+    claim_ids restricts every per-table part (not just the outer result), so a
+    page of claims reads only its own rows through the claim_id indexes.
+    """
+    parts = [
+        select(
+            Report.claim_id.label("claim_id"),
+            func.max(func.date(Report.created_at, type_=Date)).label("activity_date"),
+        ).group_by(Report.claim_id),
+        select(
+            BillableItem.claim_id.label("claim_id"),
+            func.max(func.date(BillableItem.created_at, type_=Date)).label("activity_date"),
+        ).group_by(BillableItem.claim_id),
+        select(
+            Invoice.claim_id.label("claim_id"),
+            func.max(Invoice.invoice_date).label("activity_date"),
+        ).group_by(Invoice.claim_id),
+        select(
+            ClaimDocument.claim_id.label("claim_id"),
+            func.max(func.date(ClaimDocument.uploaded_at, type_=Date)).label("activity_date"),
+        ).group_by(ClaimDocument.claim_id),
+    ]
+    if claim_ids is not None:
+        parts = [part.where(part.selected_columns.claim_id.in_(claim_ids)) for part in parts]
+    per_table = union_all(*parts).subquery("claim_activity_parts")
+
+    return (
+        select(
+            per_table.c.claim_id.label("claim_id"),
+            func.max(per_table.c.activity_date).label("last_activity"),
+        )
+        .group_by(per_table.c.claim_id)
+        .subquery("claim_last_activity")
+    )
+
+
+def get_claim_last_activity(claim_ids: Optional[Iterable[int]] = None) -> Dict[int, date]:
+    """Return {claim_id: last_activity_date} in a single query.
+
+    claim_ids: optional restriction; None means all claims.
+    Claims with no activity at all are omitted from the result.
+    """
+    ids = None
+    if claim_ids is not None:
+        ids = [int(cid) for cid in claim_ids]
+        if not ids:
+            return {}
+    sub = last_activity_subquery(ids)
+    stmt = select(sub.c.claim_id, sub.c.last_activity)
+
+    out: Dict[int, date] = {}
+    for cid, last in db.session.execute(stmt):
+        d = _as_date(last)
+        if cid is not None and d is not None:
+            out[int(cid)] = d
+    return out
+
+
+def get_dormant_threshold_days() -> int:
+    """Settings.dormant_claim_days (0 disables dormancy)."""
+    try:
+        settings = Settings.query.first()
+        return int(getattr(settings, "dormant_claim_days", 0) or 0)
+    except Exception:
+        return 0
+
+
+def dormant_clause(last_activity_col, *, threshold_days: int, today: Optional[date] = None):
+    """SQL equivalent of the `is_dormant` rule in get_claim_dormancy.
+
+    last_activity_col: usually `last_activity_subquery().c.last_activity`, outer-joined
+    onto Claim (NULL means no activity, which is never dormant).
+    """
+    if not threshold_days or threshold_days <= 0:
+        return false()
+    today = today or _system_today()
+    cutoff = today - timedelta(days=int(threshold_days))
+    return and_(last_activity_col.isnot(None), last_activity_col <= cutoff)
+
+
+def get_claim_dormancy(
+    claim_ids: Iterable[int],
+    *,
+    threshold_days: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """Return {claim_id: {"is_dormant": bool, "last_activity": date|None}}.
+
+    Same shape as the claims list `dormant_info` map. A claim is dormant when it has
+    activity and the newest activity is at least `threshold_days` old; claims with
+    no activity are never dormant.
+    """
+    ids = [int(cid) for cid in claim_ids]
+    if threshold_days is None:
+        threshold_days = get_dormant_threshold_days()
+    today = today or _system_today()
+
+    last_map = get_claim_last_activity(ids)
+
+    info: Dict[int, Dict[str, Any]] = {}
+    for cid in ids:
+        last_date = last_map.get(cid)
+        if last_date:
+            delta = (today - last_date).days
+            is_dormant = threshold_days > 0 and delta >= threshold_days
+        else:
+            is_dormant = False
+        info[cid] = {
+            "is_dormant": is_dormant,
+            "last_activity": last_date,
+        }
+    return info
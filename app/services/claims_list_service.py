@@ -0,0 +1,432 @@
+"""Claims list query building (filters + keyset pagination).
+
+The claims landing page used to load every Claim with `.all()` and filter
+activity / billing / closed state in Python. This module pushes those filters (and
+the search box) into SQL and pages through the result with a keyset cursor so each
+request only touches one page of claims, regardless of how many claims exist.
+
+Sort order:
+    claimant_last_name ASC NULLS LAST, claimant_first_name ASC NULLS LAST, id ASC
+
+The order is on plain columns so ix_claim_list_order (last, first, id) serves it:
+a page is an index seek to the cursor plus one page of rows (SQLite also sorts
+first names within a last name, since its indexes keep NULLs first). Claims
+without a last name are fetched as a second segment, so neither segment's
+predicate needs an `IS NULL OR ...` that would defeat the seek.
+
+NOTE: This service does not render HTML. Routes/templates decide presentation.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, false, func, or_, select
+from sqlalchemy.orm import selectinload
+
+from app.extensions import db
+from app.models import Carrier, Claim, Employer, Invoice
+from app.services.claim_activity_service import dormant_clause, last_activity_subquery
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+ACTIVITY_FILTERS = ("active", "dormant")
+BILLING_FILTERS = ("none", "open", "closed")
+
+# Invoice statuses that count as "closed" for billing filters/badges.
+CLOSED_INVOICE_STATUSES = ("Paid", "Void")
+
+
+def normalize_page_size(raw: Any) -> int:
+    """Parse a page-size request arg, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(n, MAX_PAGE_SIZE))
+
+
+# -----------------------------------------------------------------------------
+#  Keyset cursor
+# -----------------------------------------------------------------------------
+
+def _order_by(descending: bool = False):
+    """ORDER BY for the list order (descending = exact reverse, for `before` pages)."""
+    last, first = Claim.claimant_last_name, Claim.claimant_first_name
+    if descending:
+        return (last.desc().nulls_first(), first.desc().nulls_first(), Claim.id.desc())
+    return (last.asc().nulls_last(), first.asc().nulls_last(), Claim.id.asc())
+
+
+def _past(col, value, descending: bool):
+    """`col` strictly after `value` in list order (NULLs sort last)."""
+    if descending:
+        return col.isnot(None) if value is None else col < value
+    return false() if value is None else or_(col > value, col.is_(None))
+
+
+def _equal(col, value):
+    return col.is_(None) if value is None else col == value
+
+
+def _keyset_segments(key: Optional[Tuple[Any, ...]], descending: bool) -> List[Any]:
+    """WHERE clauses for the rows past the cursor `key`, in list order.
+
+    The cursor comparison is an expanded OR-chain on (last, first, id) led by a
+    plain bound on the last name, so it is an index seek on both databases. Rows
+    with no last name sort last and come as their own segment.
+    """
+    last, first = Claim.claimant_last_name, Claim.claimant_first_name
+    if key is None:
+        segments = [last.isnot(None), last.is_(None)]
+        return segments[::-1] if descending else segments
+
+    last_v, first_v, cid = key
+    chain = or_(
+        _past(last, last_v, descending),
+        and_(
+            _equal(last, last_v),
+            or_(
+                _past(first, first_v, descending),
+                and_(_equal(first, first_v), Claim.id < cid if descending else Claim.id > cid),
+            ),
+        ),
+    )
+    if last_v is None:
+        segments = [and_(last.is_(None), chain)]
+        return segments + [last.isnot(None)] if descending else segments
+    bound = last <= last_v if descending else last >= last_v
+    segments = [and_(bound, chain)]
+    return segments if descending else segments + [last.is_(None)]
+
+
+def encode_cursor(claim: Claim) -> str:
+    """Opaque URL-safe cursor for the position just after/before `claim`."""
+    raw = json.dumps([claim.claimant_last_name, claim.claimant_first_name, int(claim.id)])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[Any, ...]]:
+    """Return the (last, first, id) sort key for a cursor token, or None if missing/invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        last, first, cid = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if (last is not None and not isinstance(last, str)) or (first is not None and not isinstance(first, str)):
+            return None
+        return (last, first, int(cid))
+    except Exception:
+        return None
+
+
+# -----------------------------------------------------------------------------
+#  Filters
+# -----------------------------------------------------------------------------
+
+def invoice_counts_subquery():
+    """Per-claim invoice counts: (claim_id, total, open, closed)."""
+    is_closed = func.coalesce(Invoice.status, "Draft").in_(CLOSED_INVOICE_STATUSES)
+    return (
+        select(
+            Invoice.claim_id.label("claim_id"),
+            func.count(Invoice.id).label("total"),
+            func.sum(case((is_closed, 0), else_=1)).label("open"),
+            func.sum(case((is_closed, 1), else_=0)).label("closed"),
+        )
+        .group_by(Invoice.claim_id)
+        .subquery("claim_invoice_counts")
+    )
+
+
+def search_clause(search: str):
+    """WHERE clause for the search box, or None for a blank search.
+
+    Every whitespace-separated term must appear (case-insensitive substring) in
+    the claim number, a claimant name, the carrier name or the employer name.
+    """
+    clauses = []
+    for term in (search or "").split():
+        clauses.append(
+            or_(
+                Claim.claim_number.icontains(term, autoescape=True),
+                Claim.claimant_name.icontains(term, autoescape=True),
+                Claim.claimant_first_name.icontains(term, autoescape=True),
+                Claim.claimant_last_name.icontains(term, autoescape=True),
+                Claim.carrier.has(Carrier.name.icontains(term, autoescape=True)),
+                Claim.employer.has(Employer.name.icontains(term, autoescape=True)),
+            )
+        )
+    if not clauses:
+        return None
+    return and_(*clauses)
+
+
+def build_claims_query(
+    *,
+    activity_filter: str = "all",
+    billing_filter: str = "all",
+    show_closed: bool = False,
+    dormant_threshold_days: int = 0,
+    search: str = "",
+    today: Optional[date] = None,
+):
+    """Return a Claim select() with the list filters applied (no ordering/limit)."""
+    stmt = select(Claim)
+
+    matches = search_clause(search)
+    if matches is not None:
+        stmt = stmt.where(matches)
+
+    if not show_closed:
+        stmt = stmt.where(func.coalesce(Claim.is_closed, false()) == false())
+
+    if activity_filter in ACTIVITY_FILTERS:
+        la = last_activity_subquery()
+        stmt = stmt.outerjoin(la, la.c.claim_id == Claim.id)
+        dormant = dormant_clause(la.c.last_activity, threshold_days=dormant_threshold_days, today=today)
+        stmt = stmt.where(dormant if activity_filter == "dormant" else ~dormant)
+
+    if billing_filter in BILLING_FILTERS:
+        inv = invoice_counts_subquery()
+        stmt = stmt.outerjoin(inv, inv.c.claim_id == Claim.id)
+        if billing_filter == "none":
+            stmt = stmt.where(func.coalesce(inv.c.total, 0) == 0)
+        elif billing_filter == "open":
+            stmt = stmt.where(func.coalesce(inv.c.open, 0) > 0)
+        else:
+            stmt = stmt.where(func.coalesce(inv.c.closed, 0) > 0)
+
+    return stmt
+
+
+# -----------------------------------------------------------------------------
+#  Paging
+# -----------------------------------------------------------------------------
+
+@dataclass
+class ClaimsPage:
+    claims: List[Claim] = field(default_factory=list)
+    page_size: int = DEFAULT_PAGE_SIZE
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def get_claims_page(
+    *,
+    activity_filter: str = "all",
+    billing_filter: str = "all",
+    show_closed: bool = False,
+    dormant_threshold_days: int = 0,
+    search: str = "",
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    today: Optional[date] = None,
+) -> ClaimsPage:
+    """Fetch one page of claims using keyset pagination.
+
+    `after` / `before` are cursor tokens from a previous page (`next_cursor` /
+    `prev_cursor`). At most one should be given; `after` wins if both are.
+    Carrier/employer are eager-loaded because the list template renders both.
+    """
+    page_size = normalize_page_size(page_size)
+    stmt = build_claims_query(
+        activity_filter=activity_filter,
+        billing_filter=billing_filter,
+        show_closed=show_closed,
+        dormant_threshold_days=dormant_threshold_days,
+        search=search,
+        today=today,
+    ).options(selectinload(Claim.carrier), selectinload(Claim.employer))
+
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if after_key is None else None
+    descending = before_key is not None
+
+    # Segments are in list order; later ones only run if the page isn't full yet.
+    rows: List[Claim] = []
+    for where in _keyset_segments(before_key if descending else after_key, descending):
+        need = page_size + 1 - len(rows)
+        if need <= 0:
+            break
+        rows.extend(
+            db.session.execute(stmt.where(where).order_by(*_order_by(descending)).limit(need)).scalars()
+        )
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    page = ClaimsPage(page_size=page_size)
+    if before_key is not None:
+        rows.reverse()
+        page.claims = rows
+        if rows:
+            page.next_cursor = encode_cursor(rows[-1])
+            if has_more:
+                page.prev_cursor = encode_cursor(rows[0])
+    else:
+        page.claims = rows
+        if rows:
+            if has_more:
+                page.next_cursor = encode_cursor(rows[-1])
+            if after_key is not None:
+                page.prev_cursor = encode_cursor(rows[0])
+    return page
+
+
+# -----------------------------------------------------------------------------
+#  Billing summary (grouped rollup)
+# -----------------------------------------------------------------------------
+
+def get_billing_summary(claims: List[Claim], settings: Any) -> Dict[int, Dict[str, Any]]:
+    """Per-claim invoice counts, open invoice total and uninvoiced total.
+
+    Returns {claim_id: {"total", "open", "closed", "open_total", "uninvoiced_total"}}
+    with the same numbers the claims list used to compute item-by-item:
+
+    - open_total: sum of `compute_invoice_financials(...)["invoice_total"]` over the
+      claim's open (not Paid/Void) invoices. Quantities are summed in SQL per
+      (invoice, activity_code); rates, carrier overrides and per-invoice rounding are
+      applied here with the same helpers the invoice screens use.
+    - uninvoiced_total: un-invoiced, non-NO BILL quantities x the Settings hourly rate
+      (telephonic rate for telephonic claims), summed per claim in SQL.
+
+    Runs a constant number of queries regardless of how many claims/billables exist.
+    `claims` should already have `carrier` loaded (get_claims_page eager-loads it).
+    """
+    # Local import: routes.helpers owns the canonical invoice math.
+    from app.models import BillableItem, Carrier
+    from app.routes.helpers import (
+        INVOICE_EXPENSE_CODES,
+        INVOICE_MILEAGE_CODES,
+        _pick_rate_and_source,
+    )
+
+    summary: Dict[int, Dict[str, Any]] = {
+        c.id: {
+            "total": 0,
+            "open": 0,
+            "closed": 0,
+            "open_total": 0.0,
+            "uninvoiced_total": 0.0,
+        }
+        for c in claims
+    }
+    if not claims:
+        return summary
+
+    claims_by_id = {c.id: c for c in claims}
+    claim_ids = list(claims_by_id)
+
+    # 1) Invoice headers -> counts + which invoices are open
+    invoice_rows = db.session.execute(
+        select(Invoice.id, Invoice.claim_id, Invoice.status, Invoice.carrier_id)
+        .where(Invoice.claim_id.in_(claim_ids))
+    ).all()
+
+    open_invoices = []
+    for inv_id, cid, status, carrier_id in invoice_rows:
+        entry = summary.get(cid)
+        if entry is None:
+            continue
+        entry["total"] += 1
+        if (status or "Draft") in CLOSED_INVOICE_STATUSES:
+            entry["closed"] += 1
+        else:
+            entry["open"] += 1
+            open_invoices.append((inv_id, cid, carrier_id))
+
+    # 2) Open invoice totals from per-(invoice, code) quantity sums
+    if open_invoices:
+        open_ids = [inv_id for inv_id, _, _ in open_invoices]
+        qty_by_invoice: Dict[int, Dict[str, float]] = {}
+        for inv_id, code, qty_sum in db.session.execute(
+            select(BillableItem.invoice_id, BillableItem.activity_code, func.sum(BillableItem.quantity))
+            .where(BillableItem.invoice_id.in_(open_ids))
+            .where(BillableItem.quantity.isnot(None))
+            .group_by(BillableItem.invoice_id, BillableItem.activity_code)
+        ):
+            bucket = (code or "").strip().upper()
+            if bucket in INVOICE_MILEAGE_CODES:
+                key = "miles"
+            elif bucket in INVOICE_EXPENSE_CODES:
+                key = "expenses"
+            else:
+                key = "hours"
+            totals = qty_by_invoice.setdefault(inv_id, {"hours": 0.0, "miles": 0.0, "expenses": 0.0})
+            totals[key] += float(qty_sum or 0.0)
+
+        # Claims without a carrier fall back to the invoice's carrier_id (one query).
+        fallback_carrier_ids = {
+            carrier_id
+            for _, cid, carrier_id in open_invoices
+            if carrier_id and getattr(claims_by_id[cid], "carrier", None) is None
+        }
+        fallback_carriers = (
+            {c.id: c for c in Carrier.query.filter(Carrier.id.in_(fallback_carrier_ids)).all()}
+            if fallback_carrier_ids
+            else {}
+        )
+
+        rates_cache: Dict[Any, Tuple[float, float]] = {}
+
+        def _rates(carrier):
+            key = getattr(carrier, "id", None)
+            if key not in rates_cache:
+                hourly_rate, _, _ = _pick_rate_and_source(
+                    carrier,
+                    settings,
+                    carrier_attr_candidates=["hourly_rate", "billing_rate", "rate_hourly"],
+                    settings_attr_candidates=["hourly_rate", "billing_rate", "rate_hourly"],
+                    fallback=0.0,
+                )
+                mileage_rate, _, _ = _pick_rate_and_source(
+                    carrier,
+                    settings,
+                    carrier_attr_candidates=["mileage_rate", "rate_mileage"],
+                    settings_attr_candidates=["mileage_rate", "rate_mileage"],
+                    fallback=0.0,
+                )
+                rates_cache[key] = (hourly_rate, mileage_rate)
+            return rates_cache[key]
+
+        for inv_id, cid, carrier_id in open_invoices:
+            carrier = getattr(claims_by_id[cid], "carrier", None)
+            if carrier is None and carrier_id:
+                carrier = fallback_carriers.get(carrier_id)
+            hourly_rate, mileage_rate = _rates(carrier)
+
+            totals = qty_by_invoice.get(inv_id, {"hours": 0.0, "miles": 0.0, "expenses": 0.0})
+            hourly_subtotal = round(totals["hours"] * hourly_rate, 2)
+            mileage_subtotal = round(totals["miles"] * mileage_rate, 2)
+            expenses_subtotal = round(totals["expenses"], 2)
+            invoice_total = round(hourly_subtotal + mileage_subtotal + expenses_subtotal, 2)
+
+            summary[cid]["open_total"] += float(invoice_total or 0.0)
+
+    # 3) Uninvoiced totals (exclude NO BILL; settings rate, telephonic-aware)
+    hourly = float(getattr(settings, "hourly_rate", None) or 0.0)
+    telephonic = float(getattr(settings, "telephonic_rate", None) or 0.0)
+    for cid, qty_sum in db.session.execute(
+        select(BillableItem.claim_id, func.sum(BillableItem.quantity))
+        .where(BillableItem.claim_id.in_(claim_ids))
+        # COALESCE, not `IS NULL OR = 0`: that OR lures SQLite onto the invoice_id
+        # index (every un-invoiced row) instead of the page's claim_id lookups.
+        .where(func.coalesce(BillableItem.invoice_id, 0) == 0)
+        .where(func.upper(func.coalesce(BillableItem.activity_code, "")) != "NO BILL")
+        .where(BillableItem.quantity.isnot(None))
+        .where(BillableItem.quantity != 0)
+        .group_by(BillableItem.claim_id)
+    ):
+        claim_obj = claims_by_id.get(cid)
+        if claim_obj is None:
+            continue
+        rate = telephonic if getattr(claim_obj, "is_telephonic", False) else hourly
+        summary[cid]["uninvoiced_total"] += float(qty_sum or 0.0) * rate
+
+    return summary
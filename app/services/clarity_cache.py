@@ -0,0 +1,400 @@
+"""Response cache for Clarity answers (ai_service.ask_clarity).
+
+The same questions come up again and again ("how many open claims",
+"outstanding billing", "summarize this claim"), and each one pays for
+routing, retrieval and often a full LLM call. cached_answer() serves a
+stored answer instead while the data behind it is unchanged:
+
+- Key = the normalized question (lower-cased, whitespace collapsed, trailing
+  ?/!/. dropped) + a hash of the whole request context (claim_id, scope,
+  page snapshot, thread state, ...) + today's date.
+- Each entry records which tracked tables answering it read, and their data
+  versions (context_cache) as of *before* the answer was built. Every
+  statement run while answering is matched against the app's table names
+  (ORM and raw SQL alike). A hit re-reads those versions (one small SELECT)
+  and is served only if none moved, so a write that lands mid-answer still
+  invalidates it.
+- Answers that read tables without data versions, answers built inside a
+  transaction with uncommitted writes, answers from the mock backend (local
+  model down) and error/empty answers are not stored.
+- Optional near-duplicate tier (CLARITY_CACHE_SEMANTIC=1): on an exact miss,
+  the question is embedded with the local model. The answer to the most
+  similar cached question in the same context is reused when the cosine
+  similarity is at least CLARITY_CACHE_SEMANTIC_THRESHOLD (default 0.95).
+  Both questions must also have the same content words: every word that
+  isn't filler (STOPWORDS), so names, numbers, statuses and periods must
+  all agree. Only reordering and filler changes match ("show me open
+  claims for Smith" ~ "open claims for Smith please"). Embeddings alone can
+  put "...for Smith" and "...for Smyth" above the threshold.
+- Per-process LRU (CLARITY_CACHE_MAX_ENTRIES, default 256) with a TTL
+  (CLARITY_CACHE_TTL_SECONDS, default 600; 0 disables the cache). The TTL
+  bounds what versions cannot see, e.g. raw SQL writes that skip the hooks.
+- Bypass: ask_clarity(..., use_cache=False), which /api/clarity/query and
+  /api/clarity/stream use when the body has "no_cache": true.
+
+Hits carry result["cache"] = {"tier": "exact"|"semantic", "age_s": ...}.
+Counters are available via get_clarity_cache_stats().
+
+NOTE: This service does not answer questions. ask_clarity passes its
+uncached implementation.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.extensions import db
+from app.services.context_cache import TRACKED_TABLES, MemoryBackend, data_versions
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: Dict[str, Any] = {
+    "CLARITY_CACHE_TTL_SECONDS": 600,
+    "CLARITY_CACHE_MAX_ENTRIES": 256,
+    "CLARITY_CACHE_SEMANTIC": 0,
+    "CLARITY_CACHE_SEMANTIC_THRESHOLD": 0.95,
+}
+
+# Tables that are derived from tracked tables (kept current by their write
+# hooks) or are bookkeeping: reading them does not make an answer uncacheable.
+DERIVED_TABLES = frozenset({"data_version", "search_document", "search_document_fts", "daily_fact_rollup"})
+
+# Filler a rephrasing may add, drop or reorder. Every other word and number
+# is a content word, and near-duplicate questions must share all of them.
+# Negations, quantities ("all", "many" vs "much") and periods stay content.
+STOPWORDS = frozenset(
+    """
+    a an the of for to in on at by from with about as and or s
+    is are was were be been being do does did has have had
+    what which who whom whose how when where why
+    i me my we our us you your it its they them their there here that these those
+    please can could would will should may might
+    show give tell list find get display see know pull up
+    """.split()
+)
+
+
+def _config(name: str) -> Any:
+    default = DEFAULTS[name]
+    value = None
+    try:
+        from flask import current_app, has_app_context
+
+        if has_app_context():
+            value = current_app.config.get(name)
+    except Exception:
+        value = None
+    if value is None:
+        value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return type(default)(value)
+    except Exception:
+        return default
+
+
+# -----------------------------------------------------------------------------
+#  Keys
+# -----------------------------------------------------------------------------
+
+_WS_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"[a-z]+|\d+")
+
+
+def normalize_question(question: str) -> str:
+    q = _WS_RE.sub(" ", (question or "").strip().lower())
+    return q.rstrip("?!. ").strip()
+
+
+def _context_key(context: Dict[str, Any]) -> str:
+    raw = json.dumps([context, date.today().isoformat()], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _guard(qnorm: str) -> frozenset:
+    """Content words of a normalized question (numbers included)."""
+    return frozenset(w for w in _WORD_RE.findall(qnorm) if w not in STOPWORDS)
+
+
+# -----------------------------------------------------------------------------
+#  Which tables an answer read
+# -----------------------------------------------------------------------------
+
+_reads: contextvars.ContextVar[Optional[Set[str]]] = contextvars.ContextVar("clarity_cache_reads", default=None)
+_table_re: Optional["re.Pattern[str]"] = None
+
+
+def _table_pattern() -> "re.Pattern[str]":
+    global _table_re
+    if _table_re is None:
+        names = sorted(db.metadata.tables, key=len, reverse=True)
+        _table_re = re.compile(r"\b(" + "|".join(re.escape(n) for n in names) + r")\b")
+    return _table_re
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    reads = _reads.get()
+    if reads is not None:
+        reads.update(_table_pattern().findall(statement))
+
+
+@contextmanager
+def _capture_reads() -> Iterator[Set[str]]:
+    """Collect the tables every statement in this block touches (nested blocks roll up)."""
+    outer = _reads.get()
+    reads: Set[str] = set()
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+        if outer is not None:
+            outer.update(reads)
+
+
+_UNCOMMITTED = "clarity_cache_uncommitted_writes"
+
+
+def _after_flush(session: Any, flush_context: Any) -> None:
+    session.info[_UNCOMMITTED] = True
+
+
+def _do_orm_execute(orm_execute_state: Any) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info[_UNCOMMITTED] = True
+
+
+def _after_transaction(session: Any) -> None:
+    session.info.pop(_UNCOMMITTED, None)
+
+
+def _has_uncommitted_writes() -> bool:
+    """An answer that saw this transaction's own writes may describe data that gets rolled back."""
+    session = db.session
+    return bool(session.new or session.dirty or session.deleted or session.info.get(_UNCOMMITTED))
+
+
+def register_clarity_cache_hooks() -> None:
+    """Attach the hooks that record which tables an answer read and whether it saw uncommitted writes (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_transaction),
+        ("after_rollback", _after_transaction),
+    ):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# -----------------------------------------------------------------------------
+#  Store
+# -----------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_store: Optional[MemoryBackend] = None
+_store_size: Optional[int] = None
+# key -> (context key, question guard, embedding) for the near-duplicate tier
+_vectors: "OrderedDict[str, Tuple[str, frozenset, List[float]]]" = OrderedDict()
+_stats: Dict[str, Any] = {
+    "exact_hits": 0, "semantic_hits": 0, "misses": 0, "stale": 0, "bypassed": 0, "uncacheable": 0,
+    "hit_ms": 0.0, "miss_ms": 0.0,
+}
+
+
+def _get_store() -> MemoryBackend:
+    global _store, _store_size
+    size = int(_config("CLARITY_CACHE_MAX_ENTRIES"))
+    with _lock:
+        if _store is None or _store_size != size:
+            _store, _store_size = MemoryBackend(size), size
+            _vectors.clear()
+        return _store
+
+
+def clear_clarity_cache() -> None:
+    with _lock:
+        if _store is not None:
+            _store.clear()
+        _vectors.clear()
+
+
+def _count(outcome: str, ms: Optional[float] = None) -> None:
+    with _lock:
+        _stats[outcome] += 1
+        if ms is not None:
+            _stats["hit_ms" if outcome.endswith("_hits") else "miss_ms"] += ms
+
+
+def get_clarity_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counts and average answer time on hits vs misses (this process)."""
+    with _lock:
+        s = dict(_stats)
+        entries = len(_store) if _store is not None else 0
+    hits = s["exact_hits"] + s["semantic_hits"]
+    built = s["misses"] + s["stale"]
+    lookups = hits + built
+    return {
+        "entries": entries,
+        "exact_hits": s["exact_hits"],
+        "semantic_hits": s["semantic_hits"],
+        "misses": s["misses"],
+        "stale": s["stale"],
+        "bypassed": s["bypassed"],
+        "uncacheable": s["uncacheable"],
+        "hit_rate": (hits / lookups) if lookups else 0.0,
+        "avg_hit_ms": round(s["hit_ms"] / hits, 2) if hits else None,
+        "avg_miss_ms": round(s["miss_ms"] / built, 1) if built else None,
+    }
+
+
+def _load(store: MemoryBackend, key: str) -> Optional[Dict[str, Any]]:
+    blob = store.get(key)
+    if blob is None:
+        return None
+    try:
+        return pickle.loads(blob)
+    except Exception:
+        logger.warning("[clarity-cache] dropping unreadable entry", exc_info=True)
+        return None
+
+
+def _fresh(entry: Dict[str, Any]) -> bool:
+    tables = entry["tables"]
+    return not tables or data_versions(tables) == entry["versions"]
+
+
+def _embed(qnorm: str) -> Optional[List[float]]:
+    try:
+        from app.ai.llm import get_llm  # local import to avoid circulars
+
+        vecs = get_llm().embed([qnorm])
+        return list(vecs[0]) if vecs and vecs[0] else None
+    except Exception:
+        return None
+
+
+def _semantic_match(ctx_key: str, guard: frozenset, vec: List[float]) -> Optional[str]:
+    from app.ai.embeddings import cosine_similarity  # local import to avoid circulars
+
+    threshold = float(_config("CLARITY_CACHE_SEMANTIC_THRESHOLD"))
+    best_key, best = None, threshold
+    with _lock:
+        candidates = [(k, v) for k, (c, g, v) in _vectors.items() if c == ctx_key and g == guard]
+    for key, other in candidates:
+        score = cosine_similarity(vec, other)
+        if score >= best:
+            best_key, best = key, score
+    return best_key
+
+
+def _cacheable(result: Any) -> bool:
+    if not isinstance(result, dict) or result.get("ok") is False or result.get("error"):
+        return False
+    if "mock" in (result.get("model_source"), result.get("source")):
+        return False  # the local model was down; don't keep serving the fallback
+    answer = result.get("answer", result.get("text"))
+    return isinstance(answer, str) and bool(answer.strip()) and "returned an empty answer" not in answer
+
+
+def _hit(entry: Dict[str, Any], tier: str, started: float) -> Dict[str, Any]:
+    outer = _reads.get()
+    if outer is not None:  # an enclosing answer depends on what this one read
+        outer.update(entry["tables"])
+    result = entry["result"]
+    result["cache"] = {"tier": tier, "age_s": round(time.time() - entry["stored_at"], 1)}
+    _count(f"{tier}_hits", (time.perf_counter() - started) * 1000.0)
+    return result
+
+
+# -----------------------------------------------------------------------------
+#  Cache
+# -----------------------------------------------------------------------------
+
+def cached_answer(
+    question: str,
+    context: Dict[str, Any],
+    answer: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    *,
+    bypass: bool = False,
+) -> Dict[str, Any]:
+    """Return answer(question, context), reusing a stored answer while its data is unchanged."""
+    started = time.perf_counter()
+    ttl = float(_config("CLARITY_CACHE_TTL_SECONDS"))
+    if bypass or ttl <= 0:
+        _count("bypassed")
+        return answer(question, context)
+
+    qnorm = normalize_question(question)
+    ctx_key = _context_key(context)
+    key = f"{ctx_key}:{hashlib.sha256(qnorm.encode('utf-8')).hexdigest()}"
+    store = _get_store()
+
+    stale = False
+    entry = _load(store, key)
+    if entry is not None:
+        if _fresh(entry):
+            return _hit(entry, "exact", started)
+        stale = True
+
+    semantic = bool(_config("CLARITY_CACHE_SEMANTIC"))
+    guard = _guard(qnorm)
+    vec = _embed(qnorm) if semantic and not stale else None
+    if vec is not None:
+        match = _semantic_match(ctx_key, guard, vec)
+        other = _load(store, match) if match else None
+        if other is not None and _fresh(other):
+            return _hit(other, "semantic", started)
+
+    # Versions as of before answering: a write that lands mid-answer leaves
+    # the entry already stale.
+    before = data_versions(TRACKED_TABLES)
+    with _capture_reads() as reads:
+        result = answer(question, context)
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+    data_reads = reads - DERIVED_TABLES
+    if not _cacheable(result) or not data_reads <= set(TRACKED_TABLES) or _has_uncommitted_writes():
+        _count("uncacheable")
+        return result
+
+    tables = sorted(data_reads)
+    entry = {
+        "tables": tables,
+        "versions": {t: before[t] for t in tables},
+        "result": result,
+        "stored_at": time.time(),
+    }
+    try:
+        store.set(key, pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+    except Exception:
+        logger.warning("[clarity-cache] could not store answer", exc_info=True)
+        _count("uncacheable")
+        return result
+    if semantic:
+        vec = vec if vec is not None else _embed(qnorm)
+        if vec is not None:
+            with _lock:
+                _vectors[key] = (ctx_key, guard, vec)
+                _vectors.move_to_end(key)
+                while len(_vectors) > store.max_entries:
+                    _vectors.popitem(last=False)
+    _count("stale" if stale else "misses", elapsed_ms)
+    return result
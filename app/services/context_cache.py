@@ -0,0 +1,363 @@
+"""Versioned TTL cache for expensive page contexts (/analysis, /reporting) and
+the AI assistant's system fact chunks.
+
+The analysis and reporting dashboards recompute everything on every hit, even
+when nothing changed between two loads seconds apart. Routes now hand their
+context builder to cached_context(), which serves a stored copy while it is
+still valid:
+
+- Key = page name + its parameters (period, filters) + today's date + the
+  data version of every table the page reads.
+- Data versions live in the `data_version` table (one counter per table).
+  Flush hooks note each tracked table an ORM write touched (bulk
+  Query.update()/delete() included); after the commit, each of those
+  counters is bumped by one in a short transaction of its own. Holding the
+  counter row's lock for the writer's whole transaction would serialize every
+  pair of writers to the same table. The bump lands a moment after the data,
+  which caches tolerate: an entry built in that moment is keyed by the old
+  version and is invalidated by the bump. A bump lost to a crash is covered
+  by the TTL. Checking versions costs one small SELECT per page load.
+- A TTL (DASHBOARD_CACHE_TTL_SECONDS, default 300; 0 disables caching) bounds
+  what versions cannot see: the clock (reports due, upcoming appointments)
+  and raw SQL writes.
+
+Backends (DASHBOARD_CACHE_BACKEND):
+- "memory" (default): per-process LRU (DASHBOARD_CACHE_MAX_ENTRIES, default 64).
+- "sqlite": a SQLite file (DASHBOARD_CACHE_PATH, default
+  instance/context_cache.sqlite3) shared by every worker on the host.
+Values are pickled in both, so callers always get a private copy.
+
+Hit/miss/build-time counters are available via get_cache_stats().
+
+NOTE: This service does not build contexts. Routes pass a builder callable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import BillableItem, Carrier, Claim, Contact, DataVersion, Employer, Invoice, Payment, Provider, Report, Settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS: Dict[str, Any] = {
+    "DASHBOARD_CACHE_TTL_SECONDS": 300,
+    "DASHBOARD_CACHE_BACKEND": "memory",
+    "DASHBOARD_CACHE_MAX_ENTRIES": 64,
+    "DASHBOARD_CACHE_PATH": "",
+}
+
+# Models whose writes invalidate cached contexts (by table name).
+TRACKED_MODELS = (Claim, Invoice, BillableItem, Payment, Report, Settings, Carrier, Employer, Provider, Contact)
+TRACKED_TABLES = tuple(m.__tablename__ for m in TRACKED_MODELS)
+_TABLE_BY_CLASS = {m: m.__tablename__ for m in TRACKED_MODELS}
+
+
+def _config(name: str) -> Any:
+    default = DEFAULTS[name]
+    value = None
+    try:
+        from flask import current_app, has_app_context
+
+        if has_app_context():
+            value = current_app.config.get(name)
+    except Exception:
+        value = None
+    if value is None:
+        value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return type(default)(value)
+    except Exception:
+        return default
+
+
+# -----------------------------------------------------------------------------
+#  Data versions
+# -----------------------------------------------------------------------------
+
+def data_versions(tables: Iterable[str] = TRACKED_TABLES) -> Dict[str, int]:
+    """Current change counter of each table (0 if never written)."""
+    wanted = list(tables)
+    rows = db.session.execute(
+        select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(wanted))
+    ).all()
+    found = {name: int(version or 0) for name, version in rows}
+    return {name: found.get(name, 0) for name in wanted}
+
+
+# session.info key: tracked tables written in the current transaction.
+_TOUCHED_KEY = "data_version_touched"
+
+
+def bump_versions(conn: Any, tables: Iterable[str]) -> None:
+    """Add one to the counter of each table in `tables` on `conn` (creating it if needed)."""
+    t = DataVersion.__table__
+    for name in sorted(set(tables)):  # fixed order: no lock-order deadlocks between bumpers
+        res = conn.execute(t.update().where(t.c.table_name == name).values(version=t.c.version + 1))
+        if res.rowcount:
+            continue
+        # First write to this table: create its counter (another writer may race us).
+        try:
+            with conn.begin_nested():
+                conn.execute(t.insert().values(table_name=name, version=1))
+        except IntegrityError:
+            conn.execute(t.update().where(t.c.table_name == name).values(version=t.c.version + 1))
+
+
+def touched_tables(session: Any) -> Set[str]:
+    """Tracked tables written so far in `session`'s transaction (bumped after commit)."""
+    return set(session.info.get(_TOUCHED_KEY, ()))
+
+
+def _after_flush(session: Any, flush_context: Any) -> None:
+    touched = {
+        _TABLE_BY_CLASS[type(obj)]
+        for collection in (session.new, session.dirty, session.deleted)
+        for obj in collection
+        if type(obj) in _TABLE_BY_CLASS
+    }
+    if touched:
+        session.info.setdefault(_TOUCHED_KEY, set()).update(touched)
+
+
+def _do_orm_execute(orm_execute_state: Any) -> Any:
+    """Note a tracked table hit by a bulk Query.update()/delete()."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    table = _TABLE_BY_CLASS.get(mapper.class_) if mapper is not None else None
+    if table is None:
+        return None
+    orm_execute_state.session.info.setdefault(_TOUCHED_KEY, set()).add(table)
+    return None
+
+
+def _after_commit(session: Any) -> None:
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    if not touched:
+        return
+    try:
+        with db.engine.begin() as conn:
+            bump_versions(conn, touched)
+    except Exception:
+        # The data is committed; cached entries for these tables live until the TTL.
+        logger.warning("[context-cache] could not bump data versions for %s", sorted(touched), exc_info=True)
+
+
+def _after_rollback(session: Any) -> None:
+    session.info.pop(_TOUCHED_KEY, None)
+
+
+def register_version_hooks() -> None:
+    """Attach the data-version hooks to the app's session (idempotent)."""
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# -----------------------------------------------------------------------------
+#  Backends
+# -----------------------------------------------------------------------------
+
+class MemoryBackend:
+    """Per-process LRU of pickled values with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max(1, int(max_entries))
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, blob = entry
+            if expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return blob
+
+    def set(self, key: str, blob: bytes, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl, blob)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteBackend:
+    """Pickled values in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS context_cache (key TEXT PRIMARY KEY, expires REAL NOT NULL, value BLOB NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT expires, value FROM context_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return row[1]
+
+    def set(self, key: str, blob: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO context_cache (key, expires, value) VALUES (?, ?, ?)",
+                (key, now + ttl, sqlite3.Binary(blob)),
+            )
+            # Keys embed data versions, so superseded entries just age out.
+            conn.execute("DELETE FROM context_cache WHERE expires < ?", (now,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM context_cache")
+
+
+_backend: Optional[Any] = None
+_backend_sig: Optional[Tuple[Any, ...]] = None
+_backend_lock = threading.Lock()
+
+
+def _default_sqlite_path() -> str:
+    try:
+        from flask import current_app
+
+        return os.path.join(current_app.instance_path, "context_cache.sqlite3")
+    except Exception:
+        return os.path.join(os.getcwd(), "instance", "context_cache.sqlite3")
+
+
+def get_backend() -> Any:
+    """The configured backend (rebuilt if the configuration changes)."""
+    global _backend, _backend_sig
+    kind = str(_config("DASHBOARD_CACHE_BACKEND")).strip().lower()
+    if kind == "sqlite":
+        sig: Tuple[Any, ...] = (kind, _config("DASHBOARD_CACHE_PATH") or _default_sqlite_path())
+    else:
+        sig = ("memory", _config("DASHBOARD_CACHE_MAX_ENTRIES"))
+    with _backend_lock:
+        if _backend is None or _backend_sig != sig:
+            _backend = SQLiteBackend(sig[1]) if sig[0] == "sqlite" else MemoryBackend(sig[1])
+            _backend_sig = sig
+        return _backend
+
+
+# -----------------------------------------------------------------------------
+#  Cache
+# -----------------------------------------------------------------------------
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def _record(name: str, outcome: str, ms: float) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(name, {"hits": 0, "misses": 0, "bypassed": 0, "build_ms": 0.0, "hit_ms": 0.0})
+        s[outcome] += 1
+        s["hit_ms" if outcome == "hits" else "build_ms"] += ms
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-page hit/miss counts and average build vs hit time (this process)."""
+    with _stats_lock:
+        out = {}
+        for name, s in _stats.items():
+            built = s["misses"] + s["bypassed"]
+            total = s["hits"] + built
+            out[name] = {
+                "hits": s["hits"],
+                "misses": s["misses"],
+                "bypassed": s["bypassed"],
+                "hit_rate": (s["hits"] / total) if total else 0.0,
+                "avg_build_ms": round(s["build_ms"] / built, 1) if built else None,
+                "avg_hit_ms": round(s["hit_ms"] / s["hits"], 2) if s["hits"] else None,
+            }
+        return out
+
+
+def cached_context(
+    name: str,
+    params: Dict[str, Any],
+    builder: Callable[[], Any],
+    *,
+    tables: Iterable[str] = TRACKED_TABLES,
+    ttl: Optional[float] = None,
+) -> Any:
+    """Return builder()'s result, reusing a stored copy while the data is unchanged.
+
+    `params` must hold everything besides table data that the result depends
+    on (period, filters); it is JSON-encoded into the key. The result must be
+    picklable (plain data, no ORM instances).
+    """
+    started = time.perf_counter()
+    ttl = float(_config("DASHBOARD_CACHE_TTL_SECONDS") if ttl is None else ttl)
+    if ttl <= 0:
+        value = builder()
+        _record(name, "bypassed", (time.perf_counter() - started) * 1000.0)
+        return value
+
+    versions = data_versions(tables)
+    raw_key = json.dumps([name, params, date.today().isoformat(), versions], sort_keys=True, default=str)
+    key = f"{name}:{hashlib.sha256(raw_key.encode('utf-8')).hexdigest()}"
+
+    backend = get_backend()
+    try:
+        blob = backend.get(key)
+    except Exception:
+        logger.warning("[context-cache] read failed for %s", name, exc_info=True)
+        blob = None
+    if blob is not None:
+        try:
+            value = pickle.loads(blob)
+            _record(name, "hits", (time.perf_counter() - started) * 1000.0)
+            return value
+        except Exception:
+            logger.warning("[context-cache] dropping unreadable entry for %s", name, exc_info=True)
+
+    value = builder()
+    try:
+        backend.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+    except Exception:
+        logger.warning("[context-cache] could not store %s", name, exc_info=True)
+    _record(name, "misses", (time.perf_counter() - started) * 1000.0)
+    return value
@@ -15,11 +15,11 @@ NOTE: This service does not render HTML. Routes/templates decide presentation.
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cached_property
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import and_, case, func, or_, literal
-from sqlalchemy import Numeric, cast
+from sqlalchemy import Numeric, cast, func
 import statistics
 
 # For timezone conversion
@@ -147,7 +147,6 @@ def _billable_amount_expr(BillableItem: Any):
     rate = getattr(BillableItem, "rate", None)
     if qty is not None and rate is not None:
         return func.coalesce(qty, 0) * func.coalesce(rate, 0)
-    from sqlalchemy import Numeric, cast
     return cast(0, Numeric)
 
 
@@ -258,7 +257,7 @@ def get_reports_due(*, days_ahead: int = 7, period: Optional[str] = None) -> Dic
 
 def get_upcoming_appointments(*, days_ahead: int = 7, period: Optional[str] = None) -> List[Dict[str, Any]]:
     from app.models import Claim, Report, db
-    from sqlalchemy import cast, String
+    from sqlalchemy import String
 
     today = date.today()
     window_end = today + timedelta(days=days_ahead)
@@ -391,76 +390,12 @@ def get_upcoming_appointments(*, days_ahead: int = 7, period: Optional[str] = No
 
 
 def get_money_position(period: Optional[str] = None) -> Dict[str, float]:
-    """Where the money sits: open invoices + uninvoiced billables (estimated)."""
-    from app.models import BillableItem, Invoice, db
-
-    inv_total_col = _invoice_total_attr(Invoice)
-    inv_date_col = _invoice_date_attr(Invoice)
-    inv_status_col = _invoice_status_attr(Invoice)
-
-    open_invoices_total = 0.0
-    if inv_total_col is not None:
-        q = db.session.query(func.coalesce(func.sum(inv_total_col), 0))
-        # "Open" = not Paid/Void
-        if inv_status_col is not None:
-            q = q.filter(func.upper(inv_status_col).notin_(["PAID", "VOID"]))
-        # If period is provided, apply date filtering
-        if period is not None:
-            start, end = get_period_bounds(period)
-            if inv_date_col is not None:
-                q = q.filter(inv_date_col.isnot(None)).filter(inv_date_col >= start).filter(inv_date_col <= end)
-        open_invoices_total = float(q.scalar() or 0)
-
-    # -------------------------------------------------------------
-    # Uninvoiced billables (quantity * global billing rate)
-    # Excludes NO BILL and incomplete items
-    # -------------------------------------------------------------
-    service_date = _billable_service_date_attr(BillableItem)
-    qty_col = getattr(BillableItem, "quantity", None)
-    code_col = getattr(BillableItem, "activity_code", None)
-    is_complete_col = getattr(BillableItem, "is_complete", None)
-
-    uninvoiced_total = 0.0
-
-    if qty_col is not None:
-        from app.models import Settings
-        settings = db.session.query(Settings).first()
-        billing_rate = float(getattr(settings, "hourly_rate", 0.0) or 0.0)
-
-        code_u = func.upper(func.coalesce(code_col, "")) if code_col is not None else None
-
-        qty_sum_expr = func.coalesce(func.sum(func.coalesce(qty_col, 0)), 0)
-
-        q2 = db.session.query(qty_sum_expr) \
-            .filter(BillableItem.invoice_id.is_(None))
-
-        # Exclude NO BILL
-        if code_u is not None:
-            q2 = q2.filter(code_u != "NO BILL")
-
-        # Exclude incomplete items
-        if is_complete_col is not None:
-            q2 = q2.filter(is_complete_col.is_(True))
-
-        # Apply period filtering
-        if period is not None and service_date is not None:
-            start, end = get_period_bounds(period)
-            q2 = q2.filter(service_date.isnot(None)) \
-                   .filter(service_date >= start) \
-                   .filter(service_date <= end)
-
-        total_qty = float(q2.scalar() or 0.0)
-        uninvoiced_total = total_qty * billing_rate
-
-    total = float(open_invoices_total + uninvoiced_total)
+    """Where the money sits: open invoices + uninvoiced billables (estimated).
 
-    return {
-        "open_invoices": open_invoices_total,
-        "uninvoiced_billables": uninvoiced_total,
-        "total": total,
-        "open_invoices_pct": (open_invoices_total / total * 100.0) if total else 0.0,
-        "uninvoiced_billables_pct": (uninvoiced_total / total * 100.0) if total else 0.0,
-    }
+    Uninvoiced billables are complete, non-NO BILL quantities * Settings.hourly_rate.
+    period=None means all dates.
+    """
+    return DashboardAggregates([period]).money_position(period)
 
 
 def get_billable_breakdown_by_code(period: str = "MTD", *, limit: int = 12) -> List[Dict[str, Any]]:
@@ -471,85 +406,7 @@ def get_billable_breakdown_by_code(period: str = "MTD", *, limit: int = 12) -> L
     - Uses quantity * Settings.hourly_rate
     - Respects selected period based on date_of_service
     """
-
-    from app.models import BillableItem, Settings, db
-
-    start, end = get_period_bounds(period)
-
-    service_date = _billable_service_date_attr(BillableItem)
-    qty_col = getattr(BillableItem, "quantity", None)
-    code_col = getattr(BillableItem, "activity_code", None)
-    is_complete_col = getattr(BillableItem, "is_complete", None)
-
-    if qty_col is None or code_col is None:
-        return []
-
-    # Get billing rate
-    settings = db.session.query(Settings).first()
-    hourly_rate = float(getattr(settings, "hourly_rate", 0.0) or 0.0)
-
-    code_u = func.upper(func.coalesce(code_col, ""))
-
-    qty_expr = func.coalesce(qty_col, 0)
-
-    code_expr = func.coalesce(func.nullif(func.trim(code_col), ""), "(none)").label("code")
-    qty_sum_expr = func.coalesce(func.sum(qty_expr), 0).label("total_qty")
-
-    q = db.session.query(
-        code_expr,
-        qty_sum_expr,
-    )
-
-    # Only uninvoiced items
-    q = q.filter(BillableItem.invoice_id.is_(None))
-
-    # Exclude NO BILL
-    q = q.filter(code_u != "NO BILL")
-
-    # Exclude incomplete
-    if is_complete_col is not None:
-        q = q.filter(is_complete_col.is_(True))
-
-    # Apply period filter
-    if service_date is not None:
-        q = (
-            q.filter(service_date.isnot(None))
-             .filter(service_date >= start)
-             .filter(service_date <= end)
-        )
-
-    q = q.group_by(code_expr).order_by(func.sum(qty_expr).desc())
-
-    rows = q.all()
-    total_all = float(sum(float((r.total_qty or 0) * hourly_rate) for r in rows))
-
-    top = rows[: max(0, int(limit))]
-    remainder = rows[max(0, int(limit)) :]
-
-    out: List[Dict[str, Any]] = []
-
-    for r in top:
-        total_qty = float(r.total_qty or 0)
-        t = total_qty * hourly_rate
-        out.append(
-            {
-                "code": (r.code or "").strip(),
-                "total": t,
-                "pct": (t / total_all * 100.0) if total_all else 0.0,
-            }
-        )
-
-    if remainder:
-        rem_total = float(sum(float((r.total_qty or 0) * hourly_rate) for r in remainder))
-        out.append(
-            {
-                "code": "Other",
-                "total": rem_total,
-                "pct": (rem_total / total_all * 100.0) if total_all else 0.0,
-            }
-        )
-
-    return out
+    return DashboardAggregates([period]).billable_breakdown(period, limit=limit)
 
 
 def get_productivity_metrics(period: str = "MTD") -> Dict[str, float]:
@@ -557,128 +414,12 @@ def get_productivity_metrics(period: str = "MTD") -> Dict[str, float]:
 
     This uses billable items, not invoices.
     """
-    from app.models import BillableItem, db
-
-    start, end = get_period_bounds(period)
-
-    service_date = _billable_service_date_attr(BillableItem)
-    code_col = getattr(BillableItem, "activity_code", None)
-    qty_col = getattr(BillableItem, "quantity", None)
-
-    if code_col is None or qty_col is None:
-        return {"hours": 0.0, "miles": 0.0, "expenses": 0.0, "total_units": 0.0}
-
-    # Heuristic classification by activity_code
-    code_u = func.upper(func.coalesce(code_col, ""))
-
-    miles_case = case(
-        (code_u.in_(["MIL", "MILE", "MILES"]), func.coalesce(qty_col, 0)),
-        else_=0,
-    )
-
-    # Expenses may be captured as quantity or amount depending on schema.
-    # If there's an amount field, prefer that.
-    if hasattr(BillableItem, "amount"):
-        exp_val = func.coalesce(getattr(BillableItem, "amount"), 0)
-    else:
-        exp_val = func.coalesce(qty_col, 0)
-
-    exp_case = case(
-        (code_u.in_(["EXP", "EXPENSE", "EXPENSES"]), exp_val),
-        else_=0,
-    )
-
-    # Everything else with quantity counts as "hours" (including Travel, Admin, etc.)
-    hours_case = case(
-        (
-            and_(
-                ~code_u.in_(["MIL", "MILE", "MILES", "EXP", "EXPENSE", "EXPENSES", "NO BILL"]),
-                qty_col.isnot(None),
-            ),
-            func.coalesce(qty_col, 0),
-        ),
-        else_=0,
-    )
-
-    q = db.session.query(
-        func.coalesce(func.sum(hours_case), 0).label("hours"),
-        func.coalesce(func.sum(miles_case), 0).label("miles"),
-        func.coalesce(func.sum(exp_case), 0).label("expenses"),
-    )
-
-    if service_date is not None:
-        q = q.filter(service_date.isnot(None)).filter(service_date >= start).filter(service_date <= end)
-
-    r = q.one()
-    hours = float(r.hours or 0)
-    miles = float(r.miles or 0)
-    expenses = float(r.expenses or 0)
-
-    return {
-        "hours": hours,
-        "miles": miles,
-        "expenses": expenses,
-        "total_units": float(hours + miles + expenses),
-    }
+    return DashboardAggregates([period]).productivity(period)
 
 
 def get_revenue_metrics(period: str = "MTD") -> Dict[str, float]:
     """Revenue metrics based on invoices (not billables)."""
-    from app.models import Invoice, db
-
-    start, end = get_period_bounds(period)
-
-    total_col = _invoice_total_attr(Invoice)
-    date_col = _invoice_date_attr(Invoice)
-    status_col = _invoice_status_attr(Invoice)
-    # Fallback to created_at if invoice_date missing or NULL
-    created_col = getattr(Invoice, "created_at", None)
-
-    if total_col is None:
-        return {"invoiced_total": 0.0, "open_total": 0.0, "paid_total": 0.0}
-
-    # Base query scoped to period if invoice_date exists
-    base = db.session.query(func.coalesce(func.sum(total_col), 0))
-
-    if date_col is not None:
-        base = base.filter(
-            or_(
-                and_(date_col.isnot(None), date_col >= start, date_col <= end),
-                and_(
-                    date_col.is_(None),
-                    created_col.isnot(None),
-                    func.date(created_col) >= start,
-                    func.date(created_col) <= end,
-                ),
-            )
-        )
-    elif created_col is not None:
-        base = (
-            base.filter(created_col.isnot(None))
-                .filter(func.date(created_col) >= start)
-                .filter(func.date(created_col) <= end)
-        )
-
-    invoiced_total = float(base.scalar() or 0.0)
-
-    # Open = not PAID and not VOID (if status exists)
-    if status_col is not None:
-        open_total = float(
-            base.filter(func.upper(status_col).notin_(["PAID", "VOID"])).scalar() or 0.0
-        )
-        paid_total = float(
-            base.filter(func.upper(status_col) == "PAID").scalar() or 0.0
-        )
-    else:
-        # If no status column, treat all invoiced as open
-        open_total = invoiced_total
-        paid_total = 0.0
-
-    return {
-        "invoiced_total": invoiced_total,
-        "open_total": open_total,
-        "paid_total": paid_total,
-    }
+    return DashboardAggregates([period]).revenue_metrics(period)
 
 
 def get_monthly_revenue_trend(months: int = 6) -> List[Dict[str, Any]]:
@@ -687,7 +428,7 @@ def get_monthly_revenue_trend(months: int = 6) -> List[Dict[str, Any]]:
     Output:
     [{"month": "YYYY-MM", "total": float}]
     """
-    from app.models import Invoice, db
+    from app.services.analytics_rollup import rollup_rows
 
     today = date.today()
     start_month = date(today.year, today.month, 1)
@@ -707,43 +448,20 @@ def get_monthly_revenue_trend(months: int = 6) -> List[Dict[str, Any]]:
 
     months_list = sorted(months_list)
 
-    total_col = _invoice_total_attr(Invoice)
-    date_col = _invoice_date_attr(Invoice)
-
-    results: List[Dict[str, Any]] = []
-
-    for month_start in months_list:
-        if month_start.month == 12:
-            next_month = date(month_start.year + 1, 1, 1)
-        else:
-            next_month = date(month_start.year, month_start.month + 1, 1)
-
-        if total_col is None or date_col is None:
-            month_total = 0.0
-        else:
-            month_total = float(
-                db.session.query(func.coalesce(func.sum(total_col), 0))
-                .filter(date_col.isnot(None))
-                .filter(date_col >= month_start)
-                .filter(date_col < next_month)
-                .scalar()
-                or 0.0
-            )
-
-        results.append(
-            {
-                "month": month_start.strftime("%Y-%m"),
-                "total": month_total,
-            }
-        )
-
-    return results
-
+    # Daily invoiced totals (by invoice_date) from the rollup, summed per month
+    totals: Dict[str, float] = {}
+    if months_list:
+        for r in rollup_rows(("invoice",), collapse_before=months_list[0]):
+            day = _as_date(r.day)
+            if day is not None:
+                month_key = day.strftime("%Y-%m")
+                totals[month_key] = totals.get(month_key, 0.0) + float(r.amount or 0.0)
+
+    return [
+        {"month": month_start.strftime("%Y-%m"), "total": totals.get(month_start.strftime("%Y-%m"), 0.0)}
+        for month_start in months_list
+    ]
 
-# -----------------------------------------------------------------------------
-#  New: Flexible revenue trend for week, month, 3M, year
-# -----------------------------------------------------------------------------
-from typing import Any, Dict, List
 
 # -----------------------------------------------------------------------------
 #  Active Claim Trend
@@ -755,80 +473,23 @@ def get_active_claim_trend(period: str = "MTD") -> List[Dict[str, Any]]:
     Active on a given date = 
         opened_at <= bucket_date
         AND (closed_at IS NULL OR closed_at > bucket_date)
-    """
 
-    from app.models import Claim, db
-
-    start, end = get_period_bounds(period)
-    p = (period or "MONTH").strip().upper()
-
-    opened_col = getattr(Claim, "opened_at", None)
-    closed_col = getattr(Claim, "closed_at", None)
+    All buckets come from one query (analytics_rollup.active_claim_counts).
+    """
+    from app.models import Claim
+    from app.services.analytics_rollup import active_claim_counts
 
-    if opened_col is None:
+    if getattr(Claim, "opened_at", None) is None:
         return []
+    start, end = get_period_bounds(period)
+    buckets = _active_claim_buckets(period, start, end)
+    counts = active_claim_counts(as_of for _, as_of in buckets)
+    return [{"label": label, "count": counts.get(as_of, 0)} for label, as_of in buckets]
 
-    results: List[Dict[str, Any]] = []
-
-    # --- WEEK → daily buckets ---
-    if p in ("WEEK", "7D"):
-        current = start
-        while current <= end:
-            q = db.session.query(func.count(Claim.id)).filter(
-                opened_col <= current
-            )
-
-            if closed_col is not None:
-                q = q.filter(
-                    or_(
-                        closed_col.is_(None),
-                        closed_col > current
-                    )
-                )
-
-            count = int(q.scalar() or 0)
-
-            results.append({
-                "label": current.strftime("%a"),
-                "count": count,
-            })
-
-            current += timedelta(days=1)
-
-    # --- Longer ranges → monthly buckets ---
-    else:
-        current = date(start.year, start.month, 1)
-
-        while current <= end:
-            q = db.session.query(func.count(Claim.id)).filter(
-                opened_col <= current
-            )
-
-            if closed_col is not None:
-                q = q.filter(
-                    or_(
-                        closed_col.is_(None),
-                        closed_col > current
-                    )
-                )
-
-            count = int(q.scalar() or 0)
-
-            results.append({
-                "label": current.strftime("%b"),
-                "count": count,
-            })
-
-            if current.month == 12:
-                current = date(current.year + 1, 1, 1)
-            else:
-                current = date(current.year, current.month + 1, 1)
 
-    return results
 def get_open_invoice_aging() -> Dict[str, float]:
     """
-    Return aging buckets for open invoices (not PAID/VOID),
-    based on invoice_date.
+    Return aging buckets for SENT invoices, based on invoice_date.
 
     Buckets:
     - current (0–30 days)
@@ -836,164 +497,454 @@ def get_open_invoice_aging() -> Dict[str, float]:
     - 61–90
     - 90+
     """
+    return DashboardAggregates(()).open_invoice_aging()
 
-    from app.models import Invoice, db
-
-    total_col = _invoice_total_attr(Invoice)
-    date_col = _invoice_date_attr(Invoice)
-    status_col = _invoice_status_attr(Invoice)
-
-    # If we have no total column at all, we cannot compute aging
-    if total_col is None:
-        return {
-            "current": 0.0,
-            "31_60": 0.0,
-            "61_90": 0.0,
-            "90_plus": 0.0,
-        }
-
-    # Fallback to created_at if invoice_date is missing
-    created_col = getattr(Invoice, "created_at", None)
-
-    today = date.today()
-
-    # Prefer invoice_date, fallback to created_at
-    if date_col is not None:
-        date_expr = date_col
-    elif created_col is not None:
-        date_expr = func.date(created_col)
-    else:
-        return {
-            "current": 0.0,
-            "31_60": 0.0,
-            "61_90": 0.0,
-            "90_plus": 0.0,
-        }
-
-    base = db.session.query(
-        total_col.label("amount"),
-        date_expr.label("invoice_date"),
-    )
-
-    # Only SENT invoices count toward A/R aging
-    # Exclude Draft, Paid, and Void
-    if status_col is not None:
-        base = base.filter(func.upper(status_col) == "SENT")
 
-    base = base.filter(date_expr.isnot(None))
+# -----------------------------------------------------------------------------
+#  Flexible revenue trend for week, month, 3M, year
+# -----------------------------------------------------------------------------
+def get_revenue_trend_for_period(period: str = "MTD") -> List[Dict[str, Any]]:
+    """Flexible revenue trend for week, month, 3M, year."""
+    return DashboardAggregates([period]).revenue_trend(period)
 
-    rows = base.all()
 
-    buckets = {
-        "current": 0.0,
-        "31_60": 0.0,
-        "61_90": 0.0,
-        "90_plus": 0.0,
-    }
+# -----------------------------------------------------------------------------
+#  Single-pass aggregation engine
+# -----------------------------------------------------------------------------
+#
+# The dashboard shows every module for WEEK/MONTH/3M/6M/12M/YEAR so the period
+# dropdowns can switch client-side. Computing each (module, period) pair with
+# its own SUM query cost ~190 queries per /analysis load. DashboardAggregates
+# instead reads the daily rollups once (plus two window-limited per-claim
+# queries), then evaluates every period window and trend bucket over those
+# small grouped rows in Python. Settings is read once.
 
-    for r in rows:
-        amount = float(r.amount or 0.0)
-        age_days = (today - r.invoice_date).days
+DASHBOARD_PERIODS = ("WEEK", "MONTH", "3M", "6M", "12M", "YEAR")
 
-        if age_days <= 30:
-            buckets["current"] += amount
-        elif age_days <= 60:
-            buckets["31_60"] += amount
-        elif age_days <= 90:
-            buckets["61_90"] += amount
-        else:
-            buckets["90_plus"] += amount
+_MILES_CODES = ("MIL", "MILE", "MILES")
+_EXPENSE_CODES = ("EXP", "EXPENSE", "EXPENSES")
 
-    return buckets
 
-def get_revenue_trend_for_period(period: str = "MTD") -> List[Dict[str, Any]]:
-    """Flexible revenue trend for week, month, 3M, year."""
+def _period_key(period: Optional[str]) -> str:
+    """Upper-cased period name as used by the trend bucketing rules."""
+    return (period or "MONTH").strip().upper()
 
-    from app.models import Invoice, db
 
-    start, end = get_period_bounds(period)
-    total_col = _invoice_total_attr(Invoice)
-    date_col = _invoice_date_attr(Invoice)
-    created_col = getattr(Invoice, "created_at", None)
+def _add_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
 
-    if total_col is None or date_col is None:
-        return []
 
-    p = (period or "MONTH").strip().upper()
-    results: List[Dict[str, Any]] = []
+def _revenue_trend_buckets(period: Optional[str], start: date, end: date) -> List[Tuple[str, str, date, date]]:
+    """(label, date, bucket_start, bucket_end_exclusive) for get_revenue_trend_for_period."""
+    p = _period_key(period)
+    buckets: List[Tuple[str, str, date, date]] = []
 
     if p in ("WEEK", "7D"):
         # Daily buckets for last 7 days
         for i in range(7):
             day = start + timedelta(days=i)
-            next_day = day + timedelta(days=1)
-            total = float(
-                db.session.query(func.coalesce(func.sum(total_col), 0))
-                .filter(
-                    or_(
-                        and_(date_col.isnot(None), date_col >= day, date_col < next_day),
-                        and_(date_col.is_(None), created_col.isnot(None), created_col >= day, created_col < next_day)
-                    )
-                )
-                .scalar() or 0.0
-            )
-            results.append({
-                "label": day.strftime("%a"),
-                "date": day.strftime("%m/%d/%Y"),
-                "total": total,
-            })
-
+            buckets.append((day.strftime("%a"), day.strftime("%m/%d/%Y"), day, day + timedelta(days=1)))
     elif p in ("3M", "90D", "6M", "180D", "12M", "ROLLING_YEAR", "YEAR", "YTD"):
         # Monthly buckets
         current = date(start.year, start.month, 1)
         while current <= end:
-            if current.month == 12:
-                next_month = date(current.year + 1, 1, 1)
-            else:
-                next_month = date(current.year, current.month + 1, 1)
-
-            total = float(
-                db.session.query(func.coalesce(func.sum(total_col), 0))
-                .filter(
-                    or_(
-                        and_(date_col.isnot(None), date_col >= current, date_col < next_month),
-                        and_(date_col.is_(None), created_col.isnot(None), created_col >= current, created_col < next_month)
-                    )
-                )
-                .scalar() or 0.0
-            )
-
-            results.append({
-                "label": current.strftime("%b"),
-                "date": current.strftime("%m/%d/%Y"),
-                "total": total,
-            })
-
+            next_month = _add_month(current)
+            buckets.append((current.strftime("%b"), current.strftime("%m/%d/%Y"), current, next_month))
             current = next_month
-
     else:
         # Default: weekly buckets for last 30 days
         current = start
         while current <= end:
             week_end = min(current + timedelta(days=7), end + timedelta(days=1))
-            total = float(
-                db.session.query(func.coalesce(func.sum(total_col), 0))
-                .filter(
-                    or_(
-                        and_(date_col.isnot(None), date_col >= current, date_col < week_end),
-                        and_(date_col.is_(None), created_col.isnot(None), created_col >= current, created_col < week_end)
-                    )
+            buckets.append((current.strftime("%m/%d"), current.strftime("%m/%d/%Y"), current, week_end))
+            current = week_end
+    return buckets
+
+
+def _active_claim_buckets(period: Optional[str], start: date, end: date) -> List[Tuple[str, date]]:
+    """(label, as_of_date) for get_active_claim_trend: daily for WEEK, else month starts."""
+    p = _period_key(period)
+    buckets: List[Tuple[str, date]] = []
+    if p in ("WEEK", "7D"):
+        current = start
+        while current <= end:
+            buckets.append((current.strftime("%a"), current))
+            current += timedelta(days=1)
+    else:
+        current = date(start.year, start.month, 1)
+        while current <= end:
+            buckets.append((current.strftime("%b"), current))
+            current = _add_month(current)
+    return buckets
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Normalize DATE()/date/datetime results (SQLite returns strings for func.date)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _within(d: Optional[date], bounds: Tuple[Optional[date], Optional[date]]) -> bool:
+    start, end = bounds
+    if d is None:
+        return False
+    return (start is None or d >= start) and (end is None or d <= end)
+
+
+@dataclass
+class _RollupFact:
+    fact: str
+    day: Optional[date]
+    before: bool  # folded-in history older than the loaded window (day is None)
+    key: Optional[str]
+    flag: bool
+    quantity: float
+    amount: float
+    count: int
+
+    @property
+    def code_u(self) -> str:
+        return (self.key or "").upper()
+
+    @property
+    def is_open(self) -> bool:
+        # Mirrors SQL `UPPER(status) NOT IN ('PAID', 'VOID')` (NULL status is not open)
+        return self.key is not None and self.key not in ("PAID", "VOID")
+
+
+class DashboardAggregates:
+    """Every dashboard figure for a set of periods from a handful of grouped queries.
+
+    Most figures come from the daily rollups (analytics_rollup), read once for
+    the widest requested window with older history folded into one row per
+    key, so the cost does not grow with years of data. Per-claim figures (SDs,
+    claims with activity) read raw rows, limited to the window. Everything is
+    loaded lazily. Method results match the standalone get_* functions above
+    (which delegate here).
+    """
+
+    def __init__(self, periods: Iterable[Optional[str]] = DASHBOARD_PERIODS, *, today: Optional[date] = None):
+        self.today = today or date.today()
+        self._bounds: Dict[Optional[str], Tuple[Optional[date], Optional[date]]] = {}
+        for period in periods:
+            self.bounds(period)
+
+    # ---- Windows ----
+
+    def bounds(self, period: Optional[str]) -> Tuple[Optional[date], Optional[date]]:
+        """Inclusive (start, end) for a period; None means no date filter."""
+        if period not in self._bounds:
+            if getattr(self, "_facts_loaded", False):
+                raise ValueError(f"Period {period!r} was not requested before loading facts")
+            self._bounds[period] = (None, None) if period is None else get_period_bounds(period, today=self.today)
+        return self._bounds[period]
+
+    @property
+    def _earliest(self) -> Optional[date]:
+        starts = [start for start, _ in self._bounds.values()]
+        if not starts:
+            return self.today  # no windows requested (e.g. aging only)
+        if any(s is None for s in starts):
+            return None
+        # Monthly trend buckets start on the 1st, before a rolling window's start.
+        earliest = min(starts)
+        return date(earliest.year, earliest.month, 1)
+
+    @property
+    def _collapse_before(self) -> Optional[date]:
+        """Rollup rows older than this are folded together (aging needs 90 days of detail)."""
+        earliest = self._earliest
+        if earliest is None:
+            return None
+        return min(earliest, self.today - timedelta(days=90))
+
+    # ---- Fact loading (one query each) ----
+
+    @cached_property
+    def settings(self) -> Dict[str, float]:
+        from app.models import Settings, db
+
+        s = db.session.query(Settings).first()
+        return {
+            "hourly_rate": float(getattr(s, "hourly_rate", 0.0) or 0.0),
+            "target_min_hours_per_week": float(getattr(s, "target_min_hours_per_week", 0.0) or 0.0),
+            "target_max_hours_per_week": float(getattr(s, "target_max_hours_per_week", 0.0) or 0.0),
+            "target_revenue_per_claim": float(getattr(s, "target_revenue_per_claim", 0.0) or 0.0),
+        }
+
+    @cached_property
+    def rollup(self) -> Dict[str, List[_RollupFact]]:
+        """Daily rollup rows by fact (see analytics_rollup for what each fact holds)."""
+        from app.services.analytics_rollup import SOURCE_FACTS, rollup_rows
+
+        self._facts_loaded = True
+        facts = [f for group in SOURCE_FACTS.values() for f in group]
+        out: Dict[str, List[_RollupFact]] = {f: [] for f in facts}
+        for r in rollup_rows(facts, collapse_before=self._collapse_before):
+            out[r.fact].append(
+                _RollupFact(
+                    fact=r.fact,
+                    day=_as_date(r.day),
+                    before=bool(r.before),
+                    key=r.key,
+                    flag=bool(r.flag),
+                    quantity=float(r.quantity or 0.0),
+                    amount=float(r.amount or 0.0),
+                    count=int(r.row_count or 0),
                 )
-                .scalar() or 0.0
             )
-            results.append({
-                "label": current.strftime("%m/%d"),
-                "date": current.strftime("%m/%d/%Y"),
-                "total": total,
-            })
-            current = week_end
+        return out
+
+    @cached_property
+    def claim_invoices(self) -> List[Tuple[date, Optional[int], float]]:
+        """(invoice_date, claim_id, total) for invoices dated in the loaded window."""
+        from app.models import Invoice, db
+
+        self._facts_loaded = True
+        date_col = _invoice_date_attr(Invoice)
+        total_col = _invoice_total_attr(Invoice)
+        if date_col is None or total_col is None:
+            return []
+        q = db.session.query(date_col, Invoice.claim_id, func.coalesce(func.sum(total_col), 0)).filter(
+            date_col.isnot(None)
+        )
+        if self._earliest is not None:
+            q = q.filter(date_col >= self._earliest)
+        rows = q.group_by(date_col, Invoice.claim_id).all()
+        return [(_as_date(d), cid, float(t or 0.0)) for d, cid, t in rows]
+
+    @cached_property
+    def claim_billables(self) -> List[Tuple[date, Optional[int], float]]:
+        """(service date, claim_id, quantity) for billables in the loaded window."""
+        from app.models import BillableItem, db
+
+        self._facts_loaded = True
+        service_date = _billable_service_date_attr(BillableItem)
+        qty_col = getattr(BillableItem, "quantity", None)
+        if service_date is None or qty_col is None:
+            return []
+        q = db.session.query(service_date, BillableItem.claim_id, func.coalesce(func.sum(qty_col), 0)).filter(
+            service_date.isnot(None)
+        )
+        if self._earliest is not None:
+            q = q.filter(service_date >= self._earliest)
+        rows = q.group_by(service_date, BillableItem.claim_id).all()
+        return [(_as_date(d), cid, float(t or 0.0)) for d, cid, t in rows]
+
+    # ---- Invoices ----
+
+    def _invoice_rows(self) -> List[_RollupFact]:
+        return self.rollup["invoice"] + self.rollup["invoice_undated"]
+
+    def open_invoices_total(self, period: Optional[str]) -> float:
+        if period is None:
+            return float(sum(f.amount for f in self._invoice_rows() if f.is_open))
+        b = self.bounds(period)
+        return float(sum(f.amount for f in self.rollup["invoice"] if f.is_open and _within(f.day, b)))
+
+    def revenue_metrics(self, period: str) -> Dict[str, float]:
+        from app.models import Invoice
+
+        if _invoice_total_attr(Invoice) is None:
+            return {"invoiced_total": 0.0, "open_total": 0.0, "paid_total": 0.0}
+        b = self.bounds(period)
+        # invoice_date, else DATE(created_at)
+        in_period = [f for f in self._invoice_rows() if _within(f.day, b)]
+        invoiced_total = float(sum(f.amount for f in in_period))
+        if _invoice_status_attr(Invoice) is None:
+            # If no status column, treat all invoiced as open
+            return {"invoiced_total": invoiced_total, "open_total": invoiced_total, "paid_total": 0.0}
+        return {
+            "invoiced_total": invoiced_total,
+            "open_total": float(sum(f.amount for f in in_period if f.is_open)),
+            "paid_total": float(sum(f.amount for f in in_period if f.key == "PAID")),
+        }
+
+    def revenue_trend(self, period: str) -> List[Dict[str, Any]]:
+        from app.models import Invoice
+
+        if _invoice_total_attr(Invoice) is None or _invoice_date_attr(Invoice) is None:
+            return []
+        start, end = self.bounds(period)
+        rows = [f for f in self._invoice_rows() if f.day is not None]
+        out = []
+        for label, date_str, lo, hi in _revenue_trend_buckets(period, start, end):
+            total = sum(f.amount for f in rows if lo <= f.day < hi)
+            out.append({"label": label, "date": date_str, "total": float(total)})
+        return out
+
+    def open_invoice_aging(self) -> Dict[str, float]:
+        buckets = {"current": 0.0, "31_60": 0.0, "61_90": 0.0, "90_plus": 0.0}
+        for f in self.rollup["invoice"]:
+            # Only SENT invoices count toward A/R aging
+            if f.key != "SENT":
+                continue
+            if f.before:
+                # folded rows are all older than 90 days (see _collapse_before)
+                buckets["90_plus"] += f.amount
+                continue
+            age_days = (self.today - f.day).days
+            if age_days <= 30:
+                buckets["current"] += f.amount
+            elif age_days <= 60:
+                buckets["31_60"] += f.amount
+            elif age_days <= 90:
+                buckets["61_90"] += f.amount
+            else:
+                buckets["90_plus"] += f.amount
+        return buckets
+
+    def invoice_totals_by_claim(self, period: str) -> Dict[Optional[int], float]:
+        """Invoiced total per claim for invoices dated (invoice_date) in the period."""
+        b = self.bounds(period)
+        totals: Dict[Optional[int], float] = {}
+        for day, claim_id, total in self.claim_invoices:
+            if _within(day, b):
+                totals[claim_id] = totals.get(claim_id, 0.0) + total
+        return totals
+
+    # ---- Billables ----
+
+    def _billable_window(self, period: Optional[str]) -> List[_RollupFact]:
+        b = self.bounds(period)
+        return [f for f in self.rollup["billable"] if period is None or _within(f.day, b)]
+
+    def uninvoiced_quantity(self, period: Optional[str]) -> float:
+        """Complete, un-invoiced, billable (not NO BILL) quantity."""
+        return float(sum(
+            f.quantity for f in self._billable_window(period)
+            if f.flag and f.code_u != "NO BILL"
+        ))
+
+    def money_position(self, period: Optional[str]) -> Dict[str, float]:
+        open_invoices_total = self.open_invoices_total(period)
+        uninvoiced_total = self.uninvoiced_quantity(period) * self.settings["hourly_rate"]
+        total = float(open_invoices_total + uninvoiced_total)
+        return {
+            "open_invoices": open_invoices_total,
+            "uninvoiced_billables": uninvoiced_total,
+            "total": total,
+            "open_invoices_pct": (open_invoices_total / total * 100.0) if total else 0.0,
+            "uninvoiced_billables_pct": (uninvoiced_total / total * 100.0) if total else 0.0,
+        }
+
+    def billable_breakdown(self, period: str, *, limit: int = 12) -> List[Dict[str, Any]]:
+        from app.models import BillableItem
 
-    return results
+        if getattr(BillableItem, "activity_code", None) is None:
+            return []
+        hourly_rate = self.settings["hourly_rate"]
+
+        qty_by_code: Dict[str, float] = {}
+        for f in self._billable_window(period):
+            if not f.flag or f.code_u == "NO BILL":
+                continue
+            code = (f.key or "").strip(" ") or "(none)"
+            qty_by_code[code] = qty_by_code.get(code, 0.0) + f.quantity
+
+        rows = sorted(qty_by_code.items(), key=lambda kv: (-kv[1], kv[0]))
+        total_all = float(sum(qty * hourly_rate for _, qty in rows))
+        top = rows[: max(0, int(limit))]
+        remainder = rows[max(0, int(limit)):]
+
+        out: List[Dict[str, Any]] = []
+        for code, qty in top:
+            t = qty * hourly_rate
+            out.append({"code": code.strip(), "total": t, "pct": (t / total_all * 100.0) if total_all else 0.0})
+        if remainder:
+            rem_total = float(sum(qty * hourly_rate for _, qty in remainder))
+            out.append({"code": "Other", "total": rem_total, "pct": (rem_total / total_all * 100.0) if total_all else 0.0})
+        return out
+
+    def productivity(self, period: str) -> Dict[str, float]:
+        from app.models import BillableItem
+
+        if getattr(BillableItem, "activity_code", None) is None or getattr(BillableItem, "quantity", None) is None:
+            return {"hours": 0.0, "miles": 0.0, "expenses": 0.0, "total_units": 0.0}
+        hours = miles = expenses = 0.0
+        for f in self._billable_window(period):
+            code_u = f.code_u
+            if code_u in _MILES_CODES:
+                miles += f.quantity
+            elif code_u in _EXPENSE_CODES:
+                # Expenses are captured as quantity (dollars)
+                expenses += f.quantity
+            elif code_u != "NO BILL":
+                # Everything else with quantity counts as "hours" (including Travel, Admin, etc.)
+                hours += f.quantity
+        return {"hours": hours, "miles": miles, "expenses": expenses, "total_units": float(hours + miles + expenses)}
+
+    def billable_quantity_by_claim(self, period: str) -> Dict[Optional[int], float]:
+        b = self.bounds(period)
+        totals: Dict[Optional[int], float] = {}
+        for day, claim_id, qty in self.claim_billables:
+            if _within(day, b):
+                totals[claim_id] = totals.get(claim_id, 0.0) + qty
+        return totals
+
+    # ---- Claims ----
+
+    def active_claims_global(self) -> int:
+        # Active = not CLOSED (NULL status is not counted, as in SQL)
+        return sum(f.count for f in self.rollup["claim_opened"] if f.flag)
+
+    def active_claim_trend(self, period: str) -> List[Dict[str, Any]]:
+        from app.models import Claim
+
+        if getattr(Claim, "opened_at", None) is None:
+            return []
+        start, end = self.bounds(period)
+        buckets = _active_claim_buckets(period, start, end)
+        counts = self._active_claim_counts(as_of for _, as_of in buckets)
+        return [{"label": label, "count": counts[as_of]} for label, as_of in buckets]
+
+    def _active_claim_counts(self, as_of_dates: Iterable[date]) -> Dict[date, int]:
+        """Sweep-line over the claim events already loaded from the rollup.
+
+        Same result as analytics_rollup.active_claim_counts without a query:
+        opened_at <= as_of AND (closed_at IS NULL OR closed_at > as_of).
+        """
+        events = sorted(
+            ((f.day, f.count if f.fact == "claim_opened" else -f.count)
+             for fact in ("claim_opened", "claim_closed")
+             for f in self.rollup[fact]),
+            # folded history (day None) sorts first
+            key=lambda e: (e[0] is not None, e[0] or date.min),
+        )
+        counts: Dict[date, int] = {}
+        active = 0
+        i = 0
+        for as_of in sorted(set(as_of_dates)):
+            while i < len(events) and (events[i][0] is None or events[i][0] <= as_of):
+                active += events[i][1]
+                i += 1
+            counts[as_of] = active
+        return counts
+
+    def claims_with_activity(self, period: str) -> set:
+        """Claims with an invoice (invoice_date) or a billable (service date) in the period."""
+        b = self.bounds(period)
+        ids = {cid for day, cid, _ in self.claim_invoices if cid and _within(day, b)}
+        ids.update(cid for day, cid, _ in self.claim_billables if cid and _within(day, b))
+        return ids
+
+    # ---- Derived ----
+
+    def revenue_health_percent(self, period: str) -> float:
+        """Revenue per active claim vs Settings.target_revenue_per_claim (0-200%)."""
+        target = self.settings["target_revenue_per_claim"]
+        active = self.active_claims_global()
+        invoiced = float(self.revenue_metrics(period).get("invoiced_total", 0.0))
+        per_claim = (invoiced / active) if active > 0 else 0.0
+        return min(max((per_claim / target) * 100.0, 0.0), 200.0) if target > 0 else 0.0
 
 
 def build_dashboard_context(
@@ -1010,48 +961,52 @@ def build_dashboard_context(
     Each live dashboard module receives its own period argument, so dropdowns can control them separately.
     """
 
+    # Every number below comes from one grouped pass per fact table.
+    agg = DashboardAggregates(
+        DASHBOARD_PERIODS
+        + (
+            revenue_overview_period,
+            billable_breakdown_period,
+            productivity_period,
+            revenue_health_period,
+            active_claim_trend_period,
+        )
+    )
+    settings = agg.settings
+
     # 1. Revenue Overview module
-    revenue = get_revenue_metrics(revenue_overview_period)
-    money = get_money_position(period=revenue_overview_period)
+    revenue = agg.revenue_metrics(revenue_overview_period)
+    money = agg.money_position(revenue_overview_period)
 
     # ------------------------------------------------------------------
     # Revenue Overview per-period totals (for donut selector)
     # ------------------------------------------------------------------
-    _rev_week = get_money_position(period="WEEK")
-    _rev_month = get_money_position(period="MONTH")
-    _rev_quarter = get_money_position(period="3M")
-    _rev_six_month = get_money_position(period="6M")
-    _rev_rolling_year = get_money_position(period="12M")
-    _rev_year = get_money_position(period="YEAR")
+    _rev_week = agg.money_position("WEEK")
+    _rev_month = agg.money_position("MONTH")
+    _rev_quarter = agg.money_position("3M")
+    _rev_six_month = agg.money_position("6M")
+    _rev_rolling_year = agg.money_position("12M")
+    _rev_year = agg.money_position("YEAR")
 
     # 2. Billable Breakdown module
-    breakdown = get_billable_breakdown_by_code(billable_breakdown_period)
+    breakdown = agg.billable_breakdown(billable_breakdown_period)
 
     # Billable Breakdown per-period datasets (for donut selector)
-    _bb_week = get_billable_breakdown_by_code("WEEK")
-    _bb_month = get_billable_breakdown_by_code("MONTH")
-    _bb_quarter = get_billable_breakdown_by_code("3M")
-    _bb_six_month = get_billable_breakdown_by_code("6M")
-    _bb_rolling_year = get_billable_breakdown_by_code("12M")
-    _bb_year = get_billable_breakdown_by_code("YEAR")
+    _bb_week = agg.billable_breakdown("WEEK")
+    _bb_month = agg.billable_breakdown("MONTH")
+    _bb_quarter = agg.billable_breakdown("3M")
+    _bb_six_month = agg.billable_breakdown("6M")
+    _bb_rolling_year = agg.billable_breakdown("12M")
+    _bb_year = agg.billable_breakdown("YEAR")
 
     # 3. Productivity module
-    productivity = get_productivity_metrics(productivity_period)
+    productivity = agg.productivity(productivity_period)
 
     # ---------------------------------------------------------
     # Rolling 30-Day Productivity (Target Band Model)
     # ---------------------------------------------------------
-    try:
-        from app.models import Settings, db as _db_prod
-
-        settings_prod = _db_prod.session.query(Settings).first()
-
-        weekly_min = float(getattr(settings_prod, "target_min_hours_per_week", 0.0) or 0.0)
-        weekly_max = float(getattr(settings_prod, "target_max_hours_per_week", 0.0) or 0.0)
-
-    except Exception:
-        weekly_min = 0.0
-        weekly_max = 0.0
+    weekly_min = settings["target_min_hours_per_week"]
+    weekly_max = settings["target_max_hours_per_week"]
 
     # Convert weekly targets to rolling 30-day equivalents
     month_factor = 30.0 / 7.0
@@ -1059,36 +1014,8 @@ def build_dashboard_context(
     rolling_max = weekly_max * month_factor
     rolling_ceiling = rolling_max * 2.0 if rolling_max > 0 else 0.0
 
-    # Compute rolling 30-day actual hours
-    from app.models import BillableItem as _BillableItemProd, db as _db_prod2
-    service_date_prod = _billable_service_date_attr(_BillableItemProd)
-    qty_col_prod = getattr(_BillableItemProd, "quantity", None)
-    code_col_prod = getattr(_BillableItemProd, "activity_code", None)
-
-    rolling_hours = 0.0
-
-    if qty_col_prod is not None and service_date_prod is not None:
-        start_30, end_30 = get_period_bounds("MONTH")  # 30-day rolling
-        code_u_prod = func.upper(func.coalesce(code_col_prod, ""))
-        hours_case_prod = case(
-            (
-                and_(
-                    ~code_u_prod.in_(["MIL", "MILE", "MILES", "EXP", "EXPENSE", "EXPENSES", "NO BILL"]),
-                    qty_col_prod.isnot(None),
-                ),
-                func.coalesce(qty_col_prod, 0),
-            ),
-            else_=0,
-        )
-
-        rolling_hours = float(
-            _db_prod2.session.query(func.coalesce(func.sum(hours_case_prod), 0))
-            .filter(service_date_prod.isnot(None))
-            .filter(service_date_prod >= start_30)
-            .filter(service_date_prod <= end_30)
-            .scalar()
-            or 0.0
-        )
+    # Rolling 30-day actual hours (MONTH = 30D rolling)
+    rolling_hours = float(agg.productivity("MONTH").get("hours", 0.0) or 0.0)
 
     # ---------------------------------------------------------
     # Rolling Utilization Calculations (Capped + Display)
@@ -1114,102 +1041,37 @@ def build_dashboard_context(
     target_band_label = f"{weekly_min:.0f}–{weekly_max:.0f} hrs/week"
 
     # 4. Revenue Health module (Revenue per Active Claim vs Target)
-    try:
-        from app.models import Settings, Claim, db as _db_rh
-
-        settings = _db_rh.session.query(Settings).first()
-        target_per_claim = float(getattr(settings, "target_revenue_per_claim", 0.0) or 0.0)
-
-        # Active claims (not CLOSED if status exists)
-        if hasattr(Claim, "status"):
-            active_claims = (
-                _db_rh.session.query(func.count(Claim.id))
-                .filter(func.upper(Claim.status) != "CLOSED")
-                .scalar()
-                or 0
-            )
-        else:
-            active_claims = _db_rh.session.query(func.count(Claim.id)).scalar() or 0
-
-        # Recompute revenue for the revenue_health_period (period-aware gauge)
-        revenue_for_health = get_revenue_metrics(revenue_health_period)
-        revenue_per_claim_health = (
-            (float(revenue_for_health.get("invoiced_total", 0.0)) / active_claims)
-            if active_claims > 0
-            else 0.0
-        )
-
-        revenue_health_percent = (
-            min(max((revenue_per_claim_health / target_per_claim) * 100.0, 0.0), 200.0)
-            if target_per_claim > 0
-            else 0.0
-        )
-
-    except Exception:
-        revenue_health_percent = 0.0
+    revenue_health_percent = agg.revenue_health_percent(revenue_health_period)
 
     # Revenue Health per-period datasets (for gauge selector)
-    def _compute_revenue_health_for(period_key: str):
-        try:
-            from app.models import Settings, Claim, db as _db_local
-            settings_local = _db_local.session.query(Settings).first()
-            target_local = float(getattr(settings_local, "target_revenue_per_claim", 0.0) or 0.0)
-
-            if hasattr(Claim, "status"):
-                active_local = (
-                    _db_local.session.query(func.count(Claim.id))
-                    .filter(func.upper(Claim.status) != "CLOSED")
-                    .scalar()
-                    or 0
-                )
-            else:
-                active_local = _db_local.session.query(func.count(Claim.id)).scalar() or 0
-
-            rev_local = get_revenue_metrics(period_key)
-            revenue_per_claim_local = (
-                (float(rev_local.get("invoiced_total", 0.0)) / active_local)
-                if active_local > 0
-                else 0.0
-            )
-
-            percent_local = (
-                min(max((revenue_per_claim_local / target_local) * 100.0, 0.0), 200.0)
-                if target_local > 0
-                else 0.0
-            )
-
-            return percent_local
-        except Exception:
-            return 0.0
-
-    _rh_week = _compute_revenue_health_for("WEEK")
-    _rh_month = _compute_revenue_health_for("MONTH")
-    _rh_quarter = _compute_revenue_health_for("3M")
-    _rh_six_month = _compute_revenue_health_for("6M")
-    _rh_rolling_year = _compute_revenue_health_for("12M")
-    _rh_year = _compute_revenue_health_for("YEAR")
+    _rh_week = agg.revenue_health_percent("WEEK")
+    _rh_month = agg.revenue_health_percent("MONTH")
+    _rh_quarter = agg.revenue_health_percent("3M")
+    _rh_six_month = agg.revenue_health_percent("6M")
+    _rh_rolling_year = agg.revenue_health_percent("12M")
+    _rh_year = agg.revenue_health_percent("YEAR")
 
     # 5. Active Claim Trend module
-    active_claim_trend = get_active_claim_trend(active_claim_trend_period)
+    active_claim_trend = agg.active_claim_trend(active_claim_trend_period)
 
     # Active Claim Trend per-period datasets (for chart selector)
-    _act_week = get_active_claim_trend("WEEK")
-    _act_month = get_active_claim_trend("MONTH")
-    _act_quarter = get_active_claim_trend("3M")
-    _act_six_month = get_active_claim_trend("6M")
-    _act_rolling_year = get_active_claim_trend("12M")
-    _act_year = get_active_claim_trend("YEAR")
+    _act_week = agg.active_claim_trend("WEEK")
+    _act_month = agg.active_claim_trend("MONTH")
+    _act_quarter = agg.active_claim_trend("3M")
+    _act_six_month = agg.active_claim_trend("6M")
+    _act_rolling_year = agg.active_claim_trend("12M")
+    _act_year = agg.active_claim_trend("YEAR")
 
     # Revenue Trends (for charts, always provide all periods for flexibility)
-    revenue_trend_week = get_revenue_trend_for_period("WEEK")
-    revenue_trend_month = get_revenue_trend_for_period("MONTH")
-    revenue_trend_quarter = get_revenue_trend_for_period("3M")
-    revenue_trend_six_month = get_revenue_trend_for_period("6M")
-    revenue_trend_rolling_year = get_revenue_trend_for_period("12M")
-    revenue_trend_year = get_revenue_trend_for_period("YEAR")
+    revenue_trend_week = agg.revenue_trend("WEEK")
+    revenue_trend_month = agg.revenue_trend("MONTH")
+    revenue_trend_quarter = agg.revenue_trend("3M")
+    revenue_trend_six_month = agg.revenue_trend("6M")
+    revenue_trend_rolling_year = agg.revenue_trend("12M")
+    revenue_trend_year = agg.revenue_trend("YEAR")
 
     # 6. Open Invoice Aging
-    aging = get_open_invoice_aging()
+    aging = agg.open_invoice_aging()
 
     # Reporting + Scheduling (appointments and reports_due: these use their own periods)
     reports_due = get_reports_due(days_ahead=7, period=reports_period)
@@ -1219,191 +1081,73 @@ def build_dashboard_context(
     # ---------------------------------------------------------
     # System
     # Active Claims (Global + Period for active_claim_trend_period)
-    try:
-        from app.models import Claim, Invoice as _Invoice, BillableItem as _BillableItem, db as _db
-        # ---- Global Active Claims ----
-        if hasattr(Claim, "status"):
-            active_global_count = (
-                _db.session.query(func.count(Claim.id))
-                .filter(func.upper(Claim.status) != "CLOSED")
-                .scalar()
-                or 0
-            )
-        else:
-            active_global_count = _db.session.query(func.count(Claim.id)).scalar() or 0
-        # ---- Period Active Claims ----
-        start_period, end_period = get_period_bounds(active_claim_trend_period)
-        period_claim_ids = set()
-        # Claims with invoices in period
-        inv_date_col2 = _invoice_date_attr(_Invoice)
-        if inv_date_col2 is not None:
-            inv_rows = (
-                _db.session.query(_Invoice.claim_id)
-                .filter(inv_date_col2.isnot(None))
-                .filter(inv_date_col2 >= start_period)
-                .filter(inv_date_col2 <= end_period)
-                .distinct()
-                .all()
-            )
-            period_claim_ids.update(r.claim_id for r in inv_rows if r.claim_id)
-        # Claims with billables in period
-        service_date2 = _billable_service_date_attr(_BillableItem)
-        if service_date2 is not None:
-            bill_rows = (
-                _db.session.query(_BillableItem.claim_id)
-                .filter(service_date2.isnot(None))
-                .filter(service_date2 >= start_period)
-                .filter(service_date2 <= end_period)
-                .distinct()
-                .all()
-            )
-            period_claim_ids.update(r.claim_id for r in bill_rows if r.claim_id)
-        active_period_count = len(period_claim_ids)
-    except Exception:
-        active_global_count = 0
-        active_period_count = 0
+    active_global_count = agg.active_claims_global()
+    active_period_count = len(agg.claims_with_activity(active_claim_trend_period))
 
     # ---------------------------------------------------------
     # Claim Economics (Compact KPI Grid)
     # ---------------------------------------------------------
-    try:
-        # Rolling 30-day revenue (invoice-based, month = 30D rolling)
-        rolling_revenue_30 = float(
-            get_revenue_metrics("MONTH").get("invoiced_total", 0.0) or 0.0
-        )
+    # Rolling 30-day revenue (invoice-based, month = 30D rolling)
+    rolling_revenue_30 = float(agg.revenue_metrics("MONTH").get("invoiced_total", 0.0) or 0.0)
 
-        # Revenue run rate (annualized from rolling 30-day revenue)
-        revenue_run_rate = rolling_revenue_30 * 12.0
+    # Revenue run rate (annualized from rolling 30-day revenue)
+    revenue_run_rate = rolling_revenue_30 * 12.0
 
-        # Revenue per hour (based on selected productivity period hours)
-        total_hours_period = float(productivity.get("hours", 0.0) or 0.0)
-        revenue_per_hour = (
-            (float(revenue.get("invoiced_total", 0.0)) / total_hours_period)
-            if total_hours_period > 0
-            else 0.0
-        )
-
-        # Avg revenue per claim (rolling 12 months)
-        try:
-            from app.models import Invoice as _InvAvg, db as _db_avg
-
-            inv_total_col_avg = _invoice_total_attr(_InvAvg)
-            inv_date_col_avg = _invoice_date_attr(_InvAvg)
-            created_col_avg = getattr(_InvAvg, "created_at", None)
-
-            start_12m, end_12m = get_period_bounds("12M")
-
-            if inv_total_col_avg is not None:
-                # Use invoice_date if present, fallback to created_at
-                if inv_date_col_avg is not None:
-                    date_filter_expr = inv_date_col_avg
-                elif created_col_avg is not None:
-                    date_filter_expr = func.date(created_col_avg)
-                else:
-                    date_filter_expr = None
-
-                if date_filter_expr is not None:
-                    # Total revenue last 12 months
-                    rev_12m = float(
-                        _db_avg.session.query(func.coalesce(func.sum(inv_total_col_avg), 0))
-                        .filter(date_filter_expr.isnot(None))
-                        .filter(date_filter_expr >= start_12m)
-                        .filter(date_filter_expr <= end_12m)
-                        .scalar()
-                        or 0.0
-                    )
-
-                    # Distinct claims with invoices in last 12 months
-                    claim_count_12m = (
-                        _db_avg.session.query(func.count(func.distinct(_InvAvg.claim_id)))
-                        .filter(date_filter_expr.isnot(None))
-                        .filter(date_filter_expr >= start_12m)
-                        .filter(date_filter_expr <= end_12m)
-                        .scalar()
-                        or 0
-                    )
-
-                    avg_revenue_per_claim_12m = (
-                        (rev_12m / claim_count_12m)
-                        if claim_count_12m > 0
-                        else 0.0
-                    )
-                else:
-                    avg_revenue_per_claim_12m = 0.0
-            else:
-                avg_revenue_per_claim_12m = 0.0
-
-        except Exception:
-            avg_revenue_per_claim_12m = 0.0
+    # Revenue per hour (based on selected productivity period hours)
+    total_hours_period = float(productivity.get("hours", 0.0) or 0.0)
+    revenue_per_hour = (
+        (float(revenue.get("invoiced_total", 0.0)) / total_hours_period)
+        if total_hours_period > 0
+        else 0.0
+    )
 
-        # --- Collections Health (Open Invoice Aging) ---
-        aging_data = get_open_invoice_aging()
-        open_current = float(aging_data.get("current", 0.0) or 0.0)
-        open_31_60 = float(aging_data.get("31_60", 0.0) or 0.0)
-        open_61_90 = float(aging_data.get("61_90", 0.0) or 0.0)
-        open_90_plus = float(aging_data.get("90_plus", 0.0) or 0.0)
+    # Avg revenue per claim (rolling 12 months, by invoice_date)
+    claim_totals_12m = agg.invoice_totals_by_claim("12M")
+    claim_count_12m = len([cid for cid in claim_totals_12m if cid is not None])
+    avg_revenue_per_claim_12m = (
+        (sum(claim_totals_12m.values()) / claim_count_12m)
+        if claim_count_12m > 0
+        else 0.0
+    )
 
-        total_open_invoices = (
-            open_current + open_31_60 + open_61_90 + open_90_plus
-        )
+    # --- Collections Health (Open Invoice Aging) ---
+    open_current = float(aging.get("current", 0.0) or 0.0)
+    open_31_60 = float(aging.get("31_60", 0.0) or 0.0)
+    open_61_90 = float(aging.get("61_90", 0.0) or 0.0)
+    open_90_plus = float(aging.get("90_plus", 0.0) or 0.0)
 
-        over_60_total = open_61_90 + open_90_plus
+    total_open_invoices = (
+        open_current + open_31_60 + open_61_90 + open_90_plus
+    )
 
-        percent_over_60 = (
-            (over_60_total / total_open_invoices) * 100.0
-            if total_open_invoices > 0
-            else 0.0
-        )
+    over_60_total = open_61_90 + open_90_plus
 
-        claim_economics = {
-            # Revenue Engine
-            "rolling_30_day_revenue": rolling_revenue_30,
-            "revenue_run_rate": revenue_run_rate,
-            "revenue_per_hour": revenue_per_hour,
-            "avg_revenue_per_claim_12m": avg_revenue_per_claim_12m,
-            "active_claims": int(active_global_count or 0),
-
-            # Collections Health
-            "open_invoices_total": total_open_invoices,
-            "open_current": open_current,
-            "open_31_60": open_31_60,
-            "open_61_90": open_61_90,
-            "open_90_plus": open_90_plus,
-            "percent_over_60": percent_over_60,
-        }
+    percent_over_60 = (
+        (over_60_total / total_open_invoices) * 100.0
+        if total_open_invoices > 0
+        else 0.0
+    )
 
-    except Exception:
-        claim_economics = {
-            "rolling_30_day_revenue": 0.0,
-            "revenue_run_rate": 0.0,
-            "revenue_per_hour": 0.0,
-            "avg_revenue_per_claim_12m": 0.0,
-            "active_claims": 0,
-
-            "open_invoices_total": 0.0,
-            "open_current": 0.0,
-            "open_31_60": 0.0,
-            "open_61_90": 0.0,
-            "open_90_plus": 0.0,
-            "percent_over_60": 0.0,
-        }
+    claim_economics = {
+        # Revenue Engine
+        "rolling_30_day_revenue": rolling_revenue_30,
+        "revenue_run_rate": revenue_run_rate,
+        "revenue_per_hour": revenue_per_hour,
+        "avg_revenue_per_claim_12m": avg_revenue_per_claim_12m,
+        "active_claims": int(active_global_count or 0),
+
+        # Collections Health
+        "open_invoices_total": total_open_invoices,
+        "open_current": open_current,
+        "open_31_60": open_31_60,
+        "open_61_90": open_61_90,
+        "open_90_plus": open_90_plus,
+        "percent_over_60": percent_over_60,
+    }
 
     # Revenue per claim (for Revenue Overview period)
-    try:
-        from app.models import Invoice as _Invoice2, db as _db2
-        inv_date_col3 = _invoice_date_attr(_Invoice2)
-        claim_count_query = _db2.session.query(func.count(func.distinct(_Invoice2.claim_id)))
-        if inv_date_col3 is not None:
-            start_r, end_r = get_period_bounds(revenue_overview_period)
-            claim_count_query = (
-                claim_count_query
-                .filter(inv_date_col3.isnot(None))
-                .filter(inv_date_col3 >= start_r)
-                .filter(inv_date_col3 <= end_r)
-            )
-        active_claims_count = claim_count_query.scalar() or 0
-    except Exception:
-        active_claims_count = 0
+    claim_totals_period = agg.invoice_totals_by_claim(revenue_overview_period)
+    active_claims_count = len([cid for cid in claim_totals_period if cid is not None])
     invoiced_total = float(revenue.get("invoiced_total", 0.0) or 0.0)
     revenue_per_claim = (
         (invoiced_total / active_claims_count)
@@ -1412,42 +1156,13 @@ def build_dashboard_context(
     )
 
     # Revenue per claim SD (for Revenue Overview period)
-    revenue_sd = 0.0
-    try:
-        from app.models import Invoice as _Invoice3, db as _db3
-        inv_total_col2 = _invoice_total_attr(_Invoice3)
-        inv_date_col4 = _invoice_date_attr(_Invoice3)
-        if inv_total_col2 is not None:
-            q = (
-                _db3.session.query(
-                    _Invoice3.claim_id,
-                    func.coalesce(func.sum(inv_total_col2), 0).label("claim_total"),
-                )
-                .group_by(_Invoice3.claim_id)
-            )
-            if inv_date_col4 is not None:
-                start_r, end_r = get_period_bounds(revenue_overview_period)
-                q = (
-                    q.filter(inv_date_col4.isnot(None))
-                     .filter(inv_date_col4 >= start_r)
-                     .filter(inv_date_col4 <= end_r)
-                )
-            rows = q.all()
-            values = [float(r.claim_total or 0.0) for r in rows if r.claim_total is not None]
-            if len(values) > 1:
-                revenue_sd = float(statistics.stdev(values))
-    except Exception:
-        revenue_sd = 0.0
+    values = list(claim_totals_period.values())
+    revenue_sd = float(statistics.stdev(values)) if len(values) > 1 else 0.0
 
     # Productivity percent (for Productivity period)
-    try:
-        from app.models import Settings, db as _db4
-        settings = _db4.session.query(Settings).first()
-        weekly_capacity = float(getattr(settings, "target_max_hours_per_week", 40.0) or 40.0)
-    except Exception:
-        weekly_capacity = 40.0
+    weekly_capacity = settings["target_max_hours_per_week"] or 40.0
     # Period-aware baseline using exact period length
-    start_p, end_p = get_period_bounds(productivity_period)
+    start_p, end_p = agg.bounds(productivity_period)
     days_in_period = (end_p - start_p).days + 1
     weeks_in_period = days_in_period / 7.0
     baseline_hours = weekly_capacity * weeks_in_period
@@ -1458,39 +1173,14 @@ def build_dashboard_context(
     )
 
     # Hours per claim SD (for Productivity period)
-    hours_sd = 0.0
-    try:
-        from app.models import BillableItem as _BillableItem2, db as _db5
-        service_date3 = _billable_service_date_attr(_BillableItem2)
-        qty_col = getattr(_BillableItem2, "quantity", None)
-        claim_fk = getattr(_BillableItem2, "claim_id", None)
-        if qty_col is not None and claim_fk is not None:
-            q = (
-                _db5.session.query(
-                    claim_fk,
-                    func.coalesce(func.sum(qty_col), 0).label("claim_hours"),
-                )
-                .group_by(claim_fk)
-            )
-            if service_date3 is not None:
-                start, end = get_period_bounds(productivity_period)
-                q = (
-                    q.filter(service_date3.isnot(None))
-                     .filter(service_date3 >= start)
-                     .filter(service_date3 <= end)
-                )
-            rows = q.all()
-            values = [float(r.claim_hours or 0.0) for r in rows if r.claim_hours is not None]
-            if len(values) > 1:
-                hours_sd = float(statistics.stdev(values))
-    except Exception:
-        hours_sd = 0.0
+    values = list(agg.billable_quantity_by_claim(productivity_period).values())
+    hours_sd = float(statistics.stdev(values)) if len(values) > 1 else 0.0
 
     # System Health (no composite gauge)
     system_health = get_system_health()
 
     # Dates for current Revenue Overview period
-    start_current, end_current = get_period_bounds(revenue_overview_period)
+    start_current, end_current = agg.bounds(revenue_overview_period)
 
     return {
         # Revenue Overview Donut Data (per-period open + uninvoiced)
@@ -0,0 +1,161 @@
+"""Concurrency-safe invoice number allocation.
+
+Invoice numbers look like INV-YY-### (a system-wide sequence per 2-digit
+year). They used to be found by loading every invoice of the year and taking
+the max in Python: O(n) per new invoice, and two invoices created at the same
+time could get the same number.
+
+Each prefix ("INV-25-") now has a row in invoice_number_counter, advanced by
+one atomic statement in the caller's transaction:
+
+    UPDATE invoice_number_counter SET last_value = last_value + 1
+    WHERE prefix = :prefix RETURNING last_value
+
+- Postgres: the UPDATE row-locks the counter until the invoice's transaction
+  ends, so a concurrent allocation waits and then sees the incremented value
+  (same guarantee as SELECT ... FOR UPDATE, one round-trip). A rolled-back
+  invoice rolls its number back too, so numbers stay gapless.
+- SQLite: the UPDATE takes the database write lock, which serializes writers
+  the same way.
+
+The first allocation for a prefix seeds its counter from the highest number
+already issued with that prefix (one scan per prefix per year); a concurrent
+seeder losing the INSERT race just retries the UPDATE.
+
+Draft invoice numbers can still be typed in by hand. A typed number inside an
+auto series (INV-YY-###) is passed to note_issued_number in the same
+transaction, which moves the counter up to MAX(last_value, seq) so the
+allocator never hands that number out again.
+
+NOTE: This service does not create invoices. Callers assign the number.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Invoice, InvoiceNumberCounter
+
+DEFAULT_PREFIX = "INV"
+
+_SERIES_RE = re.compile(r"^([A-Za-z]+-\d{2}-)(\d+)$")
+
+
+def year_prefix(prefix: str = DEFAULT_PREFIX, on: Optional[date] = None) -> str:
+    """Number prefix for the year of `on` (default: today, local time), e.g. "INV-25-"."""
+    if on is None:
+        from app.routes.helpers import _today_local  # local import to avoid circulars
+
+        on = _today_local()
+    return f"{prefix}-{on.strftime('%y')}-"
+
+
+def format_number(number_prefix: str, seq: int) -> str:
+    """E.g. "INV-25-" + 7 -> "INV-25-007" (wider once past 999)."""
+    return f"{number_prefix}{seq:03d}"
+
+
+def highest_issued(conn: Any, number_prefix: str) -> int:
+    """Largest numeric suffix among existing invoice numbers with this prefix (0 if none)."""
+    highest = 0
+    rows = conn.execute(
+        select(Invoice.invoice_number).where(Invoice.invoice_number.like(f"{number_prefix}%"))
+    )
+    for (number,) in rows:
+        suffix = str(number or "")[len(number_prefix):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _advance(conn: Any, number_prefix: str, step: int = 1) -> Optional[int]:
+    t = InvoiceNumberCounter.__table__
+    return conn.execute(
+        t.update()
+        .where(t.c.prefix == number_prefix)
+        .values(last_value=t.c.last_value + step)
+        .returning(t.c.last_value)
+    ).scalar()
+
+
+def allocate_sequence(number_prefix: str, conn: Any = None) -> int:
+    """Reserve and return the next sequence number for `number_prefix`.
+
+    Runs on `conn` (default: the session's connection) inside its transaction;
+    the counter row stays locked until that transaction ends.
+    """
+    if conn is None:
+        conn = db.session.connection()
+
+    value = _advance(conn, number_prefix)
+    if value is not None:
+        return int(value)
+
+    # First number for this prefix: continue after what was issued before.
+    t = InvoiceNumberCounter.__table__
+    seed = highest_issued(conn, number_prefix) + 1
+    try:
+        with conn.begin_nested():
+            conn.execute(t.insert().values(prefix=number_prefix, last_value=seed))
+        return seed
+    except IntegrityError:
+        return int(_advance(conn, number_prefix))
+
+
+def parse_number(invoice_number: str) -> Optional[tuple]:
+    """("INV-25-", 7) for "INV-25-007"; None if the number is outside any auto series."""
+    m = _SERIES_RE.match(str(invoice_number or "").strip())
+    if not m:
+        return None
+    return m.group(1), int(m.group(2))
+
+
+def note_issued_number(invoice_number: str, conn: Any = None) -> None:
+    """Keep the counter ahead of a hand-typed number in an auto series.
+
+    Raises the counter for the number's prefix to MAX(last_value, seq) in the
+    caller's transaction. Numbers that don't look like PREFIX-YY-### are ignored.
+    """
+    parsed = parse_number(invoice_number)
+    if parsed is None:
+        return
+    number_prefix, seq = parsed
+    if conn is None:
+        conn = db.session.connection()
+
+    t = InvoiceNumberCounter.__table__
+    bump = t.update().where(t.c.prefix == number_prefix, t.c.last_value < seq).values(last_value=seq)
+    if conn.execute(bump).rowcount:
+        return
+    if conn.execute(select(t.c.prefix).where(t.c.prefix == number_prefix)).first() is not None:
+        return  # counter already past seq
+
+    # No counter yet: create it past both the typed number and what was issued.
+    seed = max(highest_issued(conn, number_prefix), seq)
+    try:
+        with conn.begin_nested():
+            conn.execute(t.insert().values(prefix=number_prefix, last_value=seed))
+    except IntegrityError:
+        conn.execute(bump)
+
+
+def allocate_invoice_number(prefix: str = DEFAULT_PREFIX, on: Optional[date] = None, conn: Any = None) -> str:
+    """Next invoice number (INV-YY-###) for `on` (default today), reserved in the current transaction."""
+    yp = year_prefix(prefix, on)
+    return format_number(yp, allocate_sequence(yp, conn))
+
+
+def reset_counter(number_prefix: str, last_value: int = 0, conn: Any = None) -> None:
+    """Set the counter for `number_prefix` (creating it if needed); used when renumbering."""
+    if conn is None:
+        conn = db.session.connection()
+    t = InvoiceNumberCounter.__table__
+    res = conn.execute(t.update().where(t.c.prefix == number_prefix).values(last_value=int(last_value)))
+    if not res.rowcount:
+        conn.execute(t.insert().values(prefix=number_prefix, last_value=int(last_value)))
@@ -0,0 +1,452 @@
+"""Durable background job queue (PDF renders, outbound email).
+
+Slow work (Chromium renders, SMTP sends) used to run inside the request that
+triggered it, so a slow mail server froze the UI. Routes now enqueue a
+BackgroundJob row and return immediately; workers pick jobs up, retry failures
+with exponential backoff and record the outcome for status polling.
+
+- Storage is the regular database (`background_job` table), so the queue works
+  on both Postgres and SQLite and survives restarts.
+- Jobs are claimed with a conditional UPDATE (`... WHERE status = 'queued'`), so
+  several threads/processes can poll the same table without double-running a job.
+- Jobs whose worker died mid-run (lock older than JOB_LOCK_TIMEOUT_SECONDS) are
+  put back in the queue.
+- Handlers are registered by job type with @job_handler. They receive the JSON
+  payload and run inside an app + request context (url_for works; the base URL
+  is captured at enqueue time) with their own DB session.
+- Long handlers (batch exports) can call report_progress(done, total) so status
+  polls show how far along they are.
+
+Workers:
+- In-process (default): a small thread pool starts lazily in the web process on
+  the first enqueue or status poll (JOB_WORKER_IN_PROCESS, JOB_WORKER_THREADS).
+- Dedicated: `python -m app.scripts.job_worker` (set JOB_WORKER_IN_PROCESS=0 on
+  the web processes to leave all work to it).
+
+NOTE: This service does not render HTML. Routes decide what to enqueue and show.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+DEFAULTS: Dict[str, Any] = {
+    "JOB_WORKER_IN_PROCESS": True,
+    "JOB_WORKER_THREADS": 1,
+    "JOB_POLL_SECONDS": 2.0,
+    "JOB_MAX_ATTEMPTS": 5,
+    "JOB_RETRY_BASE_SECONDS": 30.0,
+    "JOB_RETRY_MAX_SECONDS": 3600.0,
+    "JOB_LOCK_TIMEOUT_SECONDS": 900.0,
+}
+
+# job_type -> handler(payload) -> optional JSON-able result
+_handlers: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+# job_type -> on_failure(payload, error) once retries are exhausted; may return a
+# JSON-able result (e.g. {"message": ...}) shown to the user instead of the raw error
+_failure_handlers: Dict[str, Callable[[Dict[str, Any], str], Optional[Dict[str, Any]]]] = {}
+
+# Id of the job the current handler is running for (report_progress target).
+_current_job_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("job_queue_current_job", default=None)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _config(app, name: str):
+    default = DEFAULTS[name]
+    value = app.config.get(name) if app is not None else None
+    if value is None:
+        value = os.environ.get(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return str(value).strip().lower() not in {"0", "false", "no", "off", ""}
+    try:
+        return type(default)(value)
+    except Exception:
+        return default
+
+
+def job_handler(
+    job_type: str,
+    *,
+    on_failure: Optional[Callable[[Dict[str, Any], str], Optional[Dict[str, Any]]]] = None,
+):
+    """Register the function that runs jobs of `job_type`.
+
+    The handler raises to signal failure (the job is retried with backoff until
+    max_attempts); `on_failure(payload, error)` runs once when it finally gives up.
+    """
+
+    def decorator(fn):
+        _handlers[job_type] = fn
+        if on_failure is not None:
+            _failure_handlers[job_type] = on_failure
+        return fn
+
+    return decorator
+
+
+def backoff_seconds(attempts: int, *, base: float, cap: float) -> float:
+    """Exponential backoff with +/-20% jitter: base, 2*base, 4*base ... capped."""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+# -----------------------------------------------------------------------------
+# Producer side
+# -----------------------------------------------------------------------------
+
+def enqueue(
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    max_attempts: Optional[int] = None,
+    delay_seconds: float = 0,
+) -> BackgroundJob:
+    """Insert and commit a queued job; wakes the in-process workers."""
+    from flask import current_app, has_request_context, request
+
+    if job_type not in _handlers:
+        raise ValueError(f"No job handler registered for {job_type!r}")
+
+    app = current_app._get_current_object()
+    data = dict(payload or {})
+    if has_request_context():
+        data.setdefault("_base_url", request.url_root)
+
+    now = _utcnow()
+    job = BackgroundJob(
+        job_type=job_type,
+        status=STATUS_QUEUED,
+        payload=json.dumps(data, default=str),
+        attempts=0,
+        max_attempts=int(max_attempts or _config(app, "JOB_MAX_ATTEMPTS")),
+        run_after=now + timedelta(seconds=delay_seconds),
+        created_at=now,
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    logger.info("[jobs] queued %s job %s", job_type, job.id)
+    ensure_workers_started(app)
+    _wakeup.set()
+    return job
+
+
+def report_progress(done: int, total: int, message: Optional[str] = None) -> None:
+    """Publish progress for the job whose handler is running; no-op outside a job.
+
+    Written on its own connection and committed immediately, so pollers see it
+    while the handler's session is still working.
+    """
+    job_id = _current_job_id.get()
+    if job_id is None:
+        return
+    progress = json.dumps({"done": int(done), "total": int(total), "message": message})
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(progress=progress))
+    except Exception:
+        logger.warning("[jobs] could not record progress for job %s", job_id, exc_info=True)
+
+
+def get_job(job_id: int) -> Optional[BackgroundJob]:
+    return db.session.get(BackgroundJob, job_id)
+
+
+def _iso(dt: Optional[datetime]) -> Optional[str]:
+    return dt.replace(tzinfo=timezone.utc).isoformat() if dt else None
+
+
+def job_status(job: BackgroundJob) -> Dict[str, Any]:
+    """JSON-friendly status for polling endpoints."""
+    try:
+        result = json.loads(job.result) if job.result else None
+    except Exception:
+        result = None
+    try:
+        progress = json.loads(job.progress) if job.progress else None
+    except Exception:
+        progress = None
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "done": job.status in (STATUS_SUCCEEDED, STATUS_FAILED),
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "error": job.last_error,
+        "result": result,
+        "progress": progress,
+        "created_at": _iso(job.created_at),
+        "run_after": _iso(job.run_after) if job.status == STATUS_QUEUED else None,
+        "finished_at": _iso(job.finished_at),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Consumer side
+# -----------------------------------------------------------------------------
+
+def requeue_stale_jobs(lock_timeout_seconds: Optional[float] = None) -> int:
+    """Release jobs left 'running' by a worker that died; returns how many.
+
+    lock_timeout_seconds defaults to JOB_LOCK_TIMEOUT_SECONDS for the current app.
+    """
+    if lock_timeout_seconds is None:
+        from flask import current_app
+
+        lock_timeout_seconds = float(_config(current_app, "JOB_LOCK_TIMEOUT_SECONDS"))
+    cutoff = _utcnow() - timedelta(seconds=lock_timeout_seconds)
+    stale = (BackgroundJob.status == STATUS_RUNNING) & (BackgroundJob.locked_at < cutoff)
+
+    exhausted = db.session.execute(
+        update(BackgroundJob)
+        .where(stale, BackgroundJob.attempts >= BackgroundJob.max_attempts)
+        .values(status=STATUS_FAILED, finished_at=_utcnow(), locked_by=None, last_error="Worker lock expired")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    requeued = db.session.execute(
+        update(BackgroundJob)
+        .where(stale)
+        .values(status=STATUS_QUEUED, locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if exhausted or requeued:
+        logger.warning("[jobs] released stale locks: %d requeued, %d failed", requeued, exhausted)
+    return (requeued or 0) + (exhausted or 0)
+
+
+def claim_next_job(worker_id: str) -> Optional[int]:
+    """Atomically mark the next due job as running for `worker_id`; returns its id."""
+    now = _utcnow()
+    candidates = db.session.execute(
+        select(BackgroundJob.id)
+        .where(BackgroundJob.status == STATUS_QUEUED, BackgroundJob.run_after <= now)
+        .order_by(BackgroundJob.run_after, BackgroundJob.id)
+        .limit(5)
+    ).scalars().all()
+
+    for job_id in candidates:
+        claimed = db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == STATUS_QUEUED)
+            .values(
+                status=STATUS_RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                started_at=now,
+                attempts=BackgroundJob.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed == 1:
+            return job_id
+    return None
+
+
+def run_job(app, job_id: int) -> str:
+    """Run one claimed job to completion (success, retry or failure); returns its new status."""
+    with app.app_context():
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None:
+            return STATUS_FAILED
+        job_type = job.job_type
+        try:
+            payload = json.loads(job.payload or "{}")
+        except Exception:
+            payload = {}
+        base_url = payload.get("_base_url") or app.config.get("JOB_BASE_URL") or "http://localhost/"
+
+    handler = _handlers.get(job_type)
+    started = time.perf_counter()
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+    with app.test_request_context("/", base_url=base_url):
+        token = _current_job_id.set(job_id)
+        try:
+            if handler is None:
+                raise LookupError(f"No job handler registered for {job_type!r}")
+            result = handler(payload)
+        except Exception as e:
+            db.session.rollback()
+            error = f"{type(e).__name__}: {e}"
+            logger.exception("[jobs] %s job %s failed", job_type, job_id)
+        finally:
+            _current_job_id.reset(token)
+
+        job = db.session.get(BackgroundJob, job_id)
+        now = _utcnow()
+        job.locked_by = None
+        job.locked_at = None
+
+        if error is None:
+            job.status = STATUS_SUCCEEDED
+            job.result = json.dumps(result or {}, default=str)
+            job.last_error = None
+            job.finished_at = now
+        elif handler is not None and job.attempts < job.max_attempts:
+            delay = backoff_seconds(
+                job.attempts,
+                base=_config(app, "JOB_RETRY_BASE_SECONDS"),
+                cap=_config(app, "JOB_RETRY_MAX_SECONDS"),
+            )
+            job.status = STATUS_QUEUED
+            job.last_error = error
+            job.run_after = now + timedelta(seconds=delay)
+        else:
+            job.status = STATUS_FAILED
+            job.last_error = error
+            job.finished_at = now
+        status = job.status
+        db.session.commit()
+
+        if status == STATUS_FAILED and job_type in _failure_handlers:
+            try:
+                outcome = _failure_handlers[job_type](payload, error or "")
+                if isinstance(outcome, dict):
+                    db.session.get(BackgroundJob, job_id).result = json.dumps(outcome, default=str)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("[jobs] on_failure hook for %s job %s failed", job_type, job_id)
+
+    logger.info(
+        "[jobs] %s job %s -> %s in %.0f ms",
+        job_type,
+        job_id,
+        status,
+        (time.perf_counter() - started) * 1000.0,
+    )
+    return status
+
+
+def process_available_jobs(app, *, worker_id: str, limit: Optional[int] = None) -> int:
+    """Drain due jobs synchronously (CLI `--once`); returns how many were run."""
+    count = 0
+    while limit is None or count < limit:
+        with app.app_context():
+            job_id = claim_next_job(worker_id)
+        if job_id is None:
+            break
+        run_job(app, job_id)
+        count += 1
+    return count
+
+
+# -----------------------------------------------------------------------------
+# Worker threads
+# -----------------------------------------------------------------------------
+
+_wakeup = threading.Event()
+
+
+class _WorkerPool:
+    """Daemon threads polling the job table for one app in one process."""
+
+    def __init__(self, app, threads: int):
+        self.app = app
+        self.pid = os.getpid()
+        self.stop_event = threading.Event()
+        self.poll_seconds = float(_config(app, "JOB_POLL_SECONDS"))
+        self.lock_timeout = float(_config(app, "JOB_LOCK_TIMEOUT_SECONDS"))
+        self._last_stale_check = 0.0
+        self._stale_lock = threading.Lock()
+        self.threads: List[threading.Thread] = []
+        for i in range(max(1, int(threads))):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i + 1}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def _maybe_requeue_stale(self) -> None:
+        with self._stale_lock:
+            if time.monotonic() - self._last_stale_check < 60:
+                return
+            self._last_stale_check = time.monotonic()
+        requeue_stale_jobs(self.lock_timeout)
+
+    def _loop(self) -> None:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self.stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    self._maybe_requeue_stale()
+                    job_id = claim_next_job(worker_id)
+                if job_id is not None:
+                    run_job(self.app, job_id)
+                    continue
+            except Exception:
+                logger.exception("[jobs] worker loop error")
+            _wakeup.wait(self.poll_seconds)
+            _wakeup.clear()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.stop_event.set()
+        _wakeup.set()
+        for t in self.threads:
+            t.join(timeout=timeout)
+
+
+_pool: Optional[_WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def start_workers(app, threads: Optional[int] = None) -> _WorkerPool:
+    """Start (or return) this process's worker pool for `app`."""
+    global _pool
+    with _pool_lock:
+        # A forked worker inherits the parent's object but not its threads.
+        if _pool is None or _pool.pid != os.getpid():
+            n = threads if threads is not None else _config(app, "JOB_WORKER_THREADS")
+            _pool = _WorkerPool(app, n)
+            logger.info("[jobs] started %d in-process worker thread(s)", len(_pool.threads))
+        return _pool
+
+
+def ensure_workers_started(app=None) -> None:
+    """Lazily start in-process workers unless disabled (JOB_WORKER_IN_PROCESS=0)."""
+    if app is None:
+        from flask import current_app
+
+        app = current_app._get_current_object()
+    if _pool is not None and _pool.pid == os.getpid():
+        return
+    if not _config(app, "JOB_WORKER_IN_PROCESS"):
+        return
+    start_workers(app)
+
+
+def stop_workers(timeout: float = 5.0) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.stop(timeout)
+            _pool = None
@@ -0,0 +1,595 @@
+"""In-memory prefix index for the global (omnibox) search.
+
+One box searches claim numbers, claimant names, invoice numbers,
+provider/carrier/employer names and contact names/emails, and answers each
+keystroke from memory in one round-trip (GET /api/search).
+
+Index (per process, per database URL):
+- Every entity becomes a document with a label, a detail line, a link target
+  and its tokens: each searchable field lower-cased as a whole ("wc-00012",
+  "jane.doe@example.com"), its whitespace-separated words and the
+  alphanumeric runs inside them ("wc", "00012", "jane", "doe", ...).
+- A sorted token list plus token -> documents postings: a query word matches
+  every token in the bisect range [word, word + U+FFFF), i.e. by prefix.
+  Every query word must match (AND).
+- Ranking: label starts with the whole query, then any exact token match,
+  then kind (claim, invoice, provider, carrier, employer, contact), then
+  label. Top-N via heapq, so broad prefixes do not sort every candidate.
+- Answers are cached (LRU) until the index changes.
+
+Keeping it current:
+- Built in the background at server start (start_omnibox_warmup(), called
+  next to start_llm_warmup()); a search that arrives before that finishes
+  waits for it, and a process that never ran the warmup builds on its first
+  search.
+- Flush hooks record the new field values of every inserted/updated/deleted
+  entity in session.info; after_commit applies them to the index
+  (after_rollback drops them). Bulk Query.update()/delete() mark the index
+  for a rebuild instead.
+- Writes from other workers (and raw SQL that bumps data_version) are caught
+  by comparing the data_version counters (context_cache) of the indexed
+  tables with the counters the index has accounted for. Costs one small
+  SELECT. Any unexplained change starts a rebuild on a background thread
+  (at most one at a time, and at most one per REBUILD_MIN_INTERVAL_SECONDS);
+  searches keep using the current index until the new one is swapped in, so
+  another worker's write shows up here seconds later but no keystroke waits
+  for a rebuild. Commits made in this process during a rebuild are replayed
+  onto the new index before the swap.
+
+NOTE: This service does not render results. The route builds the JSON payload.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.models import Carrier, Claim, Contact, Employer, Invoice, Provider
+
+logger = logging.getLogger(__name__)
+
+# Kinds in ranking order (earlier wins a tie).
+KINDS: Tuple[str, ...] = ("claim", "invoice", "provider", "carrier", "employer", "contact")
+_KIND_RANK = {kind: i for i, kind in enumerate(KINDS)}
+
+_KIND_MODELS: Dict[str, type] = {
+    "claim": Claim,
+    "invoice": Invoice,
+    "provider": Provider,
+    "carrier": Carrier,
+    "employer": Employer,
+    "contact": Contact,
+}
+_MODEL_KIND: Dict[type, str] = {model: kind for kind, model in _KIND_MODELS.items()}
+
+# Columns read per kind (first is always the primary key).
+_KIND_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "claim": ("id", "claim_number", "claimant_name", "claimant_first_name", "claimant_last_name"),
+    "invoice": ("id", "invoice_number", "status"),
+    "provider": ("id", "name", "city"),
+    "carrier": ("id", "name", "city"),
+    "employer": ("id", "name", "city"),
+    "contact": ("id", "name", "email", "carrier_id", "employer_id", "provider_id"),
+}
+# Columns whose values are tokenized per kind.
+_KIND_SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "claim": ("claim_number", "claimant_name", "claimant_first_name", "claimant_last_name"),
+    "invoice": ("invoice_number",),
+    "provider": ("name",),
+    "carrier": ("name",),
+    "employer": ("name",),
+    "contact": ("name", "email"),
+}
+
+TABLES: Tuple[str, ...] = tuple(_KIND_MODELS[k].__tablename__ for k in KINDS)
+
+# Shortest query answered (matches the other autocompletes).
+MIN_QUERY_CHARS = 2
+RESULT_CACHE_SIZE = 256
+# Minimum gap between background rebuilds started by one process.
+REBUILD_MIN_INTERVAL_SECONDS = 5.0
+# Candidate sets larger than this are ordered by walking the label lists.
+DENSE_WALK_MIN = 2000
+
+_PENDING_KEY = "omnibox_pending"
+_WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+DocKey = Tuple[str, int]
+
+
+class _Doc:
+    __slots__ = ("kind", "entity_id", "label", "detail", "target", "tokens", "label_key", "order")
+
+    def __init__(self, kind: str, entity_id: int, label: str, detail: str, target: DocKey, tokens: Set[str]):
+        self.kind = kind
+        self.entity_id = entity_id
+        self.label = label
+        self.detail = detail
+        self.target = target
+        self.tokens = tokens
+        self.label_key = label.lower()
+        self.order = (self.label_key, -entity_id)
+
+
+def _tokens(values: Iterable[Any]) -> Set[str]:
+    out: Set[str] = set()
+    for value in values:
+        s = str(value or "").strip().lower()
+        if not s:
+            continue
+        out.add(s)
+        for word in s.split():
+            out.add(word)
+            out.update(part for part in _WORD_SPLIT.split(word) if part)
+    return out
+
+
+def _make_doc(kind: str, row: Dict[str, Any]) -> _Doc:
+    """Document for one entity from its `_KIND_COLUMNS` values."""
+    entity_id = int(row["id"])
+    target: DocKey = (kind, entity_id)
+    if kind == "claim":
+        first = (row.get("claimant_first_name") or "").strip()
+        last = (row.get("claimant_last_name") or "").strip()
+        label = " ".join(p for p in (first, last) if p) or (row.get("claimant_name") or "").strip()
+        detail = (row.get("claim_number") or "").strip()
+    elif kind == "invoice":
+        number = (row.get("invoice_number") or "").strip()
+        label = f"Invoice {number}" if number else f"Invoice #{entity_id}"
+        detail = (row.get("status") or "").strip()
+    elif kind == "contact":
+        label = (row.get("name") or "").strip()
+        detail = (row.get("email") or "").strip()
+        for parent in ("carrier", "employer", "provider"):
+            if row.get(f"{parent}_id"):
+                target = (parent, int(row[f"{parent}_id"]))
+                break
+    else:
+        label = (row.get("name") or "").strip()
+        detail = (row.get("city") or "").strip()
+    return _Doc(kind, entity_id, label, detail, target, _tokens(row.get(f) for f in _KIND_SEARCH_FIELDS[kind]))
+
+
+class PrefixIndex:
+    """Token prefix index over documents, with an LRU of recent answers.
+
+    Documents get integer ids whose low 3 bits are the kind's rank; postings
+    hold those ids, in a list aligned with the sorted tokens so a prefix range
+    is one slice. Each kind also keeps its documents sorted by (label, newest
+    first), so a dense candidate set is put in rank order by walking that
+    list instead of ranking every candidate.
+    """
+
+    def __init__(self) -> None:
+        self.docs: Dict[int, _Doc] = {}
+        self.ids: Dict[DocKey, int] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        self.sorted_tokens: List[str] = []
+        self.token_ids: List[Set[int]] = []
+        self.labels: Dict[str, List[Tuple[str, int, int]]] = {kind: [] for kind in KINDS}
+        self.versions: Dict[str, int] = {}
+        self.stale = True
+        self.built = False
+        self._next_seq = 0
+        self._results: "OrderedDict[Tuple[Any, ...], List[_Doc]]" = OrderedDict()
+
+    # -- maintenance --------------------------------------------------------
+
+    def load(self, docs: Iterable[_Doc]) -> None:
+        """Replace the contents with `docs` (bulk: one sort per list)."""
+        self.docs, self.ids, self.postings = {}, {}, {}
+        self.labels = {kind: [] for kind in KINDS}
+        self._results.clear()
+        for seq, doc in enumerate(docs):
+            i = (seq << 3) | _KIND_RANK[doc.kind]
+            self.docs[i] = doc
+            self.ids[(doc.kind, doc.entity_id)] = i
+            self.labels[doc.kind].append(doc.order + (i,))
+            for token in doc.tokens:
+                self.postings.setdefault(token, set()).add(i)
+        self._next_seq = len(self.docs)
+        self.sorted_tokens = sorted(self.postings)
+        self.token_ids = [self.postings[t] for t in self.sorted_tokens]
+        for entries in self.labels.values():
+            entries.sort()
+        self.built = True
+
+    def remove(self, key: DocKey) -> None:
+        i = self.ids.pop(key, None)
+        if i is None:
+            return
+        doc = self.docs.pop(i)
+        for token in doc.tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(i)
+            if not ids:
+                del self.postings[token]
+                j = bisect.bisect_left(self.sorted_tokens, token)
+                if j < len(self.sorted_tokens) and self.sorted_tokens[j] == token:
+                    del self.sorted_tokens[j]
+                    del self.token_ids[j]
+        entries = self.labels[doc.kind]
+        j = bisect.bisect_left(entries, doc.order + (i,))
+        if j < len(entries) and entries[j][2] == i:
+            del entries[j]
+        self._results.clear()
+
+    def upsert(self, doc: _Doc) -> None:
+        key = (doc.kind, doc.entity_id)
+        self.remove(key)
+        i = (self._next_seq << 3) | _KIND_RANK[doc.kind]
+        self._next_seq += 1
+        self.docs[i] = doc
+        self.ids[key] = i
+        bisect.insort(self.labels[doc.kind], doc.order + (i,))
+        for token in doc.tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = {i}
+                j = bisect.bisect_left(self.sorted_tokens, token)
+                self.sorted_tokens.insert(j, token)
+                self.token_ids.insert(j, ids)
+            else:
+                ids.add(i)
+        self._results.clear()
+
+    # -- lookup -------------------------------------------------------------
+
+    def _prefix_ids(self, word: str) -> Set[int]:
+        tokens = self.sorted_tokens
+        lo = bisect.bisect_left(tokens, word)
+        hi = bisect.bisect_left(tokens, word + "\uffff", lo)
+        return set().union(*self.token_ids[lo:hi])
+
+    def _in_order(self, ids: Set[int], kinds: Sequence[str], n: int, skip: Any = None) -> List[int]:
+        """Up to `n` of `ids` (minus `skip(i)`) in (kind, label, newest) order."""
+        if n <= 0 or not ids:
+            return []
+        by_rank: Dict[int, List[int]] = {}
+        for i in ids:
+            by_rank.setdefault(i & 7, []).append(i)
+
+        docs = self.docs
+        out: List[int] = []
+        for kind in KINDS:
+            members = by_rank.get(_KIND_RANK[kind])
+            if not members or kind not in kinds:
+                continue
+            if len(members) <= DENSE_WALK_MIN:
+                pool = [i for i in members if not (skip and skip(i))]
+                out += heapq.nsmallest(n - len(out), pool, key=lambda i: docs[i].order)
+            else:
+                for _, _, i in self.labels[kind]:
+                    if i in ids and not (skip and skip(i)):
+                        out.append(i)
+                        if len(out) == n:
+                            break
+            if len(out) >= n:
+                break
+        return out
+
+    def search(self, query: str, kinds: Sequence[str], limit: int) -> List[_Doc]:
+        """Top `limit` documents of `kinds` matching every word of `query` by prefix.
+
+        Rank tiers: label starts with the query, then an exact token match,
+        then the rest; within a tier by kind, label, newest.
+        """
+        cache_key = (query, tuple(kinds), limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            self._results.move_to_end(cache_key)
+            return cached
+
+        docs = self.docs
+        words = sorted(set(query.split()), key=len, reverse=True)
+        candidates = self._prefix_ids(words[0])  # longest (most selective) word first
+        for word in words[1:]:
+            if not candidates:
+                break
+            if len(candidates) <= DENSE_WALK_MIN:
+                candidates = {i for i in candidates if any(t.startswith(word) for t in docs[i].tokens)}
+            else:
+                candidates &= self._prefix_ids(word)
+
+        hits: List[int] = []
+        if candidates:
+            # Tier 0: walk each kind's labels in the bisect range of the query.
+            for kind in KINDS:
+                if kind not in kinds or len(hits) == limit:
+                    continue
+                entries = self.labels[kind]
+                j = bisect.bisect_left(entries, (query,))
+                while j < len(entries) and entries[j][0].startswith(query) and len(hits) < limit:
+                    if entries[j][2] in candidates:
+                        hits.append(entries[j][2])
+                    j += 1
+            in_tier0 = lambda i: docs[i].label_key.startswith(query)  # noqa: E731
+
+            exact: Set[int] = set()
+            for word in words:
+                exact |= self.postings.get(word, set())
+            exact &= candidates
+            hits += self._in_order(exact, kinds, limit - len(hits), skip=in_tier0)
+            hits += self._in_order(
+                candidates, kinds, limit - len(hits), skip=lambda i: i in exact or in_tier0(i)
+            )
+
+        result = [docs[i] for i in hits]
+        self._results[cache_key] = result
+        if len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return result
+
+
+_indexes: Dict[str, PrefixIndex] = {}
+_lock = threading.RLock()
+# Per database URL: commits to replay onto each in-progress rebuild, the
+# background rebuild thread and when it was started.
+_replays: Dict[str, List[List[Dict[str, Any]]]] = {}
+_rebuild_threads: Dict[str, threading.Thread] = {}
+_rebuild_started: Dict[str, float] = {}
+
+
+def _index_for(url: str) -> PrefixIndex:
+    index = _indexes.get(url)
+    if index is None:
+        index = _indexes[url] = PrefixIndex()
+    return index
+
+
+# -----------------------------------------------------------------------------
+#  Build
+# -----------------------------------------------------------------------------
+
+def _load_docs(conn: Any) -> List[_Doc]:
+    docs: List[_Doc] = []
+    for kind in KINDS:
+        model = _KIND_MODELS[kind]
+        cols = _KIND_COLUMNS[kind]
+        for row in conn.execute(select(*[getattr(model, c) for c in cols])):
+            docs.append(_make_doc(kind, dict(zip(cols, row))))
+    return docs
+
+
+def _read_versions(conn: Any) -> Dict[str, int]:
+    from app.models import DataVersion
+
+    rows = conn.execute(
+        select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(TABLES))
+    ).all()
+    found = {name: int(version or 0) for name, version in rows}
+    return {name: found.get(name, 0) for name in TABLES}
+
+
+def rebuild_index(conn: Any = None) -> PrefixIndex:
+    """(Re)build this process's index for the app's database from `conn` (default: committed data).
+
+    The new index is built aside and swapped in, so searches keep answering
+    from the old one meanwhile.
+    """
+    if conn is None:
+        with db.engine.connect() as own:
+            return rebuild_index(own)
+
+    url = str(conn.engine.url)
+    started = time.perf_counter()
+    replay: List[Dict[str, Any]] = []
+    with _lock:
+        _replays.setdefault(url, []).append(replay)
+    try:
+        # Counters first: a commit landing in between leaves them behind the data,
+        # which only costs another rebuild, never a stale index.
+        versions = _read_versions(conn)
+        docs = _load_docs(conn)
+        index = PrefixIndex()
+        index.load(docs)
+        index.versions = versions
+        index.stale = False
+        with _lock:
+            for pending in replay:
+                _apply(index, pending)
+            _indexes[url] = index
+    finally:
+        with _lock:
+            _replays[url] = [r for r in _replays.get(url, []) if r is not replay]
+    logger.info("[omnibox] indexed %d entities in %.0f ms", len(docs), (time.perf_counter() - started) * 1000.0)
+    return index
+
+
+def _rebuild_in_background(app: Any) -> None:
+    with app.app_context():
+        try:
+            rebuild_index()
+        except Exception:
+            logger.exception("[omnibox] background rebuild failed")
+
+
+def _start_rebuild(*, throttle: bool = True) -> Optional[threading.Thread]:
+    """Start a background rebuild for the app's database unless one is running (or throttled)."""
+    from flask import current_app
+
+    url = str(db.engine.url)
+    with _lock:
+        thread = _rebuild_threads.get(url)
+        if thread is not None and thread.is_alive():
+            return thread
+        now = time.monotonic()
+        if throttle and now - _rebuild_started.get(url, float("-inf")) < REBUILD_MIN_INTERVAL_SECONDS:
+            return None
+        thread = threading.Thread(
+            target=_rebuild_in_background,
+            args=(current_app._get_current_object(),),
+            name="omnibox-rebuild",
+            daemon=True,
+        )
+        _rebuild_threads[url] = thread
+        _rebuild_started[url] = now
+        thread.start()
+        return thread
+
+
+def start_omnibox_warmup(app: Any) -> None:
+    """
+    Build the index in the background now instead of on the first search.
+    Returns immediately. Called by the server entry points after create_app().
+    """
+    with app.app_context():
+        _start_rebuild(throttle=False)
+
+
+def _current_index() -> PrefixIndex:
+    url = str(db.engine.url)
+    with _lock:
+        index = _index_for(url)
+        thread = _rebuild_threads.get(url)
+    if not index.built:
+        # Nothing to serve yet: wait for the warmup build, or build here.
+        if thread is not None and thread.is_alive():
+            thread.join()
+            with _lock:
+                index = _index_for(url)
+            if index.built:
+                return index
+        return rebuild_index()
+
+    versions = _read_versions(db.session.connection())
+    with _lock:
+        fresh = not index.stale and index.versions == versions
+    if not fresh:
+        _start_rebuild()
+    return index
+
+
+def search(query: str, kinds: Optional[Sequence[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked hits for `query` as dicts: kind, id, label, detail, target_kind, target_id."""
+    q = " ".join((query or "").lower().split())
+    if len(q) < MIN_QUERY_CHARS:
+        return []
+    kinds = [k for k in (kinds or KINDS) if k in _KIND_RANK]
+    limit = max(1, min(int(limit), 100))
+
+    index = _current_index()
+    with _lock:
+        hits = index.search(q, kinds, limit)
+    return [
+        {
+            "kind": d.kind,
+            "id": d.entity_id,
+            "label": d.label,
+            "detail": d.detail,
+            "target_kind": d.target[0],
+            "target_id": d.target[1],
+        }
+        for d in hits
+    ]
+
+
+# -----------------------------------------------------------------------------
+#  Session hooks
+# -----------------------------------------------------------------------------
+
+def _pending(session: Any) -> Dict[str, Any]:
+    pending = session.info.get(_PENDING_KEY)
+    if pending is None:
+        pending = session.info[_PENDING_KEY] = {
+            "upserts": {},
+            "deletes": set(),
+            "bumps": set(),
+            "stale": False,
+        }
+    return pending
+
+
+def _after_flush(session: Any, flush_context: Any) -> None:
+    touched: Set[str] = set()
+    upserts: Dict[DocKey, _Doc] = {}
+    deletes: Set[DocKey] = set()
+    for collection in (session.new, session.dirty, session.deleted):
+        for obj in collection:
+            kind = _MODEL_KIND.get(type(obj))
+            if kind is None:
+                continue
+            # context_cache bumps a table's counter once per commit touching it.
+            touched.add(obj.__tablename__)
+            key = (kind, obj.id)
+            if obj in session.deleted:
+                deletes.add(key)
+                upserts.pop(key, None)
+            else:
+                upserts[key] = _make_doc(kind, {c: getattr(obj, c) for c in _KIND_COLUMNS[kind]})
+    if not touched:
+        return
+    pending = _pending(session)
+    pending["bumps"].update(touched)
+    for key in deletes:
+        pending["upserts"].pop(key, None)
+        pending["deletes"].add(key)
+    for key, doc in upserts.items():
+        pending["deletes"].discard(key)
+        pending["upserts"][key] = doc
+
+
+def _do_orm_execute(orm_execute_state: Any) -> None:
+    """Bulk Query.update()/delete() on an indexed model: rebuild after commit."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in _MODEL_KIND:
+        return None
+    _pending(orm_execute_state.session)["stale"] = True
+    return None
+
+
+def _apply(index: PrefixIndex, pending: Dict[str, Any]) -> None:
+    """Apply one committed transaction's changes to `index` (caller holds _lock)."""
+    if index.stale:
+        return
+    if pending["stale"]:
+        index.stale = True
+        return
+    for key in pending["deletes"]:
+        index.remove(key)
+    for doc in pending["upserts"].values():
+        index.upsert(doc)
+    for table in pending["bumps"]:
+        index.versions[table] = index.versions.get(table, 0) + 1
+
+
+def _after_commit(session: Any) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    url = str(db.engine.url)
+    with _lock:
+        for replay in _replays.get(url, ()):
+            replay.append(pending)
+        index = _indexes.get(url)
+        if index is not None:
+            _apply(index, pending)
+
+
+def _after_rollback(session: Any) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_omnibox_hooks() -> None:
+    """Attach the omnibox index maintenance hooks to the app's session (idempotent)."""
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
@@ -0,0 +1,139 @@
+"""Content-addressed cache for generated PDFs (reports, invoices).
+
+A PDF is a pure function of its print HTML (which already reflects the report,
+claim, providers, barriers, Settings branding and the template itself), the
+local assets that HTML embeds (logo, signature, CSS) and the renderer options.
+pdf_fingerprint() hashes exactly that (the HTML as rendered, before inlining,
+plus each referenced asset's path, mtime and size, so a cache check never
+base64-encodes an asset), and the hash is stored in
+DocumentArtifact.render_fingerprint when the PDF is written (sha256 keeps its
+meaning: the hash of the file's bytes):
+
+- identical inputs -> same fingerprint -> the stored file is served, no Chromium
+- any change that affects the printed page -> new fingerprint -> re-render
+
+Templates wrap text that changes on every render without changing the data
+(e.g. a "Generated at" timestamp) in <!--pdf-cache:volatile--> ...
+<!--/pdf-cache:volatile--> markers; it is left out of the fingerprint, so
+the same rendered HTML can be fingerprinted and then printed.
+
+NOTE: This service does not render templates. Routes decide what to print.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Optional
+
+from app.extensions import db
+from app.models import DocumentArtifact, now as _system_now
+from app.services.pdf_service import pdf_asset_paths
+
+# Bump when the renderer changes in a way that alters output for the same HTML
+# (Chromium flags, default options, inlining rules) to invalidate every cached PDF.
+PDF_CACHE_VERSION = "2"
+
+_VOLATILE_RE = re.compile(r"<!--pdf-cache:volatile-->.*?<!--/pdf-cache:volatile-->", re.S)
+
+
+def pdf_fingerprint(html: str, **render_options: Any) -> str:
+    """sha256 hex digest of everything that determines the PDF bytes."""
+    h = hashlib.sha256()
+    h.update(f"pdf-cache:{PDF_CACHE_VERSION}\n".encode("utf-8"))
+    h.update(json.dumps(render_options, sort_keys=True, default=str).encode("utf-8"))
+    h.update(b"\n")
+    html = _VOLATILE_RE.sub("", html)
+    h.update(html.encode("utf-8"))
+    for path in pdf_asset_paths(html):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        h.update(f"\n{path}:{st.st_mtime_ns}:{st.st_size}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """sha256 hex digest of the file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_cached_pdf(
+    artifact_type: str,
+    fingerprint: str,
+    *,
+    expected_path: str,
+    report_id: Optional[int] = None,
+    invoice_id: Optional[int] = None,
+) -> Optional[DocumentArtifact]:
+    """Return the artifact whose file at `expected_path` was rendered from `fingerprint`.
+
+    The same canonical path is overwritten by every render, so only the newest
+    artifact for that path describes the file currently on disk; it is a hit only
+    if its fingerprint matches and the file still has the recorded size.
+    """
+    q = DocumentArtifact.query.filter_by(
+        artifact_type=artifact_type,
+        storage_backend="fs",
+        stored_path=str(expected_path),
+    )
+    if report_id is not None:
+        q = q.filter_by(report_id=report_id)
+    if invoice_id is not None:
+        q = q.filter_by(invoice_id=invoice_id)
+    latest = q.order_by(DocumentArtifact.id.desc()).first()
+
+    if latest is None or latest.render_fingerprint != fingerprint:
+        return None
+    try:
+        if os.path.getsize(latest.stored_path) != int(latest.file_size_bytes or -1):
+            return None
+    except OSError:
+        return None
+    return latest
+
+
+def record_pdf_artifact(
+    *,
+    claim_id: int,
+    artifact_type: str,
+    filename: str,
+    path: str,
+    fingerprint: Optional[str],
+    report_id: Optional[int] = None,
+    invoice_id: Optional[int] = None,
+) -> Optional[DocumentArtifact]:
+    """Record metadata (no blob) for a PDF just written to `path`; commits.
+
+    Bookkeeping must never fail a render, so errors roll back and return None.
+    """
+    try:
+        art = DocumentArtifact(
+            claim_id=claim_id,
+            report_id=report_id,
+            invoice_id=invoice_id,
+            artifact_type=artifact_type,
+            content_type="application/pdf",
+            download_filename=filename,
+            file_size_bytes=int(os.path.getsize(path)),
+            storage_backend="fs",
+            stored_path=str(path),
+            content=None,
+            sha256=file_sha256(path),
+            render_fingerprint=fingerprint,
+            created_at=_system_now(),
+        )
+        db.session.add(art)
+        db.session.commit()
+        return art
+    except Exception:
+        db.session.rollback()
+        return None
+
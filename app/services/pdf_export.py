@@ -0,0 +1,176 @@
+"""Batch PDF export (all documents for a claim, open invoices for a carrier).
+
+Routes decide *what* goes into an export and hand over a list of PdfExportItem:
+either an up-to-date PDF already on disk (pdf_cache hit) or print HTML to
+render. build_export_zip() then:
+
+- copies cached PDFs straight into the ZIP (no Chromium),
+- renders the misses in parallel on the shared warm browser from pdf_service
+  (one worker per pooled browser context, PDF_POOL_SIZE),
+- hands every fresh render back to the item's `store` callback on the calling
+  thread, so DB/session work stays where the app context lives,
+- reports progress after every document and writes the ZIP atomically.
+
+A document that fails to render does not sink the batch: it is listed in
+ERRORS.txt inside the ZIP and in the returned summary.
+
+NOTE: This service does not render templates. Routes decide what to export.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.pdf_service import PdfRenderError, configured_pool_size, render_pdf_from_html
+
+logger = logging.getLogger(__name__)
+
+# progress(done, total, message)
+ProgressCallback = Callable[[int, int, Optional[str]], None]
+
+
+@dataclass
+class PdfExportItem:
+    """One document in a batch export.
+
+    Set `path` for a PDF that is already current on disk, otherwise `html`
+    (already passed through prepare_html_for_pdf) plus its render options.
+    """
+
+    arcname: str
+    label: str = ""
+    path: Optional[str] = None
+    html: Optional[str] = None
+    render_options: Dict[str, Any] = field(default_factory=dict)
+    # Persist a fresh render (write file + artifact); called on the exporting thread.
+    store: Optional[Callable[[bytes], Any]] = None
+
+
+def _unique_arcname(name: str, used: set) -> str:
+    if name not in used:
+        used.add(name)
+        return name
+    stem, ext = os.path.splitext(name)
+    n = 2
+    while f"{stem} ({n}){ext}" in used:
+        n += 1
+    unique = f"{stem} ({n}){ext}"
+    used.add(unique)
+    return unique
+
+
+def build_export_zip(
+    items: List[PdfExportItem],
+    zip_path: str,
+    *,
+    progress: Optional[ProgressCallback] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Write `items` into a ZIP at `zip_path`; returns a summary dict.
+
+    Raises PdfRenderError only when there was something to export and nothing
+    made it into the ZIP (e.g. Chromium is unavailable), so job retries kick in.
+    """
+    started = time.perf_counter()
+    total = len(items)
+    done = 0
+    cached = rendered = 0
+    failed: List[Dict[str, str]] = []
+    used: set = set()
+
+    def _tick(message: str) -> None:
+        if progress is not None:
+            progress(done, total, message)
+
+    if max_workers is None:
+        max_workers = configured_pool_size()
+    max_workers = max(1, int(max_workers))
+
+    os.makedirs(os.path.dirname(os.path.abspath(zip_path)), exist_ok=True)
+    tmp_path = zip_path + ".tmp"
+
+    # PDFs are already compressed; storing them keeps the export fast.
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        to_render: List[PdfExportItem] = []
+        for item in items:
+            if item.path and os.path.exists(item.path):
+                zf.write(item.path, _unique_arcname(item.arcname, used))
+                cached += 1
+                done += 1
+                _tick(item.arcname)
+            elif item.html is not None:
+                to_render.append(item)
+            else:
+                failed.append({"name": item.arcname, "error": "Nothing to render"})
+                done += 1
+                _tick(item.arcname)
+
+        if to_render:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(to_render)), thread_name_prefix="pdf-export") as ex:
+                futures = {
+                    ex.submit(
+                        render_pdf_from_html,
+                        item.html,
+                        label=item.label or item.arcname,
+                        inline_assets=False,
+                        **item.render_options,
+                    ): item
+                    for item in to_render
+                }
+                for fut in as_completed(futures):
+                    item = futures[fut]
+                    done += 1
+                    try:
+                        pdf_bytes = fut.result()
+                    except Exception as e:
+                        failed.append({"name": item.arcname, "error": f"{type(e).__name__}: {e}"})
+                        _tick(item.arcname)
+                        continue
+
+                    zf.writestr(_unique_arcname(item.arcname, used), pdf_bytes)
+                    rendered += 1
+                    if item.store is not None:
+                        try:
+                            item.store(pdf_bytes)
+                        except Exception:
+                            logger.warning("[pdf-export] could not store %s", item.arcname, exc_info=True)
+                    _tick(item.arcname)
+
+        if failed:
+            lines = [f"{f['name']}: {f['error']}" for f in failed]
+            zf.writestr("ERRORS.txt", "The following documents could not be exported:\n\n" + "\n".join(lines) + "\n")
+
+    added = cached + rendered
+    if total and not added:
+        os.remove(tmp_path)
+        raise PdfRenderError(f"No documents could be exported ({failed[0]['error'] if failed else 'unknown error'})")
+
+    os.replace(tmp_path, zip_path)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    logger.info(
+        "[pdf-export] %d/%d documents (%d cached, %d rendered, %d failed) in %.0f ms -> %s",
+        added,
+        total,
+        cached,
+        rendered,
+        len(failed),
+        elapsed_ms,
+        zip_path,
+    )
+    return {
+        "path": zip_path,
+        "total": total,
+        "added": added,
+        "cached": cached,
+        "rendered": rendered,
+        "failed": failed,
+        "size_bytes": os.path.getsize(zip_path),
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
@@ -0,0 +1,621 @@
+"""Shared headless-Chromium PDF rendering.
+
+Reports, invoices and forms used to each launch a fresh Chromium with
+`sync_playwright()` for every PDF and tear it down after one page, which costs
+seconds per render. This module keeps one warm browser per process instead:
+
+- A single background thread owns an asyncio loop + Playwright's async API.
+  Playwright objects are bound to the thread/loop that created them, so request
+  threads never touch them directly; they submit a render and wait on the result.
+- A bounded pool of browser contexts (PDF_POOL_SIZE, default 2) limits how many
+  renders run at once; extra requests queue for a free context.
+- The browser is started lazily on first use and restarted after a fork (gunicorn
+  pre-fork workers each get their own) or if Chromium crashes/disconnects.
+- Every render is timed (queue wait + render) and logged; running totals are
+  available via get_render_stats().
+
+Routes should prefer render_pdf_from_html(): the print template is rendered
+in-process, local /static assets are inlined (stylesheets as <style>, images and
+fonts as data: URIs) and the HTML is handed to Chromium with set_content. That
+avoids a loopback HTTP request back into the app (which ties up a second worker
+and deadlocks single-worker deployments) and the network-idle wait.
+render_pdf_from_url() remains for callers that really need to print a live URL.
+
+NOTE: This service does not render templates. Routes decide what to print.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import html as html_lib
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_NAV_TIMEOUT_MS = 20_000
+DEFAULT_PDF_TIMEOUT_MS = 20_000
+
+# Chromium flags that keep headless rendering stable in containers/servers.
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+]
+
+ZERO_MARGIN = {"top": "0in", "right": "0in", "bottom": "0in", "left": "0in"}
+
+
+@lru_cache(maxsize=1)
+def _async_playwright():
+    """Playwright's async entry point, imported on first render (~50 ms, so not at app start)."""
+    try:
+        from playwright.async_api import async_playwright
+    except Exception:  # pragma: no cover
+        return None
+    return async_playwright
+
+
+class PdfRenderError(RuntimeError):
+    """Raised when a PDF cannot be rendered (Playwright missing, timeout, crash)."""
+
+
+# Put in a context queue when its browser is replaced: wakes renders still
+# waiting on that queue so they re-queue on the new browser's contexts.
+_RETIRED = object()
+
+
+class _BrowserPool:
+    """Warm Chromium + bounded context pool living on a dedicated event-loop thread."""
+
+    def __init__(self, pool_size: int):
+        self.pool_size = max(1, int(pool_size))
+        self.pid = os.getpid()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="pdf-render-loop", daemon=True)
+        self._thread.start()
+
+        # Only touched from the loop thread.
+        self._playwright = None
+        self._browser = None
+        self._contexts: Optional[asyncio.Queue] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    # ---- loop-thread coroutines ----
+
+    async def _ensure_browser(self) -> None:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            await self._shutdown()
+
+            started = time.perf_counter()
+            self._playwright = await _async_playwright()().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            self._contexts = asyncio.Queue()
+            for _ in range(self.pool_size):
+                self._contexts.put_nowait(await self._browser.new_context())
+            logger.info(
+                "[pdf] Chromium started with %d contexts in %.0f ms",
+                self.pool_size,
+                (time.perf_counter() - started) * 1000.0,
+            )
+
+    async def _shutdown(self) -> None:
+        browser, pw, contexts = self._browser, self._playwright, self._contexts
+        self._browser = None
+        self._playwright = None
+        self._contexts = None
+        if contexts is not None:
+            contexts.put_nowait(_RETIRED)
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        if pw is not None:
+            try:
+                await pw.stop()
+            except Exception:
+                pass
+
+    async def _render(self, source: Dict[str, str], options: Dict[str, Any]) -> Dict[str, Any]:
+        submitted = options.pop("_submitted")
+        while True:
+            await self._ensure_browser()
+            contexts = self._contexts
+            context = await contexts.get()
+            if context is _RETIRED:
+                # Browser replaced while queued: pass the wake-up on, then re-queue.
+                contexts.put_nowait(_RETIRED)
+                continue
+            if contexts is self._contexts and self._browser is not None and self._browser.is_connected():
+                break
+            # Chromium died while this render queued; the context died with it.
+        acquired = time.perf_counter()
+        page = None
+        try:
+            cookies = options.get("cookies") or []
+            if cookies:
+                try:
+                    await context.add_cookies(cookies)
+                except Exception:
+                    pass
+
+            page = await context.new_page()
+            page.set_default_navigation_timeout(options["nav_timeout_ms"])
+            page.set_default_timeout(options["nav_timeout_ms"])
+
+            if "html" in source:
+                # "load" still waits for stylesheets/images (incl. any remote CDN CSS).
+                await page.set_content(source["html"], wait_until="load")
+            else:
+                await page.goto(source["url"], wait_until=options["wait_until"])
+
+            if options["emulate_print"]:
+                try:
+                    await page.emulate_media(media="print")
+                except Exception:
+                    pass
+
+            page.set_default_timeout(options["pdf_timeout_ms"])
+            pdf_kwargs = {
+                "format": options["page_format"],
+                "print_background": True,
+                "margin": options["margin"],
+            }
+            if options["prefer_css_page_size"]:
+                pdf_kwargs["prefer_css_page_size"] = True
+            pdf_bytes = await page.pdf(**pdf_kwargs)
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            # Contexts are reused; never leak one request's cookies into the next.
+            try:
+                await context.clear_cookies()
+            except Exception:
+                pass
+            if self._contexts is contexts:
+                contexts.put_nowait(context)
+
+        finished = time.perf_counter()
+        return {
+            "pdf": pdf_bytes,
+            "wait_ms": (acquired - submitted) * 1000.0,
+            "render_ms": (finished - acquired) * 1000.0,
+        }
+
+    # ---- thread-safe entrypoints ----
+
+    def render(self, source: Dict[str, str], options: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        options = dict(options, _submitted=time.perf_counter())
+        future = asyncio.run_coroutine_threadsafe(self._render(source, options), self._loop)
+        try:
+            return future.result(timeout=timeout_s)
+        except Exception:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_pool: Optional[_BrowserPool] = None
+_pool_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "renders": 0,
+    "failures": 0,
+    "total_ms": 0.0,
+    "max_ms": 0.0,
+    "last_ms": None,
+    "last_wait_ms": None,
+}
+
+
+def _config_int(name: str, default: int) -> int:
+    try:
+        from flask import current_app, has_app_context
+
+        if has_app_context():
+            return int(current_app.config.get(name, default))
+    except Exception:
+        pass
+    return int(os.environ.get(name, default))
+
+
+def configured_pool_size() -> int:
+    """Concurrent renders the shared browser allows (PDF_POOL_SIZE)."""
+    return max(1, _config_int("PDF_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+def _get_pool() -> _BrowserPool:
+    global _pool
+    with _pool_lock:
+        # A forked worker inherits the parent's object but not its thread/browser.
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = _BrowserPool(configured_pool_size())
+        return _pool
+
+
+def _record(total_ms: Optional[float], wait_ms: Optional[float], ok: bool) -> None:
+    with _stats_lock:
+        if not ok:
+            _stats["failures"] += 1
+            return
+        _stats["renders"] += 1
+        _stats["total_ms"] += total_ms
+        _stats["max_ms"] = max(_stats["max_ms"], total_ms)
+        _stats["last_ms"] = total_ms
+        _stats["last_wait_ms"] = wait_ms
+
+
+def get_render_stats() -> Dict[str, Any]:
+    """Snapshot of per-process render timings (for logs/health pages)."""
+    with _stats_lock:
+        out = dict(_stats)
+    out["avg_ms"] = (out["total_ms"] / out["renders"]) if out["renders"] else None
+    out["pool_size"] = _pool.pool_size if _pool is not None else None
+    return out
+
+
+def request_cookies() -> List[Dict[str, str]]:
+    """Current Flask request cookies in Playwright's add_cookies() format."""
+    try:
+        from flask import has_request_context, request
+
+        if not has_request_context():
+            return []
+        return [
+            {"name": name, "value": value, "url": request.host_url}
+            for name, value in (request.cookies or {}).items()
+        ]
+    except Exception:
+        return []
+
+
+# ---- local asset inlining ----
+
+_LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_ATTR_RE = re.compile(r"""\b(src|href)(\s*=\s*)(["'])(.*?)\3""", re.IGNORECASE | re.DOTALL)
+_CSS_URL_RE = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""", re.IGNORECASE)
+
+
+def _tag_attr(tag: str, name: str) -> str:
+    m = re.search(r"""\b%s\s*=\s*(["'])(.*?)\1""" % name, tag, re.IGNORECASE | re.DOTALL)
+    return m.group(2) if m else ""
+
+
+@lru_cache(maxsize=256)
+def _read_file(path: str, mtime: float, size: int) -> bytes:
+    # mtime/size are part of the cache key so edited assets are picked up.
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _file_bytes(path: str) -> bytes:
+    st = os.stat(path)
+    return _read_file(path, st.st_mtime, st.st_size)
+
+
+def _data_uri(path: str) -> str:
+    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"data:{mime};base64,{base64.b64encode(_file_bytes(path)).decode('ascii')}"
+
+
+def _local_static_path(
+    url: str,
+    *,
+    static_folder: str,
+    static_url_path: str,
+    url_roots: Iterable[str] = (),
+    base_dir: Optional[str] = None,
+) -> Optional[str]:
+    """Map a /static/... URL (relative, or absolute on this host) to a file on disk.
+
+    Returns None for anything that is not an existing file inside static_folder
+    (remote URLs, data: URIs, missing files, path traversal).
+    """
+    u = html_lib.unescape((url or "").strip())
+    if not u or u.startswith(("data:", "#", "about:", "javascript:")):
+        return None
+
+    for root in url_roots:
+        if root and u.startswith(root):
+            u = "/" + u[len(root):].lstrip("/")
+            break
+    else:
+        if u.startswith(("http://", "https://", "//")):
+            return None
+
+    u = unquote(u.split("#", 1)[0].split("?", 1)[0])
+    prefix = static_url_path.rstrip("/") + "/"
+    if u.startswith(prefix):
+        candidate = os.path.join(static_folder, u[len(prefix):])
+    elif base_dir and not u.startswith("/"):
+        candidate = os.path.join(base_dir, u)
+    else:
+        return None
+
+    root_real = os.path.realpath(static_folder)
+    path = os.path.realpath(candidate)
+    if not path.startswith(root_real + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def inline_local_assets(
+    html: str,
+    *,
+    static_folder: str,
+    static_url_path: str = "/static",
+    url_roots: Iterable[str] = (),
+) -> str:
+    """Make rendered HTML self-contained for set_content().
+
+    - <link rel="stylesheet"> pointing at /static becomes an inline <style> (with its
+      own url(...) references resolved relative to the stylesheet and inlined).
+    - src/href/url(...) pointing at /static become data: URIs.
+    Anything else (remote CDNs, page links) is left untouched.
+    """
+    roots = tuple(r for r in url_roots if r)
+    lookup = dict(static_folder=static_folder, static_url_path=static_url_path, url_roots=roots)
+
+    def _css_urls(css: str, base_dir: Optional[str]) -> str:
+        def repl(m):
+            path = _local_static_path(m.group(2), base_dir=base_dir, **lookup)
+            return f'url("{_data_uri(path)}")' if path else m.group(0)
+
+        return _CSS_URL_RE.sub(repl, css)
+
+    def link_repl(m):
+        tag = m.group(0)
+        if "stylesheet" not in _tag_attr(tag, "rel").lower():
+            return tag
+        path = _local_static_path(_tag_attr(tag, "href"), **lookup)
+        if not path:
+            return tag
+        css = _file_bytes(path).decode("utf-8", errors="replace")
+        media = _tag_attr(tag, "media")
+        media_attr = f' media="{media}"' if media else ""
+        return f"<style{media_attr}>\n{_css_urls(css, os.path.dirname(path))}\n</style>"
+
+    def attr_repl(m):
+        path = _local_static_path(m.group(4), **lookup)
+        if not path:
+            return m.group(0)
+        return f"{m.group(1)}{m.group(2)}{m.group(3)}{_data_uri(path)}{m.group(3)}"
+
+    html = _LINK_TAG_RE.sub(link_repl, html)
+    html = _ATTR_RE.sub(attr_repl, html)
+    return _css_urls(html, None)
+
+
+def local_asset_paths(
+    html: str,
+    *,
+    static_folder: str,
+    static_url_path: str = "/static",
+    url_roots: Iterable[str] = (),
+) -> List[str]:
+    """Files inline_local_assets() would embed in `html`, in order of appearance.
+
+    Only stylesheets are read (through the same mtime-keyed cache), to follow
+    their own url(...) references; images and fonts are never opened.
+    """
+    roots = tuple(r for r in url_roots if r)
+    lookup = dict(static_folder=static_folder, static_url_path=static_url_path, url_roots=roots)
+    paths: List[str] = []
+
+    def _css_paths(css: str, base_dir: Optional[str]) -> None:
+        for m in _CSS_URL_RE.finditer(css):
+            path = _local_static_path(m.group(2), base_dir=base_dir, **lookup)
+            if path:
+                paths.append(path)
+
+    for m in _LINK_TAG_RE.finditer(html):
+        tag = m.group(0)
+        if "stylesheet" not in _tag_attr(tag, "rel").lower():
+            continue
+        path = _local_static_path(_tag_attr(tag, "href"), **lookup)
+        if path:
+            paths.append(path)
+            _css_paths(_file_bytes(path).decode("utf-8", errors="replace"), os.path.dirname(path))
+    for m in _ATTR_RE.finditer(html):
+        path = _local_static_path(m.group(4), **lookup)
+        if path:
+            paths.append(path)
+    _css_paths(html, None)
+    return list(dict.fromkeys(paths))
+
+
+def _app_asset_lookup() -> Optional[Dict[str, Any]]:
+    """Static folder, URL path and request host roots of the current Flask app, if any."""
+    from flask import current_app, has_app_context, has_request_context, request
+
+    if not has_app_context() or not current_app.static_folder:
+        return None
+    roots: List[str] = []
+    if has_request_context():
+        roots = [request.url_root, request.host_url]
+    return dict(
+        static_folder=current_app.static_folder,
+        static_url_path=current_app.static_url_path or "/static",
+        url_roots=roots,
+    )
+
+
+def prepare_html_for_pdf(html: str) -> str:
+    """inline_local_assets() using the Flask app's static folder and request host.
+
+    This is exactly the document render_pdf_from_html() hands to Chromium.
+    """
+    try:
+        lookup = _app_asset_lookup()
+        if lookup is None:
+            return html
+        return inline_local_assets(html, **lookup)
+    except Exception:
+        logger.exception("[pdf] asset inlining failed; rendering HTML as-is")
+        return html
+
+
+def pdf_asset_paths(html: str) -> List[str]:
+    """local_asset_paths() for the files prepare_html_for_pdf() would inline."""
+    lookup = _app_asset_lookup()
+    if lookup is None:
+        return []
+    return local_asset_paths(html, **lookup)
+
+
+# ---- public render API ----
+
+def _submit(
+    source: Dict[str, str],
+    label: str,
+    *,
+    cookies: Optional[Iterable[Dict[str, str]]],
+    page_format: str,
+    margin: Optional[Dict[str, str]],
+    prefer_css_page_size: bool,
+    emulate_print: bool,
+    wait_until: str,
+    nav_timeout_ms: Optional[int],
+    pdf_timeout_ms: Optional[int],
+) -> bytes:
+    if _async_playwright() is None:
+        raise PdfRenderError("Playwright is not available")
+
+    nav_ms = int(nav_timeout_ms or _config_int("PDF_NAV_TIMEOUT_MS", DEFAULT_NAV_TIMEOUT_MS))
+    pdf_ms = int(pdf_timeout_ms or _config_int("PDF_RENDER_TIMEOUT_MS", DEFAULT_PDF_TIMEOUT_MS))
+    options = {
+        "cookies": list(cookies or []),
+        "page_format": page_format,
+        "margin": margin or ZERO_MARGIN,
+        "prefer_css_page_size": prefer_css_page_size,
+        "emulate_print": emulate_print,
+        "wait_until": wait_until,
+        "nav_timeout_ms": nav_ms,
+        "pdf_timeout_ms": pdf_ms,
+    }
+
+    # Queue wait + browser start + navigation + render must all fit in this budget.
+    timeout_s = (nav_ms + pdf_ms) / 1000.0 + 30.0
+
+    started = time.perf_counter()
+    try:
+        result = _get_pool().render(source, options, timeout_s)
+    except Exception as e:
+        _record(None, None, ok=False)
+        logger.exception("[pdf] render failed for %s", label)
+        raise PdfRenderError(str(e) or type(e).__name__) from e
+
+    total_ms = (time.perf_counter() - started) * 1000.0
+    _record(total_ms, result["wait_ms"], ok=True)
+    logger.info(
+        "[pdf] rendered %s in %.0f ms (wait %.0f ms, render %.0f ms, %d bytes)",
+        label,
+        total_ms,
+        result["wait_ms"],
+        result["render_ms"],
+        len(result["pdf"] or b""),
+    )
+    return result["pdf"]
+
+
+def render_pdf_from_html(
+    html: str,
+    *,
+    label: str = "html",
+    inline_assets: bool = True,
+    page_format: str = "Letter",
+    margin: Optional[Dict[str, str]] = None,
+    prefer_css_page_size: bool = False,
+    emulate_print: bool = False,
+    nav_timeout_ms: Optional[int] = None,
+    pdf_timeout_ms: Optional[int] = None,
+) -> bytes:
+    """Render already-rendered HTML to PDF bytes using the shared warm Chromium.
+
+    No HTTP round-trip into the app: local /static assets are inlined (when
+    inline_assets is true and an app context is available) and the page is loaded
+    with set_content. `label` only appears in timing logs.
+    """
+    if inline_assets:
+        html = prepare_html_for_pdf(html)
+    return _submit(
+        {"html": html},
+        label,
+        cookies=None,
+        page_format=page_format,
+        margin=margin,
+        prefer_css_page_size=prefer_css_page_size,
+        emulate_print=emulate_print,
+        wait_until="load",
+        nav_timeout_ms=nav_timeout_ms,
+        pdf_timeout_ms=pdf_timeout_ms,
+    )
+
+
+def render_pdf_from_url(
+    url: str,
+    *,
+    cookies: Optional[Iterable[Dict[str, str]]] = None,
+    page_format: str = "Letter",
+    margin: Optional[Dict[str, str]] = None,
+    prefer_css_page_size: bool = False,
+    emulate_print: bool = False,
+    wait_until: str = "networkidle",
+    nav_timeout_ms: Optional[int] = None,
+    pdf_timeout_ms: Optional[int] = None,
+) -> bytes:
+    """Render `url` to PDF bytes using the shared warm Chromium.
+
+    Safe to call concurrently from any thread; at most PDF_POOL_SIZE renders run at
+    once per process and the rest wait for a free context.
+    """
+    return _submit(
+        {"url": url},
+        url,
+        cookies=cookies,
+        page_format=page_format,
+        margin=margin,
+        prefer_css_page_size=prefer_css_page_size,
+        emulate_print=emulate_print,
+        wait_until=wait_until,
+        nav_timeout_ms=nav_timeout_ms,
+        pdf_timeout_ms=pdf_timeout_ms,
+    )
+
+
+def shutdown() -> None:
+    """Close the shared browser (tests/CLI scripts; workers just exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,590 @@
+"""Unified substring search index for the autocomplete endpoints.
+
+The face sheet, fax cover and contact autocompletes used to run
+`ILIKE '%q%'` over several columns of several tables on every keystroke,
+i.e. one sequential scan per table per keystroke. search_document keeps one
+row per searchable entity instead:
+
+  claim      claim_number, claimant_first_name, claimant_last_name (face sheet)
+  claimant   claimant_name (fax cover)
+  carrier    name, city, email, phone
+  employer   name, city, email, phone
+  provider   name, city, email, phone
+  contact    name, email, phone
+
+`search_text` is those fields lower-cased and joined by newlines, so a
+match never spans two fields. It is indexed for substring search:
+
+- Postgres: pg_trgm GIN index, used directly by `search_text LIKE '%q%'`.
+- SQLite (desktop build): an FTS5 trigram table kept in sync by triggers.
+
+Trigrams cannot serve two-character terms (the autocompletes search from the
+second keystroke), so search_gram also stores every distinct two-character
+substring of each document with the rank tier it first reaches; a
+two-character term is one index lookup on (gram, kind, tier). Single
+characters still scan the (narrow) document table.
+
+search() ranks a field starting with the term first, then a word inside a
+field starting with it, then any substring; ties by title, newest entity
+first. A term with few candidate documents is ranked in one query; common
+and two-character terms are read tier by tier, in title order, from
+search_gram, so a keystroke never sorts every match. search_entities()
+then loads the matched rows by primary key (one query per kind present).
+
+Keeping it current:
+- Flush hooks refresh the documents of every inserted, updated (searchable
+  columns only) or deleted Claim/Carrier/Employer/Provider/Contact inside the
+  same transaction; bulk Query.update()/delete() are handled in do_orm_execute.
+- Raw SQL writes bypass the hooks: run `python -m app.scripts.rebuild_search_index`.
+
+Existing databases get the text index and a backfill on first search
+(ensure_search_index(), on its own connection and transaction).
+
+NOTE: This service does not format results. Routes build their own payloads.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, bindparam, case, column, event, func, insert, literal, literal_column, or_, select, table, text
+from sqlalchemy import String
+from sqlalchemy.engine import Connection
+
+from app.extensions import db
+from app.models import Carrier, Claim, Contact, Employer, Provider, SearchDocument, SearchGram
+
+logger = logging.getLogger(__name__)
+
+# Searchable columns per document kind: (model, fields, title expression builder).
+_KIND_MODELS: Dict[str, type] = {
+    "claim": Claim,
+    "claimant": Claim,
+    "carrier": Carrier,
+    "employer": Employer,
+    "provider": Provider,
+    "contact": Contact,
+}
+_KIND_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "claim": ("claim_number", "claimant_first_name", "claimant_last_name"),
+    "claimant": ("claimant_name",),
+    "carrier": ("name", "city", "email", "phone"),
+    "employer": ("name", "city", "email", "phone"),
+    "provider": ("name", "city", "email", "phone"),
+    "contact": ("name", "email", "phone"),
+}
+KINDS: Tuple[str, ...] = tuple(_KIND_MODELS)
+
+# Kinds fed by each model (a Claim yields a claim and a claimant document).
+_MODEL_KINDS: Dict[type, Tuple[str, ...]] = {}
+for _kind, _model in _KIND_MODELS.items():
+    _MODEL_KINDS.setdefault(_model, ())
+    _MODEL_KINDS[_model] += (_kind,)
+
+# Sentinel document written once the table has been backfilled.
+BUILT_MARKER = "_built"
+
+# Shortest term the trigram indexes can serve; search_gram serves GRAM_CHARS.
+MIN_TRIGRAM_CHARS = 3
+GRAM_CHARS = 2
+
+# Terms with up to this many candidate documents are ranked by sorting them
+# all; denser terms are read in result order from search_gram.
+CANDIDATE_CAP = 500
+# search_gram rows read per requested hit before a range counts as sparse.
+WALK_ROWS_PER_HIT = 8
+# Rows counted per gram when picking a term's rarest gram in a kind.
+GRAM_COUNT_CAP = 1000
+
+_BLANKS = (" ", "\n", "\t", "\r")
+# Rank tiers: field starts with the term, a word does, substring anywhere.
+_RANK_TIERS = 3
+
+_DOC_COLUMNS = ("kind", "entity_id", "title", "search_text")
+
+# Engines (by URL) with a backfilled index, and whether SQLite has the FTS table.
+_ready_engines: Set[str] = set()
+_fts_engines: Set[str] = set()
+
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_document_fts USING fts5("
+    "search_text, content='search_document', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS search_document_fts_ai AFTER INSERT ON search_document BEGIN "
+    "INSERT INTO search_document_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS search_document_fts_ad AFTER DELETE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, search_text) "
+    "VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS search_document_fts_au AFTER UPDATE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, search_text) "
+    "VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO search_document_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+)
+
+
+# -----------------------------------------------------------------------------
+#  Document SELECTs
+# -----------------------------------------------------------------------------
+
+def _text(col: Any) -> Any:
+    return func.coalesce(col, literal("", String))
+
+
+def _document_select(kind: str, ids: Optional[Set[int]] = None) -> Any:
+    """SELECT producing the search documents of `kind` (for `ids`, or all rows)."""
+    model = _KIND_MODELS[kind]
+    fields = [getattr(model, f) for f in _KIND_FIELDS[kind]]
+
+    search_text = _text(fields[0])
+    for col in fields[1:]:
+        search_text = search_text + literal("\n", String) + _text(col)
+
+    if kind == "claim":
+        title = _text(Claim.claimant_last_name) + literal(" ", String) + _text(Claim.claimant_first_name)
+    else:
+        title = _text(fields[0])
+
+    q = select(
+        literal(kind, String).label("kind"),
+        model.id.label("entity_id"),
+        func.substr(title, 1, 255).label("title"),
+        func.lower(search_text).label("search_text"),
+    )
+    if ids is not None:
+        q = q.where(model.id.in_(ids))
+    return q
+
+
+# -----------------------------------------------------------------------------
+#  Refresh
+# -----------------------------------------------------------------------------
+
+def _gram_select(where: Any = None) -> Any:
+    """SELECT producing the search_gram rows of the documents matching `where` (all if None).
+
+    Walks every position of search_text with a recursive CTE and keeps, per
+    distinct two-character gram without whitespace, the best tier it occurs
+    at (the same tiers search() ranks by).
+    """
+    t = SearchDocument.__table__
+    base = select(
+        t.c.id, t.c.kind, t.c.entity_id, func.lower(t.c.title).label("title_key"),
+        t.c.search_text.label("s"), literal_column("1").label("i"),
+    ).where(func.length(t.c.search_text) >= GRAM_CHARS)
+    if where is not None:
+        base = base.where(where)
+    pos = base.cte("gram_pos", recursive=True)
+    pos = pos.union_all(
+        select(pos.c.id, pos.c.kind, pos.c.entity_id, pos.c.title_key, pos.c.s, pos.c.i + 1).where(
+            pos.c.i < func.length(pos.c.s) - 1
+        )
+    )
+
+    prev = func.substr(pos.c.s, pos.c.i - 1, 1)
+    grams = (
+        select(
+            pos.c.id, pos.c.kind, pos.c.entity_id, pos.c.title_key,
+            func.substr(pos.c.s, pos.c.i, GRAM_CHARS).label("gram"),
+            case((or_(pos.c.i == 1, prev == "\n"), 0), (prev == " ", 1), else_=2).label("tier"),
+        )
+        .where(
+            func.substr(pos.c.s, pos.c.i, 1).not_in(_BLANKS),
+            func.substr(pos.c.s, pos.c.i + 1, 1).not_in(_BLANKS),
+        )
+        .subquery()
+    )
+    keys = (grams.c.id, grams.c.gram, grams.c.kind, grams.c.entity_id, grams.c.title_key)
+    return select(*keys, func.min(grams.c.tier)).group_by(*keys)
+
+
+def _insert_grams(conn: Connection, where: Any = None) -> None:
+    conn.execute(
+        insert(SearchGram.__table__).from_select(
+            ["document_id", "gram", "kind", "entity_id", "title_key", "tier"], _gram_select(where)
+        )
+    )
+
+
+def refresh_documents(conn: Connection, kind: str, ids: Optional[Iterable[int]] = None) -> None:
+    """Recompute the documents of `kind` for `ids` (None = every row) on `conn`.
+
+    Runs in the caller's transaction; the source rows must already be flushed.
+    """
+    id_set = None if ids is None else {int(i) for i in ids}
+    if id_set is not None and not id_set:
+        return
+    t = SearchDocument.__table__
+    g = SearchGram.__table__
+
+    docs = t.c.kind == kind
+    if id_set is not None:
+        docs = and_(docs, t.c.entity_id.in_(id_set))
+    conn.execute(g.delete().where(g.c.document_id.in_(select(t.c.id).where(docs))))
+    conn.execute(t.delete().where(docs))
+    conn.execute(insert(t).from_select(list(_DOC_COLUMNS), _document_select(kind, id_set)))
+    _insert_grams(conn, docs)
+
+
+def _ensure_text_index(conn: Connection) -> None:
+    """Create the dialect's substring index if it is missing (best-effort)."""
+    url = str(conn.engine.url)
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_search_document_text_trgm "
+                    "ON search_document USING gin (search_text gin_trgm_ops)"
+                ))
+        except Exception:
+            logger.warning("[search] pg_trgm unavailable; autocomplete will scan search_document", exc_info=True)
+    elif dialect == "sqlite":
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_document_fts'")
+        ).first()
+        try:
+            with conn.begin_nested():
+                for ddl in _SQLITE_FTS_DDL:
+                    conn.execute(text(ddl))
+                if not existed:
+                    # Index whatever documents are already stored.
+                    conn.execute(text("INSERT INTO search_document_fts(search_document_fts) VALUES ('rebuild')"))
+            _fts_engines.add(url)
+        except Exception:
+            logger.warning("[search] FTS5 trigram unavailable; autocomplete will scan search_document", exc_info=True)
+
+
+def rebuild_search_index(conn: Optional[Connection] = None) -> None:
+    """Rebuild every search document from the source tables and mark the index as built."""
+    if conn is None:
+        with db.engine.begin() as own:
+            rebuild_search_index(own)
+        return
+
+    _ensure_text_index(conn)
+    t = SearchDocument.__table__
+    conn.execute(SearchGram.__table__.delete())
+    conn.execute(t.delete())
+    for kind in KINDS:
+        conn.execute(insert(t).from_select(list(_DOC_COLUMNS), _document_select(kind)))
+    _insert_grams(conn)
+    conn.execute(insert(t).values(kind=BUILT_MARKER, entity_id=0, title="", search_text=""))
+    _ready_engines.add(str(conn.engine.url))
+
+
+def ensure_search_index() -> None:
+    """Create the text index and backfill documents on first use.
+
+    Runs on its own connection and transaction, so nothing pending in the
+    request's session is committed along with it.
+    """
+    url = str(db.engine.url)
+    if url in _ready_engines:
+        return
+    with db.engine.begin() as conn:
+        _ensure_text_index(conn)
+        built = conn.execute(
+            select(SearchDocument.id).where(SearchDocument.kind == BUILT_MARKER).limit(1)
+        ).first()
+        if built is None:
+            logger.info("[search] backfilling search_document")
+            rebuild_search_index(conn)
+    _ready_engines.add(url)
+
+
+# -----------------------------------------------------------------------------
+#  Search
+# -----------------------------------------------------------------------------
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search(term: str, kinds: Sequence[str], limit: int = 25) -> List[Tuple[str, int]]:
+    """(kind, entity_id) of the best `limit` documents of `kinds` containing `term`."""
+    term = (term or "").strip().lower()
+    if not term or not kinds:
+        return []
+    ensure_search_index()
+
+    kinds = list(kinds)
+    doc = SearchDocument
+    esc = _like_escape(term)
+    rank = _rank(doc.search_text, esc)
+    title_order = (func.lower(doc.title), doc.entity_id.desc())
+    q = select(doc.kind, doc.entity_id).where(doc.kind.in_(kinds))
+
+    if len(term) < GRAM_CHARS:
+        rows = db.session.execute(
+            q.where(doc.search_text.like(f"%{esc}%", escape="\\")).order_by(rank, *title_order).limit(limit)
+        ).all()
+        return [(kind, int(entity_id)) for kind, entity_id in rows]
+
+    if len(term) >= MIN_TRIGRAM_CHARS:
+        # Candidate ids straight from the substring index (FTS has no kind
+        # column; kinds are filtered below). Fetching ids first keeps SQLite from
+        # driving the query from a kind index instead of the match.
+        if db.engine.dialect.name == "sqlite" and str(db.engine.url) in _fts_engines:
+            phrase = '"' + term.replace('"', '""') + '"'
+            fts = table("search_document_fts", column("rowid"))
+            candidates = select(fts.c.rowid).where(text("search_document_fts MATCH :phrase").bindparams(phrase=phrase))
+        else:
+            candidates = select(doc.id).where(doc.kind.in_(kinds), doc.search_text.like(f"%{esc}%", escape="\\"))
+        ids = db.session.execute(candidates.limit(CANDIDATE_CAP + 1)).scalars().all()
+        if len(ids) <= CANDIDATE_CAP:
+            # Ranked here rather than in SQL: with a kind filter SQLite walks the
+            # kind index instead of looking the ids up.
+            rows = db.session.execute(
+                select(doc.kind, doc.entity_id, rank, func.lower(doc.title)).where(doc.id.in_(ids))
+            ).all()
+            ranked = sorted(
+                (r, title_key or "", -int(entity_id), kind)
+                for kind, entity_id, r, title_key in rows
+                if kind in kinds
+            )
+            return [(kind, -neg_id) for _, _, neg_id, kind in ranked[:limit]]
+
+    # Two-character or very common term: take the best `limit` of each
+    # (tier, kind) in title order from search_gram, best tier first, and merge.
+    # Once a tier has enough hits, later kinds only need titles up to the
+    # last one that still makes the cut.
+    walk = _GramWalk(term, limit)
+    hits: List[Tuple[int, str, int, str]] = []
+    for tier in range(_RANK_TIERS):
+        need = limit - len(hits)
+        tier_hits: List[Tuple[int, str, int, str]] = []
+        for kind in kinds:
+            cutoff = None
+            if len(tier_hits) >= need:
+                tier_hits.sort()
+                cutoff = tier_hits[need - 1][1]
+            rows = walk.hits(kind, tier, cutoff)
+            if rows is None:
+                rows = db.session.execute(
+                    select(doc.entity_id, func.lower(doc.title))
+                    .where(doc.kind == kind, rank == tier, doc.id.in_(candidates))
+                    .order_by(*title_order)
+                    .limit(limit)
+                ).all()
+            tier_hits.extend((tier, title_key or "", -int(entity_id), kind) for entity_id, title_key in rows)
+        hits.extend(tier_hits)
+        if len(hits) >= limit:
+            break  # later tiers rank below every hit so far
+    hits.sort()
+    return [(kind, -neg_id) for _, _, neg_id, kind in hits[:limit]]
+
+
+def _rank(search_text: Any, esc: str, matches_only: bool = False) -> Any:
+    """The rank tier of `search_text` as one CASE (each LIKE runs at most once);
+    NULL instead of 2 for non-matches if `matches_only`."""
+    starts = or_(search_text.like(f"{esc}%", escape="\\"), search_text.like(f"%\n{esc}%", escape="\\"))
+    word = search_text.like(f"% {esc}%", escape="\\")
+    if not matches_only:
+        return case((starts, 0), (word, 1), else_=2)
+    return case((starts, 0), (word, 1), (search_text.like(f"%{esc}%", escape="\\"), 2), else_=None)
+
+
+class _GramWalk:
+    """Per-tier hits of one search() term, read from search_gram.
+
+    A two-character term is one range of the lookup index per (kind, tier). A
+    longer term only reaches a tier in documents whose search_gram row for its
+    first gram has that tier or better; the start of each such range is read in
+    title order and ranked against the term (once per call, shared by all
+    tiers). If that is inconclusive, the ranges of the term's rarest gram in
+    the kind are read the same way instead, keeping rows that reach the tier;
+    they never hold more than the kind's documents. Statements are built once
+    and run per kind.
+    """
+
+    def __init__(self, term: str, limit: int) -> None:
+        self.term = term
+        self.limit = limit
+        self.window_rows = limit * WALK_ROWS_PER_HIT
+        self._walks: Dict[Tuple[str, int, Optional[str]], Tuple[bool, List[Any]]] = {}  # -> (range ended, rows)
+        self._rarest: Dict[str, Optional[str]] = {}
+        self._rank = _rank(SearchDocument.search_text, _like_escape(term), matches_only=True)
+        self._statements: Dict[Tuple[str, bool], Any] = {}
+
+    def _statement(self, name: str, bounded: bool) -> Any:
+        """SELECT `name` over one (gram, kind) range of search_gram, built on first
+        use; `bounded` adds `title_key <= :cutoff`."""
+        key = (name, bounded)
+        if key in self._statements:
+            return self._statements[key]
+        g = SearchGram
+        key_order = (g.title_key, g.entity_id.desc())
+        in_range = [g.gram == bindparam("gram"), g.kind == bindparam("kind")]
+        if bounded:
+            in_range.append(g.title_key <= bindparam("cutoff"))
+        if name == "range":
+            stmt = select(g.entity_id, g.title_key).where(*in_range, g.tier == bindparam("tier"))
+            stmt = stmt.order_by(*key_order).limit(self.limit)
+        elif name == "window":
+            window = (
+                select(g.document_id, g.entity_id, g.title_key)
+                .where(*in_range, g.tier == bindparam("tier"))
+                .order_by(*key_order)
+                .limit(bindparam("rows"))
+                .offset(bindparam("skip"))
+                .subquery()
+            )
+            stmt = select(window.c.entity_id, window.c.title_key, self._rank).join(
+                SearchDocument, SearchDocument.id == window.c.document_id
+            )
+        elif name == "count":
+            stmt = select(func.count()).select_from(
+                select(g.entity_id).where(*in_range).limit(GRAM_COUNT_CAP).subquery()
+            )
+        else:
+            stmt = (
+                select(g.entity_id, g.title_key)
+                .join(SearchDocument, SearchDocument.id == g.document_id)
+                .where(*in_range, g.tier == bindparam("gram_tier"), self._rank == bindparam("tier"))
+                .order_by(*key_order)
+                .limit(self.limit)
+            )
+        self._statements[key] = stmt
+        return stmt
+
+    def _run(self, name: str, cutoff: Optional[str], **params: Any) -> List[Any]:
+        if cutoff is not None:
+            params["cutoff"] = cutoff
+        return db.session.execute(self._statement(name, cutoff is not None), params).all()
+
+    def hits(self, kind: str, tier: int, cutoff: Optional[str] = None) -> Optional[List[Tuple[int, str]]]:
+        """(entity_id, title_key) of the first `limit` documents of `kind` in rank
+        `tier` (with title_key <= `cutoff`, if given), in title order; None if
+        search_gram can't answer (every gram of the term contains whitespace)."""
+        gram = self.term[:GRAM_CHARS]
+        if len(self.term) == GRAM_CHARS:
+            return self._run("range", cutoff, gram=gram, kind=kind, tier=tier)
+
+        found: List[Tuple[int, str]] = []
+        for gram_tier in range(tier + 1):
+            if any(c in _BLANKS for c in gram):
+                break  # search_gram has no rows for it
+            key = (kind, gram_tier, cutoff)
+            ended, rows = self._walks.get(key, (False, []))
+            in_tier = [(entity_id, title_key) for entity_id, title_key, r in rows if r == tier]
+            while not ended and len(in_tier) < self.limit and len(rows) < self.window_rows:
+                # A short first read settles dense terms; sparser ones read on.
+                size = self.limit * 2 if not rows else self.window_rows - len(rows)
+                more = self._run("window", cutoff, gram=gram, kind=kind, tier=gram_tier, rows=size, skip=len(rows))
+                ended = len(more) < size
+                rows = rows + more
+                in_tier += [(entity_id, title_key) for entity_id, title_key, r in more if r == tier]
+            self._walks[key] = (ended, rows)
+            if not ended and len(in_tier) < self.limit:
+                break  # the rest of the range may hold better matches
+            found.extend(in_tier)
+        else:
+            found.sort(key=lambda r: (r[1], -r[0]))
+            return found[:self.limit]
+
+        if kind not in self._rarest:
+            self._rarest[kind] = self._rarest_gram(kind)
+        rarest = self._rarest[kind]
+        if rarest is None:
+            return None
+        found = []
+        for gram_tier in range(_RANK_TIERS):
+            found += self._run("matches", cutoff, gram=rarest, kind=kind, gram_tier=gram_tier, tier=tier)
+        found.sort(key=lambda r: (r[1], -r[0]))
+        return found[:self.limit]
+
+    def _rarest_gram(self, kind: str) -> Optional[str]:
+        """The term's gram with the fewest search_gram rows in `kind` (every
+        document of `kind` containing the term has it); None if all its grams
+        contain whitespace."""
+        best, best_count = None, GRAM_COUNT_CAP + 1
+        for gram in sorted({self.term[i:i + GRAM_CHARS] for i in range(len(self.term) - 1)}):
+            if any(c in _BLANKS for c in gram):
+                continue
+            count = self._run("count", None, gram=gram, kind=kind)[0][0]
+            if count < best_count:
+                best, best_count = gram, count
+            if not count:
+                break
+        return best
+
+
+def search_entities(term: str, kinds: Sequence[str], limit: int = 25) -> List[Tuple[str, Any]]:
+    """search() hits as (kind, model instance), in rank order."""
+    hits = search(term, kinds, limit)
+    by_kind: Dict[str, Set[int]] = {}
+    for kind, entity_id in hits:
+        by_kind.setdefault(kind, set()).add(entity_id)
+
+    loaded: Dict[Tuple[str, int], Any] = {}
+    for kind, ids in by_kind.items():
+        model = _KIND_MODELS[kind]
+        for obj in model.query.filter(model.id.in_(ids)).all():
+            loaded[(kind, obj.id)] = obj
+    return [(kind, loaded[(kind, entity_id)]) for kind, entity_id in hits if (kind, entity_id) in loaded]
+
+
+# -----------------------------------------------------------------------------
+#  Session hooks
+# -----------------------------------------------------------------------------
+
+def _changed_ids(session: Any) -> Dict[str, Set[int]]:
+    """Ids whose documents need refreshing, by kind, for the objects just flushed."""
+    from sqlalchemy import inspect as sa_inspect
+
+    ids: Dict[str, Set[int]] = {}
+    for collection in (session.new, session.dirty, session.deleted):
+        for obj in collection:
+            kinds = _MODEL_KINDS.get(type(obj))
+            if not kinds:
+                continue
+            state = sa_inspect(obj)
+            entity_id = state.identity[0] if state.identity else getattr(obj, "id", None)
+            if entity_id is None:
+                continue
+            for kind in kinds:
+                if obj in session.dirty and not state.deleted and not any(
+                    state.attrs[f].history.has_changes() for f in _KIND_FIELDS[kind]
+                ):
+                    continue
+                ids.setdefault(kind, set()).add(entity_id)
+    return ids
+
+
+def _after_flush(session: Any, flush_context: Any) -> None:
+    changed = _changed_ids(session)
+    if not changed:
+        return
+    conn = session.connection()
+    for kind, ids in changed.items():
+        refresh_documents(conn, kind, ids)
+
+
+def _do_orm_execute(orm_execute_state: Any) -> Any:
+    """Refresh the documents touched by bulk Query.update()/delete() on indexed models."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    kinds = _MODEL_KINDS.get(model)
+    if not kinds:
+        return None
+
+    conn = orm_execute_state.session.connection()
+    q = select(model.id)
+    where = orm_execute_state.statement.whereclause
+    if where is not None:
+        q = q.where(where)
+    ids = {row[0] for row in conn.execute(q)}
+    result = orm_execute_state.invoke_statement()
+    for kind in kinds:
+        refresh_documents(conn, kind, ids)
+    return result
+
+
+def register_search_hooks() -> None:
+    """Attach the search index maintenance hooks to the app's session (idempotent)."""
+    for name, fn in (("after_flush", _after_flush), ("do_orm_execute", _do_orm_execute)):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
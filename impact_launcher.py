@@ -4,6 +4,8 @@ import webbrowser
 from threading import Timer
 
 from app import create_app
+from app.ai.llm import start_llm_warmup
+from app.services.omnibox import start_omnibox_warmup
 
 
 def run_flask():
@@ -17,6 +19,8 @@ def run_flask():
     - tries to open the browser automatically once the server is starting up
     """
     app = create_app()
+    start_llm_warmup()  # background probe + model warmup; returns immediately
+    start_omnibox_warmup(app)  # background search index build; returns immediately
 
     host = os.environ.get("IMPACTCMS_HOST", "127.0.0.1")
     port_str = os.environ.get("IMPACTCMS_PORT", "5000")
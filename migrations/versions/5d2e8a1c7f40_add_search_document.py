@@ -0,0 +1,76 @@
+"""Add search_document table with substring search indexes
+
+Revision ID: 5d2e8a1c7f40
+Revises: e4a9f3b2c815
+Create Date: 2026-10-16 16:02:37.918254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a1c7f40'
+down_revision: Union[str, Sequence[str], None] = 'e4a9f3b2c815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The table starts empty; the app backfills it on first search (or run
+    `python -m app.scripts.rebuild_search_index`).
+    """
+    op.create_table(
+        'search_document',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('search_text', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'entity_id', name='uq_search_document_kind_entity'),
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            'CREATE INDEX ix_search_document_text_trgm ON search_document '
+            'USING gin (search_text gin_trgm_ops)'
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE search_document_fts USING fts5("
+            "search_text, content='search_document', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER search_document_fts_ai AFTER INSERT ON search_document BEGIN "
+            "INSERT INTO search_document_fts(rowid, search_text) VALUES (new.id, new.search_text); END"
+        )
+        op.execute(
+            "CREATE TRIGGER search_document_fts_ad AFTER DELETE ON search_document BEGIN "
+            "INSERT INTO search_document_fts(search_document_fts, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); END"
+        )
+        op.execute(
+            "CREATE TRIGGER search_document_fts_au AFTER UPDATE ON search_document BEGIN "
+            "INSERT INTO search_document_fts(search_document_fts, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); "
+            "INSERT INTO search_document_fts(rowid, search_text) VALUES (new.id, new.search_text); END"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_search_document_text_trgm')
+    elif dialect == 'sqlite':
+        for trigger in ('search_document_fts_ai', 'search_document_fts_ad', 'search_document_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS search_document_fts')
+    op.drop_table('search_document')
@@ -0,0 +1,28 @@
+"""Add background_job.progress
+
+Revision ID: 8c41d2e6f9a7
+Revises: 5f2c9e1b7a30
+Create Date: 2026-10-16 13:02:17.540921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2e6f9a7'
+down_revision: Union[str, Sequence[str], None] = '5f2c9e1b7a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('background_job', sa.Column('progress', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('background_job', 'progress')
@@ -0,0 +1,50 @@
+"""Add search_gram table for two-character autocomplete terms
+
+Revision ID: 9b4e1f6a2d37
+Revises: c6d2a8e4f193
+Create Date: 2026-10-16 22:41:09.530172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e1f6a2d37'
+down_revision: Union[str, Sequence[str], None] = 'c6d2a8e4f193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The table starts empty. Dropping the search index's built marker makes the
+    app rebuild search_document and search_gram on first search (or run
+    `python -m app.scripts.rebuild_search_index`).
+    """
+    op.create_table(
+        'search_gram',
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('gram', sa.String(length=2), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('title_key', sa.String(length=255), nullable=False),
+        sa.Column('tier', sa.SmallInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['search_document.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('document_id', 'gram'),
+    )
+    op.create_index(
+        'ix_search_gram_lookup',
+        'search_gram',
+        ['gram', 'kind', 'tier', 'title_key', sa.text('entity_id DESC'), 'document_id'],
+    )
+    op.execute("DELETE FROM search_document WHERE kind = '_built'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_search_gram_lookup', table_name='search_gram')
+    op.drop_table('search_gram')
@@ -0,0 +1,33 @@
+"""Add invoice_number_counter table
+
+Revision ID: a3f7c9d1e2b6
+Revises: 5d2e8a1c7f40
+Create Date: 2026-10-16 17:12:05.441930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f7c9d1e2b6'
+down_revision: Union[str, Sequence[str], None] = '5d2e8a1c7f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'invoice_number_counter',
+        sa.Column('prefix', sa.String(length=40), nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('prefix'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('invoice_number_counter')
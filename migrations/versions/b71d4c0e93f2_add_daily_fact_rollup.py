@@ -0,0 +1,45 @@
+"""Add daily_fact_rollup table
+
+Revision ID: b71d4c0e93f2
+Revises: 8c41d2e6f9a7
+Create Date: 2026-10-16 14:05:12.530417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d4c0e93f2'
+down_revision: Union[str, Sequence[str], None] = '8c41d2e6f9a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The table starts empty; the app backfills it from billables, invoices and
+    claims on first use (or run `python -m app.scripts.rebuild_rollups`).
+    """
+    op.create_table(
+        'daily_fact_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fact', sa.String(length=20), nullable=False),
+        sa.Column('day', sa.Date(), nullable=True),
+        sa.Column('key', sa.String(length=50), nullable=True),
+        sa.Column('flag', sa.Boolean(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_daily_fact_rollup_fact_day', 'daily_fact_rollup', ['fact', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_fact_rollup_fact_day', table_name='daily_fact_rollup')
+    op.drop_table('daily_fact_rollup')
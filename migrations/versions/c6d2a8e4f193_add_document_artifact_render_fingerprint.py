@@ -0,0 +1,35 @@
+"""Add document_artifact.render_fingerprint
+
+Revision ID: c6d2a8e4f193
+Revises: a3f7c9d1e2b6
+Create Date: 2026-10-16 21:04:37.218604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6d2a8e4f193'
+down_revision: Union[str, Sequence[str], None] = 'a3f7c9d1e2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('document_artifact', sa.Column('render_fingerprint', sa.String(length=64), nullable=True))
+    # The PDF cache briefly stored its render-input fingerprint in sha256 (nothing
+    # else ever wrote sha256); move it so sha256 only means the file's hash.
+    op.execute(
+        "UPDATE document_artifact SET render_fingerprint = sha256, sha256 = NULL "
+        "WHERE sha256 IS NOT NULL AND storage_backend = 'fs' "
+        "AND artifact_type IN ('report_pdf', 'invoice_pdf')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('document_artifact', 'render_fingerprint')
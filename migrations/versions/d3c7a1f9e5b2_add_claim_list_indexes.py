@@ -0,0 +1,49 @@
+"""Add claims list order index and per-claim foreign-key indexes
+
+Revision ID: d3c7a1f9e5b2
+Revises: 9b4e1f6a2d37
+Create Date: 2026-10-16 23:38:12.615230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3c7a1f9e5b2'
+down_revision: Union[str, Sequence[str], None] = '9b4e1f6a2d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    ix_claim_list_order serves the claims list's keyset order. The claim_id /
+    invoice_id indexes let the per-page dormancy and billing queries look up
+    one page of claims instead of scanning every report, billable, invoice and
+    document.
+    """
+    op.create_index(
+        'ix_claim_list_order',
+        'claim',
+        ['claimant_last_name', 'claimant_first_name', 'id'],
+        unique=False,
+    )
+    op.create_index(op.f('ix_report_claim_id'), 'report', ['claim_id'], unique=False)
+    op.create_index(op.f('ix_billable_item_claim_id'), 'billable_item', ['claim_id'], unique=False)
+    op.create_index(op.f('ix_billable_item_invoice_id'), 'billable_item', ['invoice_id'], unique=False)
+    op.create_index(op.f('ix_invoice_claim_id'), 'invoice', ['claim_id'], unique=False)
+    op.create_index(op.f('ix_claim_document_claim_id'), 'claim_document', ['claim_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_claim_document_claim_id'), table_name='claim_document')
+    op.drop_index(op.f('ix_invoice_claim_id'), table_name='invoice')
+    op.drop_index(op.f('ix_billable_item_invoice_id'), table_name='billable_item')
+    op.drop_index(op.f('ix_billable_item_claim_id'), table_name='billable_item')
+    op.drop_index(op.f('ix_report_claim_id'), table_name='report')
+    op.drop_index('ix_claim_list_order', table_name='claim')
@@ -1,7 +1,15 @@
 from app import create_app
+from app.ai.llm import start_llm_warmup
+from app.services.omnibox import start_omnibox_warmup
 
 app = create_app()
 app.config["LOAD_TEST_DATA"] = True
 
+# Probe and warm the local LLM in the background; the first Clarity request
+# then already knows whether the backend is up. Build the omnibox search
+# index the same way so the first search doesn't pay for it.
+start_llm_warmup()
+start_omnibox_warmup(app)
+
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5001, debug=True)